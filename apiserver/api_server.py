@@ -130,7 +130,8 @@ from nagaagent_core.api import FastAPI, HTTPException, Request, UploadFile, File
 from nagaagent_core.api import CORSMiddleware
 from nagaagent_core.api import StreamingResponse
 from nagaagent_core.api import StaticFiles
-from nagaagent_core.api import HTMLResponse
+from nagaagent_core.api import HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from nagaagent_core.core import aiohttp
 import shutil
@@ -142,7 +143,10 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # 流式文本处理模块（仅用于TTS）
 from .message_manager import message_manager  # 导入统一的消息管理器
 
-from .llm_service import get_llm_service  # 导入LLM服务
+from .llm_service import get_llm_service, close_llm_service, LLMStreamError  # 导入LLM服务
+from .sse import ChatStreamEncoder, coalesce_deltas  # 流式输出帧编码
+from .tool_dispatcher import get_tool_dispatcher  # 导入MCP工具调度器
+from .tts_service import get_tts_service, close_tts_service, TTSServiceBusy, JOB_DONE, JOB_FAILED  # 异步TTS服务
 
 # 导入配置系统
 try:
@@ -180,6 +184,38 @@ def _save_conversation_and_logs(session_id: str, user_message: str, assistant_re
     message_manager.save_conversation_and_logs(session_id, user_message, assistant_response)
 
 
+def _submit_tts_job(text: str, play_on_ui: bool):
+    """提交异步TTS任务；play_on_ui 时合成完成后交给电脑端播放。排队已满返回None"""
+    on_done = None
+    if play_on_ui:
+        def on_done(job):
+            from voice.output.voice_integration import get_voice_integration
+            get_voice_integration().receive_audio_url(job.audio_path)
+            logger.info(f"[API Server] TTS任务 {job.id} 音频已发送到UI端")
+    try:
+        job = get_tts_service().submit(text, on_done=on_done)
+    except TTSServiceBusy as e:
+        logger.warning(f"[API Server] {e}，跳过音频生成")
+        return None
+    logger.info(f"[API Server] 已提交TTS任务 {job.id}，文本长度: {len(text)}")
+    return job
+
+
+async def _tts_job_frames(encoder: ChatStreamEncoder, job, audio_delivery: str) -> AsyncGenerator[str, None]:
+    """文本流结束后下发音频：job 模式立即下发任务ID；inline 模式在事件循环中等待合成完成后下发本地路径"""
+    if job is None:
+        return
+    if audio_delivery == "job":
+        yield encoder.tts_job(job.id)
+        return
+    job = await get_tts_service().wait(job.id, config.api_server.tts_audio_wait_s)
+    if job.status == JOB_DONE:
+        yield encoder.audio_url(job.audio_path)
+        logger.info(f"[API Server] 音频URL已返回给客户端: {job.audio_path}, 大小: {job.audio_size} bytes")
+    else:
+        logger.warning(f"[API Server] TTS任务 {job.id} 未完成（{job.status}），不返回音频")
+
+
 # 回调工厂类已移除 - 功能已整合到streaming_tool_extractor
 
 
@@ -197,7 +233,10 @@ async def lifespan(app: FastAPI):
         sys.exit(1)
     finally:
         print("[INFO] 正在清理资源...")
-        # MCP服务现在由mcpserver独立管理，无需清理
+        # MCP服务现在由mcpserver独立管理，只需关闭到MCP服务器的连接池
+        await get_tool_dispatcher().aclose()
+        await close_llm_service()
+        await close_tts_service()
 
 
 # 创建FastAPI应用
@@ -227,6 +266,9 @@ class ChatRequest(BaseModel):
     return_audio: bool = False  # V19: 支持返回音频URL供客户端播放
     skip_intent_analysis: bool = False  # 新增：跳过意图分析
     chat_context: Optional[dict] = None  # 新增：聊天上下文（群聊/私聊信息）
+    stream_format: str = "base64"  # /chat/stream 帧格式：base64（旧客户端）或 text（UTF-8 JSON 事件，合并细碎增量）
+    stream_flush_ms: Optional[int] = None  # text格式的增量合并间隔，默认取配置 api_server.stream_flush_ms
+    audio_delivery: str = "inline"  # return_audio的音频下发方式：inline（文本结束后等待音频，下发本地路径）或 job（立即下发TTS任务ID，客户端自行获取）
 
 
 class ChatResponse(BaseModel):
@@ -442,6 +484,8 @@ async def chat_stream(request: ChatRequest):
     if not request.message.strip():
         raise HTTPException(status_code=400, detail="消息内容不能为空")
 
+    encoder = ChatStreamEncoder(request.stream_format)
+
     async def generate_response() -> AsyncGenerator[str, None]:
         complete_text = ""  # V19: 用于累积完整文本以生成音频
         # 创建任务列表，用于等待所有文本块处理完成
@@ -464,51 +508,23 @@ async def chat_stream(request: ChatRequest):
 
                         # 创建会话ID并保存对话
                         session_id = message_manager.create_session(request.session_id)
-                        yield f"data: session_id: {session_id}\n\n"
+                        yield encoder.session(session_id)
 
                         # 返回任务响应
                         response_text = result["response"]
 
-                        # 流式输出任务响应
-                        import base64
-                        for i in range(0, len(response_text), 5):
-                            chunk = response_text[i:i+5]
-                            b64 = base64.b64encode(chunk.encode('utf-8')).decode('ascii')
-                            yield f"data: {b64}\n\n"
+                        # 流式输出任务响应：text格式整段发送，旧格式保持5字一帧
+                        if encoder.is_text:
+                            yield encoder.delta(response_text)
+                        else:
+                            for i in range(0, len(response_text), 5):
+                                yield encoder.delta(response_text[i:i+5])
 
-                        # 如果需要返回音频，生成音频
+                        # 如果需要返回音频，提交异步合成任务（合成完成后播放给UI端）
+                        tts_job = None
                         if request.return_audio:
-                            try:
-                                logger.info(f"[API Server V19] 任务响应生成音频，文本长度: {len(response_text)}")
-
-                                from voice.output.voice_integration import VoiceIntegration
-                                voice_integration = VoiceIntegration()
-                                audio_data = voice_integration._generate_audio_sync(response_text)
-
-                                if audio_data:
-                                    import uuid
-                                    temp_dir = "logs/audio_temp"
-                                    os.makedirs(temp_dir, exist_ok=True)
-                                    audio_file = os.path.join(temp_dir, f"tts_{uuid.uuid4().hex}.mp3")
-
-                                    with open(audio_file, "wb") as f:
-                                        f.write(audio_data)
-
-                                    logger.info(f"[API Server V19] 任务音频生成成功: {audio_file}")
-                                    yield f"data: audio_url: {audio_file}\n\n"
-
-                                    # 播放给UI端
-                                    is_qq_message = session_id and session_id.startswith('qq_')
-                                    is_tool_callback = request.skip_intent_analysis or ("[工具结果]" in response_text)
-                                    if not is_tool_callback:
-                                        try:
-                                            voice_integration.receive_audio_url(audio_file)
-                                            ui_location = "电脑端和QQ端都播放" if is_qq_message else "UI端播放"
-                                            logger.info(f"[API Server V19] 任务音频已发送到{ui_location}")
-                                        except Exception as e:
-                                            logger.error(f"[API Server V19] UI端音频播放失败: {e}")
-                            except Exception as e:
-                                logger.error(f"[API Server V19] 任务音频生成失败: {e}")
+                            is_tool_callback = request.skip_intent_analysis or ("[工具结果]" in response_text)
+                            tts_job = _submit_tts_job(response_text, play_on_ui=not is_tool_callback)
 
                         # 保存对话历史
                         _save_conversation_and_logs(session_id, request.message, response_text)
@@ -517,7 +533,9 @@ async def chat_stream(request: ChatRequest):
                         if not request.skip_intent_analysis:
                             _trigger_background_analysis(session_id)
 
-                        yield "data: [DONE]\n\n"
+                        async for frame in _tts_job_frames(encoder, tts_job, request.audio_delivery):
+                            yield frame
+                        yield encoder.done()
                         return
                 except Exception as e:
                     logger.warning(f"[任务调度] 流式任务检查失败: {e}")
@@ -529,7 +547,7 @@ async def chat_stream(request: ChatRequest):
             session_id = message_manager.create_session(request.session_id)
 
             # 发送会话ID信息
-            yield f"data: session_id: {session_id}\n\n"
+            yield encoder.session(session_id)
 
             # 注意：这里不触发后台分析，将在对话保存后触发
 
@@ -551,31 +569,40 @@ async def chat_stream(request: ChatRequest):
 
             # V19: 混合模式下，如果请求return_audio，则在服务器生成音频
             # 修复：非流式模式也需要启用TTS，通过receive_final_text接收完整文本
-            # 修改：QQ消息也启用TTS，让电脑端和QQ端都能播放语音
+            # 服务器端逐句TTS（在API服务器进程中直接播放）默认关闭，由 api_server.stream_sentence_tts 开启；
+            # 请求return_audio时整段音频由_submit_tts_job合成（QQ消息也由它播放给电脑端），
+            # 不再逐句播放，否则同一回复会播两遍；QQ消息也不打断电脑端正在播放的语音
             should_enable_tts = (
-                config.system.voice_enabled
+                config.api_server.stream_sentence_tts
+                and config.system.voice_enabled
                 and config.voice_realtime.voice_mode != "hybrid"
                 and not request.disable_tts  # 兼容旧版本的disable_tts
+                and not request.return_audio
+                and not is_qq_message
             )
 
             if should_enable_tts:
-                if is_qq_message:
-                    logger.info("[API Server] QQ消息，启用TTS处理（电脑端+QQ端都播放）")
-            elif should_enable_tts:
                 try:
                     from voice.output.voice_integration import get_voice_integration
 
                     voice_integration = get_voice_integration()
+                    if request.stream:
+                        # 新一轮对话打断上一轮尚未播放的语音
+                        voice_integration.reset_processing_state()
                     logger.info(
                         f"[API Server] 语音集成已启用 (stream={request.stream}, return_audio={request.return_audio}, voice_mode={config.voice_realtime.voice_mode})"
                     )
                 except Exception as e:
                     print(f"语音集成初始化失败: {e}")
             else:
-                if config.voice_realtime.voice_mode == "hybrid":
+                if not config.api_server.stream_sentence_tts:
+                    logger.debug("[API Server] 服务器端逐句TTS未开启 (api_server.stream_sentence_tts=False)")
+                elif config.voice_realtime.voice_mode == "hybrid":
                     logger.info("[API Server] 混合模式，不处理TTS")
                 elif request.disable_tts:
                     logger.info("[API Server] 客户端禁用了TTS (disable_tts=True)")
+                elif request.return_audio or is_qq_message:
+                    logger.info("[API Server] 请求返回整段音频或QQ消息，不做逐句TTS")
                 elif not config.system.voice_enabled:
                     logger.info("[API Server] 语音功能未启用")
 
@@ -595,94 +622,41 @@ async def chat_stream(request: ChatRequest):
             except Exception as e:
                 print(f"流式文本切割器初始化失败: {e}")
 
-            # 使用整合后的流式处理
+            # 使用整合后的流式处理：LLM服务产出原始文本增量，按协商的格式编码输出
             llm_service = get_llm_service()
-            async for chunk in llm_service.stream_chat_with_context(messages, config.api.temperature):
-                # V19: 如果需要返回音频，累积文本
-                if request.return_audio and chunk.startswith("data: "):
-                    try:
-                        import base64
-
-                        data_str = chunk[6:].strip()
-                        if data_str != "[DONE]":
-                            decoded = base64.b64decode(data_str).decode("utf-8")
-                            complete_text += decoded
-                    except Exception:
-                        pass
-
-                # 立即发送到流式文本切割器进行TTS处理（不阻塞文本流）
-                if tool_extractor and chunk.startswith("data: "):
-                    try:
-                        import base64
-
-                        data_str = chunk[6:].strip()
-                        if (
-                            data_str != "[DONE]"
-                            and not data_str.startswith("session_id:")
-                            and not data_str.startswith("audio_url:")
-                        ):
-                            # LLM服务已经对内容进行了base64编码，需要解码
-                            decoded = base64.b64decode(data_str).decode("utf-8")
-                            # 异步调用TTS处理，不阻塞文本流
-                            task = asyncio.create_task(tool_extractor.process_text_chunk(decoded))
+            deltas = llm_service.stream_chat_text(messages, config.api.temperature)
+            if encoder.is_text:
+                flush_ms = (
+                    request.stream_flush_ms if request.stream_flush_ms is not None
+                    else config.api_server.stream_flush_ms
+                )
+                deltas = coalesce_deltas(deltas, flush_ms / 1000, config.api_server.stream_max_chunk_chars)
+            try:
+                async for text in deltas:
+                    # V19: 如果需要返回音频，累积文本
+                    if request.return_audio:
+                        complete_text += text
+
+                    # 立即发送到流式文本切割器进行TTS处理（不阻塞文本流）
+                    if tool_extractor:
+                        try:
+                            task = asyncio.create_task(tool_extractor.process_text_chunk(text))
                             processing_tasks.append(task)
-                    except Exception as e:
-                        logger.error(f"[API Server] 流式文本切割器处理错误: {e}")
+                        except Exception as e:
+                            logger.error(f"[API Server] 流式文本切割器处理错误: {e}")
 
-                yield chunk
+                    yield encoder.delta(text)
+            except LLMStreamError as e:
+                yield encoder.error(str(e))
 
             # 处理完成
 
-            # V19: 如果请求返回音频，在这里生成并返回音频URL
+            # V19: 如果请求返回音频，提交异步合成任务，文本流不等待音频
+            # QQ消息和非QQ消息都播放给电脑端，让两边都能听到；工具回调不播放
+            tts_job = None
             if request.return_audio and complete_text:
-                try:
-                    logger.info(f"[API Server V19] 生成音频，文本长度: {len(complete_text)}")
-
-                    # 使用voice_integration生成音频（支持GPT-SoVITS）
-                    from voice.output.voice_integration import VoiceIntegration
-
-                    voice_integration = VoiceIntegration()
-
-                    # 生成音频数据
-                    audio_data = voice_integration._generate_audio_sync(complete_text)
-
-                    if not audio_data:
-                        logger.warning(f"[API Server V19] 语音生成返回空数据")
-                        return
-
-                    # 保存音频文件
-                    import uuid
-
-                    temp_dir = "logs/audio_temp"
-                    os.makedirs(temp_dir, exist_ok=True)
-                    audio_file = os.path.join(temp_dir, f"tts_{uuid.uuid4().hex}.mp3")
-
-                    with open(audio_file, "wb") as f:
-                        f.write(audio_data)
-
-                    logger.info(f"[API Server V19] 音频生成成功: {audio_file}, 大小: {len(audio_data)} bytes")
-
-                    # 总是返回audio_url给客户端，让客户端决定是否播放
-                    yield f"data: audio_url: {audio_file}\n\n"
-                    logger.info(f"[API Server V19] 音频URL已返回给客户端: {audio_file}")
-
-                    # 播放给UI端（电脑端）
-                    # QQ消息和非QQ消息都播放给电脑端，让两边都能听到
-                    is_tool_callback = request.skip_intent_analysis or ("[工具结果]" in complete_text)
-                    if not is_tool_callback:
-                        try:
-                            voice_integration.receive_audio_url(audio_file)
-                            logger.info(f"[API Server V19] 音频已发送到UI端: {audio_file}")
-                        except Exception as e:
-                            logger.error(f"[API Server V19] UI端音频播放失败: {e}")
-                    else:
-                        reason = "工具回调" if is_tool_callback else "其他"
-                        logger.info(f"[API Server V19] {reason}模式，跳过UI端音频播放")
-
-                except Exception as e:
-                    logger.error(f"[API Server V19] 音频生成失败: {e}")
-                    # traceback已经在文件顶部导入，直接使用
-                    traceback.print_exc()
+                is_tool_callback = request.skip_intent_analysis or ("[工具结果]" in complete_text)
+                tts_job = _submit_tts_job(complete_text, play_on_ui=not is_tool_callback)
 
             # 非流式模式：通过voice_integration的receive_final_text处理完整文本
             if voice_integration and not request.stream:
@@ -730,13 +704,15 @@ async def chat_stream(request: ChatRequest):
             if not request.skip_intent_analysis:
                 _trigger_background_analysis(session_id)
 
-            yield "data: [DONE]\n\n"
+            async for frame in _tts_job_frames(encoder, tts_job, request.audio_delivery):
+                yield frame
+            yield encoder.done()
 
         except Exception as e:
             print(f"流式对话处理错误: {e}")
             # 使用顶部导入的traceback
             traceback.print_exc()
-            yield f"data: 错误: {str(e)}\n\n"
+            yield encoder.error(f"错误: {str(e)}")
 
     return StreamingResponse(
         generate_response(),
@@ -1218,8 +1194,6 @@ async def _execute_mcp_tool_sync(
                 parameters["user_content"] = parameters.pop("param_name")
                 logger.info(f"[QQ工具] 参数映射: param_name -> user_content")
 
-        import httpx
-        from system.config import get_server_port
         import uuid
 
         # 构建MCP服务器请求 - 与background_analyzer相同的格式
@@ -1231,54 +1205,52 @@ async def _execute_mcp_tool_sync(
             "skip_callback": True,  # QQ需要同步等待结果
         }
 
-        mcp_server_url = f"http://localhost:{get_server_port('mcp_server')}/schedule"
+        dispatcher = get_tool_dispatcher()
+        logger.info(f"[QQ工具] 发送MCP请求到: {dispatcher.schedule_url}")
 
-        logger.info(f"[QQ工具] 发送MCP请求到: {mcp_server_url}")
+        # 增加超时时间到60秒，避免应用启动超时；复用调度器的连接池
+        response = await dispatcher.post_schedule(mcp_payload, timeout=60.0)
 
-        # 增加超时时间到60秒，避免应用启动超时
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(mcp_server_url, json=mcp_payload)
+        if response.status_code == 200:
+            result = response.json()
+            logger.info(f"[QQ工具] MCP请求成功: {result}")
 
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"[QQ工具] MCP请求成功: {result}")
-
-                # 尝试提取工具执行结果
-                if result.get("success"):
-                    tool_result = result.get("result", "")
-
-                    # 如果result是字符串，直接使用
-                    # 如果是字典，尝试提取output/result/message字段
-                    if isinstance(tool_result, dict):
-                        tool_result = tool_result.get(
-                            "output",
-                            tool_result.get(
-                                "result", tool_result.get("message", json.dumps(tool_result, ensure_ascii=False))
-                            ),
-                        )
-
-                    # 确保tool_result不是None或空字符串
-                    if not tool_result or tool_result == "None":
-                        tool_result = ""
-
-                    # 检查工具类型：后台工具不发送结果给用户
-                    should_send = _should_send_result_to_user(tool_name)
-                    logger.info(f"[QQ工具] 工具类型判断: {tool_name} -> should_send={should_send}")
-
-                    if should_send:
-                        # 用户面向工具：返回结果
-                        return {"tool_name": tool_name, "result": str(tool_result), "success": True}
-                    else:
-                        # 后台工具：记录日志，返回空结果（避免发送给用户）
-                        logger.info(f"[QQ工具] 后台工具执行成功，结果已记录到日志: {str(tool_result)[:200]}")
-                        return {"tool_name": tool_name, "result": "", "success": True}
+            # 尝试提取工具执行结果
+            if result.get("success"):
+                tool_result = result.get("result", "")
+
+                # 如果result是字符串，直接使用
+                # 如果是字典，尝试提取output/result/message字段
+                if isinstance(tool_result, dict):
+                    tool_result = tool_result.get(
+                        "output",
+                        tool_result.get(
+                            "result", tool_result.get("message", json.dumps(tool_result, ensure_ascii=False))
+                        ),
+                    )
+
+                # 确保tool_result不是None或空字符串
+                if not tool_result or tool_result == "None":
+                    tool_result = ""
+
+                # 检查工具类型：后台工具不发送结果给用户
+                should_send = _should_send_result_to_user(tool_name)
+                logger.info(f"[QQ工具] 工具类型判断: {tool_name} -> should_send={should_send}")
+
+                if should_send:
+                    # 用户面向工具：返回结果
+                    return {"tool_name": tool_name, "result": str(tool_result), "success": True}
                 else:
-                    error_msg = result.get("error", result.get("message", "执行失败"))
-                    logger.error(f"[QQ工具] MCP执行失败: {error_msg}")
-                    return None
+                    # 后台工具：记录日志，返回空结果（避免发送给用户）
+                    logger.info(f"[QQ工具] 后台工具执行成功，结果已记录到日志: {str(tool_result)[:200]}")
+                    return {"tool_name": tool_name, "result": "", "success": True}
             else:
-                logger.error(f"[QQ工具] MCP请求失败: {response.status_code} - {response.text}")
+                error_msg = result.get("error", result.get("message", "执行失败"))
+                logger.error(f"[QQ工具] MCP执行失败: {error_msg}")
                 return None
+        else:
+            logger.error(f"[QQ工具] MCP请求失败: {response.status_code} - {response.text}")
+            return None
 
     except Exception as e:
         logger.error(f"[QQ工具] 执行MCP工具失败: {e}", exc_info=True)
@@ -1293,70 +1265,42 @@ async def _execute_batch_mcp_tools(
     group_id: Optional[str] = None,
     image_path: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """批量执行MCP工具调用 - 支持复合操作"""
-    import httpx
-    from system.config import get_server_port
-    import uuid
+    """批量执行MCP工具调用 - 并发执行（同一服务限流），结果保持原始顺序"""
+    dispatcher = get_tool_dispatcher()
 
     results = []
     errors = []
 
-    logger.info(f"[批量MCP] 开始执行 {len(tool_calls)} 个工具调用")
-
-    for i, tool_call in enumerate(tool_calls):
-        try:
-            logger.info(f"[批量MCP] 执行第 {i+1}/{len(tool_calls)} 个工具")
-
-            service_name = tool_call.get("service_name")
-            tool_name = tool_call.get("tool_name")
-
-            # 构建参数（复用现有逻辑）
-            parameters = tool_call.get("parameters", {})
+    logger.info(f"[批量MCP] 开始并发执行 {len(tool_calls)} 个工具调用")
+    start = time.perf_counter()
 
-            if not parameters:
-                parameters = {}
-                for key, value in tool_call.items():
-                    if key not in ["agentType", "service_name", "tool_name", "parameters"]:
-                        parameters[key] = value
+    outcomes = await dispatcher.dispatch(tool_calls, session_id)
 
-            # 简化的MCP调用（避免重复复杂的参数处理）
-            mcp_payload = {
-                "query": f"批量MCP {i+1}/{len(tool_calls)}: {service_name}.{tool_name}",
-                "tool_calls": [tool_call],
-                "session_id": session_id,
-                "request_id": str(uuid.uuid4()),
-                "skip_callback": True,
-            }
+    for outcome in outcomes:
+        i = outcome["index"]
+        tool_name = outcome["tool_name"]
+        if not outcome["success"]:
+            errors.append(f"工具 {i+1}: {outcome['error']}")
+            logger.error(f"[批量MCP] 第 {i+1} 个工具执行失败: {outcome['error']} ({outcome['latency_ms']}ms)")
+            continue
 
-            mcp_server_url = f"http://localhost:{get_server_port('mcp_server')}/schedule"
+        # 检查工具类型，过滤后台工具的结果
+        should_send = _should_send_result_to_user(tool_name)
+        logger.info(f"[批量MCP] 工具类型判断: {tool_name} -> should_send={should_send}")
 
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(mcp_server_url, json=mcp_payload)
-
-                if response.status_code == 200:
-                    result = response.json()
-                    # 检查工具类型，过滤后台工具的结果
-                    should_send = _should_send_result_to_user(tool_name)
-                    logger.info(f"[批量MCP] 工具类型判断: {tool_name} -> should_send={should_send}")
-
-                    if should_send:
-                        results.append({
-                            "tool": f"{service_name}.{tool_name}",
-                            "result": result,
-                            "success": True
-                        })
-                    else:
-                        # 后台工具：只记录日志，不添加到返回结果
-                        logger.info(f"[批量MCP] 后台工具已执行: {tool_name}, 结果已记录到日志")
-                    logger.info(f"[批量MCP] 第 {i+1} 个工具执行成功")
-                else:
-                    errors.append(f"工具 {i+1}: HTTP {response.status_code}")
-                    logger.error(f"[批量MCP] 第 {i+1} 个工具执行失败: {response.status_code}")
+        if should_send:
+            results.append({
+                "tool": outcome["tool"],
+                "result": outcome["result"],
+                "success": True,
+                "latency_ms": outcome["latency_ms"],
+            })
+        else:
+            # 后台工具：只记录日志，不添加到返回结果
+            logger.info(f"[批量MCP] 后台工具已执行: {tool_name}, 结果已记录到日志")
+        logger.info(f"[批量MCP] 第 {i+1} 个工具执行成功 ({outcome['latency_ms']}ms)")
 
-        except Exception as e:
-            error_msg = f"工具 {i+1}: {str(e)}"
-            errors.append(error_msg)
-            logger.error(f"[批量MCP] 第 {i+1} 个工具执行异常: {e}")
+    elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
 
     # 返回批量结果
     batch_result = {
@@ -1366,16 +1310,74 @@ async def _execute_batch_mcp_tools(
         "total": len(tool_calls),
         "successful": len(results),
         "failed": len(errors),
-        "errors": errors
+        "errors": errors,
+        "elapsed_ms": elapsed_ms,
     }
 
     logger.info(
-        f"[批量MCP] 执行完成: 成功 {len(results)}/{len(tool_calls)}, 失败 {len(errors)}"
+        f"[批量MCP] 执行完成: 成功 {len(results)}/{len(tool_calls)}, 失败 {len(errors)}, 耗时 {elapsed_ms}ms"
     )
 
     return batch_result
 
 
+@app.get("/mcp/dispatch/stats")
+async def get_mcp_dispatch_stats():
+    """获取MCP工具调度统计（各工具调用次数、失败/超时与延迟分位数）"""
+    return {"status": "success", "stats": get_tool_dispatcher().get_stats()}
+
+
+class TTSJobRequest(BaseModel):
+    text: str
+
+
+@app.post("/tts/jobs", status_code=202)
+async def create_tts_job(request: TTSJobRequest):
+    """提交异步TTS任务，立即返回任务ID"""
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="文本不能为空")
+    try:
+        job = get_tts_service().submit(request.text)
+    except TTSServiceBusy as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"status": "success", "job": job.to_dict()}
+
+
+@app.get("/tts/jobs/{job_id}")
+async def get_tts_job(job_id: str):
+    """查询TTS任务状态"""
+    job = get_tts_service().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="TTS任务不存在或已过期")
+    return {"status": "success", "job": job.to_dict()}
+
+
+@app.get("/tts/jobs/{job_id}/audio")
+async def get_tts_job_audio(job_id: str, wait: float = 30.0):
+    """获取TTS任务音频；任务未完成时最多等待 wait 秒，仍未完成返回202与任务状态"""
+    job = await get_tts_service().wait(job_id, max(0.0, min(wait, 120.0)))
+    if job is None:
+        raise HTTPException(status_code=404, detail="TTS任务不存在或已过期")
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=502, detail=f"TTS合成失败: {job.error}")
+    if job.status != JOB_DONE:
+        return JSONResponse(status_code=202, content={"status": "pending", "job": job.to_dict()})
+    return FileResponse(job.audio_path, filename=os.path.basename(job.audio_path))
+
+
+@app.get("/tts/stats")
+async def get_tts_stats():
+    """获取异步TTS服务统计（排队数、完成/失败数与延迟分位数）与音频缓存统计（命中率、节省字节数）"""
+    from voice.output.tts_cache import get_tts_cache
+
+    cache = get_tts_cache()
+    return {
+        "status": "success",
+        "stats": get_tts_service().get_stats(),
+        "cache": cache.get_stats() if cache is not None else None,
+    }
+
+
 # 挂载LLM服务路由以支持 /llm/chat
 from .llm_service import llm_app
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+对话记录结构化存储
+与 logs/YYYY-MM-DD.log 文本日志同步写入一份 SQLite 记录，避免每次创建会话都重新解析全部日志：
+- messages 表按 (day, id) 建索引，“最近 N 条”只需一次倒序索引扫描，与日志总量无关
+- day_stats 表在写入时累加每天的消息计数，统计接口只读取所需天数的汇总行
+- import_text_logs() 一次性导入已有的文本日志；某天已有记录时跳过，force 时以文本日志为准重建该天
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "conversations.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,
+    time TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_day ON messages(day, id);
+CREATE TABLE IF NOT EXISTS day_stats (
+    day TEXT PRIMARY KEY,
+    user_messages INTEGER NOT NULL DEFAULT 0,
+    assistant_messages INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_LOG_NAME = re.compile(r"^(\d{4}-\d{2}-\d{2})\.log$")
+
+
+def _cutoff_day(days: int) -> str:
+    """最近 days 天（含今天）的起始日期"""
+    return (datetime.now() - timedelta(days=max(days, 1) - 1)).strftime('%Y-%m-%d')
+
+
+class ConversationLogStore:
+    """对话记录存储（线程安全，单连接串行访问）"""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # ---------- 写入 ----------
+
+    def _insert(self, cur: sqlite3.Cursor, day: str, time_str: str, messages: Iterable[Dict]) -> int:
+        counts = {"user": 0, "assistant": 0}
+        rows = []
+        for msg in messages:
+            role = "user" if msg["role"] == "user" else "assistant"
+            counts[role] += 1
+            rows.append((day, time_str, role, msg["content"]))
+        if not rows:
+            return 0
+        cur.executemany("INSERT INTO messages(day, time, role, content) VALUES (?, ?, ?, ?)", rows)
+        cur.execute(
+            "INSERT INTO day_stats(day, user_messages, assistant_messages) VALUES (?, ?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET user_messages = user_messages + excluded.user_messages, "
+            "assistant_messages = assistant_messages + excluded.assistant_messages",
+            (day, counts["user"], counts["assistant"]))
+        return len(rows)
+
+    def append_turn(self, user_message: str, assistant_message: str, when: Optional[datetime] = None):
+        """记录一轮对话（与 save_conversation_log 写入的文本日志一一对应）"""
+        when = when or datetime.now()
+        with self._lock:
+            cur = self._conn.cursor()
+            self._insert(cur, when.strftime('%Y-%m-%d'), when.strftime('%H:%M:%S'), [
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": assistant_message},
+            ])
+            self._conn.commit()
+
+    # ---------- 查询 ----------
+
+    def recent_messages(self, days: int = 3, max_messages: Optional[int] = None) -> List[Dict]:
+        """最近 days 天内最新的 max_messages 条消息，按时间正序返回"""
+        sql = "SELECT role, content FROM messages WHERE day >= ? ORDER BY day DESC, id DESC"
+        params: Tuple = (_cutoff_day(days),)
+        if max_messages:
+            sql += " LIMIT ?"
+            params += (max_messages,)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def statistics(self, days: int = 7) -> Dict:
+        """按天汇总的消息统计，字段与 MessageManager.get_context_statistics 一致"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(user_messages), 0), COALESCE(SUM(assistant_messages), 0) "
+                "FROM day_stats WHERE day >= ?", (_cutoff_day(days),)).fetchone()
+        total_days, user_messages, assistant_messages = row
+        return {
+            "total_files": total_days,
+            "total_messages": user_messages + assistant_messages,
+            "user_messages": user_messages,
+            "assistant_messages": assistant_messages,
+            "days_covered": days,
+        }
+
+    def daily_statistics(self, days: int = 7) -> List[Dict]:
+        """每天的消息数，按日期倒序"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, user_messages, assistant_messages FROM day_stats WHERE day >= ? ORDER BY day DESC",
+                (_cutoff_day(days),)).fetchall()
+        return [{"day": day, "user_messages": u, "assistant_messages": a} for day, u, a in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    # ---------- 导入 ----------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def import_text_logs(self, log_dir, parse_file: Callable[[str], List[Dict]], force: bool = False) -> Dict[str, int]:
+        """
+        导入 log_dir 下的 YYYY-MM-DD.log 文本日志
+
+        Args:
+            log_dir: 日志目录
+            parse_file: 解析单个日志文件的函数（MessageManager.parse_log_file）
+            force: 已有记录的日期也以文本日志为准重新导入
+
+        Returns:
+            Dict[str, int]: {日期: 导入的消息数}，跳过的日期不在其中
+        """
+        log_dir = Path(log_dir)
+        if not log_dir.is_dir():
+            return {}
+        imported: Dict[str, int] = {}
+        for path in sorted(log_dir.iterdir()):
+            match = _LOG_NAME.match(path.name)
+            if not match:
+                continue
+            day = match.group(1)
+            with self._lock:
+                exists = self._conn.execute("SELECT 1 FROM day_stats WHERE day = ?", (day,)).fetchone()
+            if exists and not force:
+                continue
+            messages = parse_file(str(path))
+            with self._lock:
+                cur = self._conn.cursor()
+                cur.execute("DELETE FROM messages WHERE day = ?", (day,))
+                cur.execute("DELETE FROM day_stats WHERE day = ?", (day,))
+                imported[day] = self._insert(cur, day, "00:00:00", messages)
+                self._conn.commit()
+        self.set_meta("text_logs_imported_at", datetime.now().isoformat(timespec="seconds"))
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -19,12 +19,20 @@ from system.config import config
 # 配置日志
 logger = logging.getLogger("LLMService")
 
+
+class LLMStreamError(Exception):
+    """流式调用失败，message 可直接展示给用户"""
+
+
 class LLMService:
     """LLM服务类 - 提供统一的LLM调用接口"""
 
     def __init__(self):
         self.async_client: Optional[AsyncOpenAI] = None
         self._client_lock = None  # 客户端初始化锁
+        # 流式调用共享的 aiohttp 会话（keep-alive 连接池），绑定创建时的事件循环
+        self._http_session = None
+        self._http_session_loop = None
         # 延迟初始化客户端，避免在模块加载时创建
         # self._initialize_client()  # 注释掉模块级初始化
 
@@ -289,7 +297,18 @@ class LLMService:
             return f"聊天调用出错: {str(e)}"
     
     async def stream_chat_with_context(self, messages: List[Dict], temperature: float = 0.7):
-        """带上下文的流式聊天调用（新架构：双层意识 - 后端感知 + 前端表达）"""
+        """带上下文的流式聊天调用（旧格式：每个增量一条 base64 SSE 事件）"""
+        import base64
+        try:
+            async for text in self.stream_chat_text(messages, temperature):
+                b64 = base64.b64encode(text.encode('utf-8')).decode('ascii')
+                yield f"data: {b64}\n\n"
+        except LLMStreamError as e:
+            yield f"data: {e}\n\n"
+
+    async def stream_chat_text(self, messages: List[Dict], temperature: float = 0.7):
+        """带上下文的流式聊天调用（新架构：双层意识 - 后端感知 + 前端表达），逐个产出原始文本增量；
+        失败时抛出 LLMStreamError"""
         # 提取用户输入
         user_input = ""
         if messages:
@@ -348,15 +367,9 @@ class LLMService:
                 # 调试日志：查看响应内容
                 logger.info(f"[双层意识] 前端回复文本: {response_text[:100]}...")
 
-                # 流式输出
-                import base64
+                # 双层意识一次性生成完整回复，整段作为一个增量输出
                 if response_text:
-                    for i in range(0, len(response_text), 5):
-                        chunk = response_text[i:i+5]
-                        b64 = base64.b64encode(chunk.encode('utf-8')).decode('ascii')
-                        yield f"data: {b64}\n\n"
-
-                yield "data: [DONE]\n\n"
+                    yield response_text
                 return
             except Exception as e:
                 logger.error(f"[双层意识] 调用失败，回退到传统LLM模式: {e}")
@@ -366,15 +379,16 @@ class LLMService:
 
         # 传统LLM流式模式
         try:
-            client = await self._ensure_client()
-            # 使用流式响应
-            async for chunk in self._stream_llm_response(client, messages, temperature):
-                yield chunk
+            await self._ensure_client()
+            async for text in self._stream_llm_deltas(messages, temperature):
+                yield text
+        except LLMStreamError:
+            raise
         except Exception as e:
             logger.error(f"流式聊天失败: {e}")
             import traceback
             traceback.print_exc()
-            yield f"data: LLM服务错误: {str(e)}\n\n"
+            raise LLMStreamError(f"LLM服务错误: {str(e)}") from e
         
     def _get_system_prompt(self) -> str:
         """获取系统提示词"""
@@ -456,61 +470,90 @@ class LLMService:
             logger.error(f"LLM调用失败: {e}")
             return ""
 
+    async def _get_http_session(self):
+        """获取共享的 aiohttp 会话：复用 keep-alive 连接，省去每次流式请求的建连/TLS握手"""
+        import asyncio
+        import aiohttp
+        loop = asyncio.get_running_loop()
+        if self._http_session is None or self._http_session.closed or self._http_session_loop is not loop:
+            timeout = aiohttp.ClientTimeout(total=180, connect=60, sock_read=120)
+            connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            self._http_session = aiohttp.ClientSession(timeout=timeout, connector=connector)
+            self._http_session_loop = loop
+        return self._http_session
+
+    async def aclose(self):
+        """关闭共享的 aiohttp 会话（应用退出时调用）"""
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._http_session = None
+        self._http_session_loop = None
+
     async def _stream_llm_response(self, messages: List[Dict], temperature: float = 0.7):
-        """流式LLM响应（用于传统模式）"""
+        """流式LLM响应（用于传统模式，旧的 base64 SSE 帧格式）"""
+        import base64
         try:
-            import aiohttp
-            timeout = aiohttp.ClientTimeout(total=180, connect=60, sock_read=120)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    f"{config.api.base_url}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {config.api.api_key}",
-                        "Content-Type": "application/json",
-                        "Accept": "text/event-stream",
-                        "Connection": "keep-alive"
-                    },
-                    json={
-                        "model": config.api.model,
-                        "messages": messages,
-                        "temperature": temperature,
-                        "max_tokens": config.api.max_tokens,
-                        "stream": True
-                    }
-                ) as resp:
-                    if resp.status != 200:
-                        yield f"LLM API调用失败 (状态码: {resp.status})"
+            async for text in self._stream_llm_deltas(messages, temperature):
+                b64 = base64.b64encode(text.encode('utf-8')).decode('ascii')
+                yield f"data: {b64}\n\n"
+        except LLMStreamError as e:
+            yield f"data: {e}\n\n"
+
+    async def _stream_llm_deltas(self, messages: List[Dict], temperature: float = 0.7):
+        """直接请求 chat/completions 流式接口，逐个产出文本增量"""
+        import json
+        from .sse import SSEDecoder
+
+        def content_of(event) -> Optional[str]:
+            try:
+                data = json.loads(event.data)
+            except json.JSONDecodeError:
+                return None
+            choices = data.get('choices') if isinstance(data, dict) else None
+            if choices:
+                return (choices[0].get('delta') or {}).get('content') or None
+            return None
+
+        try:
+            session = await self._get_http_session()
+            async with session.post(
+                f"{config.api.base_url.rstrip('/')}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {config.api.api_key}",
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream",
+                },
+                json={
+                    "model": config.api.model,
+                    "messages": messages,
+                    "temperature": temperature,
+                    "max_tokens": config.api.max_tokens,
+                    "stream": True
+                }
+            ) as resp:
+                if resp.status != 200:
+                    raise LLMStreamError(f"LLM API调用失败 (状态码: {resp.status})")
+
+                # 按到达的分块增量解码，跨分块的行/事件/UTF-8字符由解码器缓冲
+                decoder = SSEDecoder()
+                async for chunk in resp.content.iter_any():
+                    for event in decoder.feed(chunk):
+                        if event.data.strip() == '[DONE]':
+                            return
+                        content = content_of(event)
+                        if content:
+                            yield content
+                for event in decoder.flush():
+                    if event.data.strip() == '[DONE]':
                         return
-                    
-                    async for chunk in resp.content.iter_chunked(1024):
-                        if not chunk:
-                            break
-                        try:
-                            data = chunk.decode('utf-8')
-                            lines = data.split('\n')
-                            for line in lines:
-                                line = line.strip()
-                                if line.startswith('data: '):
-                                    data_str = line[6:]
-                                    if data_str == '[DONE]':
-                                        return
-                                    try:
-                                        import json
-                                        data = json.loads(data_str)
-                                        if 'choices' in data and len(data['choices']) > 0:
-                                            delta = data['choices'][0].get('delta', {})
-                                            if 'content' in delta:
-                                                import base64
-                                                content = delta['content']
-                                                b64 = base64.b64encode(content.encode('utf-8')).decode('ascii')
-                                                yield f"data: {b64}\n\n"
-                                    except json.JSONDecodeError:
-                                        continue
-                        except UnicodeDecodeError:
-                            continue
+                    content = content_of(event)
+                    if content:
+                        yield content
+        except LLMStreamError:
+            raise
         except Exception as e:
             logger.error(f"流式聊天调用失败: {e}")
-            yield f"data: 流式调用出错: {str(e)}\n\n"
+            raise LLMStreamError(f"流式调用出错: {str(e)}") from e
 
 # 全局LLM服务实例
 _llm_service: Optional[LLMService] = None
@@ -522,6 +565,11 @@ def get_llm_service() -> LLMService:
         _llm_service = LLMService()
     return _llm_service
 
+async def close_llm_service():
+    """释放全局LLM服务持有的连接（应用退出时调用）"""
+    if _llm_service is not None:
+        await _llm_service.aclose()
+
 # 创建独立的LLM服务API
 llm_app = FastAPI(
     title="LLM Service API",
@@ -4,7 +4,6 @@
 支持多会话、多agent的消息存储和拼接
 """
 
-import asyncio
 import uuid
 import logging
 import re
@@ -15,6 +14,8 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from .session_store import SessionStore, DB_FILENAME as SESSION_DB_FILENAME
+
 logger = logging.getLogger(__name__)
 
 # 工具函数
@@ -48,7 +49,6 @@ class MessageManager:
     """统一的消息管理器"""
     
     def __init__(self):
-        self.sessions: Dict[str, Dict] = {}
         # 分析状态跟踪，防止重复执行
         self.analysis_in_progress: Dict[str, bool] = {}
         # 批量添加消息的临时缓冲，用于延迟截断
@@ -60,6 +60,7 @@ class MessageManager:
             self.max_messages_per_session = self.max_history_rounds * 2  # 每轮对话包含用户和助手各一条消息
             self.persistent_context = config.api.persistent_context
             self.context_load_days = config.api.context_load_days
+            self.context_store_enabled = config.api.context_store_enabled
             self.log_dir = config.system.log_dir
             self.ai_name = config.system.ai_name
         except ImportError:
@@ -67,9 +68,37 @@ class MessageManager:
             self.max_messages_per_session = 20  # 默认20条消息
             self.persistent_context = True
             self.context_load_days = 3
+            self.context_store_enabled = True
             self.log_dir = Path("logs")
             self.ai_name = "娜迦"
             logger.warning("无法导入配置，使用默认历史轮数设置")
+        # 对话记录结构化存储，首次使用时打开
+        self._conversation_store = None
+        self._conversation_store_failed = False
+        # 会话存储：有界LRU + 写盘，淘汰的会话下次访问时从磁盘加载
+        self.sessions = self._create_session_store()
+
+    def _create_session_store(self) -> SessionStore:
+        """按配置创建会话存储；持久化文件打开失败时退化为仅内存"""
+        kwargs = {}
+        persist = True
+        try:
+            from system.config import config
+            kwargs = {
+                "max_sessions": config.api.session_cache_max,
+                "memory_budget_mb": config.api.session_memory_budget_mb,
+                "idle_ttl": config.api.session_idle_ttl,
+                "flush_interval": config.api.session_flush_interval,
+            }
+            persist = config.api.session_persist
+        except (ImportError, AttributeError):
+            pass
+        if persist:
+            try:
+                return SessionStore(str(Path(self.log_dir) / SESSION_DB_FILENAME), **kwargs)
+            except Exception as e:
+                logger.warning(f"会话持久化不可用，仅保存在内存中: {e}")
+        return SessionStore(None, **kwargs)
     
     def generate_session_id(self) -> str:
         """生成唯一的会话ID"""
@@ -84,15 +113,17 @@ class MessageManager:
         if session_id in self.sessions:
             logger.debug(f"使用现有会话: {session_id}")
             # 更新最后活动时间
-            self.sessions[session_id]["last_activity"] = asyncio.get_event_loop().time()
+            session = self.sessions[session_id]
+            session["last_activity"] = time.time()
+            self.sessions.mark_dirty(session_id, session)
             return session_id
         
-        # 初始化新会话
+        # 初始化新会话（时间使用 time.time()，会话写盘后重启仍可比较）
         self.sessions[session_id] = {
-            "created_at": asyncio.get_event_loop().time(),
+            "created_at": time.time(),
             "messages": [],
             "agent_type": "default",  # 可以扩展支持不同agent类型
-            "last_activity": asyncio.get_event_loop().time()
+            "last_activity": time.time()
         }
         
         # 如果启用持久化上下文，尝试加载历史对话
@@ -112,7 +143,9 @@ class MessageManager:
             )
             
             if recent_messages:
-                self.sessions[session_id]["messages"] = recent_messages
+                session = self.sessions[session_id]
+                session["messages"] = recent_messages
+                self.sessions.mark_dirty(session_id, session)
                 logger.info(f"会话 {session_id} 加载了 {len(recent_messages)} 条历史对话")
             else:
                 logger.debug(f"会话 {session_id} 未找到历史对话记录")
@@ -141,7 +174,7 @@ class MessageManager:
         session = self.sessions[session_id]
         old_count = len(session["messages"])
         session["messages"].append({"role": role, "content": content})
-        session["last_activity"] = asyncio.get_event_loop().time()
+        session["last_activity"] = time.time()
         new_count = len(session["messages"])
 
         # 记录批量添加计数
@@ -157,6 +190,7 @@ class MessageManager:
             logger.info(f"会话 {session_id} 消息数 {old_count} -> {new_count} -> 截断为 {len(session['messages'])} (缓冲模式)")
         else:
             logger.debug(f"会话 {session_id} 消息数 {old_count} -> {new_count}")
+        self.sessions.mark_dirty(session_id, session)
 
         logger.info(f"会话 {session_id} 添加消息: {role} - {content[:50]}... (当前共{len(session['messages'])}条)")
         return True
@@ -181,7 +215,7 @@ class MessageManager:
         session["messages"].append({"role": "user", "content": user_message})
         session["messages"].append({"role": "assistant", "content": assistant_message})
         new_count = len(session["messages"])
-        session["last_activity"] = asyncio.get_event_loop().time()
+        session["last_activity"] = time.time()
 
         # 然后进行一次性截断
         if new_count > self.max_messages_per_session + 4:
@@ -189,6 +223,7 @@ class MessageManager:
             logger.info(f"会话 {session_id} 批量添加: {old_count} -> {new_count} -> 截断为 {len(session['messages'])} (批量模式)")
         else:
             logger.debug(f"会话 {session_id} 批量添加: {old_count} -> {new_count}")
+        self.sessions.mark_dirty(session_id, session)
 
         logger.info(f"会话 {session_id} 批量添加2条消息: 用户({user_message[:30]}...) + 助手({assistant_message[:30]}...) (当前共{len(session['messages'])}条)")
         return True
@@ -289,7 +324,10 @@ class MessageManager:
         session = self.sessions.get(session_id)
         if not session:
             return None
-        
+        return self._session_info(session_id, session)
+    
+    def _session_info(self, session_id: str, session: Dict) -> Dict:
+        """由会话数据生成信息字典"""
         return {
             "session_id": session_id,
             "created_at": session["created_at"],
@@ -304,14 +342,14 @@ class MessageManager:
     def get_all_sessions_info(self) -> Dict[str, Dict]:
         """获取所有会话信息"""
         sessions_info = {}
+        # 直接使用 items() 给出的会话数据，不把磁盘上的会话重新载入内存（避免挤掉活跃会话）
         for session_id, session in self.sessions.items():
-            sessions_info[session_id] = self.get_session_info(session_id)
+            sessions_info[session_id] = self._session_info(session_id, session)
         return sessions_info
     
     def delete_session(self, session_id: str) -> bool:
         """删除指定会话"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        if self.sessions.delete(session_id):
             logger.info(f"删除会话: {session_id}")
             return True
         return False
@@ -324,26 +362,18 @@ class MessageManager:
         return count
     
     def cleanup_old_sessions(self, max_age_hours: int = 24) -> int:
-        """清理过期会话"""
-        current_time = asyncio.get_event_loop().time()
-        expired_sessions = []
-        
-        for session_id, session in self.sessions.items():
-            if current_time - session["last_activity"] > max_age_hours * 3600:
-                expired_sessions.append(session_id)
-        
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
-        
-        if expired_sessions:
-            logger.info(f"清理了 {len(expired_sessions)} 个过期会话")
-        
-        return len(expired_sessions)
+        """清理过期会话（内存与磁盘中的都会删除）"""
+        expired = self.sessions.expire(max_age_hours * 3600)
+        if expired:
+            logger.info(f"清理了 {expired} 个过期会话")
+        return expired
     
     def set_agent_type(self, session_id: str, agent_type: str) -> bool:
         """设置会话的agent类型"""
-        if session_id in self.sessions:
-            self.sessions[session_id]["agent_type"] = agent_type
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session["agent_type"] = agent_type
+            self.sessions.mark_dirty(session_id, session)
             return True
         return False
     
@@ -491,6 +521,41 @@ class MessageManager:
         
         return messages
     
+    @property
+    def conversation_store(self):
+        """
+        对话记录结构化存储（logs/conversations.sqlite3）
+        首次创建时一次性导入已有的文本日志；未启用或打开失败时返回None，调用方回退到解析文本日志
+        """
+        if self._conversation_store is None and self.context_store_enabled and not self._conversation_store_failed:
+            try:
+                from .conversation_store import ConversationLogStore, DB_FILENAME
+                store = ConversationLogStore(str(Path(self.log_dir) / DB_FILENAME))
+                if store.get_meta("text_logs_imported_at") is None:
+                    imported = store.import_text_logs(self.log_dir, self.parse_log_file)
+                    if imported:
+                        logger.info(f"已从 {len(imported)} 个文本日志导入 {sum(imported.values())} 条历史对话")
+                self._conversation_store = store
+            except Exception as e:
+                self._conversation_store_failed = True
+                logger.warning(f"对话记录存储不可用，回退到解析文本日志: {e}")
+        return self._conversation_store
+
+    def import_text_logs(self, force: bool = False) -> Dict[str, int]:
+        """
+        将文本日志导入对话记录存储
+
+        Args:
+            force: 已导入的日期也以文本日志为准重新导入
+
+        Returns:
+            Dict[str, int]: {日期: 导入的消息数}
+        """
+        store = self.conversation_store
+        if store is None:
+            return {}
+        return store.import_text_logs(self.log_dir, self.parse_log_file, force=force)
+
     def get_log_files_by_date(self, days: int = 3) -> List[str]:
         """
         获取最近几天的日志文件路径
@@ -527,6 +592,15 @@ class MessageManager:
         Returns:
             List[Dict]: 对话消息列表
         """
+        store = self.conversation_store
+        if store is not None:
+            try:
+                messages = store.recent_messages(days, max_messages)
+                logger.info(f"从对话记录存储加载了最近 {days} 天的 {len(messages)} 条历史对话")
+                return messages
+            except Exception as e:
+                logger.warning(f"读取对话记录存储失败，回退到解析文本日志: {e}")
+
         all_messages = []
         log_files = self.get_log_files_by_date(days)
         
@@ -555,6 +629,13 @@ class MessageManager:
         Returns:
             Dict: 统计信息
         """
+        store = self.conversation_store
+        if store is not None:
+            try:
+                return store.statistics(days)
+            except Exception as e:
+                logger.warning(f"读取对话记录存储失败，回退到解析文本日志: {e}")
+
         log_files = self.get_log_files_by_date(days)
         total_messages = 0
         user_messages = 0
@@ -590,6 +671,9 @@ class MessageManager:
         if dev_mode:
             return  # 开发者模式不写日志
         
+        # 先打开结构化存储：首次打开时会导入已有文本日志，必须在写入本轮之前，否则本轮会被导入后再追加一次
+        store = self.conversation_store
+        
         try:
             from datetime import datetime
             import os
@@ -616,6 +700,13 @@ class MessageManager:
             
         except Exception as e:
             logger.error(f"保存对话日志失败: {e}")
+
+        # 同步写入结构化存储，供加载上下文与统计使用
+        if store is not None:
+            try:
+                store.append_turn(user_message, assistant_message)
+            except Exception as e:
+                logger.error(f"保存对话记录失败: {e}")
     
     def save_conversation_and_logs(self, session_id: str, user_message: str, assistant_response: str):
         """统一保存对话历史与日志 - 整合重复逻辑"""
@@ -693,7 +784,8 @@ class MessageManager:
             return {
                 "status": "success",
                 "sessions": sessions_info,
-                "total_sessions": len(sessions_info)
+                "total_sessions": len(sessions_info),
+                "store": self.sessions.get_stats()
             }
         except Exception as e:
             logger.error(f"获取会话信息错误: {e}")
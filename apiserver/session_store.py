@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+会话存储
+MessageManager.sessions 的有界实现，对外保持 dict 接口（in / [] / get / items / len / del / clear）：
+- 常驻内存的会话按 LRU 排列，超过 max_sessions、估算内存超过 memory_budget_mb 或空闲超过 idle_ttl 时淘汰
+- 被修改的会话标记为脏，由后台线程每 flush_interval 秒批量写入 SQLite（write-behind），退出时再刷一次
+- 淘汰只是移出内存：下次访问时从磁盘惰性加载，服务重启后会话也能继续
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "sessions.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    last_activity REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_activity ON sessions(last_activity);
+"""
+
+# 会话内存估算：dict/list 外壳与每条消息 dict 的固定开销 + 字符串实际占用
+_SESSION_OVERHEAD = 1024
+_MESSAGE_OVERHEAD = 400
+
+
+def estimate_session_size(session: Dict) -> int:
+    """估算会话占用的内存字节数（sys.getsizeof 对 str 是 O(1)）"""
+    size = _SESSION_OVERHEAD
+    for msg in session.get("messages", ()):
+        size += _MESSAGE_OVERHEAD + sys.getsizeof(msg.get("content", ""))
+    return size
+
+
+class SessionStore:
+    """有界 + 可持久化的会话字典（线程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None, max_sessions: int = 2000,
+                 memory_budget_mb: float = 64, idle_ttl: float = 1800, flush_interval: float = 5.0):
+        self.db_path = db_path
+        self.max_sessions = max_sessions
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.idle_ttl = idle_ttl
+        self.flush_interval = flush_interval
+
+        self._lock = threading.RLock()
+        # session_id -> (会话, 最近访问的 monotonic 时间, 估算字节数)
+        self._resident: "OrderedDict[str, List]" = OrderedDict()
+        self._bytes = 0
+        self._dirty: set = set()
+        # 已淘汰但还没写盘的会话，读取时优先于磁盘
+        self._evicted_dirty: Dict[str, Dict] = {}
+        self.stats = {"hits": 0, "loads": 0, "misses": 0, "evictions": 0, "flushes": 0}
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if self._conn is not None and flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-store-flusher", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    # ---------- dict 接口 ----------
+
+    def __contains__(self, session_id) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> Dict:
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __setitem__(self, session_id: str, session: Dict):
+        with self._lock:
+            self._evicted_dirty.pop(session_id, None)
+            self._admit(session_id, session)
+            self._dirty.add(session_id)
+            self._evict()
+
+    def __delitem__(self, session_id: str):
+        if not self.delete(session_id):
+            raise KeyError(session_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._all_ids())
+
+    def get(self, session_id: str, default=None) -> Optional[Dict]:
+        """获取会话并标记为最近使用；不在内存时从磁盘加载"""
+        with self._lock:
+            entry = self._resident.get(session_id)
+            if entry is not None:
+                self.stats["hits"] += 1
+                entry[1] = time.monotonic()
+                self._resident.move_to_end(session_id)
+                return entry[0]
+            session = self._evicted_dirty.pop(session_id, None)
+            if session is None:
+                session = self._load(session_id)
+                if session is None:
+                    self.stats["misses"] += 1
+                    return default
+            else:
+                self._dirty.add(session_id)
+            self.stats["loads"] += 1
+            self._admit(session_id, session)
+            self._evict(keep=session_id)
+            return session
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """遍历全部会话（含已淘汰到磁盘的），磁盘上的会话只读取不放回内存"""
+        with self._lock:
+            resident = [(sid, entry[0]) for sid, entry in self._resident.items()]
+            resident += list(self._evicted_dirty.items())
+            known = {sid for sid, _ in resident}
+            stored = []
+            if self._conn is not None:
+                stored = self._conn.execute("SELECT id, data FROM sessions").fetchall()
+        for item in resident:
+            yield item
+        for sid, data in stored:
+            if sid not in known:
+                yield sid, json.loads(data)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._all_ids())
+
+    def clear(self):
+        with self._lock:
+            self._resident.clear()
+            self._evicted_dirty.clear()
+            self._dirty.clear()
+            self._bytes = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM sessions")
+                self._conn.commit()
+
+    # ---------- 会话修改与过期 ----------
+
+    def mark_dirty(self, session_id: str, session: Optional[Dict] = None):
+        """
+        会话内容被原地修改后调用：重新估算内存、安排写盘，必要时淘汰其他会话
+        传入 session 时，即使它在修改期间被其他线程淘汰也会重新放回内存，修改不会丢失
+        """
+        with self._lock:
+            entry = self._resident.get(session_id)
+            if entry is None:
+                if session is not None:
+                    self[session_id] = session
+                return
+            size = estimate_session_size(entry[0])
+            self._bytes += size - entry[2]
+            entry[2] = size
+            entry[1] = time.monotonic()
+            self._resident.move_to_end(session_id)
+            self._dirty.add(session_id)
+            self._evict(keep=session_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            found = False
+            entry = self._resident.pop(session_id, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+                found = True
+            if self._evicted_dirty.pop(session_id, None) is not None:
+                found = True
+            self._dirty.discard(session_id)
+            if self._conn is not None:
+                cur = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+                self._conn.commit()
+                found = found or cur.rowcount > 0
+            return found
+
+    def expire(self, max_age_seconds: float, now: Optional[float] = None) -> int:
+        """永久删除 last_activity（time.time()）早于 max_age_seconds 的会话，返回删除数量"""
+        cutoff = (now or time.time()) - max_age_seconds
+        with self._lock:
+            expired = {sid for sid, entry in self._resident.items() if entry[0]["last_activity"] < cutoff}
+            expired |= {sid for sid, s in self._evicted_dirty.items() if s["last_activity"] < cutoff}
+            for sid in expired:
+                entry = self._resident.pop(sid, None)
+                if entry is not None:
+                    self._bytes -= entry[2]
+                self._evicted_dirty.pop(sid, None)
+                self._dirty.discard(sid)
+            if self._conn is not None:
+                rows = self._conn.execute("SELECT id FROM sessions WHERE last_activity < ?", (cutoff,)).fetchall()
+                resident = set(self._resident) | set(self._evicted_dirty)
+                # 内存中的版本更新，以内存为准
+                stale = [sid for (sid,) in rows if sid not in resident]
+                expired.update(stale)
+                self._conn.executemany("DELETE FROM sessions WHERE id = ?", [(sid,) for sid in expired])
+                self._conn.commit()
+            return len(expired)
+
+    # ---------- 淘汰与持久化 ----------
+
+    def _all_ids(self) -> set:
+        ids = set(self._resident) | set(self._evicted_dirty)
+        if self._conn is not None:
+            ids.update(sid for (sid,) in self._conn.execute("SELECT id FROM sessions"))
+        return ids
+
+    def _admit(self, session_id: str, session: Dict):
+        old = self._resident.pop(session_id, None)
+        if old is not None:
+            self._bytes -= old[2]
+        size = estimate_session_size(session)
+        self._resident[session_id] = [session, time.monotonic(), size]
+        self._bytes += size
+
+    def _evict(self, keep: Optional[str] = None):
+        """从 LRU 头部淘汰：超出数量/内存预算，或空闲超过 idle_ttl"""
+        deadline = time.monotonic() - self.idle_ttl if self.idle_ttl > 0 else None
+        while self._resident:
+            session_id, entry = next(iter(self._resident.items()))
+            if session_id == keep:
+                break
+            over = len(self._resident) > self.max_sessions or self._bytes > self.memory_budget
+            idle = deadline is not None and entry[1] < deadline
+            if not (over or idle):
+                break
+            del self._resident[session_id]
+            self._bytes -= entry[2]
+            self.stats["evictions"] += 1
+            if self._conn is None:
+                # 未配置持久化：淘汰即丢弃
+                self._dirty.discard(session_id)
+            elif session_id in self._dirty:
+                self._dirty.discard(session_id)
+                self._evicted_dirty[session_id] = entry[0]
+
+    def _load(self, session_id: str) -> Optional[Dict]:
+        if self._conn is None:
+            return None
+        row = self._conn.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def flush(self) -> int:
+        """把脏会话写入磁盘，返回写入数量"""
+        with self._lock:
+            if self._conn is None:
+                return 0
+            rows = []
+            for sid in self._dirty:
+                entry = self._resident.get(sid)
+                if entry is not None:
+                    rows.append((sid, entry[0]["last_activity"], json.dumps(entry[0], ensure_ascii=False)))
+            for sid, session in self._evicted_dirty.items():
+                rows.append((sid, session["last_activity"], json.dumps(session, ensure_ascii=False)))
+            self._dirty.clear()
+            self._evicted_dirty.clear()
+            if rows:
+                self._conn.executemany("INSERT OR REPLACE INTO sessions(id, last_activity, data) VALUES (?, ?, ?)", rows)
+                self._conn.commit()
+                self.stats["flushes"] += 1
+            return len(rows)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                with self._lock:
+                    self._evict()
+                self.flush()
+            except Exception as e:
+                logger.error(f"会话写盘失败: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "resident_sessions": len(self._resident),
+                "resident_mb": round(self._bytes / 1024 / 1024, 2),
+                "dirty_sessions": len(self._dirty) + len(self._evicted_dirty),
+                "max_sessions": self.max_sessions,
+                "memory_budget_mb": round(self.memory_budget / 1024 / 1024, 2),
+                "idle_ttl": self.idle_ttl,
+                "persistent": self._conn is not None,
+                **self.stats,
+            }
+
+    def close(self):
+        """停止后台线程并把剩余的脏会话写盘"""
+        self._stop.set()
+        try:
+            with self._lock:
+                if self._conn is None:
+                    return
+                self.flush()
+                self._conn.close()
+                self._conn = None
+        except Exception as e:
+            logger.error(f"关闭会话存储失败: {e}")
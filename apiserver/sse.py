@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+SSE（text/event-stream）编解码
+- SSEDecoder: 增量解码。网络分块可能在任意字节处切断：半行、半个 UTF-8 字符、半个事件都会留在缓冲区，
+  等后续分块到达后再拼接解析，不会丢失跨分块的增量。
+- ChatStreamEncoder: /chat/stream 的输出帧。base64 为旧格式；text 为 UTF-8 JSON 事件，
+  配合 coalesce_deltas 按刷新间隔合并细碎增量，减少事件数与传输字节。
+"""
+
+import asyncio
+import base64
+import codecs
+import json
+import time
+from typing import AsyncIterator, List, Optional
+
+STREAM_FORMAT_BASE64 = "base64"
+STREAM_FORMAT_TEXT = "text"
+STREAM_FORMATS = (STREAM_FORMAT_BASE64, STREAM_FORMAT_TEXT)
+
+
+class SSEEvent:
+    """一个完整的 SSE 事件；多行 data 按规范以换行拼接"""
+
+    __slots__ = ("event", "data", "id")
+
+    def __init__(self, data: str, event: str = "message", id: Optional[str] = None):
+        self.data = data
+        self.event = event
+        self.id = id
+
+    def __repr__(self):
+        return f"SSEEvent(event={self.event!r}, data={self.data!r})"
+
+
+class SSEDecoder:
+    """按 WHATWG EventSource 规则解析字节流：空行分隔事件，支持 \\n / \\r\\n / \\r 行尾和注释行"""
+
+    def __init__(self, encoding: str = "utf-8"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._buffer = ""
+        self._data: List[str] = []
+        self._event = ""
+        self._id: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """输入一个网络分块，返回其中已完整的事件"""
+        self._buffer += self._decoder.decode(chunk)
+        return self._drain(final=False)
+
+    def flush(self) -> List[SSEEvent]:
+        """流结束时调用：处理缓冲区中最后一行以及未以空行结尾的事件"""
+        self._buffer += self._decoder.decode(b"", final=True)
+        events = self._drain(final=True)
+        if self._data:
+            events.append(self._dispatch())
+        return events
+
+    def _drain(self, final: bool) -> List[SSEEvent]:
+        events = []
+        buffer = self._buffer
+        start = 0
+        while True:
+            end = -1
+            for sep in ("\n", "\r"):
+                pos = buffer.find(sep, start)
+                if pos != -1 and (end == -1 or pos < end):
+                    end = pos
+            if end == -1:
+                break
+            # \r 位于缓冲区末尾时可能是 \r\n 的前半，等下一个分块再判断
+            if buffer[end] == "\r" and end + 1 == len(buffer) and not final:
+                break
+            line = buffer[start:end]
+            start = end + 2 if buffer.startswith("\r\n", end) else end + 1
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        rest = buffer[start:]
+        if final and rest:
+            event = self._process_line(rest)
+            if event is not None:
+                events.append(event)
+            rest = ""
+        self._buffer = rest
+        return events
+
+    def _process_line(self, line: str) -> Optional[SSEEvent]:
+        if not line:
+            return self._dispatch() if self._data else self._reset()
+        if line.startswith(":"):
+            return None  # 注释/心跳
+        field, sep, value = line.partition(":")
+        if sep and value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        return None
+
+    def _reset(self) -> None:
+        self._data = []
+        self._event = ""
+        return None
+
+    def _dispatch(self) -> SSEEvent:
+        event = SSEEvent("\n".join(self._data), self._event or "message", self._id)
+        self._reset()
+        return event
+
+
+class ChatStreamEncoder:
+    """
+    /chat/stream 输出帧编码
+    - base64: 旧格式，文本增量 base64 编码，会话ID/音频地址以 "session_id: " / "audio_url: " 前缀明文发送
+    - text  : 每个事件是一行 JSON：{"text": ...} / {"session_id": ...} / {"audio_url": ...} / {"error": ...}
+      audio_delivery=job 时音频以 {"tts_job": ..., "audio_url": "/tts/jobs/<id>/audio"} 事件下发（base64 格式为 "tts_job: " 前缀）
+    两种格式都以 data: [DONE] 结束
+    """
+
+    def __init__(self, stream_format: str = STREAM_FORMAT_BASE64):
+        self.stream_format = stream_format if stream_format in STREAM_FORMATS else STREAM_FORMAT_BASE64
+
+    @property
+    def is_text(self) -> bool:
+        return self.stream_format == STREAM_FORMAT_TEXT
+
+    @staticmethod
+    def _json(payload: dict) -> str:
+        return f"data: {json.dumps(payload, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+    def delta(self, text: str) -> str:
+        if self.is_text:
+            return self._json({"text": text})
+        return f"data: {base64.b64encode(text.encode('utf-8')).decode('ascii')}\n\n"
+
+    def session(self, session_id: str) -> str:
+        return self._json({"session_id": session_id}) if self.is_text else f"data: session_id: {session_id}\n\n"
+
+    def audio_url(self, url: str) -> str:
+        return self._json({"audio_url": url}) if self.is_text else f"data: audio_url: {url}\n\n"
+
+    def tts_job(self, job_id: str) -> str:
+        if self.is_text:
+            return self._json({"tts_job": job_id, "audio_url": f"/tts/jobs/{job_id}/audio"})
+        return f"data: tts_job: {job_id}\n\n"
+
+    def error(self, message: str) -> str:
+        return self._json({"error": message}) if self.is_text else f"data: {message}\n\n"
+
+    @staticmethod
+    def done() -> str:
+        return "data: [DONE]\n\n"
+
+
+async def coalesce_deltas(source: AsyncIterator[str], interval: float,
+                          max_chars: int = 512) -> AsyncIterator[str]:
+    """
+    合并细碎的文本增量：距离上次输出超过 interval 秒的增量立即输出（首字不受影响），
+    否则先缓冲，最迟在上次输出 interval 秒后整体输出；缓冲超过 max_chars 时立即输出。
+    interval <= 0 时原样透传。
+    """
+    if interval <= 0:
+        async for text in source:
+            yield text
+        return
+
+    iterator = source.__aiter__()
+    buffer: List[str] = []
+    buffered = 0
+    last_emit = float("-inf")
+    pending: Optional[asyncio.Task] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            timeout = None
+            if buffer:
+                timeout = max(0.0, last_emit + interval - time.monotonic())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+
+            if not done:
+                # 刷新间隔到期，输出缓冲
+                yield "".join(buffer)
+                buffer, buffered = [], 0
+                last_emit = time.monotonic()
+                continue
+
+            task, pending = pending, None
+            try:
+                text = task.result()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                # 上游出错前已缓冲的内容先输出，再把异常交给调用方
+                if buffer:
+                    yield "".join(buffer)
+                raise
+            if not text:
+                continue
+            buffer.append(text)
+            buffered += len(text)
+            now = time.monotonic()
+            if now - last_emit >= interval or buffered >= max_chars:
+                yield "".join(buffer)
+                buffer, buffered = [], 0
+                last_emit = now
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
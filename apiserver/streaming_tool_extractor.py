@@ -3,6 +3,8 @@
 """
 流式文本切割器
 负责将LLM流式输出按句切割并发送给语音集成（TTS）。不再检测或处理工具调用。
+切句是单遍扫描：每个文本块只被正则扫描一次，未完成的句子以片段列表保存，
+每个字符只在所属句子发出时拼接一次，处理耗时与响应总长度成线性关系。
 """
 
 import re
@@ -65,9 +67,10 @@ class StreamingToolCallExtractor:
     
     def __init__(self, mcp_manager=None):
         self.mcp_manager = mcp_manager
-        self.text_buffer = ""  # 普通文本缓冲区
-        self.complete_text = ""  # 完整文本内容
+        self._pending: List[str] = []  # 未完成句子的文本片段
+        self._complete_parts: List[str] = []  # 完整文本片段，读取时再拼接
         self.sentence_endings = r"[。？！；\.\?\!\;]"  # 断句标点
+        self._sentence_end = re.compile(self.sentence_endings)
         
         # 使用回调管理器
         self.callback_manager = CallbackManager()
@@ -77,6 +80,28 @@ class StreamingToolCallExtractor:
         
         # 工具调用功能已移除
         self.tool_calls_queue = None
+
+    @property
+    def text_buffer(self) -> str:
+        """未完成句子的文本（普通文本缓冲区）"""
+        if len(self._pending) > 1:
+            self._pending = ["".join(self._pending)]
+        return self._pending[0] if self._pending else ""
+
+    @text_buffer.setter
+    def text_buffer(self, value: str):
+        self._pending = [value] if value else []
+
+    @property
+    def complete_text(self) -> str:
+        """完整文本内容"""
+        if len(self._complete_parts) > 1:
+            self._complete_parts = ["".join(self._complete_parts)]
+        return self._complete_parts[0] if self._complete_parts else ""
+
+    @complete_text.setter
+    def complete_text(self, value: str):
+        self._complete_parts = [value] if value else []
         
     def set_callbacks(self, 
                      on_text_chunk: Optional[Callable] = None,
@@ -92,9 +117,9 @@ class StreamingToolCallExtractor:
         
         处理流程：
         1. 累积完整文本（用于最终保存）
-        2. 逐字符检查句子结束符
-        3. 遇到结束符时立即切割并发送完整句子到TTS
-        4. 保留未完成的句子部分继续累积
+        2. 单遍扫描文本块中的句子结束符
+        3. 每个结束符处切割，缓冲的未完成部分 + 本块到结束符为止的文本作为一句发送到TTS
+        4. 最后一个结束符之后的文本留在缓冲区继续累积
         """
         if not text_chunk:
             return None
@@ -107,23 +132,20 @@ class StreamingToolCallExtractor:
             results.append(result)
 
         # 累积完整文本（用于最终保存到数据库）
-        self.complete_text += text_chunk
+        self._complete_parts.append(text_chunk)
             
-        # 实时按句切割并发送到TTS
-        for char in text_chunk:
-            self.text_buffer += char
-            # 检查是否遇到句子结束符（。？！；等）
-            if re.search(self.sentence_endings, char):
-                # 立即切割并发送完整句子到TTS
-                sentences = re.split(self.sentence_endings, self.text_buffer)
-                if len(sentences) > 1:
-                    complete_sentence = sentences[0] + char
-                    if complete_sentence.strip():
-                        # 立即发送到语音集成进行TTS合成（不阻塞文本流）
-                        self._send_to_voice_integration(complete_sentence)
-                    # 保留未完成的句子部分，继续累积
-                    remaining_sentences = [s for s in sentences[1:] if s.strip()]
-                    self.text_buffer = "".join(remaining_sentences)
+        # 实时按句切割并发送到TTS：每个结束符（。？！；等）都结束一句，连续的结束符各自成句
+        start = 0
+        for match in self._sentence_end.finditer(text_chunk):
+            end = match.end()
+            self._pending.append(text_chunk[start:end])
+            # 立即发送到语音集成进行TTS合成（不阻塞文本流）
+            self._send_to_voice_integration("".join(self._pending))
+            self._pending = []
+            start = end
+        if start < len(text_chunk):
+            # 保留未完成的句子部分，继续累积
+            self._pending.append(text_chunk[start:])
         return results if results else None
     
     async def _flush_text_buffer(self):
@@ -137,16 +159,14 @@ class StreamingToolCallExtractor:
         return None
     
     def _send_to_voice_integration(self, text: str):
-        """发送文本到语音集成（不阻塞文本流）"""
+        """
+        按顺序发送句子到语音集成（不阻塞文本流）
+        receive_text_chunk 只做入队，合成在语音集成的线程池中进行，因此直接在当前线程调用，
+        句子顺序与文本顺序一致
+        """
         if self.voice_integration:
             try:
-                # 在独立线程中处理TTS，不阻塞文本流
-                import threading
-                threading.Thread(
-                    target=self.voice_integration.receive_text_chunk,
-                    args=(text,),
-                    daemon=True
-                ).start()
+                self.voice_integration.receive_text_chunk(text)
             except Exception as e:
                 logger.error(f"发送到语音集成失败: {e}")
     
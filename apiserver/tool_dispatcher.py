@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+MCP工具调度器
+批量工具调用通过同一个长连接池发往MCP服务器的 /schedule 接口：
+- 同一服务的并发数受 per_service_limit 限制，不同服务之间互不阻塞
+- 每个调用单独计时，超过 call_timeout 视为失败，不影响其他调用
+- 结果按原始 tool_calls 顺序返回
+- 按 服务.工具 统计调用次数、失败/超时次数与延迟分位数
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class ToolLatencyStats:
+    """单个工具的调用计数与最近延迟样本"""
+
+    def __init__(self, window: int = 256):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float, success: bool, timed_out: bool = False):
+        self.calls += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self._recent.append(latency_ms)
+        if not success:
+            self.failures += 1
+        if timed_out:
+            self.timeouts += 1
+
+    def _percentile(self, ordered: List[float], q: float) -> Optional[float]:
+        if not ordered:
+            return None
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))], 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        ordered = sorted(self._recent)
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else None,
+            "p50_ms": self._percentile(ordered, 0.5),
+            "p95_ms": self._percentile(ordered, 0.95),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class MCPToolDispatcher:
+    """MCP工具调度：复用HTTP连接池，按服务限流并发执行"""
+
+    def __init__(self, schedule_url: Optional[str] = None, per_service_limit: int = 4,
+                 max_connections: int = 20, call_timeout: float = 30.0):
+        self._schedule_url = schedule_url
+        self.per_service_limit = per_service_limit
+        self.max_connections = max_connections
+        self.call_timeout = call_timeout
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._service_slots: Dict[str, asyncio.Semaphore] = {}
+        self._stats: Dict[str, ToolLatencyStats] = {}
+        self.batches = 0
+
+    @property
+    def schedule_url(self) -> str:
+        if self._schedule_url is None:
+            from system.config import get_server_port
+            self._schedule_url = f"http://localhost:{get_server_port('mcp_server')}/schedule"
+        return self._schedule_url
+
+    def _ensure_loop_state(self):
+        """连接池与信号量都绑定事件循环，循环变化时重建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._client = None
+            self._service_slots = {}
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.call_timeout, connect=5.0),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+
+    def _service_slot(self, service_name: str) -> asyncio.Semaphore:
+        slot = self._service_slots.get(service_name)
+        if slot is None:
+            slot = self._service_slots[service_name] = asyncio.Semaphore(self.per_service_limit)
+        return slot
+
+    async def post_schedule(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> httpx.Response:
+        """通过共享连接池向MCP服务器提交一次调度请求"""
+        self._ensure_loop_state()
+        return await self._client.post(self.schedule_url, json=payload,
+                                       timeout=httpx.Timeout(timeout or self.call_timeout, connect=5.0))
+
+    async def call(self, index: int, total: int, tool_call: Dict[str, Any], session_id: str,
+                   timeout: Optional[float] = None) -> Dict[str, Any]:
+        """执行单个工具调用，返回结果描述（不抛出异常）"""
+        service_name = tool_call.get("service_name")
+        tool_name = tool_call.get("tool_name")
+        tool = f"{service_name}.{tool_name}"
+        timeout = timeout or self.call_timeout
+        outcome: Dict[str, Any] = {
+            "index": index, "tool": tool, "service_name": service_name, "tool_name": tool_name,
+            "success": False, "result": None, "error": None, "latency_ms": 0.0,
+        }
+        payload = {
+            "query": f"批量MCP {index + 1}/{total}: {tool}",
+            "tool_calls": [tool_call],
+            "session_id": session_id,
+            "request_id": str(uuid.uuid4()),
+            "skip_callback": True,
+        }
+
+        timed_out = False
+        async with self._service_slot(str(service_name)):
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(self.post_schedule(payload, timeout), timeout)
+                if response.status_code == 200:
+                    outcome["success"] = True
+                    outcome["result"] = response.json()
+                else:
+                    outcome["error"] = f"HTTP {response.status_code}"
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                timed_out = True
+                outcome["error"] = f"超时({timeout:g}s)"
+            except Exception as e:
+                outcome["error"] = str(e) or type(e).__name__
+            outcome["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+        stats = self._stats.get(tool)
+        if stats is None:
+            stats = self._stats[tool] = ToolLatencyStats()
+        stats.record(outcome["latency_ms"], outcome["success"], timed_out)
+        return outcome
+
+    async def dispatch(self, tool_calls: List[Dict[str, Any]], session_id: str,
+                       timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """并发执行一批工具调用，结果顺序与 tool_calls 一致"""
+        self._ensure_loop_state()
+        self.batches += 1
+        total = len(tool_calls)
+        return await asyncio.gather(*(
+            self.call(i, total, tool_call, session_id, timeout) for i, tool_call in enumerate(tool_calls)
+        ))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "per_service_limit": self.per_service_limit,
+            "max_connections": self.max_connections,
+            "call_timeout": self.call_timeout,
+            "tools": {tool: stats.snapshot() for tool, stats in self._stats.items()},
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_tool_dispatcher: Optional[MCPToolDispatcher] = None
+
+
+def get_tool_dispatcher() -> MCPToolDispatcher:
+    """获取全局MCP工具调度器实例"""
+    global _tool_dispatcher
+    if _tool_dispatcher is None:
+        kwargs = {}
+        try:
+            from system.config import config
+            kwargs = {
+                "per_service_limit": config.api_server.mcp_per_service_limit,
+                "max_connections": config.api_server.mcp_max_connections,
+                "call_timeout": config.api_server.mcp_call_timeout,
+            }
+        except Exception:
+            pass
+        _tool_dispatcher = MCPToolDispatcher(**kwargs)
+    return _tool_dispatcher
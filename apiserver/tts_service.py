@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+异步TTS服务
+- 全进程共用一个长期存活的TTS引擎（默认是 VoiceIntegration 单例的 _generate_audio_sync），
+  不再每个请求新建 VoiceIntegration
+- submit() 立即返回任务，合成在固定大小的线程池中进行，不阻塞事件循环，文本流也不会等待音频
+- 音频写入 logs/audio_temp/tts_<job_id>.<格式>，通过任务ID查询状态或获取音频（/tts/jobs/{job_id}/audio）
+- 任务记录有数量上限与存活时间，过期任务连同音频文件一起清理
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional
+
+from voice.output.tts_pipeline import latency_percentile_ms
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class TTSServiceBusy(Exception):
+    """排队中的合成任务已达上限"""
+
+
+class TTSJob:
+    """一次合成任务"""
+
+    __slots__ = ("id", "text", "status", "created_at", "started_at", "finished_at",
+                 "audio_path", "audio_size", "error", "future")
+
+    def __init__(self, job_id: str, text: str):
+        self.id = job_id
+        self.text = text
+        self.status = JOB_PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.audio_path: Optional[str] = None
+        self.audio_size = 0
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "text_length": len(self.text),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "audio_path": self.audio_path,
+            "audio_size": self.audio_size,
+            "audio_url": f"/tts/jobs/{self.id}/audio",
+            "error": self.error,
+        }
+
+
+class TTSService:
+    """非阻塞TTS任务服务（线程安全，可在事件循环与工作线程中调用）"""
+
+    def __init__(self, engine: Optional[Callable[[str], Optional[bytes]]] = None, workers: int = 2,
+                 max_pending: int = 32, max_jobs: int = 256, job_ttl: float = 300,
+                 audio_dir: str = "logs/audio_temp", audio_format: str = "mp3"):
+        self._engine = engine
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_jobs = max_jobs
+        self.job_ttl = job_ttl
+        self.audio_dir = audio_dir
+        self.audio_format = audio_format
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, TTSJob]" = OrderedDict()
+        self._pending = 0
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    @property
+    def engine(self) -> Callable[[str], Optional[bytes]]:
+        """默认引擎：语音集成单例（首次合成时才创建，避免服务启动时加载音频系统）"""
+        if self._engine is None:
+            from voice.output.voice_integration import get_voice_integration
+            self._engine = get_voice_integration()._generate_audio_sync
+        return self._engine
+
+    # ---------- 提交与查询 ----------
+
+    def submit(self, text: str, on_done: Optional[Callable[[TTSJob], None]] = None) -> TTSJob:
+        """
+        提交合成任务并立即返回；排队任务已满时抛出 TTSServiceBusy
+        on_done 在合成成功后于工作线程中调用（如交给UI端播放）
+        """
+        job = TTSJob(uuid.uuid4().hex, text)
+        with self._lock:
+            self._prune()
+            if self._pending >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise TTSServiceBusy(f"TTS任务排队已满（{self.max_pending}）")
+            self._pending += 1
+            self._jobs[job.id] = job
+            self.stats["submitted"] += 1
+        job.future = self._executor.submit(self._run, job, on_done)
+        return job
+
+    def get(self, job_id: str) -> Optional[TTSJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[TTSJob]:
+        """在事件循环中等待任务结束（不占用线程），超时后返回当前状态的任务"""
+        job = self.get(job_id)
+        if job is None or job.finished or job.future is None:
+            return job
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout)
+        except asyncio.TimeoutError:
+            pass
+        except Exception:
+            pass  # 失败信息已记录在任务上
+        return job
+
+    # ---------- 合成 ----------
+
+    def _run(self, job: TTSJob, on_done: Optional[Callable[[TTSJob], None]]):
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        status = JOB_FAILED
+        try:
+            audio = self.engine(job.text)
+            if not audio:
+                raise RuntimeError("TTS引擎返回空音频")
+            os.makedirs(self.audio_dir, exist_ok=True)
+            path = os.path.join(self.audio_dir, f"tts_{job.id}.{self.audio_format}")
+            with open(path, "wb") as f:
+                f.write(audio)
+            job.audio_path = path
+            job.audio_size = len(audio)
+            status = JOB_DONE
+        except Exception as e:
+            job.error = str(e)
+            status = JOB_FAILED
+            logger.error(f"TTS任务 {job.id} 失败: {e}")
+        finally:
+            # 先记录结束时间再更新状态，清理线程看到已结束的任务时 finished_at 一定存在
+            job.finished_at = time.time()
+            job.status = status
+            with self._lock:
+                self._pending -= 1
+                self.stats["completed" if job.status == JOB_DONE else "failed"] += 1
+                self._latencies.append(job.finished_at - job.created_at)
+
+        if job.status == JOB_DONE and on_done is not None:
+            try:
+                on_done(job)
+            except Exception as e:
+                logger.error(f"TTS任务 {job.id} 完成回调失败: {e}")
+
+    def _prune(self):
+        """清理超出存活时间或数量上限的已结束任务（调用方持有锁）"""
+        deadline = time.time() - self.job_ttl
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            over = len(self._jobs) >= self.max_jobs  # 为即将加入的任务留出位置
+            if not job.finished:
+                continue
+            if not over and job.finished_at >= deadline:
+                break
+            del self._jobs[job_id]
+            if job.audio_path:
+                try:
+                    os.remove(job.audio_path)
+                except OSError:
+                    pass
+
+    # ---------- 统计与关闭 ----------
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            ordered = sorted(self._latencies)
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "jobs": len(self._jobs),
+                "latency_p50_ms": latency_percentile_ms(ordered, 0.5),
+                "latency_p95_ms": latency_percentile_ms(ordered, 0.95),
+                **self.stats,
+            }
+
+    async def aclose(self):
+        """停止接收新任务；不等待正在进行的合成"""
+        self._executor.shutdown(wait=False)
+
+
+_tts_service: Optional[TTSService] = None
+_tts_service_lock = threading.Lock()
+
+
+def get_tts_service() -> TTSService:
+    """获取全局TTS服务实例"""
+    global _tts_service
+    if _tts_service is None:
+        with _tts_service_lock:
+            if _tts_service is None:
+                from system.config import config
+                _tts_service = TTSService(
+                    workers=config.api_server.tts_workers,
+                    max_pending=config.api_server.tts_max_pending,
+                    max_jobs=config.api_server.tts_max_jobs,
+                    job_ttl=config.api_server.tts_job_ttl,
+                    audio_format=getattr(config.tts, "default_format", "mp3"),
+                )
+    return _tts_service
+
+
+async def close_tts_service():
+    """关闭全局TTS服务（应用退出时调用）"""
+    if _tts_service is not None:
+        await _tts_service.aclose()
@@ -388,8 +388,8 @@ class AgentQQWeChat:
             import os
             sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-            from voice.output.voice_integration import VoiceIntegration
-            voice_integration = VoiceIntegration()
+            from voice.output.voice_integration import get_voice_integration
+            voice_integration = get_voice_integration()
             return await voice_integration._generate_audio_sync(text)
         except Exception as e:
             logger.error(f"生成音频数据异常: {e}")
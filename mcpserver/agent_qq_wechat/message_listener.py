@@ -1974,9 +1974,9 @@ class QQWeChatMessageListener:
             # 添加项目根目录到路径
             sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-            from voice.output.voice_integration import VoiceIntegration
+            from voice.output.voice_integration import get_voice_integration
 
-            voice_integration = VoiceIntegration()
+            voice_integration = get_voice_integration()
 
             # 生成音频数据（_generate_audio_sync是同步函数，不需要await）
             audio_data = voice_integration._generate_audio_sync(text)
@@ -0,0 +1,185 @@
+# mcp_capability_index.py # MCP服务能力索引：由manifest构建，与manifest缓存增量对齐
+"""
+MCP服务能力索引
+- 文本索引：displayName、description 的字符1/2元组倒排，按能力关键词取候选后再做子串校验，
+  结果与逐个manifest子串扫描一致
+- 词索引：服务名、displayName、description 与 capabilities 中所有字符串的词（英文单词、中文二元组）倒排，
+  能力关键词的每个词都命中时也算匹配（如按工具命令名 today_weather 查服务）
+- 预先计算每个服务由manifest声明的工具列表
+"""
+
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+_WORD_PATTERN = re.compile(r"([a-z0-9_]+)|([\u4e00-\u9fff]+)")
+
+
+def tokenize(text: str) -> Set[str]:
+    """英文/数字按单词，中文按相邻二字切分（单字保留）"""
+    tokens = set()
+    for word, cjk in _WORD_PATTERN.findall(text.lower()):
+        if word:
+            tokens.add(word)
+        elif len(cjk) == 1:
+            tokens.add(cjk)
+        else:
+            tokens.update(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+def _grams(text: str) -> Set[str]:
+    """字符一元与二元组，用于子串匹配的候选过滤"""
+    return set(text) | {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _iter_strings(value: Any) -> Iterator[str]:
+    """遍历capabilities中的所有字符串（含字典键）"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield str(key)
+            yield from _iter_strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def manifest_tools(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """manifest中 capabilities.invocationCommands 声明的工具列表"""
+    capabilities = manifest.get('capabilities') or {}
+    invocation_commands = capabilities.get('invocationCommands', []) if isinstance(capabilities, dict) else []
+    return [{
+        "name": cmd.get('command', ''),
+        "description": cmd.get('description', ''),
+        "example": cmd.get('example', ''),
+    } for cmd in invocation_commands or [] if isinstance(cmd, dict)]
+
+
+class CapabilityIndex:
+    """服务能力倒排索引"""
+
+    def __init__(self):
+        self._manifests: Dict[str, Dict[str, Any]] = {}
+        self._order: Dict[str, int] = {}
+        self._seq = 0
+        self._texts: Dict[str, List[str]] = {}
+        self._service_grams: Dict[str, Set[str]] = {}
+        self._service_tokens: Dict[str, Set[str]] = {}
+        self._gram_index: Dict[str, Set[str]] = {}
+        self._token_index: Dict[str, Set[str]] = {}
+        self._tools: Dict[str, List[Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._manifests)
+
+    def __contains__(self, service_name: str) -> bool:
+        return service_name in self._manifests
+
+    def add(self, service_name: str, manifest: Optional[Dict[str, Any]]) -> None:
+        """加入或更新一个服务"""
+        if service_name in self._manifests:
+            self.remove(service_name, keep_order=True)
+        else:
+            self._order[service_name] = self._seq
+            self._seq += 1
+        manifest = manifest or {}
+        self._manifests[service_name] = manifest
+
+        description = str(manifest.get('description') or '').lower()
+        display_name = str(manifest.get('displayName') or '').lower()
+        self._texts[service_name] = [description, display_name]
+        grams = _grams(description) | _grams(display_name)
+        self._service_grams[service_name] = grams
+        for gram in grams:
+            self._gram_index.setdefault(gram, set()).add(service_name)
+
+        tokens = tokenize(service_name) | tokenize(description) | tokenize(display_name)
+        for text in _iter_strings(manifest.get('capabilities')):
+            tokens |= tokenize(text)
+        self._service_tokens[service_name] = tokens
+        for token in tokens:
+            self._token_index.setdefault(token, set()).add(service_name)
+
+        self._tools[service_name] = manifest_tools(manifest)
+
+    def remove(self, service_name: str, keep_order: bool = False) -> None:
+        """移除一个服务（不存在时忽略）"""
+        if service_name not in self._manifests:
+            return
+        del self._manifests[service_name]
+        for gram in self._service_grams.pop(service_name, ()):
+            _discard(self._gram_index, gram, service_name)
+        for token in self._service_tokens.pop(service_name, ()):
+            _discard(self._token_index, token, service_name)
+        self._texts.pop(service_name, None)
+        self._tools.pop(service_name, None)
+        if not keep_order:
+            self._order.pop(service_name, None)
+
+    def sync(self, manifests: Dict[str, Dict[str, Any]]) -> None:
+        """与manifest缓存对齐：新增、移除或替换过的服务增量更新"""
+        # 快速路径：服务名与manifest逐个相同（列表比较在C层完成，同一对象直接判等不做深比较）
+        if (len(manifests) == len(self._manifests)
+                and list(manifests) == list(self._manifests)
+                and list(manifests.values()) == list(self._manifests.values())):
+            return
+        for service_name in [name for name in self._manifests if name not in manifests]:
+            self.remove(service_name)
+        for service_name, manifest in manifests.items():
+            if self._manifests.get(service_name) is not manifest:
+                self.add(service_name, manifest)
+        # 替换过的服务会排到末尾，按缓存顺序重排以便下次走快速路径
+        self._manifests = {name: self._manifests[name] for name in manifests}
+
+    def sync_service(self, service_name: str, manifest: Optional[Dict[str, Any]]) -> None:
+        """只对齐一个服务（manifest为None表示已注销）"""
+        if manifest is None:
+            self.remove(service_name)
+        elif self._manifests.get(service_name) is not manifest:
+            self.add(service_name, manifest)
+
+    def tools(self, service_name: str) -> List[Dict[str, Any]]:
+        """manifest声明的工具列表（副本）"""
+        return [dict(tool) for tool in self._tools.get(service_name, [])]
+
+    def query(self, capability: str) -> List[str]:
+        """按能力关键词查询服务，按注册顺序返回"""
+        needle = capability.lower()
+        matches: Set[str] = set()
+
+        # displayName / description 子串匹配：先用字符一元/二元组求候选
+        grams = {needle[i:i + 2] for i in range(len(needle) - 1)} if len(needle) > 1 else set(needle)
+        if not needle:
+            candidates = set(self._manifests)
+        else:
+            candidates = _intersect(self._gram_index, grams)
+        matches.update(name for name in candidates if any(needle in text for text in self._texts[name]))
+
+        # 词匹配：关键词的所有词都出现在服务名/描述/capabilities中
+        tokens = tokenize(needle)
+        if tokens:
+            matches |= _intersect(self._token_index, tokens)
+
+        return sorted(matches, key=self._order.__getitem__)
+
+
+def _discard(index: Dict[str, Set[str]], key: str, service_name: str) -> None:
+    services = index.get(key)
+    if services is not None:
+        services.discard(service_name)
+        if not services:
+            del index[key]
+
+
+def _intersect(index: Dict[str, Set[str]], keys: Set[str]) -> Set[str]:
+    """各键倒排表的交集，从最短的开始"""
+    postings = sorted((index.get(key, set()) for key in keys), key=len)
+    if not postings or not postings[0]:
+        return set()
+    result = set(postings[0])
+    for services in postings[1:]:
+        result &= services
+        if not result:
+            break
+    return result
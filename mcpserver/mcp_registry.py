@@ -15,6 +15,16 @@ from nagaagent_core.stable.mcp import (
     MCP_REGISTRY,
     MANIFEST_CACHE
 )
+from mcpserver.mcp_capability_index import CapabilityIndex
+
+# 能力倒排索引与预计算的manifest工具列表，按MANIFEST_CACHE增量对齐
+_capability_index = CapabilityIndex()
+
+def _ensure_capability_index() -> CapabilityIndex:
+    """与MANIFEST_CACHE对齐：只比较服务名与manifest对象是否相同，新增、移除或整体替换的服务增量重建
+    （原地修改的manifest对象不会被发现，应替换为新对象）"""
+    _capability_index.sync(MANIFEST_CACHE)
+    return _capability_index
 
 def get_service_info(service_name: str) -> Optional[Dict[str, Any]]:
     """获取指定服务的详细信息
@@ -66,21 +76,9 @@ def get_available_tools(service_name: str) -> List[Dict[str, Any]]:
             import logging
             logging.warning(f"调用{service_name}的get_available_tools()失败: {e}")
 
-    # 回退到从manifest读取
-    manifest = MANIFEST_CACHE.get(service_name, {})
-    # invocationCommands 在 manifest 的 capabilities 下面
-    capabilities = manifest.get('capabilities', {})
-    invocation_commands = capabilities.get('invocationCommands', [])
-
-    tools = []
-    for cmd in invocation_commands:
-        tools.append({
-            "name": cmd.get('command', ''),
-            "description": cmd.get('description', ''),
-            "example": cmd.get('example', ''),
-        })
-
-    return tools
+    # 回退到manifest中声明的工具（预先计算，只对齐该服务）
+    _capability_index.sync_service(service_name, MANIFEST_CACHE.get(service_name))
+    return _capability_index.tools(service_name)
 
 def get_all_services_info() -> Dict[str, Any]:
     """获取所有已注册服务的详细信息
@@ -105,16 +103,8 @@ def query_services_by_capability(capability: str) -> List[str]:
     Returns:
         List[str]: 匹配的服务名称列表
     """
-    matching_services = []
-    
-    for service_name, manifest in MANIFEST_CACHE.items():
-        description = manifest.get('description', '').lower()
-        display_name = manifest.get('displayName', '').lower()
-        
-        if capability.lower() in description or capability.lower() in display_name:
-            matching_services.append(service_name)
-    
-    return matching_services
+    # 倒排索引：displayName/description 子串匹配，或关键词的词全部出现在服务名/描述/capabilities中
+    return _ensure_capability_index().query(capability)
 
 def get_service_statistics() -> Dict[str, Any]:
     """获取服务统计信息
@@ -136,6 +126,7 @@ def get_service_statistics() -> Dict[str, Any]:
 def auto_register_mcp():
     """自动注册所有MCP服务"""
     registered = scan_and_register_mcp_agents()
+    _ensure_capability_index()
     sys.stderr.write(f"MCP注册完成，共注册 {len(registered)} 个服务: {registered}\n")
     return registered
 
@@ -6,11 +6,15 @@ MCP调度器 - 负责MCP任务的调度和执行
 """
 
 import asyncio
+import time
 import uuid
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass
+from typing import Deque, Dict, Any, List, Optional, Set, Tuple
+from dataclasses import dataclass, field
 from system.config import config, logger
+from .mcp_task_executor import ToolCallExecutor
+from .mcp_task_store import CompletedTaskStore, TaskFingerprintIndex
 
 # 能力信息从注册中心获取，由上层管理
 
@@ -32,49 +36,208 @@ class MCPTask:
     error: Optional[str] = None
     retry_count: int = 0
     max_retries: int = 3
+    done: Optional[asyncio.Future] = field(default=None, repr=False)  # 任务结束（完成/失败/取消）时置为结果
+    enqueued_at: float = field(default=0.0, repr=False)  # 最近一次入队时间（monotonic），用于排队延迟统计
+
+    def resolve(self) -> None:
+        """唤醒等待该任务的调用方（只生效一次）"""
+        if self.done is not None and not self.done.done():
+            self.done.set_result(self)
+
+    def services(self) -> Set[str]:
+        return {str(tc.get("service_name", "")) for tc in self.tool_calls}
+
+
+class ServiceQuota:
+    """按服务限制同时执行的任务数，超额的任务暂存在该服务的等待队列里，不占用工作协程"""
+
+    def __init__(self, default_quota: int, quotas: Optional[Dict[str, int]] = None):
+        self.default_quota = default_quota
+        self.quotas = dict(quotas or {})
+        self.running: Dict[str, int] = {}
+        self.parked: Dict[str, Deque[MCPTask]] = {}
+
+    def quota(self, service: str) -> int:
+        return self.quotas.get(service, self.default_quota)
+
+    def try_acquire(self, task: MCPTask) -> bool:
+        """任务涉及的服务都有空位时占用全部空位；否则暂存到第一个满额服务的等待队列"""
+        services = task.services()
+        for service in services:
+            if self.running.get(service, 0) >= self.quota(service):
+                self.parked.setdefault(service, deque()).append(task)
+                return False
+        for service in services:
+            self.running[service] = self.running.get(service, 0) + 1
+        return True
+
+    def release(self, task: MCPTask) -> List[MCPTask]:
+        """释放任务占用的空位，返回可以重新入队的暂存任务"""
+        for service in task.services():
+            self.running[service] -= 1
+            if not self.running[service]:
+                del self.running[service]
+        return self.wake(task.services())
+
+    def wake(self, services: Set[str]) -> List[MCPTask]:
+        """取出这些服务空位数以内的暂存任务（跳过已取消的）"""
+        ready = []
+        for service in services:
+            waiting = self.parked.get(service)
+            free = self.quota(service) - self.running.get(service, 0)
+            while waiting and free > 0:
+                task = waiting.popleft()
+                if task.status != "cancelled":
+                    ready.append(task)
+                    free -= 1
+            if waiting is not None and not waiting:
+                del self.parked[service]
+        return ready
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": dict(self.running),
+            "parked": {service: len(waiting) for service, waiting in self.parked.items()},
+        }
+
 
 class MCPScheduler:
     """MCP调度器 - 负责任务调度和执行"""
     
-    def __init__(self, mcp_manager=None):
+    def __init__(self, mcp_manager=None, sync_timeout: Optional[float] = None,
+                 per_service_limit: Optional[int] = None, completed_max: Optional[int] = None,
+                 completed_ttl: Optional[float] = None, spill_path: Optional[str] = None):
+        settings = config.mcp_scheduler
         self.mcp_manager = mcp_manager
+        # 同步模式（skip_callback）默认最长等待时间（秒）
+        self.sync_timeout = sync_timeout or settings.sync_timeout
+        # 任务内无依赖的工具调用并发执行，同一服务最多 per_service_limit 个
+        self.tool_executor = ToolCallExecutor(self._execute_single_tool_call,
+                                              per_service_limit or settings.per_service_limit)
         self.active_tasks: Dict[str, MCPTask] = {}
-        self.completed_tasks: Dict[str, MCPTask] = {}
+        # 已完成任务只保留最近一批，移出内存的任务可选写入JSONL留档
+        if spill_path is None and settings.completed_spill:
+            spill_path = str(config.system.log_dir / "mcp_tasks" / "completed.jsonl")
+        self.completed_tasks = CompletedTaskStore(
+            max_tasks=completed_max or settings.completed_max,
+            ttl=settings.completed_ttl if completed_ttl is None else completed_ttl,
+            spill_path=spill_path,
+            spill_max_bytes=int(settings.completed_spill_max_mb * 1024 * 1024),
+        )
+        # 活跃任务的 (query, tool_calls) 指纹索引，用于O(1)去重
+        self._fingerprints = TaskFingerprintIndex()
         self.task_queue = asyncio.Queue()
-        self.worker_tasks: List[asyncio.Task] = []
-        self.max_concurrent = 10
         self.shutdown_event = asyncio.Event()
         
+        # 工作协程池：阻塞等待队列，按排队深度与排队延迟在 [min_workers, max_workers] 之间伸缩
+        self.min_workers = settings.min_workers
+        self.max_workers = max(settings.max_workers, self.min_workers)
+        self.max_concurrent = self.max_workers
+        self.target_queue_wait = settings.target_queue_wait_ms / 1000
+        self.worker_tasks: Set[asyncio.Task] = set()
+        self._worker_seq = 0
+        self._live_workers = 0  # 未退出的工作协程数（worker_tasks 在协程结束后才移除）
+        self._retiring = 0  # 已放入队列、尚未被取走的缩容信号数
+        self._idle_workers = 0
+        self._busy_workers = 0
+        self._queue_wait_ewma = 0.0
+        self._queue_waits: Deque[float] = deque(maxlen=256)
+        self._executed = 0
+        # 同一服务同时执行的任务数受限，慢服务不会占满工作协程
+        self.service_quota = ServiceQuota(settings.service_quota, settings.service_quotas)
+        
         # 启动工作线程
         self._start_workers()
     
     def _start_workers(self):
-        """启动工作线程"""
-        for i in range(self.max_concurrent):
-            worker = asyncio.create_task(self._worker(f"worker-{i}"))
-            self.worker_tasks.append(worker)
+        """启动常驻的最少工作协程"""
+        for _ in range(self.min_workers):
+            self._spawn_worker()
+    
+    def _spawn_worker(self) -> None:
+        name = f"worker-{self._worker_seq}"
+        self._worker_seq += 1
+        self._live_workers += 1
+        worker = asyncio.create_task(self._worker(name))
+        self.worker_tasks.add(worker)
+        worker.add_done_callback(self.worker_tasks.discard)
+    
+    def _enqueue(self, task: MCPTask) -> None:
+        """任务入队，空闲协程不够或排队延迟超标时扩容"""
+        task.enqueued_at = time.monotonic()
+        self.task_queue.put_nowait(task)
+        if self.shutdown_event.is_set() or self._live_workers >= self.max_workers:
+            return
+        if (self.task_queue.qsize() > self._idle_workers - self._retiring
+                or self._queue_wait_ewma > self.target_queue_wait):
+            self._spawn_worker()
+    
+    def _retire_excess(self) -> bool:
+        """队列已空且排队延迟正常时缩容到 max(min_workers, 忙碌数)
+
+        当前协程直接退出，其余多出的空闲协程通过队列里的None唤醒后退出。返回当前协程是否退出。
+        """
+        if (self.shutdown_event.is_set() or self.task_queue.qsize() > self._retiring
+                or self._queue_wait_ewma > self.target_queue_wait):
+            return False
+        excess = self._live_workers - self._retiring - max(self.min_workers, self._busy_workers)
+        if excess <= 0:
+            return False
+        for _ in range(excess - 1):
+            self._retiring += 1
+            self.task_queue.put_nowait(None)
+        return True
+    
+    def _observe_queue_wait(self, task: MCPTask) -> None:
+        wait = time.monotonic() - task.enqueued_at
+        self._queue_waits.append(wait)
+        self._queue_wait_ewma = wait if not self._executed else 0.8 * self._queue_wait_ewma + 0.2 * wait
+        self._executed += 1
     
     async def _worker(self, worker_name: str):
-        """工作线程"""
-        while not self.shutdown_event.is_set():
-            try:
-                # 等待任务或关闭信号
-                task = await asyncio.wait_for(
-                    self.task_queue.get(), 
-                    timeout=1.0
-                )
+        """工作协程：阻塞等待任务，没有轮询超时"""
+        try:
+            while True:
+                self._idle_workers += 1
+                try:
+                    task = await self.task_queue.get()
+                finally:
+                    self._idle_workers -= 1
                 
-                if task is None:  # 关闭信号
+                if task is None:  # 缩容或关闭信号
+                    if self._retiring and not self.shutdown_event.is_set():
+                        self._retiring -= 1
                     break
                 
-                await self._execute_task(task)
+                if self.shutdown_event.is_set():
+                    break
+                
+                if task.status == "cancelled":  # 排队期间已被取消
+                    for ready in self.service_quota.wake(task.services()):
+                        self._enqueue(ready)
+                    continue
+                
+                # 服务满额：任务暂存，等该服务有任务结束时重新入队
+                if not self.service_quota.try_acquire(task):
+                    continue
                 
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"工作线程 {worker_name} 执行任务失败: {e}")
+                self._observe_queue_wait(task)
+                self._busy_workers += 1
+                try:
+                    await self._execute_task(task)
+                except Exception as e:
+                    logger.error(f"工作线程 {worker_name} 执行任务失败: {e}")
+                finally:
+                    self._busy_workers -= 1
+                    for ready in self.service_quota.release(task):
+                        self._enqueue(ready)
+                
+                if self._retire_excess():
+                    break
+        finally:
+            self._live_workers -= 1
         
-        logger.info(f"MCP调度器工作线程 {worker_name} 关闭")
+        logger.debug(f"MCP调度器工作线程 {worker_name} 关闭")
     
     async def _execute_task(self, task: MCPTask):
         """执行单个任务"""
@@ -87,19 +250,8 @@ class MCPScheduler:
             # 能力分析（已简化/可选）
             # 如需根据能力做路由，可在此从注册中心获取信息
                 
-            # 执行工具调用
-            results = []
-            for tool_call in task.tool_calls:
-                try:
-                    result = await self._execute_single_tool_call(tool_call)
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"工具调用失败: {tool_call} - {e}")
-                    results.append({
-                        "tool": tool_call.get("tool_name", "unknown"),
-                        "success": False,
-                        "error": str(e)
-                    })
+            # 执行工具调用（按依赖关系并发，结果保持原顺序）
+            results = await self.tool_executor.execute(task.tool_calls)
             
             # 更新任务状态
             task.status = "completed"
@@ -111,6 +263,7 @@ class MCPScheduler:
             }
             
             logger.info(f"MCP任务完成: {task.id}")
+            self._finish_task(task)  # 先唤醒同步等待方，不必等回调重试结束
             # 回调通知（可选）
             await self._maybe_callback(task)
             
@@ -124,6 +277,7 @@ class MCPScheduler:
                 "error": str(e),
                 "message": f"任务执行失败: {str(e)}"
             }
+            self._finish_task(task)
             # 回调失败也尝试通知
             try:
                 await self._maybe_callback(task)
@@ -131,10 +285,14 @@ class MCPScheduler:
                 pass
         
         finally:
-            # 移动到已完成任务
-            if task.id in self.active_tasks:
-                del self.active_tasks[task.id]
-            self.completed_tasks[task.id] = task
+            self._finish_task(task)
+
+    def _finish_task(self, task: MCPTask) -> None:
+        """移动到已完成任务并唤醒等待方（可重复调用）"""
+        self.active_tasks.pop(task.id, None)
+        self._fingerprints.discard(task.id)
+        self.completed_tasks[task.id] = task
+        task.resolve()
 
     async def _maybe_callback(self, task: MCPTask) -> None:
         """如果提供了callback_url，则POST回传任务结果"""
@@ -289,47 +447,21 @@ class MCPScheduler:
                 session_id=task_info.get("session_id"),
                 request_id=task_info.get("request_id"),
                 callback_url=task_info.get("callback_url"),
-                created_at=task_info["created_at"]
+                created_at=task_info["created_at"],
+                done=asyncio.get_running_loop().create_future()
             )
 
             # 添加到活跃任务
             self.active_tasks[task.id] = task
+            self._fingerprints.add(task.id, task.query, task.tool_calls)
 
             # 加入队列
-            await self.task_queue.put(task)
+            self._enqueue(task)
 
             # 如果是同步模式（skip_callback=True），等待任务完成
             if skip_callback:
                 logger.info(f"[MCP调度] 同步等待任务完成: {task.id}")
-                # 等待任务完成，最多等待60秒
-                try:
-                    for _ in range(60):  # 60秒超时
-                        await asyncio.sleep(1)
-                        if task.status in ["completed", "failed"]:
-                            logger.info(f"[MCP调度] 任务完成: {task.id}, status={task.status}")
-                            return {
-                                "success": task.status == "completed",
-                                "message": f"任务执行完成: {task.status}",
-                                "task_id": task.id,
-                                "result": task.result if task.status == "completed" else None,
-                                "error": task.error if task.status == "failed" else None
-                            }
-                    # 超时
-                    logger.warning(f"[MCP调度] 任务执行超时: {task.id}")
-                    return {
-                        "success": False,
-                        "message": "任务执行超时",
-                        "task_id": task.id,
-                        "error": "执行超时（60秒）"
-                    }
-                except Exception as e:
-                    logger.error(f"[MCP调度] 同步等待异常: {e}")
-                    return {
-                        "success": False,
-                        "message": f"任务等待异常: {str(e)}",
-                        "task_id": task.id,
-                        "error": str(e)
-                    }
+                return await self.wait_for_task(task, task_info.get("timeout") or self.sync_timeout)
             else:
                 # 异步模式，立即返回
                 return {
@@ -346,17 +478,44 @@ class MCPScheduler:
                 "message": f"任务调度失败: {str(e)}"
             }
     
+    async def wait_for_task(self, task: MCPTask, timeout: float) -> Dict[str, Any]:
+        """等待任务结束并返回同步结果
+
+        任务完成、失败或被取消时立即唤醒。超时只结束等待，任务本身继续执行，
+        结果仍会进入completed_tasks；调用方自身被取消（如客户端断开）时同样不影响任务。
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(task.done), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"[MCP调度] 任务执行超时: {task.id}")
+            return {
+                "success": False,
+                "message": "任务执行超时",
+                "task_id": task.id,
+                "error": f"执行超时（{timeout:g}秒）"
+            }
+
+        logger.info(f"[MCP调度] 任务完成: {task.id}, status={task.status}")
+        if task.status == "cancelled":
+            return {
+                "success": False,
+                "message": "任务已取消",
+                "task_id": task.id,
+                "result": None,
+                "error": "任务已取消"
+            }
+        return {
+            "success": task.status == "completed",
+            "message": f"任务执行完成: {task.status}",
+            "task_id": task.id,
+            "result": task.result if task.status == "completed" else None,
+            "error": task.error if task.status == "failed" else None
+        }
+
     async def check_duplicate(self, query: str, tool_calls: List[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
-        """检查任务重复"""
-        # 简单的重复检查逻辑
-        for task_id, task in self.active_tasks.items():
-            if (task.query == query and 
-                len(task.tool_calls) == len(tool_calls) and
-                all(tc.get("tool_name") == tc2.get("tool_name") 
-                    for tc, tc2 in zip(task.tool_calls, tool_calls))):
-                return True, task_id
-        
-        return False, None
+        """检查任务重复：规范化 (query, tool_calls) 指纹与活跃任务相同即视为重复"""
+        task_id = self._fingerprints.find(query, tool_calls)
+        return task_id is not None, task_id
     
     async def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
@@ -365,9 +524,8 @@ class MCPScheduler:
             task.status = "cancelled"
             task.completed_at = datetime.utcnow().isoformat() + "Z"
             
-            # 移动到已完成任务
-            del self.active_tasks[task_id]
-            self.completed_tasks[task_id] = task
+            # 移动到已完成任务，同步等待方会收到“任务已取消”
+            self._finish_task(task)
             
             return True
         
@@ -375,23 +533,42 @@ class MCPScheduler:
     
     async def get_status(self) -> Dict[str, Any]:
         """获取调度器状态"""
+        self.completed_tasks.expire()  # 空闲时也按TTL淘汰
+        waits = sorted(self._queue_waits)
+        workers = self._live_workers
         return {
             "active_tasks": len(self.active_tasks),
             "completed_tasks": len(self.completed_tasks),
+            "retention": self.completed_tasks.get_stats(),
             "queue_size": self.task_queue.qsize(),
             "max_concurrent": self.max_concurrent,
-            "workers": len(self.worker_tasks)
+            "workers": workers,
+            "busy_workers": self._busy_workers,
+            "idle_workers": self._idle_workers,
+            "worker_utilization": round(self._busy_workers / workers, 3) if workers else 0.0,
+            "min_workers": self.min_workers,
+            "max_workers": self.max_workers,
+            "queue_wait_ms": {
+                "ewma": round(self._queue_wait_ewma * 1000, 1),
+                "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else None,
+            },
+            "services": self.service_quota.snapshot(),
         }
     
     async def shutdown(self):
         """关闭调度器"""
         logger.info("MCP调度器关闭中...")
         
-        # 设置关闭信号
+        # 设置关闭信号：每个工作协程取到下一项（任务或None）后退出，正在执行的任务会先完成
         self.shutdown_event.set()
+        workers = list(self.worker_tasks)
+        for _ in workers:
+            self.task_queue.put_nowait(None)
         
         # 等待工作线程完成
-        if self.worker_tasks:
-            await asyncio.gather(*self.worker_tasks, return_exceptions=True)
+        if workers:
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        self.completed_tasks.close(spill_remaining=True)
         
         logger.info("MCP调度器已关闭")
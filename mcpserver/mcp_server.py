@@ -479,6 +479,7 @@ async def schedule_mcp_task(payload: Dict[str, Any]):
             "session_id": session_id,
             "request_id": request_id,
             "callback_url": callback_url,
+            "timeout": payload.get("timeout"),  # 同步模式最长等待秒数，缺省用调度器默认值
             "status": "queued",
             "created_at": _now_iso(),
             "result": None,
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP任务内工具调用执行器
+一个任务的多个 tool_calls 按依赖关系并发执行：
+- 依赖可显式声明：tool_call 中的 depends_on（前面调用的下标或 call_id，单个或列表）
+- 也可从参数推断：参数里的 {{N}} / {{N.字段.子字段}} 引用第 N 个调用的结果，
+  {{call_id}} / {{call_id.字段}} 按 call_id 引用；整段参数恰好是一个引用时保留原始类型
+- 只能依赖排在前面的调用，因此依赖图一定无环
+- 同一服务的调用默认按列表顺序逐个执行（有状态的Agent如先打开应用再输入），
+  声明 "parallel": true 的调用不等待前面的同服务调用；不同服务之间互不阻塞
+- 同一服务的并发数受 per_service_limit 限制
+- 某个调用失败只影响依赖它的调用，结果按原始 tool_calls 顺序返回
+"""
+
+import asyncio
+import json
+import re
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from system.config import logger
+
+# 执行器使用、不传给工具的字段
+CONTROL_KEYS = ("call_id", "depends_on", "parallel")
+
+_REF_PATTERN = re.compile(r"\{\{\s*([\w\-]+)((?:\.[\w\-]+)*)\s*\}\}")
+
+
+class ToolCallPlan:
+    """一个任务内 tool_calls 的依赖图"""
+
+    def __init__(self, tool_calls: List[Dict[str, Any]]):
+        self.tool_calls = tool_calls
+        self.ids: Dict[str, int] = {}
+        for i, tool_call in enumerate(tool_calls):
+            call_id = tool_call.get("call_id")
+            if call_id is not None and str(call_id) not in self.ids:
+                self.ids[str(call_id)] = i
+        self.deps: List[Set[int]] = []
+        self.errors: Dict[int, str] = {}
+        for i, tool_call in enumerate(tool_calls):
+            self.deps.append(self._collect_deps(i, tool_call))
+        # 同服务的顺序约束：只等前一个同服务调用结束，不要求它成功（与逐个执行时一致）
+        self.after: List[Optional[int]] = []
+        last_by_service: Dict[str, int] = {}
+        for i, tool_call in enumerate(tool_calls):
+            service_name = str(tool_call.get("service_name", ""))
+            previous = last_by_service.get(service_name)
+            self.after.append(None if tool_call.get("parallel") is True else previous)
+            last_by_service[service_name] = i
+
+    def _lookup(self, ref: str) -> Optional[int]:
+        """把下标或 call_id 解析为调用下标，无法识别时返回 None"""
+        if ref in self.ids:
+            return self.ids[ref]
+        if ref.isdigit() and int(ref) < len(self.tool_calls):
+            return int(ref)
+        return None
+
+    def _collect_deps(self, index: int, tool_call: Dict[str, Any]) -> Set[int]:
+        deps: Set[int] = set()
+        declared = tool_call.get("depends_on")
+        if declared is not None:
+            for ref in declared if isinstance(declared, (list, tuple)) else [declared]:
+                dep = self._lookup(str(ref))
+                if dep is None or dep >= index:
+                    self.errors[index] = f"无效的依赖: {ref}（只能依赖前面的工具调用）"
+                else:
+                    deps.add(dep)
+        for key, value in tool_call.items():
+            if key in CONTROL_KEYS:
+                continue
+            for ref in _iter_refs(value):
+                dep = self._lookup(ref)
+                # 指向自身或后面调用的占位符不是引用，原样传给工具
+                if dep is not None and dep < index:
+                    deps.add(dep)
+        return deps
+
+    def resolve_args(self, index: int, outcomes: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """用已完成调用的结果替换参数中的引用，并去掉执行器字段"""
+
+        def substitute(value: Any) -> Any:
+            if isinstance(value, str):
+                whole = _REF_PATTERN.fullmatch(value.strip())
+                if whole:
+                    found, resolved = self._ref_value(index, whole, outcomes)
+                    return resolved if found else value
+                return _REF_PATTERN.sub(lambda m: self._ref_text(index, m, outcomes), value)
+            if isinstance(value, dict):
+                return {k: substitute(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [substitute(v) for v in value]
+            return value
+
+        return {key: substitute(value) for key, value in self.tool_calls[index].items()
+                if key not in CONTROL_KEYS}
+
+    def _ref_value(self, index: int, match: "re.Match", outcomes: List[Optional[Dict[str, Any]]]):
+        dep = self._lookup(match.group(1))
+        if dep is None or dep >= index or outcomes[dep] is None:
+            return False, None
+        value = outcomes[dep].get("result")
+        for part in filter(None, match.group(2).split(".")):
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    return True, None
+            if isinstance(value, dict):
+                value = value.get(part)
+            elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            else:
+                return True, None
+        return True, value
+
+    def _ref_text(self, index: int, match: "re.Match", outcomes: List[Optional[Dict[str, Any]]]) -> str:
+        found, value = self._ref_value(index, match, outcomes)
+        if not found:
+            return match.group(0)
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False)
+        return "" if value is None else str(value)
+
+
+def _iter_refs(value: Any):
+    """遍历参数值（含嵌套结构）中出现的引用名"""
+    if isinstance(value, str):
+        for match in _REF_PATTERN.finditer(value):
+            yield match.group(1)
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _iter_refs(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from _iter_refs(v)
+
+
+class ToolCallExecutor:
+    """按依赖图并发执行一个任务的工具调用，同一服务的并发受限"""
+
+    def __init__(self, run_call: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 per_service_limit: int = 4):
+        self.run_call = run_call
+        self.per_service_limit = per_service_limit
+        self._service_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _service_slot(self, service_name: str) -> asyncio.Semaphore:
+        slot = self._service_slots.get(service_name)
+        if slot is None:
+            slot = self._service_slots[service_name] = asyncio.Semaphore(self.per_service_limit)
+        return slot
+
+    async def execute(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """执行全部工具调用，结果顺序与 tool_calls 一致（不抛出异常）"""
+        plan = ToolCallPlan(tool_calls)
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+        runners: List[asyncio.Task] = []
+
+        async def run(index: int) -> None:
+            tool_call = tool_calls[index]
+            deps = sorted(plan.deps[index])
+            waits = set(deps)
+            if plan.after[index] is not None:
+                waits.add(plan.after[index])
+            if waits:
+                await asyncio.gather(*(runners[dep] for dep in sorted(waits)))
+            if index in plan.errors:
+                outcomes[index] = _failure(tool_call, plan.errors[index])
+                return
+            failed = [dep for dep in deps if not outcomes[dep].get("success")]
+            if failed:
+                outcomes[index] = _failure(tool_call, f"依赖的工具调用失败: {failed}")
+                return
+            async with self._service_slot(str(tool_call.get("service_name", ""))):
+                try:
+                    outcomes[index] = await self.run_call(plan.resolve_args(index, outcomes))
+                except Exception as e:
+                    logger.error(f"工具调用失败: {tool_call} - {e}")
+                    outcomes[index] = _failure(tool_call, str(e))
+
+        # 依赖只指向前面的调用，按顺序创建即可保证被等待的任务已存在
+        for index in range(len(tool_calls)):
+            runners.append(asyncio.ensure_future(run(index)))
+        try:
+            await asyncio.gather(*runners)
+        finally:
+            for runner in runners:
+                runner.cancel()
+        return outcomes
+
+
+def _failure(tool_call: Dict[str, Any], error: str) -> Dict[str, Any]:
+    return {
+        "tool": tool_call.get("tool_name", "unknown"),
+        "success": False,
+        "error": error,
+        "timestamp": datetime.utcnow().isoformat() + "Z"
+    }
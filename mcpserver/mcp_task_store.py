@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP调度器任务保留与去重索引
+- CompletedTaskStore: 已完成任务的有界环形缓冲，超出条数或超过TTL的最旧任务被移出内存，
+  可选追加写入JSONL文件留档（按大小轮转一份 .1 备份）
+- TaskFingerprintIndex: 规范化 (query, tool_calls) 的哈希指纹 -> 活跃任务ID，重复检查为O(1)
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import fields
+from typing import Any, Dict, Iterator, List, Optional
+
+from system.config import logger
+
+
+def task_fingerprint(query: str, tool_calls: List[Dict[str, Any]]) -> str:
+    """规范化后的 (query, tool_calls) 指纹：忽略首尾/连续空白与参数键顺序"""
+    normalized_query = " ".join((query or "").split())
+    payload = json.dumps([normalized_query, tool_calls or []], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TaskFingerprintIndex:
+    """活跃任务指纹索引，同一指纹可对应多个任务（按加入顺序）"""
+
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, None]] = {}
+        self._by_task: Dict[str, str] = {}
+
+    def add(self, task_id: str, query: str, tool_calls: List[Dict[str, Any]]) -> str:
+        fingerprint = task_fingerprint(query, tool_calls)
+        self._tasks.setdefault(fingerprint, {})[task_id] = None
+        self._by_task[task_id] = fingerprint
+        return fingerprint
+
+    def discard(self, task_id: str) -> None:
+        fingerprint = self._by_task.pop(task_id, None)
+        if fingerprint is None:
+            return
+        ids = self._tasks.get(fingerprint)
+        if ids is not None:
+            ids.pop(task_id, None)
+            if not ids:
+                del self._tasks[fingerprint]
+
+    def find(self, query: str, tool_calls: List[Dict[str, Any]]) -> Optional[str]:
+        """返回指纹相同的最早活跃任务ID"""
+        ids = self._tasks.get(task_fingerprint(query, tool_calls))
+        return next(iter(ids)) if ids else None
+
+    def __len__(self) -> int:
+        return len(self._by_task)
+
+
+class CompletedTaskStore:
+    """已完成任务的有界保留：按条数与TTL淘汰最旧任务，可选落盘留档"""
+
+    # 落盘时不写入的运行时字段
+    _SKIP_FIELDS = {"done"}
+
+    def __init__(self, max_tasks: int = 10000, ttl: float = 3600.0, spill_path: Optional[str] = None,
+                 spill_max_bytes: int = 64 * 1024 * 1024):
+        self.max_tasks = max_tasks
+        self.ttl = ttl  # 秒，0为不按时间淘汰
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self._tasks: "OrderedDict[str, Any]" = OrderedDict()
+        self._added_at: Dict[str, float] = {}
+        self._spill_file = None
+        self.evicted = 0
+        self.spilled = 0
+
+    def __setitem__(self, task_id: str, task: Any) -> None:
+        if task_id in self._tasks:
+            self._tasks.move_to_end(task_id)
+        self._tasks[task_id] = task
+        self._added_at[task_id] = time.monotonic()
+        self.expire()
+
+    def __getitem__(self, task_id: str) -> Any:
+        return self._tasks[task_id]
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._tasks
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def get(self, task_id: str, default: Any = None) -> Any:
+        return self._tasks.get(task_id, default)
+
+    def values(self):
+        return self._tasks.values()
+
+    def items(self):
+        return self._tasks.items()
+
+    def expire(self) -> int:
+        """淘汰超出条数上限或超过TTL的最旧任务，返回淘汰数"""
+        evicted = 0
+        deadline = time.monotonic() - self.ttl if self.ttl > 0 else None
+        while self._tasks:
+            oldest = next(iter(self._tasks))
+            if len(self._tasks) <= self.max_tasks and (deadline is None or self._added_at[oldest] > deadline):
+                break
+            task = self._tasks.pop(oldest)
+            del self._added_at[oldest]
+            self._spill(task)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def _spill(self, task: Any) -> None:
+        if not self.spill_path:
+            return
+        try:
+            if self._spill_file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+                self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+            record = {f.name: getattr(task, f.name) for f in fields(task) if f.name not in self._SKIP_FIELDS}
+            self._spill_file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self.spilled += 1
+            if self._spill_file.tell() >= self.spill_max_bytes:
+                self._rotate()
+        except Exception as e:
+            logger.warning(f"已完成任务落盘失败，停止落盘: {e}")
+            self.spill_path = None
+            self.close()
+
+    def _rotate(self) -> None:
+        """当前文件写满后改名为 .1 备份（覆盖旧备份），之后写新文件"""
+        self._spill_file.close()
+        self._spill_file = None
+        os.replace(self.spill_path, self.spill_path + ".1")
+
+    def flush(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.flush()
+
+    def close(self, spill_remaining: bool = False) -> None:
+        """关闭留档文件；spill_remaining 时先把仍在内存中的任务也写入"""
+        if spill_remaining and self.spill_path:
+            for task in self._tasks.values():
+                self._spill(task)
+        if self._spill_file is not None:
+            try:
+                self._spill_file.close()
+            finally:
+                self._spill_file = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "retained": len(self._tasks),
+            "max_tasks": self.max_tasks,
+            "ttl": self.ttl,
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "spill_path": self.spill_path,
+        }
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS播放路径基准：句间空隙与CPU时间
+
+用合成的WAV句子（24kHz单声道，时长随机）模拟已合成好、在音频队列中排队的句子，按实时速度播放，对比：
+- legacy: 旧的 _play_audio_data_sync —— 每句写临时文件、从文件读回解码、按文件加载到混音器播放，
+          60FPS轮询播放状态并把当前块 tobytes() 交给口型同步，播完卸载并删除临时文件
+- stream: PCMStreamPlayer —— 内存解码、排入常开输出流，口型同步读取与播放共用的样本切片
+混音器/声卡用按实时节奏每块拷贝样本的虚拟设备代替（两种方式相同，均重采样到 --playback-rate）。
+统计句间空隙（上一句结束到下一句开始）p50/最大值、整段播放的进程CPU时间、
+每句交给播放器前的准备CPU时间（临时文件读写+解码+加载 / 内存解码+重采样）与遗留的临时文件数。
+
+用法:
+    python scripts/bench_audio_playback.py --sentences 12
+"""
+
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice.output.pcm_stream import PCMStreamPlayer, decode_audio, resample
+
+
+def make_wav(duration, rate, rng):
+    """带音节包络的合成“语音”WAV字节"""
+    t = np.arange(int(duration * rate)) / rate
+    envelope = np.clip(np.sin(2 * np.pi * 3.5 * t + rng.random() * 6), 0, None)
+    signal = envelope * (0.4 * np.sin(2 * np.pi * (180 + 60 * rng.random()) * t) + 0.05 * rng.standard_normal(len(t)))
+    pcm = (signal * 20000).astype(np.int16)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+def fake_lip_sync(chunk):
+    """口型同步引擎的入口开销：与 process_audio_chunk 一样先 frombuffer 再算RMS"""
+    samples = np.frombuffer(chunk, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples ** 2))) if len(samples) else 0.0
+
+
+class FakeMixer:
+    """pygame.mixer.music 的替身：load() 读取并解码整个文件（重采样到混音器采样率），
+    虚拟声卡线程按实时节奏每块拷贝样本，按输出帧记录每句的开始与结束位置"""
+
+    def __init__(self, rate, blocksize):
+        self.rate = rate
+        self.blocksize = blocksize
+        self.pcm = np.zeros(0, dtype=np.int16)
+        self.pos = 0
+        self.frames = 0  # 虚拟声卡已输出的总帧数
+        self.start_frame = None
+        self.end_frame = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._device, daemon=True)
+        self._thread.start()
+
+    def _device(self):
+        out = np.zeros(self.blocksize, dtype=np.int16)
+        period = self.blocksize / self.rate
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            with self._lock:
+                take = min(self.blocksize, len(self.pcm) - self.pos)
+                if take > 0:
+                    if self.pos == 0:
+                        self.start_frame = self.frames
+                    out[:take] = self.pcm[self.pos:self.pos + take]
+                    out[take:] = 0
+                    self.pos += take
+                    if self.pos >= len(self.pcm):
+                        self.end_frame = self.frames + take
+                else:
+                    out[:] = 0
+                self.frames += self.blocksize
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    def load(self, path):
+        with wave.open(path, "rb") as wf:
+            rate = wf.getframerate()
+            pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        self._loaded = resample(pcm, rate, self.rate)
+
+    def play(self):
+        with self._lock:
+            self.pcm, self.pos = self._loaded, 0
+
+    def get_busy(self):
+        with self._lock:
+            return self.pos < len(self.pcm)
+
+    def unload(self):
+        pass
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_legacy(clips, tmp_dir, blocksize, rate):
+    mixer = FakeMixer(rate, blocksize)
+    gaps = []
+    prep = 0.0
+    for audio_data in clips:
+        # —— 与旧的 _play_audio_data_sync 相同的步骤 ——
+        t = time.process_time()
+        temp_file = tempfile.mktemp(suffix=".wav", dir=tmp_dir)
+        with open(temp_file, "wb") as f:
+            f.write(audio_data)
+        with wave.open(temp_file, "rb") as wf:  # 旧实现用 soundfile.read(temp_file)：float64 -> int16
+            sample_rate = wf.getframerate()
+            audio_array = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16) / 32768.0
+        audio_array = (audio_array * 32767).astype(np.int16)
+        previous_end = mixer.end_frame
+        mixer.load(temp_file)
+        prep += time.process_time() - t
+        mixer.play()
+        start = time.perf_counter()
+
+        chunk_size = int(sample_rate / 60)
+        while mixer.get_busy():
+            target = int((time.perf_counter() - start) * sample_rate)
+            if target < len(audio_array):
+                chunk = audio_array[max(0, target - chunk_size // 2):target + chunk_size // 2].tobytes()
+                fake_lip_sync(chunk)
+            time.sleep(1.0 / 60)
+        if previous_end is not None:
+            gaps.append((mixer.start_frame - previous_end) / rate)
+        t = time.process_time()
+        mixer.unload()
+        os.unlink(temp_file)
+        prep += time.process_time() - t
+    mixer.close()
+    return gaps, prep
+
+
+def run_stream(clips, blocksize, rate):
+    player = PCMStreamPlayer(sample_rate=rate, blocksize=blocksize)
+    stop = threading.Event()
+
+    def device():
+        # 虚拟声卡：每 blocksize 帧的实时时长拉取一次数据
+        out = np.zeros(blocksize, dtype=np.int16)
+        period = blocksize / rate
+        next_tick = time.perf_counter()
+        while not stop.is_set():
+            player.render_into(out)
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    def lip_sync():
+        chunk_size = int(rate / 60)
+        while not stop.is_set():
+            if not player.active.wait(0.1):
+                continue
+            while player.busy:
+                window = player.current_window(chunk_size)
+                if window is not None and len(window):
+                    fake_lip_sync(window)
+                time.sleep(1.0 / 60)
+
+    threads = [threading.Thread(target=device, daemon=True), threading.Thread(target=lip_sync, daemon=True)]
+    for t in threads:
+        t.start()
+    prep = 0.0
+    for audio_data in clips:
+        t = time.process_time()
+        samples, sample_rate = decode_audio(audio_data)
+        samples = resample(samples, sample_rate, rate)  # 与 enqueue 内部相同，单独计时
+        prep += time.process_time() - t
+        player.enqueue(samples, rate)
+    player.wait_idle()
+    stop.set()
+    for t in threads:
+        t.join()
+    return list(player._gaps), prep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS播放路径基准")
+    parser.add_argument("--sentences", type=int, default=12)
+    parser.add_argument("--min-s", type=float, default=0.6, help="句子最短时长（秒）")
+    parser.add_argument("--max-s", type=float, default=1.8, help="句子最长时长（秒）")
+    parser.add_argument("--rate", type=int, default=24000, help="TTS输出采样率")
+    parser.add_argument("--playback-rate", type=int, default=44100, help="连续输出流采样率")
+    parser.add_argument("--blocksize", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    durations = [random.Random(args.seed + i).uniform(args.min_s, args.max_s) for i in range(args.sentences)]
+    clips = [make_wav(d, args.rate, rng) for d in durations]
+    print(f"{args.sentences} 句，共 {sum(durations):.1f}s 音频（{args.rate}Hz WAV），连续输出流 {args.playback_rate}Hz / 块 {args.blocksize}")
+    print("=" * 96)
+    print(f"{'方式':<7} | {'句间空隙p50(ms)':>15} | {'句间空隙max(ms)':>15} | {'CPU时间(ms)':>11} | {'每句准备CPU(ms)':>15} | {'遗留临时文件':>12}")
+    print("-" * 96)
+
+    tmp_dir = tempfile.mkdtemp(prefix="bench_playback_")
+    try:
+        for mode in ("legacy", "stream"):
+            cpu = time.process_time()
+            if mode == "legacy":
+                gaps, prep = run_legacy(clips, tmp_dir, args.blocksize, args.playback_rate)
+            else:
+                gaps, prep = run_stream(clips, args.blocksize, args.playback_rate)
+            cpu = (time.process_time() - cpu) * 1000
+            gaps = sorted(gaps)
+            leftover = len(os.listdir(tmp_dir))
+            print(f"{mode:<7} | {gaps[len(gaps) // 2] * 1000:>15.1f} | {gaps[-1] * 1000:>15.1f} | {cpu:>11.0f} | {prep * 1000 / len(clips):>15.2f} | {leftover:>12}")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+五元组批量提取基准
+
+使用进程内的模拟 LLM（固定请求开销 + 按 prompt/输出 token 计费的耗时），
+对比逐条提取与微批量提取在突发负载下的请求数、tokens/五元组与吞吐。
+
+用法:
+    python scripts/bench_batch_extraction.py --texts 64 --concurrency 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summer_memory.quintuple_batch_extractor import QuintupleBatchExtractor, estimate_tokens, RULES_TOKENS
+
+SAMPLE_TEXTS = [
+    "用户: 我下周要去杭州出差，顺便看看西湖。\n娜迦: 好的，记得带伞。",
+    "用户: 我最近在学Rust，感觉所有权机制挺难的。\n娜迦: 可以从借用检查器的报错入手。",
+    "用户: 我妹妹喜欢吃草莓蛋糕。\n娜迦: 那生日可以订一个草莓蛋糕。",
+    "用户: 帮我记一下，周五下午三点和张经理开会。\n娜迦: 已记录。",
+    "用户: 我养了一只叫团子的橘猫。\n娜迦: 团子这个名字很可爱。",
+]
+QUINTUPLES_PER_TEXT = 2
+
+
+class FakeLLM:
+    """模拟 chat.completions：耗时 = 请求开销 + prompt token * 预填充耗时 + 输出 token * 解码耗时"""
+
+    def __init__(self, overhead_ms, prefill_us, decode_ms):
+        self.overhead = overhead_ms / 1000
+        self.prefill = prefill_us / 1e6
+        self.decode = decode_ms / 1000
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def _respond(self, prompt_tokens, content):
+        completion_tokens = estimate_tokens(content)
+        self.requests += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        await asyncio.sleep(self.overhead + prompt_tokens * self.prefill + completion_tokens * self.decode)
+        return completion_tokens
+
+    async def create(self, model, messages, **kwargs):
+        payload = json.loads(messages[-1]["content"])
+        results = {text_id: self._quintuples(text) for text_id, text in payload.items()}
+        content = json.dumps({"results": results}, ensure_ascii=False)
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        completion_tokens = await self._respond(prompt_tokens, content)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+        )
+
+    async def single(self, text):
+        content = json.dumps(self._quintuples(text), ensure_ascii=False)
+        await self._respond(RULES_TOKENS + estimate_tokens(text), content)
+        return [tuple(q) for q in self._quintuples(text)]
+
+    @staticmethod
+    def _quintuples(text):
+        return [["用户", "人物", "提到", text[4:10 + i], "概念"] for i in range(QUINTUPLES_PER_TEXT)]
+
+
+async def run_single(llm, texts, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(text):
+        async with semaphore:
+            return await llm.single(text)
+
+    return await asyncio.gather(*(one(t) for t in texts))
+
+
+async def run_batched(llm, texts, concurrency, max_texts, max_tokens, max_wait):
+    extractor = QuintupleBatchExtractor(client=llm, model="fake", single_extract=llm.single,
+                                        max_batch_texts=max_texts, max_batch_tokens=max_tokens,
+                                        max_wait=max_wait, max_concurrent_batches=concurrency, max_tokens=1024)
+    return await asyncio.gather(*(extractor.extract(t) for t in texts))
+
+
+def report(name, llm, results, elapsed, texts):
+    quintuples = sum(len(r) for r in results)
+    total_tokens = llm.prompt_tokens + llm.completion_tokens
+    print(f"{name:<10} | {llm.requests:>6} | {llm.prompt_tokens:>9} | {total_tokens / quintuples:>13.1f} | "
+          f"{len(texts) / elapsed:>10.1f} | {elapsed:>8.2f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="五元组批量提取基准")
+    parser.add_argument("--texts", type=int, default=64, help="突发提交的文本数")
+    parser.add_argument("--concurrency", type=int, default=3, help="并发LLM请求数（对应任务管理器worker数）")
+    parser.add_argument("--max-texts", type=int, default=8)
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    parser.add_argument("--max-wait", type=float, default=0.2)
+    parser.add_argument("--overhead-ms", type=float, default=300, help="每次请求的固定开销")
+    parser.add_argument("--prefill-us", type=float, default=200, help="每个prompt token的预填充耗时")
+    parser.add_argument("--decode-ms", type=float, default=5, help="每个输出token的解码耗时")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    texts = [rng.choice(SAMPLE_TEXTS) + f" (#{i})" for i in range(args.texts)]
+
+    print(f"规则提示词约 {RULES_TOKENS} tokens，文本 {len(texts)} 段，并发 {args.concurrency}")
+    print("=" * 72)
+    print(f"{'方式':<10} | {'请求数':>6} | {'prompt tok':>9} | {'tokens/五元组':>13} | {'文本/秒':>10} | {'耗时(s)':>8}")
+    print("-" * 72)
+
+    llm = FakeLLM(args.overhead_ms, args.prefill_us, args.decode_ms)
+    t0 = time.perf_counter()
+    results = await run_single(llm, texts, args.concurrency)
+    report("single", llm, results, time.perf_counter() - t0, texts)
+
+    llm = FakeLLM(args.overhead_ms, args.prefill_us, args.decode_ms)
+    t0 = time.perf_counter()
+    results = await run_batched(llm, texts, args.concurrency, args.max_texts, args.max_tokens, args.max_wait)
+    report("batched", llm, results, time.perf_counter() - t0, texts)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
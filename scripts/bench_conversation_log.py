@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对话上下文加载基准
+
+在临时目录生成 --days 天的文本日志（每天 --turns 轮），对比：
+- 旧实现：load_recent_context / get_context_statistics 每次解析文本日志
+- 对话记录存储：SQLite 倒序索引取最近 N 条 + 按天汇总统计
+并校验两者返回的消息完全一致。
+
+用法:
+    python scripts/bench_conversation_log.py --days 30 --turns 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+from system.config import config
+
+# 基准只关心对话记录，会话不写盘
+config.api.session_persist = False
+
+from apiserver.message_manager import MessageManager
+
+WORDS = ["今天", "天气", "怎么样", "帮我", "查一下", "明天", "的", "日程", "好的", "已经", "为你", "打开", "音乐", "。", "，"]
+
+
+def write_logs(log_dir, days, turns, ai_name, seed):
+    rng = random.Random(seed)
+    today = datetime.now()
+    for d in range(days):
+        day = (today - timedelta(days=d)).strftime('%Y-%m-%d')
+        with open(Path(log_dir) / f"{day}.log", "w", encoding="utf-8") as f:
+            for t in range(turns):
+                user = "".join(rng.choice(WORDS) for _ in range(rng.randint(4, 20)))
+                answer = "".join(rng.choice(WORDS) for _ in range(rng.randint(10, 60)))
+                if rng.random() < 0.1:
+                    answer += "\n第二行：" + answer
+                f.write(f"[12:{t // 60 % 60:02d}:{t % 60:02d}] 用户: {user}\n")
+                f.write(f"[12:{t // 60 % 60:02d}:{t % 60:02d}] {ai_name}: {answer}\n")
+                f.write("-" * 50 + "\n")
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对话上下文加载基准")
+    parser.add_argument("--days", type=int, default=30, help="生成的日志天数")
+    parser.add_argument("--turns", type=int, default=200, help="每天的对话轮数")
+    parser.add_argument("--load-days", type=int, default=3, help="加载上下文的天数")
+    parser.add_argument("--max-messages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = MessageManager()
+        write_logs(tmp, args.days, args.turns, legacy.ai_name, args.seed)
+        legacy.log_dir = Path(tmp)
+        legacy.context_store_enabled = False
+
+        indexed = MessageManager()
+        indexed.log_dir = Path(tmp)
+        indexed.context_store_enabled = True
+        t0 = time.perf_counter()
+        store = indexed.conversation_store
+        import_ms = (time.perf_counter() - t0) * 1000
+
+        print(f"{args.days} 天日志 x {args.turns} 轮，加载最近 {args.load_days} 天 / {args.max_messages} 条；"
+              f"一次性导入 {store.count()} 条耗时 {import_ms:.0f}ms")
+        print("=" * 66)
+        print(f"{'操作':<26} | {'旧实现(ms)':>11} | {'存储(ms)':>9} | {'加速':>7}")
+        print("-" * 66)
+
+        cases = [
+            ("load_recent_context", lambda m: m.load_recent_context(args.load_days, args.max_messages)),
+            ("get_context_statistics(7)", lambda m: m.get_context_statistics(7)),
+            ("get_context_statistics(30)", lambda m: m.get_context_statistics(30)),
+        ]
+        for name, fn in cases:
+            old_ms, old_result = timed(lambda: fn(legacy), args.repeat)
+            new_ms, new_result = timed(lambda: fn(indexed), args.repeat)
+            assert old_result == new_result, f"{name} 结果不一致"
+            print(f"{name:<26} | {old_ms:>11.2f} | {new_ms:>9.3f} | {old_ms / new_ms:>6.0f}x")
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            indexed.save_conversation_log("你好", "你好呀")
+        print("-" * 66)
+        print(f"save_conversation_log（文本日志 + 存储）: {(time.perf_counter() - t0) * 1000 / args.repeat:.2f}ms/轮")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GRAG 图存储后端召回延迟基准
+
+在同一份随机五元组数据上对比各 GraphStore 后端的构建耗时、关键词召回延迟与 2 跳扩展延迟：
+- sqlite : 内嵌 SQLite（邻接表 + FTS5），数据库文件放在临时目录
+- memory : 进程内倒排索引
+- neo4j  : 指定 --uri 时测量（需事先导入数据；加 --load 会把数据写入目标库，请勿对生产库使用）
+
+用法:
+    python scripts/bench_graph_backends.py
+    python scripts/bench_graph_backends.py --sizes 10000 --uri neo4j://127.0.0.1:7687 --password xxx --load
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summer_memory.graph_store import GraphStore
+from summer_memory.quintuple_index import QuintupleKeywordIndex
+from summer_memory.sqlite_graph_store import SQLiteGraphStore
+
+# 复用关键词查询基准的数据生成方式
+from scripts.bench_keyword_query import make_dataset, make_queries, measure
+
+
+class IndexGraphStore(GraphStore):
+    """独立的倒排索引实例（不依赖全局五元组存储），用于与其他后端对比"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.index = QuintupleKeywordIndex()
+
+    def add_quintuples(self, quintuples):
+        self.index.add(quintuples)
+        return len(quintuples)
+
+    def query_by_keywords(self, keywords, limit_per_keyword=5):
+        return self.index.search(keywords, limit_per_keyword=limit_per_keyword)
+
+    def expand(self, entities, hops=1, limit=50):
+        return self.index.neighbors(entities, hops=hops, limit=limit)
+
+
+def bench_backend(store, quintuples, queries, seeds, load=True):
+    build = 0.0
+    if load:
+        t0 = time.perf_counter()
+        for i in range(0, len(quintuples), 10000):
+            store.add_quintuples(quintuples[i:i + 10000])
+        build = time.perf_counter() - t0
+    query = measure(store.query_by_keywords, queries)
+    expand = measure(lambda names: store.expand(names, hops=2), seeds)
+    return build, query, expand
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRAG 图存储后端召回延迟基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--uri", help="Neo4j地址，设置后额外测量Neo4j后端")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="neo4j")
+    parser.add_argument("--load", action="store_true", help="先把数据批量写入Neo4j")
+    args = parser.parse_args()
+
+    neo4j_store = None
+    if args.uri:
+        from py2neo import Graph
+        from summer_memory.quintuple_graph import Neo4jGraphStore, ensure_indexes
+        graph = Graph(args.uri, auth=(args.user, args.password), name=args.database)
+        ensure_indexes(graph)
+        neo4j_store = Neo4jGraphStore(graph)
+
+    print("=" * 88)
+    print(f"{'实体数':>9} | {'后端':<7} | {'构建(s)':>8} | {'召回p50':>8} | {'召回p99':>8} | "
+          f"{'2跳p50':>8} | {'2跳p99':>8}  (ms)")
+    print("-" * 88)
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            rng = random.Random(args.seed)
+            names, quintuples = make_dataset(size, rng)
+            queries = make_queries(names, rng, args.queries)
+            seeds = [[rng.choice(names)] for _ in range(args.queries)]
+
+            backends = [
+                SQLiteGraphStore(os.path.join(tmp, f"graph_{size}.sqlite3")),
+                IndexGraphStore(),
+            ]
+            if neo4j_store is not None:
+                backends.append(neo4j_store)
+
+            for store in backends:
+                load = store is not neo4j_store or args.load
+                build, query, expand = bench_backend(store, quintuples, queries, seeds, load=load)
+                print(f"{size:>9} | {store.name:<7} | {build:>8.2f} | {query[0]:>8.3f} | {query[1]:>8.3f} | "
+                      f"{expand[0]:>8.3f} | {expand[1]:>8.3f}")
+                if store is not neo4j_store:
+                    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+关键词图谱查询延迟基准
+
+在 10k / 100k / 1M 个实体规模下，测量本地倒排索引(QuintupleKeywordIndex)的构建耗时与查询延迟，
+并与逐条扫描全部五元组的朴素实现对比。
+指定 --uri 时额外测量 Neo4j 全文索引查询（需事先导入数据，脚本不会写入Neo4j）。
+
+用法:
+    python scripts/bench_keyword_query.py
+    python scripts/bench_keyword_query.py --sizes 10000 100000 --uri neo4j://127.0.0.1:7687 --password xxx
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summer_memory.quintuple_index import QuintupleKeywordIndex
+
+# 常用汉字区间，用于生成接近真实分布的实体名
+CJK_START, CJK_END = 0x4E00, 0x4E00 + 3000
+ENTITY_TYPES = ["人物", "地点", "组织", "物品", "概念", "时间", "事件", "活动"]
+RELATIONS = ["喜欢", "位于", "属于", "拥有", "参加", "认识", "使用", "前往", "讨论", "购买"]
+
+
+def random_name(rng):
+    return "".join(chr(rng.randint(CJK_START, CJK_END)) for _ in range(rng.randint(2, 5)))
+
+
+def make_dataset(entity_count, rng):
+    names = list({random_name(rng) for _ in range(int(entity_count * 1.05))})[:entity_count]
+    quintuples = []
+    for i, head in enumerate(names):
+        tail = names[rng.randrange(len(names))]
+        quintuples.append((head, rng.choice(ENTITY_TYPES), rng.choice(RELATIONS), tail, rng.choice(ENTITY_TYPES)))
+    return names, quintuples
+
+
+def linear_scan(quintuples, keywords, limit_per_keyword=5):
+    """朴素实现：逐条扫描所有五元组做子串匹配"""
+    results = []
+    for kw in keywords:
+        hits = 0
+        for q in quintuples:
+            if kw in q[0] or kw in q[3] or kw in q[2] or kw in q[1] or kw in q[4]:
+                results.append(q)
+                hits += 1
+                if hits >= limit_per_keyword:
+                    break
+    return results
+
+
+def make_queries(names, rng, count):
+    queries = []
+    for _ in range(count):
+        keywords = []
+        for _ in range(rng.randint(1, 4)):
+            name = rng.choice(names)
+            start = rng.randrange(max(1, len(name) - 1))
+            keywords.append(name[start:start + rng.randint(2, 3)])
+        queries.append(keywords)
+    return queries
+
+
+def measure(fn, queries):
+    latencies = []
+    for keywords in queries:
+        t0 = time.perf_counter()
+        fn(keywords)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99) - 1], statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词图谱查询延迟基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=20, help="朴素扫描的查询次数（较慢）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--uri", help="Neo4j地址，设置后额外测量全文索引查询")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="neo4j")
+    args = parser.parse_args()
+
+    graph = None
+    if args.uri:
+        from py2neo import Graph
+        from summer_memory import quintuple_graph
+        graph = Graph(args.uri, auth=(args.user, args.password), name=args.database)
+        quintuple_graph._graph = graph
+        quintuple_graph.ensure_indexes(graph)
+
+    print("=" * 78)
+    print(f"{'实体数':>9} | {'实现':<14} | {'构建(s)':>8} | {'p50(ms)':>9} | {'p99(ms)':>9} | {'mean(ms)':>9}")
+    print("-" * 78)
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        names, quintuples = make_dataset(size, rng)
+        queries = make_queries(names, rng, args.queries)
+
+        t0 = time.perf_counter()
+        index = QuintupleKeywordIndex()
+        index.add(quintuples)
+        build = time.perf_counter() - t0
+
+        p50, p99, mean = measure(index.search, queries)
+        print(f"{size:>9} | {'inverted index':<14} | {build:>8.2f} | {p50:>9.3f} | {p99:>9.3f} | {mean:>9.3f}")
+
+        p50, p99, mean = measure(lambda kws: linear_scan(quintuples, kws), queries[:args.scan_queries])
+        print(f"{size:>9} | {'linear scan':<14} | {'-':>8} | {p50:>9.3f} | {p99:>9.3f} | {mean:>9.3f}")
+
+        if graph is not None:
+            from summer_memory.quintuple_graph import query_graph_by_keywords
+            p50, p99, mean = measure(query_graph_by_keywords, queries)
+            print(f"{size:>9} | {'neo4j fulltext':<14} | {'-':>8} | {p50:>9.3f} | {p99:>9.3f} | {mean:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS口型同步：实时分析 vs 预计算时间轴 的CPU对比
+
+用合成的“语音”句子（带音节包络、谐波与摩擦噪声）模拟TTS输出，按播放时口型线程的60FPS节奏对比：
+- realtime : 播放时每帧取当前位置附近 1/60 秒样本调用 process_audio_chunk（旧路径）
+- timeline : 合成时 compute_timeline 一次性算出整句时间轴，播放时每帧只调用 params_from_timeline 插值
+- cached   : 时间轴已随音频缓存，合成时只需反序列化（from_bytes）
+统计每秒音频在合成线程与播放线程上各花费的CPU时间、播放线程每帧耗时，
+并校验时间轴与实时路径逐帧输出的张嘴幅度差与音素一致率。
+
+说明：未安装 scipy 时共振峰检测跳过，两条路径走相同的降级分支。
+
+用法:
+    python scripts/bench_lip_sync_timeline.py --sentences 20
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 直接按文件加载引擎模块：voice.input.voice_realtime 包的 __init__ 会导入各语音服务商的SDK
+_spec = importlib.util.spec_from_file_location(
+    "advanced_lip_sync_v2", os.path.join(ROOT, "voice", "input", "voice_realtime", "core", "advanced_lip_sync_v2.py"))
+lip = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(lip)
+
+
+def make_sentence(duration, rate, rng):
+    t = np.arange(int(duration * rate)) / rate
+    f0 = 150 + 60 * rng.random() + 30 * np.sin(2 * np.pi * 0.8 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * (2.5 + rng.random()) * t + rng.random() * 6), 0, None)
+    noise = rng.standard_normal(len(t)) * (np.sin(2 * np.pi * 1.3 * t + rng.random() * 6) > 0.8)
+    return ((envelope * voiced * 0.6 + 0.15 * noise) * 12000).astype(np.int16)
+
+
+def playback_windows(samples, rate, fps):
+    """口型线程每帧读取的窗口：以当前播放位置为中心、1/60 秒长"""
+    size = int(rate / 60)
+    for k in range(int(np.ceil(len(samples) * fps / rate))):
+        center = int(round(k * rate / fps))
+        start = min(max(0, center - size // 2), len(samples) - size)
+        yield k / fps, samples[start:start + size]
+
+
+def run_realtime(clips, rate, fps):
+    # 每句用新引擎，从与时间轴相同的初始状态开始，便于逐帧对比
+    engines = [lip.AdvancedLipSyncEngineV2(rate) for _ in clips]
+    outputs = []
+    cpu = time.process_time()
+    for engine, samples in zip(engines, clips):
+        series = []
+        for _, window in playback_windows(samples, rate, fps):
+            params = engine.process_audio_chunk(window)
+            series.append((params['mouth_open'], engine.state.current_viseme))
+        outputs.append(series)
+    return 0.0, time.process_time() - cpu, outputs
+
+
+def run_timeline(clips, rate, fps, cached):
+    engine = lip.AdvancedLipSyncEngineV2(rate)
+    store = [engine.compute_timeline(samples, rate, fps).to_bytes() for samples in clips] if cached else None
+    cpu = time.process_time()
+    if cached:
+        timelines = [lip.LipSyncTimeline.from_bytes(data) for data in store]
+    else:
+        timelines = [engine.compute_timeline(samples, rate, fps) for samples in clips]
+    synth_cpu = time.process_time() - cpu
+
+    outputs = []
+    cpu = time.process_time()
+    for samples, timeline in zip(clips, timelines):
+        series = []
+        for t, _ in playback_windows(samples, rate, fps):
+            params = engine.params_from_timeline(timeline, t)
+            series.append((params['mouth_open'], engine.state.current_viseme))
+        outputs.append(series)
+    return synth_cpu, time.process_time() - cpu, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS口型同步CPU对比")
+    parser.add_argument("--sentences", type=int, default=20)
+    parser.add_argument("--min-s", type=float, default=1.0)
+    parser.add_argument("--max-s", type=float, default=4.0)
+    parser.add_argument("--rate", type=int, default=24000, help="TTS输出采样率")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    durations = [random.Random(args.seed + i).uniform(args.min_s, args.max_s) for i in range(args.sentences)]
+    clips = [make_sentence(d, args.rate, rng) for d in durations]
+    audio_seconds = sum(durations)
+    frames = sum(int(np.ceil(len(c) * args.fps / args.rate)) for c in clips)
+
+    print(f"scipy: {'可用' if lip.SCIPY_AVAILABLE else '不可用（共振峰跳过）'}，{args.sentences} 句共 {audio_seconds:.1f}s 音频"
+          f"（{args.rate}Hz），口型 {args.fps}FPS 共 {frames} 帧")
+    print("=" * 92)
+    print(f"{'方式':<9} | {'合成线程CPU(ms/音频秒)':>22} | {'播放线程CPU(ms/音频秒)':>22} | {'播放每帧(us)':>12} | {'合计(ms/音频秒)':>15}")
+    print("-" * 92)
+    results = {}
+    for mode in ("realtime", "timeline", "cached"):
+        if mode == "realtime":
+            synth_cpu, play_cpu, outputs = run_realtime(clips, args.rate, args.fps)
+        else:
+            synth_cpu, play_cpu, outputs = run_timeline(clips, args.rate, args.fps, cached=(mode == "cached"))
+        results[mode] = outputs
+        print(f"{mode:<9} | {synth_cpu * 1000 / audio_seconds:>22.2f} | {play_cpu * 1000 / audio_seconds:>22.2f} | "
+              f"{play_cpu * 1e6 / frames:>12.1f} | {(synth_cpu + play_cpu) * 1000 / audio_seconds:>15.2f}")
+
+    reference = [frame for series in results["realtime"] for frame in series]
+    computed = [frame for series in results["timeline"] for frame in series]
+    diff = np.abs(np.array([r[0] for r in reference]) - np.array([c[0] for c in computed]))
+    agree = np.mean([r[1] == c[1] for r, c in zip(reference, computed)])
+    print("-" * 92)
+    print(f"时间轴 vs 实时: 张嘴幅度差 平均 {diff.mean():.2e} / 最大 {diff.max():.2e}，音素一致率 {agree:.1%}")
+
+
+if __name__ == "__main__":
+    main()
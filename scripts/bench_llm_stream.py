@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM流式响应基准
+
+启动一个本地模拟 OpenAI 兼容接口（/chat/completions, stream=True）：
+- 新连接先等待 --handshake-ms 再处理请求，模拟远端 API 的建连 + TLS 握手开销
+- SSE 数据按随机大小分块写出，会在行中间、UTF-8 字符中间切断
+
+对比旧实现（每次请求新建 ClientSession、按分块直接切行）与 LLMService._stream_llm_response
+（共享 keep-alive 会话 + 增量 SSE 解码）的首字延迟(TTFT)、tokens/s 与丢失的增量数。
+
+用法:
+    python scripts/bench_llm_stream.py --requests 20 --tokens 200
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import sys
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import aiohttp
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+from system.config import config
+from apiserver.llm_service import LLMService
+
+TOKENS = ["你好", "，", "我是", "娜迦", "。", "今天", "天气", "不错", "，", "适合", "出门", "散步", "。", " hello", " world"]
+
+
+class FakeOpenAIServer:
+    """极简 HTTP/1.1 chunked SSE 服务器"""
+
+    def __init__(self, tokens, handshake_ms, token_interval_ms, seed):
+        self.tokens = tokens
+        self.handshake = handshake_ms / 1000
+        self.interval = token_interval_ms / 1000
+        self.rng = random.Random(seed)
+        self.connections = 0
+
+    def _sse_body(self):
+        rng = random.Random(0)
+        events = []
+        for i in range(self.tokens):
+            delta = {"choices": [{"index": 0, "delta": {"content": rng.choice(TOKENS)}}]}
+            events.append(f"data: {json.dumps(delta, ensure_ascii=False)}\n\n".encode())
+        events.append(b"data: [DONE]\n\n")
+        return events
+
+    def expected_text(self):
+        rng = random.Random(0)
+        return "".join(rng.choice(TOKENS) for _ in range(self.tokens))
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                await reader.readexactly(length)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Transfer-Encoding: chunked\r\n\r\n")
+                pending = b""
+                for event in self._sse_body():
+                    pending += event
+                    # 随机切分，模拟网络分块落在行/字符中间
+                    cut = self.rng.randint(1, len(pending))
+                    piece, pending = pending[:cut], pending[cut:]
+                    writer.write(f"{len(piece):x}\r\n".encode() + piece + b"\r\n")
+                    await writer.drain()
+                    await asyncio.sleep(self.interval)
+                if pending:
+                    writer.write(f"{len(pending):x}\r\n".encode() + pending + b"\r\n")
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+
+async def legacy_stream(messages):
+    """旧实现：每次新建会话，iter_chunked(1024) 后直接按 '\\n' 切分，不保留半行"""
+    timeout = aiohttp.ClientTimeout(total=180, connect=60, sock_read=120)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.post(f"{config.api.base_url}/chat/completions",
+                                json={"model": "fake", "messages": messages, "stream": True}) as resp:
+            async for chunk in resp.content.iter_chunked(1024):
+                try:
+                    lines = chunk.decode("utf-8").split("\n")
+                except UnicodeDecodeError:
+                    continue
+                for line in lines:
+                    line = line.strip()
+                    if line.startswith("data: "):
+                        data_str = line[6:]
+                        if data_str == "[DONE]":
+                            return
+                        try:
+                            delta = json.loads(data_str)["choices"][0]["delta"]
+                        except (json.JSONDecodeError, KeyError, IndexError):
+                            continue
+                        if "content" in delta:
+                            yield "data: " + base64.b64encode(delta["content"].encode()).decode() + "\n\n"
+
+
+async def measure(stream_factory, requests, expected):
+    ttfts, rates, dropped = [], [], 0
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        first = None
+        text = []
+        async for chunk in stream_factory([{"role": "user", "content": "hi"}]):
+            if first is None:
+                first = time.perf_counter() - t0
+            text.append(base64.b64decode(chunk[6:].strip()).decode("utf-8"))
+        elapsed = time.perf_counter() - t0
+        received = "".join(text)
+        dropped += 0 if received == expected else 1
+        ttfts.append(first * 1000 if first is not None else float("nan"))
+        rates.append(len(received) / elapsed)
+    ttfts.sort()
+    return ttfts[len(ttfts) // 2], sum(rates) / len(rates), dropped
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="LLM流式响应基准")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=200, help="每次响应的增量数")
+    parser.add_argument("--handshake-ms", type=float, default=80, help="新连接的模拟握手耗时")
+    parser.add_argument("--token-interval-ms", type=float, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.tokens, args.handshake_ms, args.token_interval_ms, args.seed)
+    config.api.base_url = await server.start()
+    expected = server.expected_text()
+
+    print(f"{args.requests} 次请求 x {args.tokens} 个增量，新连接握手 {args.handshake_ms:g}ms")
+    print("=" * 66)
+    print(f"{'实现':<8} | {'TTFT p50(ms)':>12} | {'字符/秒':>10} | {'内容不完整':>10} | {'新建连接':>8}")
+    print("-" * 66)
+
+    server.connections = 0
+    ttft, rate, dropped = await measure(legacy_stream, args.requests, expected)
+    print(f"{'legacy':<8} | {ttft:>12.1f} | {rate:>10.0f} | {dropped:>10} | {server.connections:>8}")
+
+    service = LLMService()
+    server.connections = 0
+    ttft, rate, dropped = await measure(service._stream_llm_response, args.requests, expected)
+    print(f"{'pooled':<8} | {ttft:>12.1f} | {rate:>10.0f} | {dropped:>10} | {server.connections:>8}")
+    await service.aclose()
+    server.server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
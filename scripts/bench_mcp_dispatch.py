@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP批量工具调用基准
+
+启动一个本地模拟 /schedule 接口（HTTP/1.1 keep-alive，按服务名模拟不同耗时），
+对比旧实现（逐个调用、每次新建 httpx.AsyncClient）与 MCPToolDispatcher
+（共享连接池 + 按服务限流并发）的批次耗时与新建连接数。
+
+用法:
+    python scripts/bench_mcp_dispatch.py --batches 20 --tools 5
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+# 直接按文件加载调度器模块：导入 apiserver 包会连带初始化整个 API 服务器
+_spec = importlib.util.spec_from_file_location(
+    "tool_dispatcher", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    "apiserver", "tool_dispatcher.py"))
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+MCPToolDispatcher = _module.MCPToolDispatcher
+
+SERVICES = {"天气时间Agent": 0.08, "应用启动服务": 0.05, "在线搜索": 0.15, "系统控制服务": 0.03}
+
+
+class FakeScheduleServer:
+    """极简 HTTP/1.1 服务器：读取 JSON 请求体，按工具所属服务 sleep 后返回"""
+
+    def __init__(self):
+        self.connections = 0
+        self.server = None
+        self.port = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":", 1)[1])
+                body = json.loads(await reader.readexactly(length))
+                service = body["tool_calls"][0]["service_name"]
+                await asyncio.sleep(SERVICES.get(service, 0.05))
+                payload = json.dumps({"success": True, "result": f"{service} ok"}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{self.port}/schedule"
+
+
+async def legacy_batch(url, tool_calls, session_id):
+    """旧实现：逐个调用，每次新建客户端"""
+    results = []
+    for i, tool_call in enumerate(tool_calls):
+        payload = {"query": f"批量MCP {i+1}", "tool_calls": [tool_call], "session_id": session_id,
+                   "request_id": str(i), "skip_callback": True}
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.post(url, json=payload)
+            results.append(response.json())
+    return results
+
+
+async def run(mode, url, batches, server):
+    dispatcher = MCPToolDispatcher(schedule_url=url, per_service_limit=4)
+    server.connections = 0
+    latencies = []
+    for tool_calls in batches:
+        t0 = time.perf_counter()
+        if mode == "legacy":
+            await legacy_batch(url, tool_calls, "bench")
+        else:
+            await dispatcher.dispatch(tool_calls, "bench")
+        latencies.append((time.perf_counter() - t0) * 1000)
+    await dispatcher.aclose()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{mode:<11} | {p50:>9.1f} | {p95:>9.1f} | {server.connections:>8}")
+    return dispatcher
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP批量工具调用基准")
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--tools", type=int, default=5, help="每批工具调用数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    batches = [[{"service_name": rng.choice(list(SERVICES)), "tool_name": "run", "parameters": {}}
+                for _ in range(args.tools)] for _ in range(args.batches)]
+
+    server = FakeScheduleServer()
+    url = await server.start()
+    print(f"{args.batches} 批 x {args.tools} 个工具，模拟服务耗时: {SERVICES}")
+    print("=" * 50)
+    print(f"{'方式':<11} | {'p50(ms)':>9} | {'p95(ms)':>9} | {'新建连接':>8}")
+    print("-" * 50)
+    await run("legacy", url, batches, server)
+    dispatcher = await run("dispatcher", url, batches, server)
+    print("-" * 50)
+    for tool, stats in dispatcher.get_stats()["tools"].items():
+        print(f"{tool}: {stats}")
+    server.server.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP注册中心能力查询基准
+
+生成 --services 个合成manifest（中英文描述、若干 invocationCommands），写入 MANIFEST_CACHE 后对比：
+- scan : 旧实现，每次调用遍历 MANIFEST_CACHE 做子串匹配 / 重新组装manifest工具列表
+- index: 能力倒排索引 + 预计算的工具列表
+统计能力查询与工具列表（单个服务、全部服务即拼提示词的场景）延迟（index含每次查询前与缓存的对齐）、
+索引构建与增量注册/注销后对齐的耗时，
+并检查索引结果包含旧实现的全部结果（词匹配可能额外命中工具命令名等）。
+
+用法:
+    python scripts/bench_mcp_registry_index.py --services 500 --queries 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 mcpserver 下需要的模块，不执行包的 __init__（它会连带加载 MCP 管理器和全部 Agent）
+if "mcpserver" not in sys.modules:
+    _pkg = types.ModuleType("mcpserver")
+    _pkg.__path__ = [os.path.join(ROOT, "mcpserver")]
+    sys.modules["mcpserver"] = _pkg
+
+from mcpserver import mcp_registry
+from mcpserver.mcp_capability_index import CapabilityIndex
+from mcpserver.mcp_registry import (
+    MANIFEST_CACHE, MCP_REGISTRY, get_available_tools, query_services_by_capability,
+)
+
+DOMAINS = [("天气", "weather"), ("搜索", "search"), ("浏览器", "browser"), ("文件", "file"), ("音乐", "music"),
+           ("日程", "calendar"), ("邮件", "mail"), ("翻译", "translate"), ("截图", "screenshot"), ("记忆", "memory"),
+           ("漫画", "comic"), ("视觉", "vision"), ("系统", "system"), ("消息", "message"), ("股票", "stock")]
+VERBS = [("查询", "query"), ("下载", "download"), ("打开", "open"), ("管理", "manage"), ("分析", "analyze"),
+         ("发送", "send"), ("控制", "control"), ("生成", "generate")]
+
+
+def synthetic_manifest(i, rng):
+    zh, en = rng.choice(DOMAINS)
+    verbs = rng.sample(VERBS, 3)
+    commands = [{
+        "command": f"{verb_en}_{en}_{i}_{j}",
+        "description": f"{verb_zh}{zh}信息。\n- `tool_name`: {verb_en}_{en}\n- `query`: 查询内容（可选）",
+        "example": f'{{"tool_name": "{verb_en}_{en}_{i}_{j}", "query": "{zh}"}}',
+    } for j, (verb_zh, verb_en) in enumerate(verbs)]
+    return {
+        "displayName": f"{zh}服务{i}",
+        "version": "1.0.0",
+        "description": f"支持{'、'.join(v[0] + zh for v in verbs)}，{en} service #{i} for {verbs[0][1]} tasks.",
+        "agentType": "mcp",
+        "capabilities": {"invocationCommands": commands},
+    }
+
+
+def legacy_query(capability):
+    matching_services = []
+    for service_name, manifest in MANIFEST_CACHE.items():
+        description = manifest.get('description', '').lower()
+        display_name = manifest.get('displayName', '').lower()
+        if capability.lower() in description or capability.lower() in display_name:
+            matching_services.append(service_name)
+    return matching_services
+
+
+def legacy_tools(service_name):
+    manifest = MANIFEST_CACHE.get(service_name, {})
+    capabilities = manifest.get('capabilities', {})
+    tools = []
+    for cmd in capabilities.get('invocationCommands', []):
+        tools.append({"name": cmd.get('command', ''), "description": cmd.get('description', ''),
+                      "example": cmd.get('example', '')})
+    return tools
+
+
+def register(name, manifest):
+    MANIFEST_CACHE[name] = manifest
+    MCP_REGISTRY[name] = None
+
+
+def unregister(name):
+    MANIFEST_CACHE.pop(name, None)
+    MCP_REGISTRY.pop(name, None)
+
+
+def timed(fn, args_list):
+    samples = []
+    results = []
+    for args in args_list:
+        t0 = time.perf_counter()
+        results.append(fn(*args))
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return samples, results
+
+
+def pct(samples, q):
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP注册中心能力查询基准")
+    parser.add_argument("--services", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = [f"bench_service_{i}" for i in range(args.services)]
+    manifests = {name: synthetic_manifest(i, rng) for i, name in enumerate(names)}
+
+    t0 = time.perf_counter()
+    for name in names:
+        register(name, manifests[name])
+    mcp_registry._ensure_capability_index()
+    register_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    rebuilt = CapabilityIndex()
+    rebuilt.sync(MANIFEST_CACHE)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    vocabulary = [d[0] for d in DOMAINS] + [d[1] for d in DOMAINS] + [v[0] + d[0] for v in VERBS for d in DOMAINS[:5]] + \
+                 ["service", "服务1", "Weather", "不存在的能力", "download_comic", "查询天气"]
+    queries = [(rng.choice(vocabulary),) for _ in range(args.queries)]
+    lookups = [(rng.choice(names),) for _ in range(args.queries)]
+
+    t0 = time.perf_counter()
+    for _ in range(100):
+        mcp_registry._ensure_capability_index()
+    sync_us = (time.perf_counter() - t0) * 1e6 / 100
+    print(f"{args.services} 个服务，{args.queries} 次查询；注册并对齐索引 {register_ms:.1f}ms，"
+          f"全量重建索引 {build_ms:.1f}ms，无变化时对齐 {sync_us:.1f}µs")
+    print("=" * 76)
+    print(f"{'操作':<26} | {'scan p50(µs)':>12} | {'index p50(µs)':>13} | {'scan p95':>9} | {'index p95':>9}")
+    print("-" * 76)
+    scan_q, scan_res = timed(legacy_query, queries)
+    index_q, index_res = timed(query_services_by_capability, queries)
+    print(f"{'query_services_by_capability':<26} | {pct(scan_q, .5):>12.1f} | {pct(index_q, .5):>13.1f} | "
+          f"{pct(scan_q, .95):>9.1f} | {pct(index_q, .95):>9.1f}")
+    scan_t, scan_tools = timed(legacy_tools, lookups)
+    index_t, index_tools = timed(get_available_tools, lookups)
+    print(f"{'get_available_tools':<26} | {pct(scan_t, .5):>12.1f} | {pct(index_t, .5):>13.1f} | "
+          f"{pct(scan_t, .95):>9.1f} | {pct(index_t, .95):>9.1f}")
+    scan_all, _ = timed(lambda: [legacy_tools(n) for n in names], [()] * 20)
+    index_all, _ = timed(lambda: [get_available_tools(n) for n in names], [()] * 20)
+    print(f"{'全部服务工具列表':<22} | {pct(scan_all, .5):>12.1f} | {pct(index_all, .5):>13.1f} | "
+          f"{pct(scan_all, .95):>9.1f} | {pct(index_all, .95):>9.1f}")
+    print("-" * 76)
+
+    missing = sum(1 for old, new in zip(scan_res, index_res) if not set(old) <= set(new))
+    extra = sum(len(set(new) - set(old)) for old, new in zip(scan_res, index_res))
+    same_tools = all(old == new for old, new in zip(scan_tools, index_tools))
+    print(f"索引结果缺失旧结果的查询: {missing}；词匹配额外命中: {extra}；工具列表一致: {'是' if same_tools else '否'}")
+
+    for name in names[:100]:
+        unregister(name)
+    t0 = time.perf_counter()
+    mcp_registry._ensure_capability_index()
+    unregister_us = (time.perf_counter() - t0) * 1e6 / 100
+    for name in names[:100]:
+        register(name, dict(manifests[name]))  # 替换为新的manifest对象
+    t0 = time.perf_counter()
+    mcp_registry._ensure_capability_index()
+    reregister_us = (time.perf_counter() - t0) * 1e6 / 100
+    print(f"增量注销 {unregister_us:.1f}µs/个，增量注册/替换 {reregister_us:.1f}µs/个")
+
+    # 服务数不变、manifest整体替换时查询结果也要更新
+    renamed = dict(manifests[names[0]], description="独一无二的新能力")
+    register(names[0], renamed)
+    assert query_services_by_capability("独一无二的新能力") == [names[0]]
+
+    for name in names:
+        unregister(name)
+    assert len(mcp_registry._ensure_capability_index()) == len(MANIFEST_CACHE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP同步调用等待基准
+
+用模拟的 mcp_manager（unified_call 按设定耗时 sleep）驱动 MCPScheduler，
+测量 skip_callback=True 时 schedule_task 从调用到拿到结果的延迟：
+- poll  : 旧实现，每秒检查一次 task.status
+- future: 任务结束时由工作协程直接唤醒等待方
+默认对比 10/50/200ms 三档快速工具，每档顺序调用与并发调用各测一遍。
+
+用法:
+    python scripts/bench_mcp_sync_wait.py --calls 10 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import types
+import uuid
+from datetime import datetime
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from system.config import config
+
+# 只加载 mcpserver 下需要的模块，不执行包的 __init__（它会连带加载 MCP 管理器和全部 Agent）
+if "mcpserver" not in sys.modules:
+    _pkg = types.ModuleType("mcpserver")
+    _pkg.__path__ = [os.path.join(ROOT, "mcpserver")]
+    sys.modules["mcpserver"] = _pkg
+
+from mcpserver.mcp_scheduler import MCPScheduler
+
+
+class FakeMCPManager:
+    """只实现 unified_call，按固定耗时返回"""
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+
+    async def unified_call(self, service_name, tool_name, args):
+        await asyncio.sleep(self.latency_s)
+        return f"{service_name}.{tool_name} ok"
+
+
+class PollingScheduler(MCPScheduler):
+    """旧的同步等待方式：每秒轮询一次任务状态，最多60次"""
+
+    async def wait_for_task(self, task, timeout):
+        for _ in range(int(timeout)):
+            await asyncio.sleep(1)
+            if task.status in ["completed", "failed"]:
+                return {
+                    "success": task.status == "completed",
+                    "task_id": task.id,
+                    "result": task.result if task.status == "completed" else None,
+                    "error": task.error if task.status == "failed" else None
+                }
+        return {"success": False, "task_id": task.id, "error": "执行超时"}
+
+
+def _task_info():
+    return {
+        "id": str(uuid.uuid4()),
+        "query": "bench",
+        "tool_calls": [{"service_name": "天气时间Agent", "tool_name": "today_weather", "city": "北京"}],
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "skip_callback": True,
+    }
+
+
+async def _timed_call(scheduler):
+    t0 = time.perf_counter()
+    result = await scheduler.schedule_task(_task_info())
+    assert result["success"], result
+    return (time.perf_counter() - t0) * 1000
+
+
+def _pct(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(mode, latency_s, calls, concurrency):
+    cls = PollingScheduler if mode == "poll" else MCPScheduler
+    scheduler = cls(FakeMCPManager(latency_s))
+    sequential = [await _timed_call(scheduler) for _ in range(calls)]
+    t0 = time.perf_counter()
+    concurrent = await asyncio.gather(*[_timed_call(scheduler) for _ in range(concurrency)])
+    wall = (time.perf_counter() - t0) * 1000
+    await scheduler.shutdown()
+    print(f"{mode:<6} | {latency_s * 1000:>7.0f} | {_pct(sequential, 50):>9.1f} | {_pct(sequential, 95):>9.1f}"
+          f" | {_pct(concurrent, 95):>12.1f} | {wall:>10.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP同步调用等待基准")
+    parser.add_argument("--calls", type=int, default=10, help="每档顺序调用次数")
+    parser.add_argument("--concurrency", type=int, default=8, help="每档并发调用数")
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[10, 50, 200], help="模拟工具耗时（毫秒）")
+    args = parser.parse_args()
+
+    # 直接走 mcp_manager.unified_call，不经过工具优先级降级
+    config.tool_priority.enabled = False
+
+    print(f"每档顺序 {args.calls} 次 + 并发 {args.concurrency} 个同步调用")
+    print("=" * 68)
+    print(f"{'方式':<6} | {'工具(ms)':>7} | {'p50(ms)':>9} | {'p95(ms)':>9} | {'并发p95(ms)':>12} | {'并发总(ms)':>10}")
+    print("-" * 68)
+    for latency_ms in args.latency_ms:
+        for mode in ("poll", "future"):
+            await run(mode, latency_ms / 1000, args.calls, args.concurrency)
+    print("-" * 68)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
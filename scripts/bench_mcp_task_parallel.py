@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP任务内工具调用并发基准
+
+用模拟的 mcp_manager（每个服务固定耗时 ± 抖动，可按概率失败）执行一个任务的多个 tool_calls，对比：
+- serial  : 旧实现，逐个 await _execute_single_tool_call
+- executor: ToolCallExecutor，按依赖图并发；同一服务默认按顺序执行，"parallel": true 的调用受 per_service_limit 限制
+场景：
+- independent: 互不相关的调用（天气 + 搜索 + 系统控制 ...）
+- chain      : 前一步结果作为后一步参数（{{N.字段}} 引用）与无关调用混合
+- fanout     : 一次搜索，多个声明 parallel 的同服务调用引用它的结果，最后一个调用汇总
+每个场景同时检查结果顺序与失败传播：失败的调用只让依赖它的调用失败。
+
+用法:
+    python scripts/bench_mcp_task_parallel.py --rounds 20 --fail-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from system.config import config
+
+# 只加载 mcpserver 下需要的模块，不执行包的 __init__（它会连带加载 MCP 管理器和全部 Agent）
+if "mcpserver" not in sys.modules:
+    _pkg = types.ModuleType("mcpserver")
+    _pkg.__path__ = [os.path.join(ROOT, "mcpserver")]
+    sys.modules["mcpserver"] = _pkg
+
+from mcpserver.mcp_scheduler import MCPScheduler
+
+# 服务 -> 平均耗时（秒）
+SERVICES = {"天气时间Agent": 0.08, "在线搜索": 0.25, "系统控制服务": 0.02, "应用启动服务": 0.12, "网页解析": 0.15}
+
+
+class FakeMCPManager:
+    """按服务耗时返回JSON结果，记录同一服务的最大并发"""
+
+    def __init__(self, rng, jitter, fail_rate):
+        self.rng = rng
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.running = {}
+        self.peak = {}
+
+    async def unified_call(self, service_name, tool_name, args):
+        self.running[service_name] = self.running.get(service_name, 0) + 1
+        self.peak[service_name] = max(self.peak.get(service_name, 0), self.running[service_name])
+        try:
+            base = SERVICES.get(service_name, 0.05)
+            await asyncio.sleep(max(0.0, base * (1 + self.rng.uniform(-self.jitter, self.jitter))))
+            if self.rng.random() < self.fail_rate:
+                raise RuntimeError(f"{service_name} 模拟失败")
+            return json.dumps({"tool": tool_name, "args": args, "url": f"https://example.com/{tool_name}"},
+                              ensure_ascii=False)
+        finally:
+            self.running[service_name] -= 1
+
+
+class FailingAwareScheduler(MCPScheduler):
+    """_execute_single_tool_call 会吞掉异常并返回占位成功；基准里让失败如实返回"""
+
+    async def _execute_single_tool_call(self, tool_call):
+        service_name = tool_call.get("service_name", "")
+        tool_name = tool_call.get("tool_name", "")
+        args = {k: v for k, v in tool_call.items() if k not in ["agentType", "service_name", "tool_name"]}
+        result = await self.mcp_manager.unified_call(service_name, tool_name, args)
+        return {"tool": tool_name, "success": True, "result": result}
+
+
+def scenario(name):
+    if name == "independent":
+        return [{"service_name": s, "tool_name": f"call_{i}", "q": i} for i, s in enumerate(SERVICES)] + \
+               [{"service_name": "在线搜索", "tool_name": "search_extra", "q": "more"}]
+    if name == "chain":
+        return [
+            {"service_name": "在线搜索", "tool_name": "search", "q": "新闻"},
+            {"service_name": "网页解析", "tool_name": "open", "url": "{{0.url}}"},
+            {"service_name": "天气时间Agent", "tool_name": "weather", "city": "北京"},
+            {"service_name": "系统控制服务", "tool_name": "notify", "text": "天气: {{2.tool}}, 新闻: {{1.url}}"},
+            {"service_name": "应用启动服务", "tool_name": "launch", "app": "浏览器"},
+        ]
+    # fanout：显式 call_id + depends_on
+    calls = [{"call_id": "search", "service_name": "在线搜索", "tool_name": "search", "q": "行情"}]
+    calls += [{"service_name": "网页解析", "tool_name": f"parse_{i}", "url": "{{search.url}}", "parallel": True}
+              for i in range(4)]
+    calls.append({"service_name": "系统控制服务", "tool_name": "summary", "depends_on": [1, 2, 3, 4]})
+    return calls
+
+
+async def serial(scheduler, tool_calls):
+    results = []
+    for tool_call in tool_calls:
+        try:
+            results.append(await scheduler._execute_single_tool_call(tool_call))
+        except Exception as e:
+            results.append({"tool": tool_call.get("tool_name", "unknown"), "success": False, "error": str(e)})
+    return results
+
+
+def _pct(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(mode, name, rounds, seed, jitter, fail_rate, per_service_limit):
+    manager = FakeMCPManager(random.Random(seed), jitter, fail_rate)
+    scheduler = FailingAwareScheduler(manager, per_service_limit=per_service_limit)
+    latencies, failed, skipped, ordered = [], 0, 0, True
+    for _ in range(rounds):
+        tool_calls = scenario(name)
+        t0 = time.perf_counter()
+        if mode == "serial":
+            results = await serial(scheduler, tool_calls)
+        else:
+            results = await scheduler.tool_executor.execute(tool_calls)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ordered &= [r.get("tool") for r in results] == [tc["tool_name"] for tc in tool_calls]
+        failed += sum(1 for r in results if not r["success"])
+        skipped += sum(1 for r in results if "依赖" in str(r.get("error")))
+    await scheduler.shutdown()
+    print(f"{name:<11} | {mode:<8} | {_pct(latencies, 50):>8.1f} | {_pct(latencies, 95):>8.1f} | "
+          f"{failed:>4} | {skipped:>8} | {'是' if ordered else '否':>4} | {max(manager.peak.values()):>4}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP任务内工具调用并发基准")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jitter", type=float, default=0.3, help="耗时抖动比例")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="单个调用失败概率")
+    parser.add_argument("--per-service-limit", type=int, default=4)
+    args = parser.parse_args()
+
+    # 直接走 mcp_manager.unified_call，不经过工具优先级降级
+    config.tool_priority.enabled = False
+
+    print(f"{args.rounds} 轮/场景，服务耗时: {SERVICES}，失败率 {args.fail_rate}")
+    print("=" * 78)
+    print(f"{'场景':<11} | {'方式':<8} | {'p50(ms)':>8} | {'p95(ms)':>8} | {'失败':>4} | {'依赖失败':>8} | {'有序':>4} | {'峰值':>4}")
+    print("-" * 78)
+    for name in ("independent", "chain", "fanout"):
+        for mode in ("serial", "executor"):
+            await run(mode, name, args.rounds, args.seed, args.jitter, args.fail_rate, args.per_service_limit)
+    print("-" * 78)
+    print("峰值 = 同一服务的最大并发调用数")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP调度器长时间运行基准
+
+按 /schedule 的流程（check_duplicate -> schedule_task）调度大量任务，工具调用立即返回，
+每批任务排队后测一次去重检查（未命中，即线性扫描的最坏情况），再等这批任务执行完。对比：
+- legacy: 旧实现，completed_tasks 为无上限 dict，check_duplicate 线性扫描活跃任务
+- store : CompletedTaskStore 有界保留 + 指纹索引去重
+每种实现在独立子进程中运行，报告RSS增量、保留任务数、每任务调度耗时与去重检查延迟。
+
+用法:
+    python scripts/bench_mcp_task_retention.py --tasks 1000000 --batch 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import uuid
+from datetime import datetime
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def rss_mb():
+    """当前进程常驻内存（MB）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+async def run_mode(mode, args):
+    from system.config import config
+
+    # 只加载 mcpserver 下需要的模块，不执行包的 __init__（它会连带加载 MCP 管理器和全部 Agent）
+    if "mcpserver" not in sys.modules:
+        _pkg = types.ModuleType("mcpserver")
+        _pkg.__path__ = [os.path.join(ROOT, "mcpserver")]
+        sys.modules["mcpserver"] = _pkg
+    from mcpserver.mcp_scheduler import MCPScheduler
+
+    class BenchScheduler(MCPScheduler):
+        async def _execute_single_tool_call(self, tool_call):
+            return {"tool": tool_call.get("tool_name", "unknown"), "success": True, "result": "ok"}
+
+    class UnboundedDict(dict):
+        def close(self, spill_remaining=False):
+            pass
+
+    class NoIndex:
+        def add(self, *a):
+            pass
+
+        def discard(self, *a):
+            pass
+
+    class LegacyScheduler(BenchScheduler):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            self.completed_tasks = UnboundedDict()
+            self._fingerprints = NoIndex()
+
+        async def check_duplicate(self, query, tool_calls):
+            for task_id, task in self.active_tasks.items():
+                if (task.query == query and
+                        len(task.tool_calls) == len(tool_calls) and
+                        all(tc.get("tool_name") == tc2.get("tool_name")
+                            for tc, tc2 in zip(task.tool_calls, tool_calls))):
+                    return True, task_id
+            return False, None
+
+    config.tool_priority.enabled = False
+    spill_path = os.path.join(tempfile.mkdtemp(), "completed.jsonl") if args.spill else None
+    cls = LegacyScheduler if mode == "legacy" else BenchScheduler
+    scheduler = cls(None, completed_max=args.retain, completed_ttl=0, spill_path=spill_path)
+    base_rss = rss_mb()
+
+    schedule_s = 0.0
+    dup_samples = []
+    miss_calls = [{"service_name": "在线搜索", "tool_name": "never_scheduled", "q": "miss"}]
+    t_start = time.perf_counter()
+    for start in range(0, args.tasks, args.batch):
+        t0 = time.perf_counter()
+        for i in range(start, min(start + args.batch, args.tasks)):
+            query = f"查询 {i}"
+            tool_calls = [{"service_name": "天气时间Agent", "tool_name": "today_weather", "city": f"城市{i % 500}"}]
+            await scheduler.check_duplicate(query, tool_calls)
+            await scheduler.schedule_task({
+                "id": str(uuid.uuid4()), "query": query, "tool_calls": tool_calls,
+                "session_id": f"s{i % 100}", "request_id": str(i),
+                "created_at": datetime.utcnow().isoformat() + "Z",
+            })
+        schedule_s += time.perf_counter() - t0
+
+        # 这批任务都还在排队：测一次未命中的去重检查
+        t0 = time.perf_counter()
+        await scheduler.check_duplicate("不存在的查询", miss_calls)
+        dup_samples.append(time.perf_counter() - t0)
+
+        while scheduler.active_tasks:
+            await asyncio.sleep(0.001)
+    total_s = time.perf_counter() - t_start
+    after_rss = rss_mb()
+
+    result = {
+        "mode": mode,
+        "total_s": total_s,
+        "rss_mb": after_rss - base_rss,
+        "retained": len(scheduler.completed_tasks),
+        "schedule_us": schedule_s / args.tasks * 1e6,
+        "dup_p50_us": percentile(dup_samples, 0.5) * 1e6,
+        "dup_p99_us": percentile(dup_samples, 0.99) * 1e6,
+    }
+    if mode != "legacy":
+        result["stats"] = scheduler.completed_tasks.get_stats()
+    await scheduler.shutdown()
+    if spill_path:
+        result["spill_mb"] = sum(os.path.getsize(p) for p in (spill_path, spill_path + ".1")
+                                 if os.path.exists(p)) / 1024 / 1024
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP调度器长时间运行基准")
+    parser.add_argument("--tasks", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=2000, help="每批排队的任务数（即去重检查时的活跃任务数）")
+    parser.add_argument("--retain", type=int, default=10000, help="CompletedTaskStore 保留任务数")
+    parser.add_argument("--spill", action="store_true", help="被淘汰任务写入临时JSONL留档")
+    parser.add_argument("--mode", choices=["legacy", "store"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        asyncio.run(run_mode(args.mode, args))
+        return
+
+    print(f"{args.tasks} 个任务，每批 {args.batch} 个排队；保留上限 {args.retain}，留档: {'是' if args.spill else '否'}")
+    print("=" * 92)
+    print(f"{'实现':<6} | {'总耗时(s)':>9} | {'RSS增量(MB)':>11} | {'保留任务':>8} | {'调度(µs/个)':>11} | "
+          f"{'去重p50(µs)':>11} | {'去重p99(µs)':>11}")
+    print("-" * 92)
+    for mode in ("legacy", "store"):
+        out = subprocess.run([sys.executable, __file__, "--mode", mode] + sys.argv[1:],
+                             capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<6} | {r['total_s']:>9.1f} | {r['rss_mb']:>11.1f} | {r['retained']:>8} | "
+              f"{r['schedule_us']:>11.1f} | {r['dup_p50_us']:>11.1f} | {r['dup_p99_us']:>11.1f}")
+        if "stats" in r:
+            print(f"       {r['stats']}" + (f"，留档 {r['spill_mb']:.1f}MB" if "spill_mb" in r else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MCP调度器工作协程池基准
+
+模拟一个慢Agent的突发积压：先提交 --slow 个慢服务任务，紧接着提交 --fast 个其他服务的快任务，
+之后空闲 --idle 秒。对比：
+- legacy  : 旧实现，固定10个工作协程，每个以1秒超时轮询队列
+- adaptive: 阻塞等待队列的弹性协程池 + 按服务的任务数配额
+统计快任务/慢任务从提交到完成的延迟、全部完成耗时、空闲期间的无效唤醒次数，
+以及突发期间与空闲后的 get_status 指标（协程数、利用率、排队深度）。
+
+用法:
+    python scripts/bench_mcp_worker_pool.py --slow 40 --fast 20 --slow-ms 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import types
+import uuid
+from datetime import datetime
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from system.config import config
+
+# 只加载 mcpserver 下需要的模块，不执行包的 __init__（它会连带加载 MCP 管理器和全部 Agent）
+if "mcpserver" not in sys.modules:
+    _pkg = types.ModuleType("mcpserver")
+    _pkg.__path__ = [os.path.join(ROOT, "mcpserver")]
+    sys.modules["mcpserver"] = _pkg
+
+from mcpserver.mcp_scheduler import MCPScheduler
+
+FAST_SERVICES = ["天气时间Agent", "系统控制服务", "应用启动服务"]
+
+
+class FakeMCPManager:
+    def __init__(self, slow_s, fast_s):
+        self.slow_s = slow_s
+        self.fast_s = fast_s
+
+    async def unified_call(self, service_name, tool_name, args):
+        await asyncio.sleep(self.slow_s if service_name == "慢Agent" else self.fast_s)
+        return "ok"
+
+
+class AdaptiveScheduler(MCPScheduler):
+    wakeups = 0  # 阻塞等待没有空转唤醒
+
+
+class LegacyScheduler(MCPScheduler):
+    """旧的固定协程池：10个协程各自 wait_for(get, 1s) 轮询"""
+
+    wakeups = 0
+
+    def _start_workers(self):
+        self.max_concurrent = 10
+        for i in range(self.max_concurrent):
+            self._live_workers += 1
+            self.worker_tasks.add(asyncio.create_task(self._worker(f"worker-{i}")))
+
+    def _enqueue(self, task):
+        self.task_queue.put_nowait(task)
+
+    async def _worker(self, worker_name):
+        while not self.shutdown_event.is_set():
+            try:
+                task = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
+                if task is None:
+                    break
+                self._busy_workers += 1
+                try:
+                    await self._execute_task(task)
+                finally:
+                    self._busy_workers -= 1
+            except asyncio.TimeoutError:
+                self.wakeups += 1
+                continue
+
+
+def _task_info(service):
+    return {
+        "id": str(uuid.uuid4()), "query": f"bench {service}",
+        "tool_calls": [{"service_name": service, "tool_name": "run"}],
+        "created_at": datetime.utcnow().isoformat() + "Z", "skip_callback": True,
+    }
+
+
+def _pct(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(mode, args):
+    cls = LegacyScheduler if mode == "legacy" else AdaptiveScheduler
+    scheduler = cls(FakeMCPManager(args.slow_ms / 1000, args.fast_ms / 1000))
+
+    async def timed(service):
+        t0 = time.perf_counter()
+        await scheduler.schedule_task(_task_info(service))
+        return (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    slow = [asyncio.ensure_future(timed("慢Agent")) for _ in range(args.slow)]
+    await asyncio.sleep(0.01)
+    fast = [asyncio.ensure_future(timed(FAST_SERVICES[i % len(FAST_SERVICES)])) for i in range(args.fast)]
+    await asyncio.sleep(0.05)
+    burst = await scheduler.get_status()
+    fast_ms = await asyncio.gather(*fast)
+    slow_ms = await asyncio.gather(*slow)
+    total = (time.perf_counter() - t0) * 1000
+
+    wakeups_before = scheduler.wakeups
+    await asyncio.sleep(args.idle)
+    idle = await scheduler.get_status()
+    idle_wakeups = scheduler.wakeups - wakeups_before
+    await scheduler.shutdown()
+
+    print(f"{mode:<8} | {_pct(fast_ms, 50):>9.0f} | {_pct(fast_ms, 95):>9.0f} | {_pct(slow_ms, 95):>9.0f} | "
+          f"{total:>8.0f} | {idle_wakeups:>8} | {burst['workers']:>4}/{burst.get('worker_utilization', '-')!s:<5} | "
+          f"{idle['workers']:>4}")
+    return burst, idle
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="MCP调度器工作协程池基准")
+    parser.add_argument("--slow", type=int, default=40, help="慢服务任务数")
+    parser.add_argument("--fast", type=int, default=20, help="快任务数")
+    parser.add_argument("--slow-ms", type=float, default=1000)
+    parser.add_argument("--fast-ms", type=float, default=50)
+    parser.add_argument("--idle", type=float, default=5.0, help="突发结束后的空闲观察时间（秒）")
+    args = parser.parse_args()
+
+    # 直接走 mcp_manager.unified_call，不经过工具优先级降级
+    config.tool_priority.enabled = False
+    settings = config.mcp_scheduler
+    print(f"慢任务 {args.slow} 个 x {args.slow_ms:g}ms，快任务 {args.fast} 个 x {args.fast_ms:g}ms；"
+          f"弹性池 {settings.min_workers}~{settings.max_workers} 协程，每服务配额 {settings.service_quota}")
+    print("=" * 90)
+    print(f"{'方式':<8} | {'快p50(ms)':>9} | {'快p95(ms)':>9} | {'慢p95(ms)':>9} | {'总耗时':>8} | "
+          f"{'空闲唤醒':>8} | {'突发协程/利用率':<10} | {'空闲协程':>4}")
+    print("-" * 90)
+    await run("legacy", args)
+    burst, idle = await run("adaptive", args)
+    print("-" * 90)
+    print(f"突发期间 get_status: {burst}")
+    print(f"空闲后 get_status  : {idle}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Neo4j五元组写入吞吐基准
+
+对比旧版逐条 graph.merge（每个五元组3次往返）与批量 UNWIND 写入路径。
+默认使用进程内的模拟图数据库（按往返次数计入网络延迟），
+也可以通过 --uri 指向本地 Neo4j 实例进行实测（会写入 Entity 节点，请使用测试库）。
+
+用法:
+    python scripts/bench_neo4j_ingest.py --rtt-ms 1.0
+    python scripts/bench_neo4j_ingest.py --uri neo4j://127.0.0.1:7687 --user neo4j --password xxx
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summer_memory.quintuple_graph import write_quintuples_batched
+
+
+class _FakeTransaction:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def run(self, query, **params):
+        rows = params.get("rows", [])
+        self.graph.round_trip(len(rows))
+
+
+class FakeGraph:
+    """进程内替身：每次往返休眠 rtt，每行再加少量服务端处理时间"""
+
+    def __init__(self, rtt_ms, row_cost_us):
+        self.rtt = rtt_ms / 1000.0
+        self.row_cost = row_cost_us / 1e6
+        self.round_trips = 0
+
+    def round_trip(self, rows=1):
+        self.round_trips += 1
+        time.sleep(self.rtt + rows * self.row_cost)
+
+    def merge(self, *args, **kwargs):
+        self.round_trip()
+
+    def begin(self):
+        self.round_trip()
+        return _FakeTransaction(self)
+
+    def commit(self, tx):
+        self.round_trip()
+
+    def rollback(self, tx):
+        self.round_trip()
+
+
+def make_quintuples(count, relation_types):
+    return [
+        (f"实体{i}", "人物", f"关系{i % relation_types}", f"对象{i % (count // 2 + 1)}", "物品")
+        for i in range(count)
+    ]
+
+
+def legacy_write(graph, quintuples):
+    """旧版写入：每个五元组 merge 两个节点和一条关系"""
+    if isinstance(graph, FakeGraph):
+        for _ in quintuples:
+            graph.merge()
+            graph.merge()
+            graph.merge()
+        return
+
+    from py2neo import Node, Relationship
+    for head, head_type, rel, tail, tail_type in quintuples:
+        h_node = Node("Entity", name=head, entity_type=head_type)
+        t_node = Node("Entity", name=tail, entity_type=tail_type)
+        r = Relationship(h_node, rel, t_node, head_type=head_type, tail_type=tail_type)
+        graph.merge(h_node, "Entity", "name")
+        graph.merge(t_node, "Entity", "name")
+        graph.merge(r)
+
+
+def run_case(graph_factory, name, writer, quintuples):
+    graph = graph_factory()
+    t0 = time.perf_counter()
+    writer(graph, quintuples)
+    elapsed = time.perf_counter() - t0
+    round_trips = getattr(graph, "round_trips", None)
+    rt_text = f"{round_trips:>8}" if round_trips is not None else f"{'-':>8}"
+    print(f"{len(quintuples):>8} | {name:<16} | {elapsed * 1000:>10.1f} | {len(quintuples) / elapsed:>10.1f} | {rt_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neo4j五元组写入吞吐基准")
+    parser.add_argument("--counts", type=int, nargs="+", default=[20, 100, 1000])
+    parser.add_argument("--relation-types", type=int, default=8, help="合成数据中的关系类型数")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="模拟的单次往返延迟")
+    parser.add_argument("--row-cost-us", type=float, default=20.0, help="模拟的每行服务端处理耗时")
+    parser.add_argument("--uri", help="真实Neo4j地址，设置后不再使用进程内替身")
+    parser.add_argument("--user", default="neo4j")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="neo4j")
+    args = parser.parse_args()
+
+    if args.uri:
+        from py2neo import Graph
+        shared = Graph(args.uri, auth=(args.user, args.password), name=args.database)
+        graph_factory = lambda: shared
+        print(f"目标: Neo4j {args.uri}")
+    else:
+        graph_factory = lambda: FakeGraph(args.rtt_ms, args.row_cost_us)
+        print(f"目标: 进程内替身 (rtt={args.rtt_ms}ms, row_cost={args.row_cost_us}us)")
+
+    print("=" * 66)
+    print(f"{'五元组':>8} | {'写入方式':<16} | {'耗时(ms)':>10} | {'条/秒':>10} | {'往返次数':>8}")
+    print("-" * 66)
+    for count in args.counts:
+        quintuples = make_quintuples(count, args.relation_types)
+        run_case(graph_factory, "legacy merge", legacy_write, quintuples)
+        run_case(graph_factory, "batched UNWIND",
+                 lambda g, q: write_quintuples_batched(g, q, chunk_size=args.chunk_size, max_retries=3), quintuples)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+五元组存储写入延迟基准
+
+对比追加式分段存储(QuintupleStore)与旧版“读取-合并-重写整个JSON”方式，
+在图谱规模从 1k 增长到 1M 时单次 store 的延迟变化。
+
+用法:
+    python scripts/bench_quintuple_store.py
+    python scripts/bench_quintuple_store.py --sizes 1000 10000 100000 1000000 --legacy-max 100000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summer_memory.quintuple_store import QuintupleStore
+
+
+def make_quintuples(start, count):
+    """生成互不重复的合成五元组"""
+    return [
+        (f"实体{i}", "人物", f"关系{i % 97}", f"对象{i}", "物品")
+        for i in range(start, start + count)
+    ]
+
+
+def legacy_store(path, new_quintuples):
+    """旧版实现：每次读取全部五元组、合并后整体重写"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            all_quintuples = set(tuple(t) for t in json.load(f))
+    except FileNotFoundError:
+        all_quintuples = set()
+    all_quintuples.update(new_quintuples)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(list(all_quintuples), f, ensure_ascii=False, indent=2)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+    return ordered[index]
+
+
+def bench_store(size, batch, rounds, fsync):
+    workdir = tempfile.mkdtemp(prefix="bench_quintuples_")
+    try:
+        snapshot = os.path.join(workdir, "quintuples.json")
+        store = QuintupleStore(snapshot, fsync=fsync)
+        # 预填充到目标规模（不计时）
+        step = 50000
+        for start in range(0, size, step):
+            store.append(make_quintuples(start, min(step, size - start)))
+        store.compact(force=True)
+
+        latencies = []
+        next_id = size
+        for _ in range(rounds):
+            items = make_quintuples(next_id, batch)
+            next_id += batch
+            t0 = time.perf_counter()
+            store.append(items)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        store.close()
+        return latencies
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_legacy(size, batch, rounds):
+    workdir = tempfile.mkdtemp(prefix="bench_quintuples_legacy_")
+    try:
+        path = os.path.join(workdir, "quintuples.json")
+        legacy_store(path, make_quintuples(0, size))
+        latencies = []
+        next_id = size
+        for _ in range(rounds):
+            items = make_quintuples(next_id, batch)
+            next_id += batch
+            t0 = time.perf_counter()
+            legacy_store(path, items)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        return latencies
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="五元组存储写入延迟基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--batch", type=int, default=10, help="每次store的五元组数量")
+    parser.add_argument("--rounds", type=int, default=200, help="每个规模下计时的store次数")
+    parser.add_argument("--legacy-max", type=int, default=100000, help="旧版实现测试的最大规模（旧版过慢）")
+    parser.add_argument("--no-fsync", action="store_true", help="追加时不调用fsync")
+    args = parser.parse_args()
+
+    print("=" * 72)
+    print(f"五元组存储写入延迟 (batch={args.batch}, rounds={args.rounds}, fsync={not args.no_fsync})")
+    print("=" * 72)
+    print(f"{'规模':>10} | {'实现':<8} | {'p50(ms)':>9} | {'p99(ms)':>9} | {'mean(ms)':>9}")
+    print("-" * 72)
+    for size in args.sizes:
+        latencies = bench_store(size, args.batch, args.rounds, not args.no_fsync)
+        print(f"{size:>10} | {'append':<8} | {percentile(latencies, 50):>9.3f} | "
+              f"{percentile(latencies, 99):>9.3f} | {statistics.mean(latencies):>9.3f}")
+        if size <= args.legacy_max:
+            legacy_rounds = max(5, min(args.rounds, 2000000 // max(size, 1)))
+            latencies = bench_legacy(size, args.batch, legacy_rounds)
+            print(f"{size:>10} | {'legacy':<8} | {percentile(latencies, 50):>9.3f} | "
+                  f"{percentile(latencies, 99):>9.3f} | {statistics.mean(latencies):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话存储浸泡基准
+
+按 MessageManager 的访问方式（创建会话、逐轮追加消息、读取历史）生成 --sessions 个合成会话，
+对比旧实现（无上限 dict）与 SessionStore（LRU + 内存预算 + SQLite 写盘）的：
+- 进程常驻内存（RSS）
+- 查询延迟：热点会话（80% 请求落在 1% 会话上）与冷会话（需要从磁盘加载）
+每种实现在独立子进程中运行，RSS 互不影响。
+
+用法:
+    python scripts/bench_session_store.py --sessions 100000 --rounds 3
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+WORDS = ["今天", "天气", "怎么样", "帮我", "查一下", "明天", "的", "日程", "好的", "已经", "为你", "打开", "音乐", "hello"]
+
+
+def rss_mb():
+    """当前进程常驻内存（MB）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+def run_mode(mode, args):
+    from apiserver.session_store import SessionStore
+
+    rng = random.Random(args.seed)
+    text = lambda n: "".join(rng.choice(WORDS) for _ in range(n))
+    base_rss = rss_mb()
+
+    tmp = tempfile.mkdtemp()
+    if mode == "dict":
+        sessions = {}
+        mark_dirty = lambda sid, session: None
+    else:
+        sessions = SessionStore(os.path.join(tmp, "sessions.sqlite3"), max_sessions=args.max_sessions,
+                                memory_budget_mb=args.budget_mb, idle_ttl=0, flush_interval=1.0)
+        mark_dirty = sessions.mark_dirty
+
+    # 创建会话并逐轮追加消息（与 MessageManager.add_message_pair 一致）
+    ids = [f"session-{i:06d}" for i in range(args.sessions)]
+    t0 = time.perf_counter()
+    for sid in ids:
+        now = time.time()
+        sessions[sid] = {"created_at": now, "messages": [], "agent_type": "default", "last_activity": now}
+        session = sessions[sid]
+        for _ in range(args.rounds):
+            session["messages"].append({"role": "user", "content": text(8)})
+            session["messages"].append({"role": "assistant", "content": text(30)})
+            session["last_activity"] = time.time()
+            mark_dirty(sid, session)
+    build_s = time.perf_counter() - t0
+    if mode != "dict":
+        sessions.flush()
+    after_rss = rss_mb()
+
+    # 热点访问：80% 的请求落在 1% 的会话
+    hot = ids[:max(1, len(ids) // 100)]
+    hot_samples, cold_samples = [], []
+    for i in range(args.lookups):
+        if rng.random() < 0.8:
+            sid = rng.choice(hot)
+            bucket = hot_samples
+        else:
+            sid = rng.choice(ids)
+            bucket = cold_samples
+        t = time.perf_counter()
+        messages = sessions.get(sid)["messages"]
+        bucket.append(time.perf_counter() - t)
+        assert len(messages) == args.rounds * 2
+
+    result = {
+        "mode": mode,
+        "build_s": build_s,
+        "rss_mb": after_rss - base_rss,
+        "hot_p50": percentile(hot_samples, 0.5),
+        "hot_p99": percentile(hot_samples, 0.99),
+        "cold_p50": percentile(cold_samples, 0.5),
+        "cold_p99": percentile(cold_samples, 0.99),
+    }
+    if mode != "dict":
+        result["stats"] = sessions.get_stats()
+        sessions.close()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="会话存储浸泡基准")
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=3, help="每个会话的对话轮数")
+    parser.add_argument("--lookups", type=int, default=50000)
+    parser.add_argument("--max-sessions", type=int, default=2000, help="SessionStore 常驻会话上限")
+    parser.add_argument("--budget-mb", type=float, default=64, help="SessionStore 内存预算")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=["dict", "store"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args)
+        return
+
+    print(f"{args.sessions} 个会话 x {args.rounds} 轮，{args.lookups} 次查询；"
+          f"SessionStore 上限 {args.max_sessions} 个 / {args.budget_mb:g}MB")
+    print("=" * 92)
+    print(f"{'实现':<6} | {'构建(s)':>8} | {'RSS增量(MB)':>11} | {'热点p50(µs)':>11} | {'热点p99(µs)':>11} | "
+          f"{'冷p50(µs)':>10} | {'冷p99(µs)':>10}")
+    print("-" * 92)
+    for mode in ("dict", "store"):
+        out = subprocess.run([sys.executable, __file__, "--mode", mode] + sys.argv[1:],
+                             capture_output=True, text=True, check=True).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<6} | {r['build_s']:>8.2f} | {r['rss_mb']:>11.1f} | {r['hot_p50'] * 1000:>11.1f} | "
+              f"{r['hot_p99'] * 1000:>11.1f} | {r['cold_p50'] * 1000:>10.1f} | {r['cold_p99'] * 1000:>10.1f}")
+        if "stats" in r:
+            print(f"       {r['stats']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+/chat/stream 帧格式基准
+
+用模拟的 LLM 增量流（中文为主的 1~3 字增量，按固定间隔到达）分别以
+旧 base64 格式与 text 格式（不同合并间隔）编码，统计每次响应的传输字节、事件数、
+首字延迟以及合并带来的最大额外延迟。
+
+用法:
+    python scripts/bench_stream_format.py --deltas 300 --interval-ms 15
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+from apiserver.sse import ChatStreamEncoder, coalesce_deltas
+
+PIECES = ["你", "好", "我是", "娜迦", "，", "今天", "的", "天气", "很", "不错", "。", "要不要",
+          "一起", "去", "公园", "散步", "？", " OK", "\n"]
+
+
+def make_deltas(count, seed):
+    rng = random.Random(seed)
+    return [rng.choice(PIECES) for _ in range(count)]
+
+
+async def llm_stream(deltas, interval, arrivals):
+    for text in deltas:
+        await asyncio.sleep(interval)
+        arrivals.append((time.perf_counter(), len(text)))
+        yield text
+
+
+async def run(stream_format, flush_ms, deltas, interval):
+    encoder = ChatStreamEncoder(stream_format)
+    arrivals = []
+    source = llm_stream(deltas, interval, arrivals)
+    if encoder.is_text:
+        source = coalesce_deltas(source, flush_ms / 1000)
+
+    t0 = time.perf_counter()
+    total_bytes = len(encoder.session("bench-session").encode())
+    events = 1
+    first = None
+    max_delay = 0.0
+    consumed = 0
+    async for text in source:
+        now = time.perf_counter()
+        if first is None:
+            first = now - t0
+        # 本事件包含的增量中，最早到达的那个等待了多久
+        oldest = arrivals[consumed][0]
+        max_delay = max(max_delay, now - oldest)
+        remaining = len(text)
+        while remaining > 0:
+            remaining -= arrivals[consumed][1]
+            consumed += 1
+        total_bytes += len(encoder.delta(text).encode())
+        events += 1
+    total_bytes += len(encoder.done().encode())
+    events += 1
+    return total_bytes, events, first * 1000, max_delay * 1000
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="/chat/stream 帧格式基准")
+    parser.add_argument("--deltas", type=int, default=300, help="每次响应的LLM增量数")
+    parser.add_argument("--interval-ms", type=float, default=15, help="增量到达间隔")
+    parser.add_argument("--flush-ms", type=int, nargs="+", default=[0, 40, 100])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    deltas = make_deltas(args.deltas, args.seed)
+    text_bytes = len("".join(deltas).encode())
+    print(f"{args.deltas} 个增量，到达间隔 {args.interval_ms:g}ms，正文 {text_bytes} 字节")
+    print("=" * 74)
+    print(f"{'格式':<14} | {'传输字节':>9} | {'相对正文':>8} | {'事件数':>6} | {'首字(ms)':>9} | {'最大额外延迟(ms)':>15}")
+    print("-" * 74)
+    cases = [("base64", 0)] + [("text", ms) for ms in args.flush_ms]
+    for stream_format, flush_ms in cases:
+        total, events, ttft, delay = await run(stream_format, flush_ms, deltas, args.interval_ms / 1000)
+        name = stream_format if stream_format == "base64" else f"text/{flush_ms}ms"
+        print(f"{name:<14} | {total:>9} | {total / text_bytes:>7.2f}x | {events:>6} | {ttft:>9.1f} | {delay:>15.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
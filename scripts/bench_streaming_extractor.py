@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式切句基准
+
+把 --size KB 的模拟回复按随机大小（1~--max-chunk 字符）切块后喂给 StreamingToolCallExtractor，
+对比旧实现（逐字符追加 + 每个结束符对整个缓冲区 re.split）与单遍扫描实现：
+- 总耗时与每块平均耗时
+- 最后 10% 文本块与最前 10% 文本块的平均耗时之比（线性实现应接近 1）
+并校验两者发出的句子序列与完整文本完全一致。
+
+两种文本：
+- prose: 中文为主的正常对话（句子较短）
+- code : 长段无标点文本（如代码块、长链接），旧实现的缓冲区拼接退化为平方级
+
+用法:
+    python scripts/bench_streaming_extractor.py --size 100 --max-chunk 16
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+from apiserver.streaming_tool_extractor import StreamingToolCallExtractor
+
+PROSE = ["你好", "，", "今天", "天气", "不错", "。", "我们", "去", "公园", "散步", "吧", "！", "好吗", "？",
+         " hello", " world", ".", "版本", "1.2", "；", "\n"]
+CODE = list("abcdefghijklmnopqrstuvwxyz_ ()[]{}=+-*/<>\n\t0123456789")
+
+
+class LegacyExtractor:
+    """旧实现的切句逻辑（逐字符）"""
+
+    def __init__(self, sink):
+        self.text_buffer = ""
+        self.complete_text = ""
+        self.sentence_endings = r"[。？！；\.\?\!\;]"
+        self.sink = sink
+
+    async def process_text_chunk(self, text_chunk):
+        self.complete_text += text_chunk
+        for char in text_chunk:
+            self.text_buffer += char
+            if re.search(self.sentence_endings, char):
+                sentences = re.split(self.sentence_endings, self.text_buffer)
+                if len(sentences) > 1:
+                    complete_sentence = sentences[0] + char
+                    if complete_sentence.strip():
+                        self.sink(complete_sentence)
+                    remaining_sentences = [s for s in sentences[1:] if s.strip()]
+                    self.text_buffer = "".join(remaining_sentences)
+
+    async def finish_processing(self):
+        if self.text_buffer:
+            self.sink(self.text_buffer)
+            self.text_buffer = ""
+
+
+class CollectingExtractor(StreamingToolCallExtractor):
+    """收集发往语音集成的句子，而不是启动TTS线程"""
+
+    def __init__(self, sink):
+        super().__init__()
+        self._sink = sink
+
+    def _send_to_voice_integration(self, text):
+        self._sink(text)
+
+
+def make_text(kind, size, rng):
+    pieces = PROSE if kind == "prose" else CODE
+    out, length = [], 0
+    while length < size:
+        piece = rng.choice(pieces)
+        out.append(piece)
+        length += len(piece)
+    if kind == "code":
+        # 代码块中偶尔出现的句号（如方法调用）
+        return "".join(out)[:size].replace("(", ".(", 3)
+    return "".join(out)[:size]
+
+
+def make_chunks(text, max_chunk, rng):
+    chunks, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, max_chunk)
+        chunks.append(text[i:i + n])
+        i += n
+    return chunks
+
+
+async def run(factory, chunks):
+    sentences = []
+    extractor = factory(sentences.append)
+    timings = []
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        t = time.perf_counter()
+        await extractor.process_text_chunk(chunk)
+        timings.append(time.perf_counter() - t)
+    await extractor.finish_processing()
+    total = time.perf_counter() - t0
+    tenth = max(1, len(timings) // 10)
+    head = sum(timings[:tenth]) / tenth
+    tail = sum(timings[-tenth:]) / tenth
+    return total, tail / head if head else float("nan"), sentences, extractor.complete_text
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="流式切句基准")
+    parser.add_argument("--size", type=int, default=100, help="回复大小（KB，按字符计）")
+    parser.add_argument("--max-chunk", type=int, default=16, help="随机切块的最大字符数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{args.size}KB 回复，随机切块 1~{args.max_chunk} 字符")
+    print("=" * 72)
+    print(f"{'文本':<6} | {'实现':<8} | {'块数':>6} | {'总耗时(ms)':>10} | {'每块(µs)':>9} | {'尾/首块耗时比':>12}")
+    print("-" * 72)
+    for kind in ("prose", "code"):
+        text = make_text(kind, args.size * 1024, rng)
+        chunks = make_chunks(text, args.max_chunk, rng)
+        results = {}
+        for name, factory in (("legacy", LegacyExtractor), ("单遍扫描", CollectingExtractor)):
+            total, ratio, sentences, complete = await run(factory, chunks)
+            results[name] = (sentences, complete)
+            print(f"{kind:<6} | {name:<8} | {len(chunks):>6} | {total * 1000:>10.1f} | "
+                  f"{total / len(chunks) * 1e6:>9.2f} | {ratio:>12.2f}")
+        assert results["legacy"] == results["单遍扫描"], f"{kind}: 切句结果不一致"
+    print("-" * 72)
+    print("两种实现发出的句子序列与完整文本一致")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
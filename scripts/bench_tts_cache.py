@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS音频缓存基准
+
+按 VoiceIntegration._generate_audio_sync 的顺序（查缓存 -> 获取合成信号量 -> 合成 -> 写缓存）
+用假引擎（time.sleep 模拟，同时最多 --workers 个请求）跑一段对话负载：
+--repeat-ratio 的句子来自少量常用语（问候、确认等，按 Zipf 分布抽取），其余为一次性句子。
+句子每隔 --interval-ms 到达一次（开环，模拟多路对话），对比：
+- none : 不使用缓存
+- cold : 空缓存启动
+- warm : 用 cold 留下的磁盘缓存重新创建（模拟进程重启），一次性句子换成新的
+统计引擎合成次数与耗时、每句延迟（含排队）p50/p95、常用语延迟 p95、命中率与节省的合成字节数。
+
+用法:
+    python scripts/bench_tts_cache.py --sentences 400
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice.output.tts_cache import TTSAudioCache, make_cache_key
+
+COMMON = ["你好呀！", "好的。", "没问题。", "我在呢。", "收到，马上处理。", "晚安，做个好梦。", "早上好！",
+          "稍等一下。", "已经帮你打开了。", "还有什么需要吗？", "嗯嗯。", "对的。", "不客气。", "明白了。",
+          "我来查一下。", "这个我不太确定。", "好的，已经记下了。", "请再说一遍？", "哈哈。", "谢谢你。"]
+
+
+def build_workload(args, seed):
+    rng = random.Random(seed)
+    weights = [1 / (i + 1) for i in range(len(COMMON))]
+    workload = []
+    for i in range(args.sentences):
+        if rng.random() < args.repeat_ratio:
+            workload.append((True, rng.choices(COMMON, weights)[0]))
+        else:
+            workload.append((False, f"第{i}句：" + "".join(rng.choice("今天天气不错我们去公园散步吧") for _ in range(rng.randint(8, 30))) + "。"))
+    return workload
+
+
+def run(mode, args, workload, cache_dir):
+    semaphore = threading.Semaphore(args.workers)
+    engine = {"calls": 0, "busy": 0.0}
+    cache = None if mode == "none" else TTSAudioCache(cache_dir, max_disk_mb=args.disk_mb, memory_mb=args.memory_mb)
+
+    def synthesize(text):
+        # 与 _generate_audio_sync 相同：命中缓存时不获取信号量
+        key = make_cache_key("edge_tts", "zh-CN-XiaoxiaoNeural|mp3", 1.0, text)
+        if cache is not None:
+            audio = cache.get(key)
+            if audio is not None:
+                return audio
+        with semaphore:
+            cost = (args.synth_base_ms + args.synth_char_ms * len(text)) / 1000
+            time.sleep(cost)
+            audio = os.urandom(args.bytes_per_char * len(text))
+            engine["calls"] += 1
+            engine["busy"] += cost
+        if cache is not None:
+            cache.put(key, audio)
+        return audio
+
+    def timed(item, arrived):
+        synthesize(item[1])
+        return item[0], time.perf_counter() - arrived
+
+    start = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=args.callers) as pool:
+        for i, item in enumerate(workload):
+            delay = start + i * args.interval_ms / 1000 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(timed, item, time.perf_counter()))
+        results = [f.result() for f in futures]
+    stats = cache.get_stats() if cache is not None else {}
+    return engine, results, stats
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS音频缓存基准")
+    parser.add_argument("--sentences", type=int, default=400)
+    parser.add_argument("--repeat-ratio", type=float, default=0.4, help="来自常用语的句子比例")
+    parser.add_argument("--interval-ms", type=float, default=40, help="句子到达间隔")
+    parser.add_argument("--callers", type=int, default=64, help="请求线程数（足够大，排队发生在合成信号量上）")
+    parser.add_argument("--workers", type=int, default=2, help="合成信号量大小（tts.synthesis_workers）")
+    parser.add_argument("--synth-base-ms", type=float, default=40, help="每次合成的固定开销")
+    parser.add_argument("--synth-char-ms", type=float, default=2, help="每个字的合成耗时")
+    parser.add_argument("--bytes-per-char", type=int, default=3000, help="每个字的音频字节数（约mp3 24kbps）")
+    parser.add_argument("--disk-mb", type=float, default=256)
+    parser.add_argument("--memory-mb", type=float, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_tts_cache_")
+    try:
+        print(f"{args.sentences} 句（常用语 {args.repeat_ratio:.0%}），每 {args.interval_ms:g}ms 到达一句，合成并发 {args.workers}，"
+              f"假引擎 {args.synth_base_ms:g}ms + {args.synth_char_ms:g}ms/字")
+        print("=" * 111)
+        print(f"{'方式':<5} | {'合成次数':>8} | {'合成耗时(s)':>11} | {'延迟p50(ms)':>11} | {'延迟p95(ms)':>11} | {'常用语p95(ms)':>13} | "
+              f"{'命中率':>7} | {'节省(MB)':>9}")
+        print("-" * 111)
+        for mode in ("none", "cold", "warm"):
+            workload = build_workload(args, args.seed + (1 if mode == "warm" else 0))
+            engine, results, stats = run(mode, args, workload, cache_dir)
+            latencies = [r[1] for r in results]
+            common = [r[1] for r in results if r[0]]
+            hit_rate = stats.get("hit_rate") or 0.0
+            saved = stats.get("bytes_saved", 0) / 1024 / 1024
+            print(f"{mode:<5} | {engine['calls']:>8} | {engine['busy']:>11.2f} | {pct(latencies, 0.5):>11.1f} | {pct(latencies, 0.95):>11.1f} | "
+                  f"{pct(common, 0.95):>13.1f} | {hit_rate:>7.1%} | {saved:>9.1f}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS分发基准
+
+模拟一段流式回复：LLM 每隔 --emit-ms 产出一句；合成耗时 = 固定开销 + 与句长成正比的部分
+（同时最多 2 个请求，与 VoiceIntegration.tts_semaphore 一致），播放耗时与句长成正比。
+默认参数对应略慢于实时的本地引擎（如CPU上的GPT-SoVITS），时间整体缩小约10倍。对比：
+- legacy  : 每句启动一个线程把文本交给语音集成，单个处理线程串行合成，播放队列无上限
+- pipeline: 直接按顺序入队，OrderedTTSPipeline 线程池并行合成，按句子顺序送入有界播放队列
+统计启动的线程数、播放乱序数、首句出声延迟、每句从产出到开始播放的延迟、句间静音总时长，
+以及第二轮对话在第一轮中途打断时，打断后仍播放的旧句子数与新一轮首句出声延迟。
+
+用法:
+    python scripts/bench_tts_dispatch.py --sentences 30
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from queue import Empty, Queue
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from voice.output.tts_pipeline import OrderedTTSPipeline
+
+
+class FakeVoice:
+    """语音集成的最小模拟：句子队列 -> 合成 -> 音频队列 -> 播放"""
+
+    def __init__(self, mode, synth_base_ms, synth_ms, play_ms, workers=2, max_pending=4):
+        self.mode = mode
+        self.synth_base_ms = synth_base_ms
+        self.synth_ms = synth_ms
+        self.play_ms = play_ms
+        self.semaphore = threading.Semaphore(workers)
+        self.sentence_queue = Queue()
+        self.text_buffer = ""
+        self.played = []  # (轮次, 句号, 开始播放时间)
+        self.turn = 0
+        if mode == "pipeline":
+            self.audio_queue = Queue(maxsize=max_pending)
+            self.pipeline = OrderedTTSPipeline(self._synthesize, self.audio_queue, workers=workers,
+                                               max_pending=max_pending)
+        else:
+            self.audio_queue = Queue()
+        threading.Thread(target=self._processing_worker, daemon=True).start()
+        threading.Thread(target=self._player_worker, daemon=True).start()
+
+    def receive_text_chunk(self, text):
+        # 与 VoiceIntegration._check_and_queue_sentences 相同：追加到缓冲区后切出一句
+        self.text_buffer += text
+        end = self.text_buffer.find("。")
+        if end != -1:
+            self.sentence_queue.put(self.text_buffer[:end + 1])
+            self.text_buffer = self.text_buffer[end + 1:]
+
+    def reset(self):
+        self.turn += 1
+        while not self.sentence_queue.empty():
+            self.sentence_queue.get_nowait()
+        if self.mode == "pipeline":
+            self.pipeline.cancel()
+        while not self.audio_queue.empty():
+            self.audio_queue.get_nowait()
+        self.text_buffer = ""
+
+    def _synthesize(self, sentence):
+        with self.semaphore:
+            time.sleep((self.synth_base_ms + self.synth_ms * len(sentence) / 10) / 1000)
+            return sentence
+
+    def _processing_worker(self):
+        while True:
+            sentence = self.sentence_queue.get()
+            if self.mode == "pipeline":
+                self.pipeline.submit(sentence)
+            else:
+                audio = self._synthesize(sentence)
+                if audio:
+                    self.audio_queue.put(audio)
+
+    def _player_worker(self):
+        while True:
+            try:
+                audio = self.audio_queue.get(timeout=1)
+            except Empty:
+                continue
+            turn, index = audio.split("#")[:2]
+            start = time.perf_counter()
+            duration = self.play_ms / 1000 * len(audio) / 10
+            self.played.append((int(turn), int(index), start, start + duration))
+            time.sleep(duration)
+
+
+def emit_turn(voice, mode, turn, sentences, emit_ms, emitted):
+    for i, text in enumerate(sentences):
+        time.sleep(emit_ms / 1000)
+        sentence = f"{turn}#{i}#{text}。"
+        emitted[(turn, i)] = time.perf_counter()
+        if mode == "legacy":
+            threading.Thread(target=voice.receive_text_chunk, args=(sentence,), daemon=True).start()
+        else:
+            voice.receive_text_chunk(sentence)
+
+
+def run(mode, args, rng_seed):
+    rng = random.Random(rng_seed)
+    sentences = ["嗯" * rng.randint(4, 24) for _ in range(args.sentences)]
+    started = [0]
+    original_start = threading.Thread.start
+
+    def counting_start(thread):
+        started[0] += 1
+        original_start(thread)
+
+    threading.Thread.start = counting_start
+    try:
+        voice = FakeVoice(mode, args.synth_base_ms, args.synth_ms, args.play_ms)
+        emitted = {}
+
+        # 第一轮完整播放
+        emit_turn(voice, mode, 0, sentences, args.emit_ms, emitted)
+        while len([p for p in voice.played if p[0] == 0]) < args.sentences:
+            time.sleep(0.01)
+        threads = started[0]
+    finally:
+        threading.Thread.start = original_start
+    first_turn = [p for p in voice.played if p[0] == 0]
+    order_errors = sum(1 for a, b in zip(first_turn, first_turn[1:]) if b[1] < a[1])
+    delays = sorted((p[2] - emitted[(p[0], p[1])]) * 1000 for p in first_turn)
+    gaps = sum(max(0.0, b[2] - a[3]) for a, b in zip(first_turn, first_turn[1:])) * 1000
+    time.sleep(first_turn[-1][3] - time.perf_counter() + 0.05)
+
+    # 第二轮在一半时被第三轮打断
+    emit_turn(voice, mode, 1, sentences[: args.sentences // 2], args.emit_ms, emitted)
+    voice.reset()
+    interrupt_at = time.perf_counter()
+    emit_turn(voice, mode, 2, sentences[:3], args.emit_ms, emitted)
+    while not any(p[0] == 2 for p in voice.played):
+        time.sleep(0.01)
+    stale = sum(1 for p in voice.played if p[0] == 1 and p[2] > interrupt_at)
+    resume = (min(p[2] for p in voice.played if p[0] == 2) - interrupt_at) * 1000
+
+    return {
+        "threads": threads,
+        "order_errors": order_errors,
+        "first_audio_ms": (first_turn[0][2] - emitted[(0, 0)]) * 1000,
+        "p50": delays[len(delays) // 2],
+        "p95": delays[min(len(delays) - 1, int(len(delays) * 0.95))],
+        "gaps_ms": gaps,
+        "stale": stale,
+        "resume_ms": resume,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS分发基准")
+    parser.add_argument("--sentences", type=int, default=30)
+    parser.add_argument("--emit-ms", type=float, default=40, help="LLM产出一句的间隔")
+    parser.add_argument("--synth-base-ms", type=float, default=60, help="每次合成请求的固定开销")
+    parser.add_argument("--synth-ms", type=float, default=220, help="每10个字的合成耗时")
+    parser.add_argument("--play-ms", type=float, default=220, help="每10个字的播放耗时")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.sentences} 句，产出间隔 {args.emit_ms:g}ms，合成 {args.synth_base_ms:g}ms+{args.synth_ms:g}ms/10字，"
+          f"播放 {args.play_ms:g}ms/10字")
+    print("=" * 104)
+    print(f"{'方式':<9} | {'启动线程':>8} | {'乱序':>4} | {'首句出声(ms)':>12} | {'延迟p50(ms)':>11} | "
+          f"{'延迟p95(ms)':>11} | {'句间静音(ms)':>12} | {'打断后旧句':>10} | {'新轮出声(ms)':>12}")
+    print("-" * 104)
+    for mode in ("legacy", "pipeline"):
+        r = run(mode, args, args.seed)
+        print(f"{mode:<9} | {r['threads']:>8} | {r['order_errors']:>4} | {r['first_audio_ms']:>12.0f} | {r['p50']:>11.0f} | "
+              f"{r['p95']:>11.0f} | {r['gaps_ms']:>12.0f} | {r['stale']:>10} | {r['resume_ms']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步TTS服务延迟基准
+
+用本地假TTS引擎（time.sleep 模拟，耗时 = 固定开销 + 与字数成正比）和假LLM（每 --delta-ms 产出一个增量）
+并发跑 --streams 个 return_audio=True 的 /chat/stream 生成器，按 chat_stream 的顺序产出帧，对比：
+- sync  : 旧实现，文本结束后在事件循环里直接调用同步合成（阻塞所有并发流）
+- inline: TTSService，文本结束后提交任务并在事件循环中等待，完成后下发 audio_url 再 [DONE]
+- job   : TTSService，文本结束后立即下发 tts_job 与 [DONE]，客户端按任务ID获取音频
+统计每个流的末个文本帧延迟、[DONE] 延迟、音频可用延迟，以及事件循环最大卡顿（20ms 心跳的最大滞后）。
+
+用法:
+    python scripts/bench_tts_service.py --streams 8
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+from apiserver.sse import ChatStreamEncoder
+from apiserver.tts_service import JOB_DONE, TTSService
+
+
+class FakeEngine:
+    """假TTS引擎：耗时 = base_ms + per_char_ms * 字数"""
+
+    def __init__(self, base_ms, per_char_ms):
+        self.base_ms = base_ms
+        self.per_char_ms = per_char_ms
+
+    def __call__(self, text):
+        time.sleep((self.base_ms + self.per_char_ms * len(text)) / 1000)
+        return b"\xff\xfb" + text.encode("utf-8")
+
+
+async def fake_llm(deltas, delta_ms):
+    for text in deltas:
+        await asyncio.sleep(delta_ms / 1000)
+        yield text
+
+
+async def chat_stream(mode, encoder, deltas, args, engine, service):
+    """按 chat_stream 的顺序产出帧：文本增量 -> 音频 -> [DONE]"""
+    complete_text = ""
+    async for text in fake_llm(deltas, args.delta_ms):
+        complete_text += text
+        yield "text", encoder.delta(text)
+
+    if mode == "sync":
+        audio = engine(complete_text)
+        path = os.path.join(args.audio_dir, f"tts_sync_{id(encoder)}.mp3")
+        with open(path, "wb") as f:
+            f.write(audio)
+        yield "audio", encoder.audio_url(path)
+    else:
+        job = service.submit(complete_text)
+        if mode == "job":
+            yield "job", encoder.tts_job(job.id)
+        else:
+            job = await service.wait(job.id, 60)
+            if job.status == JOB_DONE:
+                yield "audio", encoder.audio_url(job.audio_path)
+    yield "done", encoder.done()
+
+
+async def consume(mode, args, engine, service, start, deltas):
+    encoder = ChatStreamEncoder("text")
+    result = {}
+    job_id = None
+    async for kind, frame in chat_stream(mode, encoder, deltas, args, engine, service):
+        now = time.perf_counter() - start
+        if kind == "text":
+            result["last_text"] = now
+        elif kind == "audio":
+            result["audio"] = now
+        elif kind == "job":
+            job_id = frame.split('"tts_job":"')[1].split('"')[0]
+        elif kind == "done":
+            result["done"] = now
+    if job_id is not None:
+        # 客户端收到 [DONE] 后按任务ID获取音频（GET /tts/jobs/{id}/audio）
+        job = await service.wait(job_id, 60)
+        if job.status == JOB_DONE:
+            result["audio"] = time.perf_counter() - start
+    return result
+
+
+async def heartbeat(stop, lags, interval=0.02):
+    expected = time.perf_counter() + interval
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        lags.append(now - expected)
+        expected = now + interval
+
+
+async def run(mode, args):
+    engine = FakeEngine(args.synth_base_ms, args.synth_char_ms)
+    service = None
+    if mode != "sync":
+        service = TTSService(engine=engine, workers=args.workers, audio_dir=args.audio_dir)
+    deltas = ["今天天气不错，" for _ in range(args.deltas)]
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    start = time.perf_counter()
+    tasks = []
+    for i in range(args.streams):
+        tasks.append(asyncio.create_task(consume(mode, args, engine, service, start, deltas)))
+        await asyncio.sleep(args.stagger_ms / 1000)
+    results = await asyncio.gather(*tasks)
+    stop.set()
+    await beat
+    if service is not None:
+        await service.aclose()
+    return results, max(lags) * 1000
+
+
+def pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="异步TTS服务延迟基准")
+    parser.add_argument("--streams", type=int, default=8, help="并发对话流数量")
+    parser.add_argument("--stagger-ms", type=float, default=100, help="相邻对话流的开始间隔")
+    parser.add_argument("--deltas", type=int, default=20, help="每个回复的文本增量数")
+    parser.add_argument("--delta-ms", type=float, default=30, help="LLM产出增量的间隔")
+    parser.add_argument("--synth-base-ms", type=float, default=150, help="每次合成的固定开销")
+    parser.add_argument("--synth-char-ms", type=float, default=4, help="每个字的合成耗时")
+    parser.add_argument("--workers", type=int, default=2, help="TTSService 合成线程数")
+    args = parser.parse_args()
+
+    args.audio_dir = tempfile.mkdtemp(prefix="bench_tts_")
+    try:
+        print(f"{args.streams} 个并发流（间隔 {args.stagger_ms:g}ms），每个 {args.deltas} 个增量 x {args.delta_ms:g}ms；"
+              f"假引擎 {args.synth_base_ms:g}ms + {args.synth_char_ms:g}ms/字，服务线程 {args.workers}")
+        print("=" * 100)
+        print(f"{'方式':<7} | {'末个文本p50(ms)':>15} | {'末个文本p95(ms)':>15} | {'[DONE]p50(ms)':>13} | "
+              f"{'[DONE]p95(ms)':>13} | {'音频p95(ms)':>11} | {'循环卡顿(ms)':>12}")
+        print("-" * 100)
+        for mode in ("sync", "inline", "job"):
+            results, max_lag = asyncio.run(run(mode, args))
+            # 以各流自身的开始时间为基准
+            offsets = [i * args.stagger_ms / 1000 for i in range(args.streams)]
+            last_text = [r["last_text"] - o for r, o in zip(results, offsets)]
+            done = [r["done"] - o for r, o in zip(results, offsets)]
+            audio = [r["audio"] - o for r, o in zip(results, offsets) if "audio" in r]
+            print(f"{mode:<7} | {pct(last_text, 0.5):>15.0f} | {pct(last_text, 0.95):>15.0f} | {pct(done, 0.5):>13.0f} | "
+                  f"{pct(done, 0.95):>13.0f} | {pct(audio, 0.95):>11.0f} | {max_lag:>12.0f}")
+    finally:
+        shutil.rmtree(args.audio_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语音输出流水线无头基准（播放 + 口型同步）
+
+用虚拟输出设备按实时节奏跑两条真实的播放路径，不需要声卡、PyAudio、sounddevice 或 Live2D：
+- realtime: 实时语音路径 —— AudioManager 的Base64解码线程、播放线程与60FPS口型线程。
+            音频按网络分块经 add_output_audio 送入；PyAudio 换成按实时节奏阻塞写入的虚拟设备，
+            Live2D 换成只接收参数的虚拟模型
+- tts     : TTS播放路径 —— 与 VoiceIntegration 相同的 解码 → 口型时间轴 → PCMStreamPlayer → 口型线程，
+            声卡换成按块周期调用 render_into 的虚拟设备线程
+音频为合成“语音”或 --wav 指定的录音（16位PCM WAV，重采样到 --rate）。
+
+每个阶段报告 p50/p95/p99/最大耗时（ms），并统计：
+- 丢块：口型线程取到的不是当前播放位置的块（已滑出缓冲窗口或尚未到达）、设备欠载/回调迟到、句间空隙
+- 丢帧：口型线程相邻两帧间隔超过目标周期的2倍
+- CPU ：进程CPU时间、占用率与每秒音频的CPU毫秒
+--json 写出机器可读结果，--compare 与之前保存的结果逐项对比。--stress 增加争抢GIL的后台线程，复现卡顿机器。
+
+用法:
+    python scripts/bench_voice_pipeline.py --json logs/bench_voice.json
+    python scripts/bench_voice_pipeline.py --wav sample.wav --stress 2 --compare logs/bench_voice.json
+"""
+
+import argparse
+import base64
+import importlib.util
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from voice.output.pcm_stream import PCMStreamPlayer, decode_audio, resample
+
+
+def _load(name, filename):
+    spec = importlib.util.spec_from_file_location(
+        name, os.path.join(ROOT, "voice", "input", "voice_realtime", "core", filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# 直接按文件加载：voice.input.voice_realtime 包的 __init__ 会导入各语音服务商的SDK；
+# 以完整模块名注册，AudioManager 内部的 from ... import AdvancedLipSyncEngineV2 直接命中
+lip = _load("voice.input.voice_realtime.core.advanced_lip_sync_v2", "advanced_lip_sync_v2.py")
+am = _load("voice.input.voice_realtime.core.audio_manager", "audio_manager.py")
+
+
+# ---------- 统计 ----------
+
+class Recorder:
+    """按阶段收集耗时（秒）与丢块/丢帧计数"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)  # list.append 在GIL下是原子的
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def timed(self, stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+    def stages(self):
+        result = {}
+        for stage, values in self.samples.items():
+            ms = np.asarray(values) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            result[stage] = {"count": len(ms), "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+                             "p99_ms": round(float(p99), 3), "max_ms": round(float(ms.max()), 3),
+                             "mean_ms": round(float(ms.mean()), 3)}
+        return result
+
+
+class FrameClock:
+    """口型线程的帧间隔：超过目标周期2倍记为丢帧"""
+
+    def __init__(self, recorder, fps):
+        self.recorder = recorder
+        self.limit = 2.0 / fps
+        self.last = None
+
+    def reset(self):
+        self.last = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            interval = now - self.last
+            self.recorder.add("frame_interval", interval)
+            if interval > self.limit:
+                self.recorder.count("dropped_frames")
+        self.last = now
+
+
+# ---------- 音频来源 ----------
+
+def synth_speech(seconds, rate, rng):
+    """带音节包络、谐波、摩擦噪声与停顿的合成“语音”"""
+    t = np.arange(int(seconds * rate)) / rate
+    f0 = 150 + 60 * rng.random() + 30 * np.sin(2 * np.pi * 0.8 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / rate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 3.2 * t), 0, None) * (np.sin(2 * np.pi * 0.25 * t) > -0.7)
+    noise = rng.standard_normal(len(t)) * (np.sin(2 * np.pi * 1.3 * t) > 0.8)
+    return ((envelope * voiced * 0.6 + 0.15 * noise) * 12000).astype(np.int16)
+
+
+def load_wav(path, rate):
+    with open(path, "rb") as f:
+        decoded = decode_audio(f.read())
+    if decoded is None:
+        sys.exit(f"无法解码音频文件: {path}")
+    samples, sample_rate = decoded
+    return resample(samples, sample_rate, rate)
+
+
+def split_sentences(audio, rate, min_s, max_s, rng):
+    pieces, pos = [], 0
+    while pos < len(audio):
+        size = int(rng.uniform(min_s, max_s) * rate)
+        pieces.append(audio[pos:pos + size])
+        pos += size
+    return pieces
+
+
+def to_wav(samples, rate):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+    return buf.getvalue()
+
+
+# ---------- 虚拟设备 ----------
+
+class FakeStream:
+    """PyAudio 流的替身：输入流按实时节奏返回静音；输出流 write() 像声卡一样按实时节奏阻塞，
+    只提前一个缓冲块返回，上一块已播完才写入下一块时记为欠载"""
+
+    def __init__(self, rate, frames_per_buffer, recorder, on_write=None):
+        self.rate = rate
+        self.latency = frames_per_buffer / rate
+        self.recorder = recorder
+        self.on_write = on_write
+        self._drained_at = None  # 已写入数据全部播完的时刻
+
+    def read(self, frames, exception_on_overflow=True):
+        time.sleep(frames / self.rate)
+        return bytes(frames * 2)
+
+    def write(self, data):
+        now = time.perf_counter()
+        if self.on_write:
+            self.on_write(now)
+        if self._drained_at is not None and now > self._drained_at:
+            self.recorder.count("underruns")
+            self.recorder.count("underrun_ms", (now - self._drained_at) * 1000)
+        self._drained_at = max(now, self._drained_at or now) + len(data) / 2 / self.rate
+        time.sleep(max(0.0, self._drained_at - self.latency - time.perf_counter()))
+
+    def is_active(self):
+        return True
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePyAudio:
+    def __init__(self, recorder, on_write):
+        self.recorder = recorder
+        self.on_write = on_write
+
+    def open(self, rate, frames_per_buffer, input=False, output=False, **kwargs):
+        return FakeStream(rate, frames_per_buffer, self.recorder, self.on_write if output else None)
+
+    def terminate(self):
+        pass
+
+
+class FakeLive2D:
+    """Live2D 模型的替身，只计数收到的口型参数"""
+
+    def __init__(self):
+        self.updates = 0
+
+    def set_audio_volume(self, value):
+        self.updates += 1
+
+    def set_mouth_form(self, value):
+        pass
+
+    def set_mouth_smile(self, value):
+        pass
+
+    def stop_speaking(self):
+        pass
+
+
+# ---------- 场景 ----------
+
+def run_realtime(audio, args, recorder, rng):
+    """AudioManager：网络分块 → Base64解码线程 → 播放线程（虚拟PyAudio） → 60FPS口型线程"""
+    sent = deque()  # 每个网络块送入的时刻，播放线程按相同顺序写入设备
+    am.pyaudio = SimpleNamespace(
+        paInt16=8, PyAudio=lambda: FakePyAudio(recorder, lambda now: recorder.add("queue_to_device", now - sent.popleft())))
+    am.PYAUDIO_AVAILABLE = True
+
+    manager = am.AudioManager(output_sample_rate=args.rate)
+    manager.initialize()
+    size = manager.output_chunk_size
+    audio = np.concatenate([audio, np.zeros(-len(audio) % size, dtype=np.int16)])
+    expected = [audio[i:i + size].tobytes() for i in range(0, len(audio), size)]
+    net = max(1, round(args.net_chunk_ms / manager.chunk_size_ms)) * size
+
+    widget = FakeLive2D()
+    manager._get_live2d_widget = lambda: widget
+    engine = manager._advanced_lip_sync_v2
+    engine.process_audio_chunk = recorder.timed("lip_sync_engine", engine.process_audio_chunk)
+    extract, update = manager._extract_audio_from_buffer, manager._update_live2d_with_advanced_engine
+    clock = FrameClock(recorder, manager.lip_sync_fps)
+
+    def checked_extract(target_sample_pos):
+        start = time.perf_counter()
+        chunk = extract(target_sample_pos)
+        recorder.add("buffer_extract", time.perf_counter() - start)
+        index = target_sample_pos // size
+        if index < len(expected):
+            recorder.count("lip_sync_frames")
+            if chunk != expected[index]:
+                recorder.count("stale_chunks")
+        return chunk
+
+    def timed_update(chunk):
+        clock.tick()
+        start = time.perf_counter()
+        update(chunk)
+        recorder.add("lip_sync_frame", time.perf_counter() - start)
+
+    manager._extract_audio_from_buffer = checked_extract
+    manager._update_live2d_with_advanced_engine = timed_update
+
+    sent_at = []
+    ended = threading.Event()
+    manager.on_playback_started = lambda: recorder.add("first_audio", time.perf_counter() - sent_at[0])
+    manager.on_playback_ended = ended.set
+    manager.start()
+
+    period = net / args.rate / args.feed_speed
+    start = time.perf_counter()
+    for k, pos in enumerate(range(0, len(audio), net)):
+        now = time.perf_counter()
+        sent.append(now)
+        sent_at.append(now)
+        manager.add_output_audio(base64.b64encode(audio[pos:pos + net].tobytes()).decode())
+        delay = start + (k + 1) * period + rng.uniform(0, args.jitter_ms) / 1000
+        time.sleep(max(0.0, delay - time.perf_counter()))
+    manager.mark_response_done()
+    ended.wait(timeout=len(audio) / args.rate + 10)
+    manager.stop()
+    return {"lip_sync_updates": widget.updates}
+
+
+def run_tts(audio, args, recorder, rng):
+    """VoiceIntegration：每句 解码 → 口型时间轴 → 重采样 → PCMStreamPlayer（虚拟声卡） → 60FPS口型线程"""
+    player = PCMStreamPlayer(sample_rate=args.playback_rate, blocksize=args.blocksize)
+    engine = lip.AdvancedLipSyncEngineV2(player.sample_rate)
+    use_timeline = args.tts_lip_sync == "timeline"
+    sentences = split_sentences(audio, args.rate, args.min_s, args.max_s, rng)
+    clips = [to_wav(s, args.rate) for s in sentences]
+    stop = threading.Event()
+
+    def device():
+        out = np.zeros(player.blocksize, dtype=np.int16)
+        period = player.blocksize / player.sample_rate
+        next_tick = time.perf_counter()
+        while not stop.is_set():
+            lateness = time.perf_counter() - next_tick
+            recorder.add("callback_lateness", max(0.0, lateness))
+            if lateness > period:  # 真实声卡此时已输出一块静音
+                recorder.count("xruns")
+                next_tick = time.perf_counter()
+            start = time.perf_counter()
+            player.render_into(out)
+            recorder.add("render", time.perf_counter() - start)
+            next_tick += period
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+
+    def lip_sync():
+        # 与 VoiceIntegration._pcm_lip_sync_worker 相同的取参方式
+        chunk_size = int(player.sample_rate / 60)
+        clock = FrameClock(recorder, 60)
+        while not stop.is_set():
+            if not player.active.wait(0.1):
+                continue
+            clock.reset()
+            while player.busy:
+                clock.tick()
+                start = time.perf_counter()
+                position = player.position()
+                if position is not None and position[0] is not None:
+                    engine.params_from_timeline(*position)
+                elif position is not None:
+                    window = player.current_window(chunk_size)
+                    if window is not None and len(window):
+                        engine.process_audio_chunk(window)
+                recorder.add("lip_sync_frame", time.perf_counter() - start)
+                time.sleep(1.0 / 60)
+
+    threads = [threading.Thread(target=device, daemon=True), threading.Thread(target=lip_sync, daemon=True)]
+    for t in threads:
+        t.start()
+
+    start = time.perf_counter()
+    first = threading.Event()
+
+    def on_first_start():
+        if not first.is_set():
+            first.set()
+            recorder.add("first_audio", time.perf_counter() - start)
+
+    for samples, clip in zip(sentences, clips):
+        time.sleep(len(samples) / args.rate * args.synth_rtf)  # 模拟TTS合成耗时
+        t0 = time.perf_counter()
+        samples, sample_rate = decode_audio(clip)
+        t1 = time.perf_counter()
+        timeline = engine.compute_timeline(samples, sample_rate) if use_timeline else None
+        t2 = time.perf_counter()
+        samples = resample(samples, sample_rate, player.sample_rate)
+        t3 = time.perf_counter()
+        player.enqueue(samples, player.sample_rate, on_start=on_first_start, tag=timeline)
+        recorder.add("decode", t1 - t0)
+        if use_timeline:
+            recorder.add("timeline", t2 - t1)
+        recorder.add("resample", t3 - t2)
+        recorder.add("enqueue_wait", time.perf_counter() - t3)
+    player.wait_idle(timeout=len(audio) / args.rate + 10)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    for gap in player._gaps:
+        recorder.add("sentence_gap", gap)
+    stats = player.get_stats()
+    recorder.count("late_clips", stats["late_clips"])
+    return {"sentences": len(clips)}
+
+
+SCENARIOS = {"realtime": run_realtime, "tts": run_tts}
+
+
+def start_stress(count, stop):
+    """争抢GIL的后台线程：numpy矩阵乘（释放GIL）与纯Python循环（持有GIL）交替；返回线程与各自CPU时间"""
+    burned = []
+
+    def burn():
+        a = np.random.default_rng(0).standard_normal((192, 192))
+        while not stop.is_set():
+            a @ a
+            sum(range(20000))
+        burned.append(time.thread_time())
+
+    threads = [threading.Thread(target=burn, daemon=True) for _ in range(count)]
+    for t in threads:
+        t.start()
+    return threads, burned
+
+
+def run_scenario(name, audio, args):
+    recorder = Recorder()
+    rng = np.random.default_rng(args.seed)
+    stop = threading.Event()
+    stress, burned = start_stress(args.stress, stop)
+    cpu, wall = time.process_time(), time.perf_counter()
+    try:
+        extra = SCENARIOS[name](audio, args, recorder, rng)
+    finally:
+        stop.set()
+        for t in stress:
+            t.join()
+    # 扣除压力线程自身的CPU时间，只统计流水线
+    cpu, wall = time.process_time() - cpu - sum(burned), time.perf_counter() - wall
+    seconds = len(audio) / args.rate
+    counters = {k: round(v, 1) if isinstance(v, float) and not v.is_integer() else int(v)
+                for k, v in recorder.counters.items()}
+    return {
+        "audio_seconds": round(seconds, 3),
+        "wall_s": round(wall, 3),
+        "cpu_ms": round(cpu * 1000, 1),
+        "cpu_percent": round(cpu / wall * 100, 1),
+        "cpu_ms_per_audio_s": round(cpu * 1000 / seconds, 2),
+        "stages": recorder.stages(),
+        "dropped": counters,
+        **extra,
+    }
+
+
+# ---------- 输出 ----------
+
+def print_result(name, result):
+    print(f"\n[{name}] 音频 {result['audio_seconds']:.1f}s，耗时 {result['wall_s']:.1f}s，"
+          f"CPU {result['cpu_ms']:.0f}ms（{result['cpu_percent']:.1f}%，{result['cpu_ms_per_audio_s']:.1f}ms/音频秒）")
+    print("-" * 78)
+    print(f"{'阶段':<18} | {'次数':>6} | {'p50(ms)':>8} | {'p95(ms)':>8} | {'p99(ms)':>8} | {'max(ms)':>8}")
+    print("-" * 78)
+    for stage, s in result["stages"].items():
+        print(f"{stage:<18} | {s['count']:>6} | {s['p50_ms']:>8.3f} | {s['p95_ms']:>8.3f} | {s['p99_ms']:>8.3f} | {s['max_ms']:>8.3f}")
+    print("-" * 78)
+    print("丢块/丢帧: " + ("，".join(f"{k}={v}" for k, v in sorted(result["dropped"].items())) or "无"))
+
+
+def print_compare(results, path):
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["scenarios"]
+    print(f"\n与基线 {path} 对比（p95，基线 → 本次）")
+    print("=" * 78)
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        print(f"[{name}] CPU {base['cpu_ms_per_audio_s']} → {result['cpu_ms_per_audio_s']} ms/音频秒")
+        for stage, s in result["stages"].items():
+            old = base["stages"].get(stage)
+            if old:
+                change = (s["p95_ms"] / old["p95_ms"] - 1) * 100 if old["p95_ms"] else 0.0
+                print(f"  {stage:<18} {old['p95_ms']:>9.3f} → {s['p95_ms']:>9.3f} ms  ({change:+.0f}%)")
+        for key in sorted(set(result["dropped"]) | set(base["dropped"])):
+            print(f"  {key:<18} {base['dropped'].get(key, 0):>9} → {result['dropped'].get(key, 0):>9}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语音输出流水线无头基准")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["realtime", "tts"])
+    parser.add_argument("--wav", help="使用录音（16位PCM WAV）代替合成语音")
+    parser.add_argument("--seconds", type=float, default=8.0, help="合成语音时长")
+    parser.add_argument("--rate", type=int, default=24000, help="音频采样率（实时语音/TTS输出）")
+    parser.add_argument("--net-chunk-ms", type=float, default=100, help="realtime: 每个网络音频块时长")
+    parser.add_argument("--feed-speed", type=float, default=1.5, help="realtime: 音频送达速度（实时的倍数）")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="realtime: 每块额外的随机网络延迟上限")
+    parser.add_argument("--playback-rate", type=int, default=44100, help="tts: 连续输出流采样率")
+    parser.add_argument("--blocksize", type=int, default=1024, help="tts: 输出流块大小")
+    parser.add_argument("--min-s", type=float, default=0.8, help="tts: 句子最短时长")
+    parser.add_argument("--max-s", type=float, default=2.5, help="tts: 句子最长时长")
+    parser.add_argument("--synth-rtf", type=float, default=0.3, help="tts: 模拟合成耗时（音频时长的倍数）")
+    parser.add_argument("--tts-lip-sync", choices=["timeline", "realtime"], default="timeline",
+                        help="tts: 预计算口型时间轴 / 播放时实时分析")
+    parser.add_argument("--stress", type=int, default=0, help="争抢CPU的后台线程数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="结果写入的JSON文件")
+    parser.add_argument("--compare", help="与之前 --json 保存的结果对比")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    audio = load_wav(args.wav, args.rate) if args.wav else synth_speech(args.seconds, args.rate, np.random.default_rng(args.seed))
+    print(f"音频: {args.wav or '合成语音'}，{len(audio) / args.rate:.1f}s @ {args.rate}Hz；"
+          f"scipy: {'可用' if lip.SCIPY_AVAILABLE else '不可用'}；后台压力线程 {args.stress}")
+
+    results = {}
+    for name in args.scenarios:
+        results[name] = run_scenario(name, audio, args)
+        print_result(name, results[name])
+
+    if args.compare:
+        print_compare(results, args.compare)
+    if args.json:
+        report = {
+            "meta": {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "git": git_revision(),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "scipy": lip.SCIPY_AVAILABLE,
+                "platform": platform.platform(),
+                "args": vars(args),
+            },
+            "scenarios": results,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
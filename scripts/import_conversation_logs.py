@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+将 logs/YYYY-MM-DD.log 文本日志导入对话记录存储（logs/conversations.sqlite3）
+
+首次加载上下文时会自动导入一次；本脚本用于手动补导入或以文本日志为准重建。
+
+用法:
+    python scripts/import_conversation_logs.py            # 只导入存储中还没有的日期
+    python scripts/import_conversation_logs.py --force    # 所有日期以文本日志为准重新导入
+"""
+
+import argparse
+import os
+import sys
+import types
+from pathlib import Path
+
+# 添加项目根目录到路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 只加载 apiserver 下需要的模块，不执行包的 __init__（它会初始化整个 API 服务器）
+if "apiserver" not in sys.modules:
+    _pkg = types.ModuleType("apiserver")
+    _pkg.__path__ = [os.path.join(ROOT, "apiserver")]
+    sys.modules["apiserver"] = _pkg
+
+from apiserver.conversation_store import ConversationLogStore, DB_FILENAME
+from apiserver.message_manager import MessageManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入文本对话日志到对话记录存储")
+    parser.add_argument("--log-dir", help="日志目录（默认取配置 system.log_dir）")
+    parser.add_argument("--force", action="store_true", help="已导入的日期也重新导入")
+    args = parser.parse_args()
+
+    manager = MessageManager()
+    log_dir = Path(args.log_dir) if args.log_dir else Path(manager.log_dir)
+
+    store = ConversationLogStore(str(log_dir / DB_FILENAME))
+    imported = store.import_text_logs(log_dir, manager.parse_log_file, force=args.force)
+    for day, count in sorted(imported.items()):
+        print(f"  {day}: {count} 条")
+    print(f"✅ 导入 {len(imported)} 个日志文件，{sum(imported.values())} 条消息；存储共 {store.count()} 条")
+    store.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""
+GRAG 图存储后端接口
+
+quintuple_graph / quintuple_rag_query 只依赖 GraphStore 接口，后端可在以下实现间切换
+（config.grag.graph_backend）：
+- neo4j  : py2neo + Neo4j 全文索引（quintuple_graph.Neo4jGraphStore）
+- sqlite : 内嵌 SQLite，邻接表 + FTS5 关键词检索（sqlite_graph_store.SQLiteGraphStore）
+- memory : 进程内倒排索引，不落盘（quintuple_index.MemoryGraphStore）
+- auto   : 能连上 Neo4j 用 neo4j，否则用 sqlite
+"""
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+DEFAULT_SQLITE_PATH = "logs/knowledge_graph/graph.sqlite3"
+
+
+class GraphStore(ABC):
+    """图存储后端统一接口"""
+
+    name = "base"
+
+    @abstractmethod
+    def add_quintuples(self, quintuples: Iterable) -> int:
+        """写入五元组，返回成功写入的数量"""
+
+    @abstractmethod
+    def query_by_keywords(self, keywords: List[str], limit_per_keyword: int = 5) -> List[Quintuple]:
+        """关键词召回，按匹配度与关系权重排序"""
+
+    @abstractmethod
+    def expand(self, entities: List[str], hops: int = 1, limit: int = 50) -> List[Quintuple]:
+        """从给定实体出发做 k 跳邻居扩展，返回经过的关系"""
+
+    def count(self) -> Optional[int]:
+        """五元组（关系）数量，后端不支持时返回 None"""
+        return None
+
+    def close(self):
+        pass
+
+
+_store: Optional[GraphStore] = None
+_store_lock = threading.Lock()
+
+
+def _create_graph_store(backend: str) -> GraphStore:
+    if backend in ("auto", "neo4j"):
+        from .quintuple_graph import get_graph, Neo4jGraphStore
+        graph = get_graph()
+        if graph is not None:
+            return Neo4jGraphStore(graph)
+        if backend == "neo4j":
+            logger.warning("[GRAG] 配置要求使用Neo4j但无法连接，回退到SQLite图存储")
+
+    if backend == "memory":
+        from .quintuple_index import MemoryGraphStore
+        return MemoryGraphStore()
+
+    try:
+        from .sqlite_graph_store import SQLiteGraphStore
+        return SQLiteGraphStore(DEFAULT_SQLITE_PATH, bootstrap=True)
+    except Exception as e:
+        logger.error(f"[GRAG] SQLite图存储初始化失败，回退到内存索引: {e}")
+        from .quintuple_index import MemoryGraphStore
+        return MemoryGraphStore()
+
+
+def get_graph_store() -> GraphStore:
+    """获取全局图存储后端（首次调用时按配置选择）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    from system.config import config
+                    backend = config.grag.graph_backend
+                except Exception:
+                    backend = "auto"
+                _store = _create_graph_store(backend)
+                logger.info(f"[GRAG] 图存储后端: {_store.name}")
+    return _store
+
+
+def set_graph_store(store: Optional[GraphStore]):
+    """替换全局图存储后端（测试与基准脚本使用）"""
+    global _store
+    with _store_lock:
+        if _store is not None and _store is not store:
+            _store.close()
+        _store = store
@@ -0,0 +1,329 @@
+"""
+GRAG 召回关键词提取（带缓存）
+
+- 异步调用 LLM 提取关键词，不阻塞事件循环
+- 内存 LRU + 磁盘缓存两级，键为规范化后的问题文本，支持 TTL
+- 相同问题的并发请求只发起一次 LLM 调用，其余请求等待同一结果
+- 命中/未命中等计数可通过 get_stats() 获取
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = "logs/knowledge_graph/keyword_cache.json"
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCT = "?？!！。.，,~～…；;：:"
+
+
+class KeywordExtractionError(Exception):
+    """关键词提取失败，message 为可直接返回给调用方的提示"""
+
+
+def normalize_query(text: str) -> str:
+    """规范化问题文本：全角转半角、小写、合并空白、去掉结尾标点"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip(_TRAILING_PUNCT).strip()
+
+
+def build_keyword_request(user_question: str, context_str: str) -> dict:
+    """构造关键词提取请求体（与原 query_knowledge 的提示词保持一致）"""
+    from system.config import config
+
+    prompt = (
+        f"基于以下上下文和用户问题，提取与知识图谱相关的关键词（如人物、物体、关系、实体类型），"
+        f"仅以列表的形式返回核心关键词，避免无关词。返回 JSON 格式的关键词列表：\n"
+        f"上下文：\n{context_str}\n"
+        f"问题：{user_question}\n"
+        f"输出格式：```json\n[]\n```"
+    )
+
+    # 检测是否使用ollama并启用结构化输出
+    is_ollama = "localhost" in config.api.base_url or "11434" in config.api.base_url
+
+    body = {
+        "model": config.api.model,
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": config.api.max_tokens,
+        "temperature": 0.5  # 降低温度，提高精准度
+    }
+
+    # 为ollama添加结构化输出
+    if is_ollama:
+        body["format"] = "json"
+        # 简化提示词，ollama会自动处理JSON格式
+        simplified_prompt = (
+            f"基于以下上下文和用户问题，提取与知识图谱相关的关键词（如人物、物体、关系、实体类型），"
+            f"仅返回核心关键词，避免无关词。直接返回关键词数组：\n"
+            f"上下文：\n{context_str}\n"
+            f"问题：{user_question}"
+        )
+        body["messages"] = [{"role": "user", "content": simplified_prompt}]
+    return body
+
+
+def parse_keyword_response(content: dict) -> List[str]:
+    """解析 chat/completions 响应为关键词列表"""
+    if "choices" not in content or not content["choices"]:
+        logger.error("DeepSeek API 响应中未找到 'choices' 字段")
+        raise KeywordExtractionError("无法处理 API 响应，请稍后重试。")
+
+    raw_content = content["choices"][0]["message"]["content"]
+    try:
+        raw_content = raw_content.strip()
+        if raw_content.startswith("```json") and raw_content.endswith("```"):
+            raw_content = raw_content[7:-3].strip()
+        keywords = json.loads(raw_content)
+        if not isinstance(keywords, list):
+            raise ValueError("关键词应为列表")
+    except (json.JSONDecodeError, ValueError) as e:
+        logger.error(f"解析 DeepSeek 响应失败: {raw_content}, 错误: {e}")
+        raise KeywordExtractionError("无法解析关键词，请检查问题格式。")
+    return [str(kw) for kw in keywords if str(kw).strip()]
+
+
+class KeywordCache:
+    """内存 LRU + 磁盘两级关键词缓存（线程安全）"""
+
+    def __init__(self, max_entries: int = 256, disk_max_entries: int = 2048,
+                 ttl: float = 86400.0, cache_file: Optional[str] = DEFAULT_CACHE_FILE):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self.ttl = ttl
+        self.cache_file = cache_file
+
+        self._memory: "OrderedDict[str, Tuple[List[str], float]]" = OrderedDict()
+        self._disk: "OrderedDict[str, Tuple[List[str], float]]" = OrderedDict()
+        self._disk_loaded = False
+        self._disk_dirty = False
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def make_key(question: str) -> str:
+        return hashlib.sha256(normalize_query(question).encode("utf-8")).hexdigest()
+
+    def _load_disk(self):
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        if not self.cache_file:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            now = time.time()
+            for key, (keywords, created_at) in sorted(data.items(), key=lambda item: item[1][1]):
+                if now - created_at <= self.ttl:
+                    self._disk[key] = (keywords, created_at)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"[GRAG] 关键词磁盘缓存读取失败，忽略: {e}")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            now = time.time()
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[0])
+                del self._memory[key]
+                self.expired += 1
+
+            self._load_disk()
+            entry = self._disk.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._put_memory(key, entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return list(entry[0])
+                del self._disk[key]
+                self._disk_dirty = True
+                self.expired += 1
+
+            self.misses += 1
+            return None
+
+    def _put_memory(self, key: str, entry: Tuple[List[str], float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, keywords: List[str]):
+        with self._lock:
+            entry = (list(keywords), time.time())
+            self._put_memory(key, entry)
+            self._load_disk()
+            self._disk[key] = entry
+            self._disk.move_to_end(key)
+            while len(self._disk) > self.disk_max_entries:
+                self._disk.popitem(last=False)
+            self._disk_dirty = True
+
+    def flush(self):
+        """把磁盘层写回文件（原子替换）"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            if not self._disk_dirty:
+                return
+            data = dict(self._disk)
+            self._disk_dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_path = self.cache_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            logger.warning(f"[GRAG] 关键词磁盘缓存写入失败: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._disk.clear()
+            self._disk_loaded = True
+            self._disk_dirty = True
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._disk),
+        }
+
+
+class KeywordExtractor:
+    """异步关键词提取：缓存 + 并发请求合并 + 复用HTTP连接"""
+
+    def __init__(self, cache: KeywordCache, timeout: float = 20.0):
+        self.cache = cache
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        self.llm_calls = 0
+
+    def _ensure_loop_state(self):
+        """HTTP客户端和进行中的 future 都绑定事件循环，循环变化时重建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._client = None
+            self._inflight = {}
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+    async def extract(self, user_question: str, context_str: str = "无上下文") -> List[str]:
+        """提取关键词；失败时抛出 KeywordExtractionError"""
+        key = self.cache.make_key(user_question)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        self._ensure_loop_state()
+        task = self._inflight.get(key)
+        leader = task is None
+        if leader:
+            # LLM 调用作为独立任务运行，所有等待者（包括发起者）都只 shield 等待它：
+            # 任一调用方被取消（如客户端断开）不会影响其他合并进来的调用，结果仍会写入缓存
+            task = self._loop.create_task(self._fetch(key, user_question, context_str))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._fetch_done, key))
+        else:
+            self.coalesced += 1
+
+        keywords = await asyncio.shield(task)
+        if leader:
+            await asyncio.to_thread(self.cache.flush)
+        return list(keywords)
+
+    async def _fetch(self, key: str, user_question: str, context_str: str) -> List[str]:
+        keywords = await self._call_llm(user_question, context_str)
+        self.cache.put(key, keywords)
+        return keywords
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 标记异常已被读取，避免所有等待者都已取消时的告警
+
+    async def _call_llm(self, user_question: str, context_str: str) -> List[str]:
+        from system.config import config
+
+        api_url = f"{config.api.base_url.rstrip('/')}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {config.api.api_key}",
+            "Content-Type": "application/json"
+        }
+        body = build_keyword_request(user_question, context_str)
+        self.llm_calls += 1
+        try:
+            response = await self._client.post(api_url, headers=headers, json=body)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            logger.error(f"DeepSeek API HTTP 错误: {e}")
+            raise KeywordExtractionError("调用 DeepSeek API 失败，请检查 API 密钥或网络连接。")
+        except httpx.HTTPError as e:
+            logger.error(f"DeepSeek API 请求失败: {e}")
+            raise KeywordExtractionError("无法连接到 DeepSeek API，请检查网络。")
+        return parse_keyword_response(response.json())
+
+    def get_stats(self) -> Dict:
+        stats = self.cache.get_stats()
+        stats.update({
+            "coalesced": self.coalesced,
+            "llm_calls": self.llm_calls,
+            "inflight": len(self._inflight),
+        })
+        return stats
+
+
+def _create_keyword_extractor() -> KeywordExtractor:
+    kwargs = {}
+    try:
+        from system.config import config
+        kwargs = {
+            "max_entries": config.grag.keyword_cache_size,
+            "disk_max_entries": config.grag.keyword_cache_disk_size,
+            "ttl": config.grag.keyword_cache_ttl,
+        }
+    except Exception:
+        pass
+    return KeywordExtractor(KeywordCache(**kwargs))
+
+
+# 全局关键词提取器实例
+keyword_extractor = _create_keyword_extractor()
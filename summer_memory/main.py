@@ -1,3 +1,4 @@
+import asyncio
 import os
 import sys
 import subprocess
@@ -10,6 +11,7 @@ from .quintuple_extractor import extract_quintuples
 from .quintuple_graph import store_quintuples
 from .quintuple_visualize_v2 import visualize_quintuples
 from .quintuple_rag_query import query_knowledge, set_context
+from .task_manager import TaskPriority, task_manager, start_task_manager, stop_task_manager
 
 # 添加上级目录以导入 config.py
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -93,20 +95,47 @@ atexit.register(stop_neo4j_container)
 
 
 # --- 核心业务逻辑 ---
+async def _extract_texts_bulk(texts):
+    """通过任务管理器的BULK通道提取：多段文本由批量提取器合并请求，排在交互式记忆写入之后"""
+    await start_task_manager()
+    try:
+        # 通道满时等待空位（背压），最多等一个任务的执行时间
+        enqueue_timeout = task_manager.task_timeout + task_manager.enqueue_timeout
+        task_ids = [await task_manager.add_task(text, priority=TaskPriority.BULK, timeout=enqueue_timeout)
+                    for text in texts]
+        results = await asyncio.gather(*(task_manager.get_task_result(task_id) for task_id in task_ids))
+    finally:
+        await stop_task_manager()
+    for text, (quintuples, error) in zip(texts, results):
+        if error:
+            logger.warning(f"文本提取失败: {text[:50]}... - {error}")
+    return [quintuples or [] for quintuples, _ in results]
+
+
+def _extract_texts(texts):
+    """批量提取五元组；任务管理器已被其他事件循环使用或不可用时逐段同步提取"""
+    if not task_manager.is_running and task_manager.enabled:
+        try:
+            return asyncio.run(_extract_texts_bulk(texts))
+        except Exception as e:
+            logger.warning(f"任务管理器批量提取失败，改为逐段提取: {e}")
+    return [extract_quintuples(text) for text in texts]
+
+
 def batch_add_texts(texts):# 批量处理文本，提取五元组并存储
     try:
         all_quintuples = set()
-        for text in texts:
-            if not text:
-                logger.warning("跳过空文本")
-                continue
-            logger.info(f"处理文本: {text[:50]}...")
-            quintuples = extract_quintuples(text)
+        empty = sum(1 for text in texts if not (text and text.strip()))
+        if empty:
+            logger.warning(f"跳过 {empty} 段空文本")
+        texts = [text for text in texts if text and text.strip()]
+        logger.info(f"处理 {len(texts)} 段文本...")
+        for text, quintuples in zip(texts, _extract_texts(texts)):
             if not quintuples:
                 logger.warning(f"文本未提取到五元组: {text}")
             else:
                 logger.info(f"提取到五元组: {quintuples}")
-            all_quintuples.update(quintuples)
+            all_quintuples.update(tuple(q) for q in quintuples)
 
         if not all_quintuples:
             logger.warning("未提取到任何五元组")
@@ -5,7 +5,9 @@ import weakref
 from typing import List, Dict, Optional, Tuple
 from .quintuple_extractor import extract_quintuples
 from .quintuple_graph import store_quintuples, query_graph_by_keywords, get_all_quintuples
-from .quintuple_rag_query import query_knowledge, set_context
+from .graph_store import get_graph_store
+from .quintuple_rag_query import query_knowledge_async, set_context
+from .keyword_extractor import keyword_extractor
 from .task_manager import task_manager, start_task_manager
 from system.config import config, AI_NAME
 
@@ -32,7 +34,7 @@ class GRAGMemoryManager:
             from .quintuple_graph import get_graph, GRAG_ENABLED
             _graph = get_graph()  # 尝试连接Neo4j
             if _graph is None and GRAG_ENABLED:
-                logger.warning("GRAG已启用但无法连接到Neo4j，将继续使用文件存储")
+                logger.warning("GRAG已启用但无法连接到Neo4j，将使用本地图存储")
             logger.info("GRAG记忆系统初始化成功")
 
             # 懒加载：任务管理器会在第一次调用add_task时自动启动
@@ -65,7 +67,6 @@ class GRAGMemoryManager:
                         logger.warning("任务管理器未运行，正在启动...")
                         from .task_manager import start_task_manager
                         await start_task_manager()
-                        await asyncio.sleep(1)  # 等待启动完成
 
                     logger.info(f"任务管理器状态: running={task_manager.is_running}, workers={len(task_manager.worker_tasks)}")
 
@@ -184,8 +185,8 @@ class GRAGMemoryManager:
             # 设置查询上下文
             set_context(self.recent_context)
             
-            # 异步查询
-            result = await asyncio.to_thread(query_knowledge, question)
+            # 异步查询（关键词提取带缓存，不阻塞事件循环）
+            result = await query_knowledge_async(question)
             
             if result and "未在知识图谱中找到相关信息" not in result:
                 logger.info("从记忆中找到相关信息")
@@ -225,12 +226,18 @@ class GRAGMemoryManager:
                 "context_length": len(self.recent_context),
                 "cache_size": len(self.extraction_cache),
                 "active_tasks": len(self.active_tasks),
-                "task_manager": task_stats
+                "task_manager": task_stats,
+                "keyword_cache": keyword_extractor.get_stats(),
+                "graph_backend": get_graph_store().name
             }
         except Exception as e:
             logger.error(f"获取记忆统计失败: {e}")
             return {"enabled": False, "error": str(e)}
     
+    def get_keyword_cache_stats(self) -> Dict:
+        """获取关键词提取缓存的命中/未命中统计"""
+        return keyword_extractor.get_stats()
+
     def get_task_status(self, task_id: str) -> Optional[Dict]:
         """获取任务状态"""
         return task_manager.get_task_status(task_id)
@@ -239,11 +246,11 @@ class GRAGMemoryManager:
         """获取所有任务状态"""
         return task_manager.get_all_tasks()
     
-    def cancel_task(self, task_id: str) -> bool:
-        """取消任务"""
+    async def cancel_task(self, task_id: str) -> bool:
+        """取消任务（正在执行的提取会被立即中断）"""
         if task_id in self.active_tasks:
             self.active_tasks.discard(task_id)
-        return task_manager.cancel_task(task_id)
+        return await task_manager.cancel_task(task_id)
     
     async def clear_memory(self) -> bool:
         """清空记忆"""
@@ -256,7 +263,7 @@ class GRAGMemoryManager:
             
             # 取消所有活跃任务
             for task_id in list(self.active_tasks):
-                task_manager.cancel_task(task_id)
+                await task_manager.cancel_task(task_id)
             self.active_tasks.clear()
             
             logger.info("记忆已清空")
@@ -0,0 +1,313 @@
+"""
+五元组微批量提取
+
+把短时间内排队的多段文本打包进一次 LLM 请求：抽取规则只发送一次，
+结果按文本编号拆分回各自的调用方；批量结果无法解析时回退到逐条提取。
+"""
+import asyncio
+import json
+import logging
+import re
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+EXTRACTION_RULES = """
+你是一个专业的中文文本信息抽取专家。你的任务是从给定的多段中文文本中分别抽取有价值的五元组关系。
+五元组格式为：[主体, 主体类型, 动作, 客体, 客体类型]。
+
+## 提取规则
+1. 只提取**事实性**信息，包括：
+   - 具体的行为和动作
+   - 明确的实体关系
+   - 实际存在的状态和属性
+   - 用户表达的具体需求、偏好、计划
+
+2. 严格过滤以下内容：
+   - 比喻、拟人、夸张等修辞手法
+   - 虚拟、假设、想象的内容
+   - 纯粹的情感表达（如"我很开心"、"你真棒"）
+   - 赞美、讽刺、调侃等主观评价
+   - 闲聊中的无关信息
+   - 重复或冗余的关系
+
+3. 类型包括但不限于：人物、地点、组织、物品、概念、时间、事件、活动等。
+
+## 示例
+
+输入：{"1": "小明在公园里踢足球。", "2": "你像小太阳一样温暖。"}
+输出：{"results": {"1": [["小明", "人物", "踢", "足球", "物品"], ["小明", "人物", "在", "公园", "地点"]], "2": []}}
+
+## 输出要求
+输入是以编号为键的 JSON 对象，每段文本相互独立，不要跨文本合并关系。
+只输出 JSON 对象 {"results": {"编号": [[五元组], ...], ...}}，每个编号都必须出现，没有可提取内容时给出空数组。
+"""
+
+_CJK = re.compile(r"[\u3000-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符按 1 个计，其余按 4 个字符 1 个计"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+RULES_TOKENS = estimate_tokens(EXTRACTION_RULES)
+
+
+def parse_batch_response(content: str, ids: List[str]) -> Dict[str, List[Quintuple]]:
+    """解析批量响应，返回 {编号: 五元组列表}；缺失的编号不会出现在结果中"""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.strip("`")
+        if content.startswith("json"):
+            content = content[4:]
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError:
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        data = json.loads(content[start:end + 1])
+
+    results = data.get("results", data) if isinstance(data, dict) else None
+    if not isinstance(results, dict):
+        raise ValueError("批量响应缺少 results 对象")
+
+    parsed: Dict[str, List[Quintuple]] = {}
+    for text_id in ids:
+        items = results.get(text_id)
+        if not isinstance(items, list):
+            continue
+        parsed[text_id] = [tuple(str(x) for x in item) for item in items
+                           if isinstance(item, (list, tuple)) and len(item) == 5]
+    return parsed
+
+
+class _PendingText:
+    __slots__ = ("text", "tokens", "future")
+
+    def __init__(self, text: str, tokens: int, future: asyncio.Future):
+        self.text = text
+        self.tokens = tokens
+        self.future = future
+
+
+class QuintupleBatchExtractor:
+    """微批量五元组提取器：按 token 预算和最大等待时间打包请求"""
+
+    def __init__(self, client=None, model: Optional[str] = None,
+                 single_extract: Optional[Callable[[str], Awaitable[List]]] = None,
+                 max_batch_texts: int = 8, max_batch_tokens: int = 3000,
+                 max_wait: float = 0.2, max_concurrent_batches: int = 2,
+                 max_tokens: Optional[int] = None, request_timeout: float = 600):
+        self._client = client
+        self._model = model
+        self._single_extract = single_extract
+        self.max_batch_texts = max_batch_texts
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait
+        self.max_concurrent_batches = max_concurrent_batches
+        self._max_tokens = max_tokens
+        self.request_timeout = request_timeout
+
+        self._pending: List[_PendingText] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._batch_tasks = set()
+
+        # 统计信息
+        self.texts = 0
+        self.requests = 0
+        self.batches = 0
+        self.fallbacks = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.quintuples = 0
+
+    # ---------- 依赖（延迟导入，避免循环引用） ----------
+
+    def _get_client(self):
+        if self._client is None:
+            from .quintuple_extractor import async_client
+            self._client = async_client
+        return self._client
+
+    def _get_model(self) -> str:
+        if self._model is None:
+            from system.config import config
+            self._model = config.api.model
+        return self._model
+
+    def _get_max_tokens(self) -> int:
+        if self._max_tokens is None:
+            from system.config import config
+            self._max_tokens = config.api.max_tokens
+        return self._max_tokens
+
+    async def _extract_single(self, text: str) -> List:
+        if self._single_extract is None:
+            from .quintuple_extractor import extract_quintuples_async
+            self._single_extract = extract_quintuples_async
+        self.requests += 1
+        self.prompt_tokens += RULES_TOKENS + estimate_tokens(text)
+        result = await self._single_extract(text)
+        self.quintuples += len(result)
+        return result
+
+    # ---------- 提交与打包 ----------
+
+    def _ensure_loop_state(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_batches)
+            self._pending = []
+            self._pending_tokens = 0
+            self._timer = None
+
+    async def extract(self, text: str) -> List[Quintuple]:
+        """提交一段文本，等待其所在批次完成后返回该文本的五元组"""
+        self._ensure_loop_state()
+        future = self._loop.create_future()
+        item = _PendingText(text, estimate_tokens(text), future)
+        self._pending.append(item)
+        self._pending_tokens += item.tokens
+        self.texts += 1
+
+        if self._batch_full():
+            self._flush(force=False)
+        if self._pending and self._timer is None:
+            self._timer = self._loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _take_batch(self) -> List[_PendingText]:
+        batch, tokens = [], 0
+        while self._pending and len(batch) < self.max_batch_texts:
+            item = self._pending[0]
+            if batch and tokens + item.tokens > self.max_batch_tokens:
+                break
+            batch.append(self._pending.pop(0))
+            tokens += item.tokens
+        self._pending_tokens -= tokens
+        return batch
+
+    def _batch_full(self) -> bool:
+        return len(self._pending) >= self.max_batch_texts or self._pending_tokens >= self.max_batch_tokens
+
+    def _flush(self, force: bool = True):
+        """发出待处理批次；force=False 时只发出已满的批次，余下的继续等待计时器"""
+        if force:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+        while self._pending and (force or self._batch_full()):
+            batch = [item for item in self._take_batch() if not item.future.done()]
+            if batch:
+                task = self._loop.create_task(self._run_batch(batch))
+                self._batch_tasks.add(task)
+                task.add_done_callback(self._batch_tasks.discard)
+        if not self._pending and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def _run_batch(self, batch: List[_PendingText]):
+        async with self._semaphore:
+            if len(batch) == 1:
+                await self._run_single(batch[0])
+                return
+
+            self.batches += 1
+            ids = [str(i + 1) for i in range(len(batch))]
+            try:
+                results = await self._call_batch(ids, batch)
+            except Exception as e:
+                logger.warning(f"批量五元组提取失败，回退到逐条提取 ({len(batch)} 段): {e}")
+                results = {}
+
+            missing = []
+            for text_id, item in zip(ids, batch):
+                if text_id in results:
+                    if not item.future.done():
+                        item.future.set_result(results[text_id])
+                else:
+                    missing.append(item)
+
+            if missing:
+                self.fallbacks += len(missing)
+                await asyncio.gather(*(self._run_single(item) for item in missing))
+
+    async def _run_single(self, item: _PendingText):
+        if item.future.done():
+            return
+        try:
+            result = await self._extract_single(item.text)
+            if not item.future.done():
+                item.future.set_result(result)
+        except Exception as e:
+            if not item.future.done():
+                item.future.set_exception(e)
+
+    async def _call_batch(self, ids: List[str], batch: List[_PendingText]) -> Dict[str, List[Quintuple]]:
+        payload = json.dumps({text_id: item.text for text_id, item in zip(ids, batch)}, ensure_ascii=False)
+        self.requests += 1
+        response = await self._get_client().chat.completions.create(
+            model=self._get_model(),
+            messages=[
+                {"role": "system", "content": EXTRACTION_RULES},
+                {"role": "user", "content": payload},
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=self._get_max_tokens(),
+            temperature=0.3,
+            timeout=self.request_timeout,
+        )
+
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "prompt_tokens", None):
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens or 0
+        else:
+            self.prompt_tokens += RULES_TOKENS + estimate_tokens(payload)
+
+        results = parse_batch_response(response.choices[0].message.content or "", ids)
+        extracted = sum(len(v) for v in results.values())
+        self.quintuples += extracted
+        logger.info(f"批量提取完成: {len(batch)} 段文本, {extracted} 个五元组, 缺失 {len(ids) - len(results)} 段")
+        return results
+
+    def get_stats(self) -> Dict:
+        return {
+            "texts": self.texts,
+            "requests": self.requests,
+            "batches": self.batches,
+            "fallbacks": self.fallbacks,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "quintuples": self.quintuples,
+            "texts_per_request": round(self.texts / self.requests, 2) if self.requests else 0.0,
+            "tokens_per_quintuple": round(
+                (self.prompt_tokens + self.completion_tokens) / self.quintuples, 1) if self.quintuples else None,
+        }
+
+
+def _create_batch_extractor() -> QuintupleBatchExtractor:
+    kwargs = {}
+    try:
+        from system.config import config
+        kwargs = {
+            "max_batch_texts": config.grag.batch_max_texts,
+            "max_batch_tokens": config.grag.batch_max_tokens,
+            "max_wait": config.grag.batch_max_wait,
+        }
+    except Exception:
+        pass
+    return QuintupleBatchExtractor(**kwargs)
+
+
+# 全局批量提取器实例
+batch_extractor = _create_batch_extractor()
@@ -1,12 +1,17 @@
 import json as _json
-from py2neo import Graph, Node, Relationship
-from py2neo.errors import ServiceUnavailable
+from py2neo import Graph
+from py2neo.errors import ServiceUnavailable, TransientError
 import logging
 import sys
 import os
+import re
+import time
 from charset_normalizer import from_path
 from typing import Optional
 
+from .graph_store import GraphStore, get_graph_store
+from .quintuple_store import get_quintuple_store, DEFAULT_SNAPSHOT_FILE
+
 # 添加项目根目录到路径，以便导入config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
@@ -96,6 +101,7 @@ def get_graph():
                     _graph = Graph(neo4j_uri, auth=(neo4j_user, neo4j_password), name=neo4j_database)
                     _graph.service.kernel_version
                     print("[GRAG] 成功连接到 Neo4j。")
+                    ensure_indexes(_graph)
                     GRAG_ENABLED = True
                 except ServiceUnavailable:
                     print("[GRAG] 未能连接到 Neo4j，图数据库功能已临时禁用。请检查 Neo4j 是否正在运行以及配置是否正确。", file=sys.stderr)
@@ -116,73 +122,143 @@ def get_graph():
 
 
 logger = logging.getLogger(__name__)
-QUINTUPLES_FILE = "logs/knowledge_graph/quintuples.json"  # 修改为logs目录下的专门文件夹
+QUINTUPLES_FILE = DEFAULT_SNAPSHOT_FILE  # 快照文件，新增五元组先写入同名 .segments 目录下的追加段
 
 
 def load_quintuples():
-    try:
-        with open(QUINTUPLES_FILE, 'r', encoding='utf-8') as f:
-            return set(tuple(t) for t in _json.load(f))
-    except FileNotFoundError:
-        return set()
+    """读取全部五元组（来自追加式存储的内存集合，返回副本）"""
+    return get_quintuple_store().snapshot()
 
 
 def save_quintuples(quintuples):
-    # 确保目录存在
-    import os
-    os.makedirs(os.path.dirname(QUINTUPLES_FILE), exist_ok=True)
-    
-    with open(QUINTUPLES_FILE, 'w', encoding='utf-8') as f:
-        _json.dump(list(quintuples), f, ensure_ascii=False, indent=2)
+    """整体覆盖五元组存储（仅用于批量重建，日常写入请使用store_quintuples）"""
+    get_quintuple_store().replace_all(quintuples)
 
 
-def store_quintuples(new_quintuples) -> bool:
-    """存储五元组到文件和Neo4j，返回是否成功"""
+def _get_batch_settings():
+    """读取批量写入配置（分块大小、瞬时错误重试次数）"""
     try:
-        all_quintuples = load_quintuples()
-        all_quintuples.update(new_quintuples)  # 集合自动去重
+        from system.config import config
+        return config.grag.neo4j_batch_size, config.grag.neo4j_write_retries
+    except Exception:
+        return 500, 3
 
-        # 持久化到文件
-        save_quintuples(all_quintuples)
 
-        # 获取graph实例（延迟加载）
-        _graph = get_graph()
+def _quote_rel_type(rel: str) -> str:
+    """关系类型无法参数化，只能拼进Cypher，用反引号转义"""
+    return "`" + str(rel).replace("`", "``") + "`"
 
-        # 同步更新Neo4j图谱数据库（仅在graph可用时）
-        success = True
-        if _graph is not None:
-            success_count = 0
-            for head, head_type, rel, tail, tail_type in new_quintuples:
-                if not head or not tail:
-                    logger.warning(f"跳过无效五元组，head或tail为空: {(head, head_type, rel, tail, tail_type)}")
-                    continue
 
-                try:
-                    # 创建带类型的节点
-                    h_node = Node("Entity", name=head, entity_type=head_type)
-                    t_node = Node("Entity", name=tail, entity_type=tail_type)
-
-                    # 创建关系，保存主体和客体类型信息
-                    r = Relationship(h_node, rel, t_node, head_type=head_type, tail_type=tail_type)
-
-                    # 合并节点时使用name和entity_type作为唯一标识
-                    _graph.merge(h_node, "Entity", "name")
-                    _graph.merge(t_node, "Entity", "name")
-                    _graph.merge(r)
-                    success_count += 1
-                except Exception as e:
-                    logger.error(f"存储五元组失败: {head}-{rel}-{tail}, 错误: {e}")
-                    success = False
+def _build_merge_query(rel: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MERGE (h:Entity {{name: row.head}})
+      SET h.entity_type = row.head_type
+    MERGE (t:Entity {{name: row.tail}})
+      SET t.entity_type = row.tail_type
+    MERGE (h)-[r:{_quote_rel_type(rel)}]->(t)
+      ON CREATE SET r.weight = 1
+      ON MATCH SET r.weight = coalesce(r.weight, 0) + 1
+      SET r.head_type = row.head_type, r.tail_type = row.tail_type
+    """
 
-            logger.info(f"成功存储 {success_count}/{len(new_quintuples)} 个五元组到Neo4j")
-            # 如果至少成功存储了一个五元组，就认为是成功的
-            if success_count > 0:
-                return True
-            else:
-                return False
+
+def _commit(graph, tx):
+    # py2neo 2021 推荐 graph.commit(tx)，旧版本只有 tx.commit()
+    if hasattr(graph, "commit"):
+        graph.commit(tx)
+    else:
+        tx.commit()
+
+
+def _rollback(graph, tx):
+    try:
+        if hasattr(graph, "rollback"):
+            graph.rollback(tx)
         else:
-            logger.info(f"跳过Neo4j存储（未启用），保存 {len(new_quintuples)} 个五元组到文件")
-            return True  # 文件存储成功也算成功
+            tx.rollback()
+    except Exception:
+        pass
+
+
+def write_quintuples_batched(graph, quintuples, chunk_size: int = None, max_retries: int = None) -> int:
+    """
+    批量写入五元组到Neo4j：按关系类型分组，使用参数化的 UNWIND $rows MERGE 语句分块发送，
+    所有分块在同一事务内提交；遇到瞬时错误（死锁、连接中断等）整体重试。
+    返回成功写入的五元组数量。
+    """
+    if chunk_size is None or max_retries is None:
+        default_chunk, default_retries = _get_batch_settings()
+        chunk_size = chunk_size or default_chunk
+        max_retries = default_retries if max_retries is None else max_retries
+
+    # 按关系类型分组，并在本批次内去重
+    groups = {}
+    seen = set()
+    for quintuple in quintuples:
+        head, head_type, rel, tail, tail_type = quintuple
+        if not head or not tail or not rel:
+            logger.warning(f"跳过无效五元组，head/rel/tail为空: {tuple(quintuple)}")
+            continue
+        key = (head, head_type, rel, tail, tail_type)
+        if key in seen:
+            continue
+        seen.add(key)
+        groups.setdefault(rel, []).append({
+            "head": head, "head_type": head_type,
+            "tail": tail, "tail_type": tail_type,
+        })
+
+    total = len(seen)
+    if total == 0:
+        return 0
+
+    for attempt in range(max_retries + 1):
+        tx = None
+        try:
+            tx = graph.begin()
+            for rel, rows in groups.items():
+                query = _build_merge_query(rel)
+                for i in range(0, len(rows), chunk_size):
+                    tx.run(query, rows=rows[i:i + chunk_size])
+            _commit(graph, tx)
+            return total
+        except (TransientError, ServiceUnavailable) as e:
+            if tx is not None:
+                _rollback(graph, tx)
+            if attempt >= max_retries:
+                logger.error(f"批量写入Neo4j失败（已重试{max_retries}次）: {e}")
+                return 0
+            delay = 0.2 * (2 ** attempt)
+            logger.warning(f"批量写入Neo4j遇到瞬时错误，{delay:.1f}s后重试 ({attempt + 1}/{max_retries}): {e}")
+            time.sleep(delay)
+        except Exception as e:
+            if tx is not None:
+                _rollback(graph, tx)
+            logger.error(f"批量写入Neo4j失败: {e}")
+            return 0
+    return 0
+
+
+def store_quintuples(new_quintuples) -> bool:
+    """存储五元组到文件和图存储后端（Neo4j / SQLite / 内存索引），返回是否成功"""
+    try:
+        # 先取得图存储后端：SQLite首次创建时会从五元组存储导入已有数据，须在追加本批之前，
+        # 否则本批会被导入一次、下面再写入一次，权重从2开始
+        store = get_graph_store()
+
+        # 追加写入分段日志，内存集合去重，不再重写整个文件
+        added = get_quintuple_store().append(new_quintuples)
+        if not added:
+            # 全部已存在：图存储中已有这些关系，不再写入（避免重复累加关系权重）
+            logger.info(f"{len(new_quintuples)} 个五元组均已存在，跳过图存储写入")
+            return bool(new_quintuples)
+
+        # 同步更新图存储后端（按配置选择，Neo4j不可用时使用内嵌SQLite），只写入去重后新增的五元组
+        success_count = store.add_quintuples(added)
+        logger.info(f"成功存储 {success_count}/{len(added)} 个新五元组到{store.name}图存储")
+        # 如果至少成功存储了一个五元组，就认为是成功的
+        return success_count > 0
     except Exception as e:
         logger.error(f"存储五元组失败: {e}")
         return False
@@ -191,25 +267,190 @@ def get_all_quintuples():
     return load_quintuples()
 
 
-def query_graph_by_keywords(keywords):
-    results = []
-    _graph = get_graph()
-    if _graph is not None:
-        for kw in keywords:
-            query = f"""
-            MATCH (e1:Entity)-[r]->(e2:Entity)
-            WHERE e1.name CONTAINS '{kw}' OR e2.name CONTAINS '{kw}' OR type(r) CONTAINS '{kw}'
-               OR e1.entity_type CONTAINS '{kw}' OR e2.entity_type CONTAINS '{kw}'
-            RETURN e1.name, e1.entity_type, type(r), e2.name, e2.entity_type
-            LIMIT 5
-            """
-            res = _graph.run(query).data()
-            for record in res:
-                results.append((
-                    record['e1.name'],
-                    record['e1.entity_type'],
-                    record['type(r)'],
-                    record['e2.name'],
-                    record['e2.entity_type']
-                ))
-    return results
\ No newline at end of file
+FULLTEXT_INDEX_NAME = "entity_name_fulltext"
+_fulltext_ready: Optional[bool] = None  # None=未检查, True=全文索引可用, False=回退到CONTAINS查询
+
+_LUCENE_PHRASE_ESCAPE = re.compile(r'(["\\])')
+
+
+def ensure_indexes(graph) -> bool:
+    """创建实体名的范围索引和全文索引（已存在则跳过），返回全文索引是否可用"""
+    global _fulltext_ready
+    if _fulltext_ready is not None:
+        return _fulltext_ready
+
+    try:
+        graph.run("CREATE INDEX entity_name IF NOT EXISTS FOR (n:Entity) ON (n.name)")
+    except Exception as e:
+        logger.debug(f"创建实体名索引失败（旧版Neo4j可忽略）: {e}")
+
+    try:
+        graph.run(
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX_NAME} IF NOT EXISTS "
+            f"FOR (n:Entity) ON EACH [n.name, n.entity_type]"
+        )
+        _fulltext_ready = True
+    except Exception:
+        # Neo4j 4.3 之前只能通过过程创建全文索引
+        try:
+            existing = graph.run(
+                "CALL db.indexes() YIELD name WHERE name = $name RETURN count(*) AS n",
+                name=FULLTEXT_INDEX_NAME
+            ).evaluate()
+            if not existing:
+                graph.run(
+                    "CALL db.index.fulltext.createNodeIndex($name, ['Entity'], ['name', 'entity_type'])",
+                    name=FULLTEXT_INDEX_NAME
+                )
+            _fulltext_ready = True
+        except Exception as e:
+            logger.warning(f"Neo4j全文索引不可用，关键词查询回退到CONTAINS扫描: {e}")
+            _fulltext_ready = False
+
+    if _fulltext_ready:
+        logger.info(f"Neo4j全文索引已就绪: {FULLTEXT_INDEX_NAME}")
+    return _fulltext_ready
+
+
+def _to_phrase_query(keyword: str) -> str:
+    """把关键词转成Lucene短语查询，近似于子串匹配且不受特殊字符影响"""
+    return '"' + _LUCENE_PHRASE_ESCAPE.sub(r'\\\1', keyword) + '"'
+
+
+_FULLTEXT_QUERY = f"""
+UNWIND $keywords AS kw
+CALL db.index.fulltext.queryNodes('{FULLTEXT_INDEX_NAME}', kw.query) YIELD node, score
+WITH kw, node, score ORDER BY score DESC
+WITH kw, collect({{node: node, score: score}})[..$node_limit] AS hits
+UNWIND hits AS hit
+WITH kw, hit.node AS node, hit.score AS score
+MATCH (node)-[r]-(:Entity)
+WITH kw, r, max(score) * (1 + log(coalesce(r.weight, 1))) AS rank
+ORDER BY rank DESC
+WITH kw, collect({{r: r, rank: rank}})[..$limit] AS top
+UNWIND top AS item
+WITH item.r AS r, sum(item.rank) AS rank
+ORDER BY rank DESC
+WITH startNode(r) AS e1, r, endNode(r) AS e2
+RETURN e1.name AS head, e1.entity_type AS head_type, type(r) AS rel,
+       e2.name AS tail, e2.entity_type AS tail_type
+"""
+
+# 全文索引只覆盖实体，谓词（关系类型）命中单独按类型匹配：
+# 先在关系类型列表中找出包含关键词的类型，再用类型模式取权重最高的关系，不扫描全部关系
+_RELATION_TYPE_QUERY = """
+UNWIND $keywords AS kw
+CALL db.relationshipTypes() YIELD relationshipType
+WITH kw, relationshipType WHERE relationshipType CONTAINS kw
+RETURN kw, collect(relationshipType) AS types
+"""
+
+_RELATION_MATCH_QUERY = """
+MATCH (e1:Entity)-[r:{types}]->(e2:Entity)
+WITH e1, r, e2 ORDER BY coalesce(r.weight, 1) DESC LIMIT $limit
+RETURN e1.name AS head, e1.entity_type AS head_type, type(r) AS rel,
+       e2.name AS tail, e2.entity_type AS tail_type
+"""
+
+
+def _relation_type_pattern(types) -> str:
+    """关系类型名来自数据库，用反引号转义后拼成 `A`|`B` 模式"""
+    return "|".join("`" + t.replace("`", "``") + "`" for t in types)
+
+
+_CONTAINS_QUERY = """
+UNWIND $keywords AS kw
+MATCH (e1:Entity)-[r]->(e2:Entity)
+WHERE e1.name CONTAINS kw OR e2.name CONTAINS kw OR type(r) CONTAINS kw
+   OR e1.entity_type CONTAINS kw OR e2.entity_type CONTAINS kw
+WITH kw, e1, r, e2 ORDER BY coalesce(r.weight, 1) DESC
+WITH kw, collect({e1: e1, r: r, e2: e2})[..$limit] AS top
+UNWIND top AS item
+WITH item.e1 AS e1, item.r AS r, item.e2 AS e2, count(*) AS hits
+ORDER BY hits DESC, coalesce(r.weight, 1) DESC
+RETURN e1.name AS head, e1.entity_type AS head_type, type(r) AS rel,
+       e2.name AS tail, e2.entity_type AS tail_type
+"""
+
+
+def _query_neo4j_by_keywords(graph, keywords, limit_per_keyword: int = 5):
+    """所有关键词合并为一条参数化查询，全文索引可用时按匹配得分与关系权重排序"""
+    if ensure_indexes(graph):
+        params = {
+            "keywords": [{"raw": kw, "query": _to_phrase_query(kw)} for kw in keywords],
+            "node_limit": limit_per_keyword * 4,
+            "limit": limit_per_keyword,
+        }
+        res = graph.run(_FULLTEXT_QUERY, **params).data()
+        # 与CONTAINS查询一致，关键词命中关系类型（如“喜欢”）的五元组也要召回
+        for record in graph.run(_RELATION_TYPE_QUERY, keywords=keywords).data():
+            if record['types']:
+                res += graph.run(
+                    _RELATION_MATCH_QUERY.format(types=_relation_type_pattern(record['types'])),
+                    limit=limit_per_keyword
+                ).data()
+    else:
+        res = graph.run(_CONTAINS_QUERY, keywords=keywords, limit=limit_per_keyword).data()
+
+    # 同一五元组可能既由实体命中又由关系类型命中，按首次出现去重
+    return list(dict.fromkeys(
+        (record['head'], record['head_type'], record['rel'], record['tail'], record['tail_type'])
+        for record in res
+    ))
+
+
+def _build_expand_query(hops: int) -> str:
+    # 可变长度路径的跳数无法参数化，只接受整数
+    return f"""
+    MATCH (e:Entity) WHERE e.name IN $names
+    MATCH p = (e)-[*1..{int(hops)}]-(:Entity)
+    UNWIND relationships(p) AS r
+    WITH DISTINCT r LIMIT $limit
+    WITH startNode(r) AS e1, r, endNode(r) AS e2
+    RETURN e1.name AS head, e1.entity_type AS head_type, type(r) AS rel,
+           e2.name AS tail, e2.entity_type AS tail_type
+    """
+
+
+class Neo4jGraphStore(GraphStore):
+    """py2neo 图存储后端"""
+
+    name = "neo4j"
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def add_quintuples(self, quintuples) -> int:
+        return write_quintuples_batched(self.graph, quintuples)
+
+    def query_by_keywords(self, keywords, limit_per_keyword: int = 5):
+        return _query_neo4j_by_keywords(self.graph, keywords, limit_per_keyword)
+
+    def expand(self, entities, hops: int = 1, limit: int = 50):
+        names = [str(name) for name in entities if name]
+        if not names or hops < 1 or limit < 1:
+            return []
+        res = self.graph.run(_build_expand_query(hops), names=names, limit=limit).data()
+        return [
+            (record['head'], record['head_type'], record['rel'], record['tail'], record['tail_type'])
+            for record in res
+        ]
+
+    def count(self):
+        return self.graph.run("MATCH (:Entity)-[r]->(:Entity) RETURN count(r)").evaluate()
+
+
+def query_graph_by_keywords(keywords, limit_per_keyword: int = 5):
+    """
+    按关键词召回五元组，由当前图存储后端执行：
+    Neo4j 走全文索引，SQLite 走 FTS5 + 邻接索引，memory 走本地倒排索引
+    """
+    keywords = [str(kw).strip() for kw in keywords if kw is not None and str(kw).strip()]
+    if not keywords:
+        return []
+    return get_graph_store().query_by_keywords(keywords, limit_per_keyword=limit_per_keyword)
+
+
+def expand_graph_neighbors(entities, hops: int = 1, limit: int = 50):
+    """从给定实体出发做 k 跳邻居扩展"""
+    return get_graph_store().expand(list(entities), hops=hops, limit=limit)
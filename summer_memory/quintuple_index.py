@@ -0,0 +1,218 @@
+"""
+本地五元组倒排索引
+
+graph_backend = "memory" 时，MemoryGraphStore 使用该索引在本地五元组存储上做关键词召回：
+- 索引对象是去重后的字符串（实体名、实体类型、关系），而不是每条五元组，内存随实体数增长
+- 字符串按单字/双字切分建立倒排表，中文无需分词即可支持“包含”语义
+- 每个字符串再映射到引用它的五元组，按匹配度与实体度数排序
+- 随 QuintupleStore 的追加增量更新，无需重建
+"""
+import logging
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .graph_store import GraphStore
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+# 不同字段命中时的权重：实体名 > 关系 > 实体类型
+ROLE_ENTITY = 0
+ROLE_RELATION = 1
+ROLE_TYPE = 2
+ROLE_WEIGHTS = (1.0, 0.8, 0.5)
+
+
+def _grams(text: str) -> set:
+    """单字 + 相邻双字切分（统一小写）"""
+    text = text.lower()
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class QuintupleKeywordIndex:
+    """基于字符 n-gram 倒排表的五元组关键词索引（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._quintuples: List[Quintuple] = []
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._grams: Dict[str, array] = {}
+        # 字符串id -> 引用它的五元组id，按字段角色分开存放
+        self._refs: Tuple[Dict[int, array], Dict[int, array], Dict[int, array]] = ({}, {}, {})
+
+    def __len__(self) -> int:
+        return len(self._quintuples)
+
+    @property
+    def entity_count(self) -> int:
+        return len(self._refs[ROLE_ENTITY])
+
+    def clear(self):
+        with self._lock:
+            self._quintuples = []
+            self._strings = []
+            self._string_ids = {}
+            self._grams = {}
+            self._refs = ({}, {}, {})
+
+    def _intern(self, text: str) -> int:
+        sid = self._string_ids.get(text)
+        if sid is None:
+            sid = len(self._strings)
+            self._strings.append(text)
+            self._string_ids[text] = sid
+            for gram in _grams(text):
+                postings = self._grams.get(gram)
+                if postings is None:
+                    postings = self._grams[gram] = array('I')
+                postings.append(sid)
+        return sid
+
+    def _link(self, role: int, text: str, qid: int):
+        if not text:
+            return
+        sid = self._intern(text)
+        refs = self._refs[role].get(sid)
+        if refs is None:
+            refs = self._refs[role][sid] = array('I')
+        refs.append(qid)
+
+    def add(self, quintuples: Iterable):
+        """增量加入五元组（调用方保证已去重）"""
+        with self._lock:
+            for q in quintuples:
+                head, head_type, rel, tail, tail_type = (str(x) if x is not None else "" for x in q)
+                qid = len(self._quintuples)
+                self._quintuples.append(tuple(q))
+                self._link(ROLE_ENTITY, head, qid)
+                if tail != head:
+                    self._link(ROLE_ENTITY, tail, qid)
+                self._link(ROLE_RELATION, rel, qid)
+                self._link(ROLE_TYPE, head_type, qid)
+                if tail_type != head_type:
+                    self._link(ROLE_TYPE, tail_type, qid)
+
+    def _match_strings(self, keyword: str) -> List[Tuple[float, int]]:
+        """返回包含关键词的字符串 [(匹配度, 字符串id)]，按匹配度降序"""
+        kw = keyword.lower()
+        grams = [kw[i:i + 2] for i in range(len(kw) - 1)] or [kw]
+        # 选择最稀有的 gram 作为候选集合，再逐个校验包含关系
+        best = None
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if postings is None:
+                return []
+            if best is None or len(postings) < len(best):
+                best = postings
+        matches = []
+        for sid in best:
+            text = self._strings[sid]
+            if kw in text.lower():
+                matches.append((len(kw) / len(text), sid))
+        matches.sort(reverse=True)
+        return matches
+
+    def search(self, keywords: Iterable[str], limit_per_keyword: int = 5) -> List[Quintuple]:
+        """
+        关键词召回：每个关键词最多贡献 limit_per_keyword 条五元组，
+        多个关键词命中同一五元组时得分累加，结果按总分降序返回
+        """
+        with self._lock:
+            scores: Dict[int, float] = {}
+            for keyword in keywords:
+                keyword = str(keyword).strip()
+                if not keyword:
+                    continue
+                per_keyword: Dict[int, float] = {}
+                for match_score, sid in self._match_strings(keyword):
+                    for role in (ROLE_ENTITY, ROLE_RELATION, ROLE_TYPE):
+                        refs = self._refs[role].get(sid)
+                        if not refs:
+                            continue
+                        # 度数越高的实体越“核心”，给予轻微加权
+                        weight = ROLE_WEIGHTS[role] * match_score * (1.0 + min(len(refs), 100) / 1000.0)
+                        for qid in refs:
+                            if weight > per_keyword.get(qid, 0.0):
+                                per_keyword[qid] = weight
+                            if len(per_keyword) >= limit_per_keyword * 4:
+                                break
+                    if len(per_keyword) >= limit_per_keyword * 4:
+                        break
+                top = sorted(per_keyword.items(), key=lambda item: item[1], reverse=True)[:limit_per_keyword]
+                for qid, weight in top:
+                    scores[qid] = scores.get(qid, 0.0) + weight
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            return [self._quintuples[qid] for qid, _ in ranked]
+
+    def neighbors(self, entities: Iterable[str], hops: int = 1, limit: int = 50) -> List[Quintuple]:
+        """从给定实体出发按广度优先做 k 跳扩展，返回经过的五元组"""
+        with self._lock:
+            frontier = [self._string_ids[name] for name in entities if name in self._string_ids]
+            visited = set(frontier)
+            seen_qids = set()
+            results: List[Quintuple] = []
+            for _ in range(hops):
+                next_frontier = []
+                for sid in frontier:
+                    for qid in self._refs[ROLE_ENTITY].get(sid, ()):
+                        if qid in seen_qids:
+                            continue
+                        seen_qids.add(qid)
+                        quintuple = self._quintuples[qid]
+                        results.append(quintuple)
+                        if len(results) >= limit:
+                            return results
+                        for name in (quintuple[0], quintuple[3]):
+                            other = self._string_ids.get(str(name))
+                            if other is not None and other not in visited:
+                                visited.add(other)
+                                next_frontier.append(other)
+                frontier = next_frontier
+                if not frontier:
+                    break
+            return results
+
+
+_index: Optional[QuintupleKeywordIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_keyword_index() -> QuintupleKeywordIndex:
+    """获取全局本地索引：首次调用时从五元组存储构建，之后随存储追加增量更新"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                from .quintuple_store import get_quintuple_store
+                store = get_quintuple_store()
+                index = QuintupleKeywordIndex()
+                store.add_listener(index)
+                _index = index
+                logger.info(f"[GRAG] 本地关键词索引已构建: {len(index)} 条五元组, {index.entity_count} 个实体")
+    return _index
+
+
+class MemoryGraphStore(GraphStore):
+    """进程内图存储：数据来自五元组存储，由全局倒排索引提供检索（不落盘）"""
+
+    name = "memory"
+
+    def add_quintuples(self, quintuples: Iterable) -> int:
+        # 五元组存储追加时已通过监听器增量更新索引，这里只需确保索引已构建
+        get_keyword_index()
+        return len(quintuples) if hasattr(quintuples, "__len__") else 0
+
+    def query_by_keywords(self, keywords: List[str], limit_per_keyword: int = 5) -> List[Quintuple]:
+        return get_keyword_index().search(keywords, limit_per_keyword=limit_per_keyword)
+
+    def expand(self, entities: List[str], hops: int = 1, limit: int = 50) -> List[Quintuple]:
+        return get_keyword_index().neighbors(entities, hops=hops, limit=limit)
+
+    def count(self) -> Optional[int]:
+        return len(get_keyword_index())
@@ -1,5 +1,5 @@
 from nagaagent_core.core import requests
-import json
+import asyncio
 import logging
 import sys
 import os
@@ -8,6 +8,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from system.config import config
+from .keyword_extractor import (
+    KeywordExtractionError, build_keyword_request, parse_keyword_response, keyword_extractor
+)
 API_URL = f"{config.api.base_url.rstrip('/')}/chat/completions"
 
 # 设置日志
@@ -25,84 +28,59 @@ def set_context(texts):
     recent_context = texts[:context_length]  # 限制上下文长度
     logger.info(f"更新查询上下文: {len(recent_context)} 条记录")
 
+def _format_answer(keywords):
+    """根据关键词查询知识图谱并格式化回答"""
+    if not keywords:
+        logger.warning("未提取到关键词")
+        return "未找到相关关键词，请提供更具体的问题。"
+
+    logger.info(f"提取关键词: {keywords}")
+    from .quintuple_graph import query_graph_by_keywords, expand_graph_neighbors
+    quintuples = query_graph_by_keywords(keywords)
+
+    # 可选：从命中的实体出发做 k 跳扩展，补充间接相关的关系
+    hops = getattr(config.grag, 'recall_hops', 0)
+    if quintuples and hops > 0:
+        entities = list(dict.fromkeys(name for q in quintuples for name in (q[0], q[3])))
+        seen = set(quintuples)
+        for quintuple in expand_graph_neighbors(entities, hops=hops):
+            if quintuple not in seen:
+                seen.add(quintuple)
+                quintuples.append(quintuple)
+
+    if not quintuples:
+        logger.info(f"未找到相关五元组: {keywords}")
+        return "未在知识图谱中找到相关信息。"
+
+    answer = "我在知识图谱中找到以下相关信息：\n\n"
+    for h, h_type, r, t, t_type in quintuples:
+        answer += f"- {h}({h_type}) —[{r}]→ {t}({t_type})\n"
+    return answer
+
+
 def query_knowledge(user_question):
-    """使用 DeepSeek API 提取关键词并查询知识图谱"""
+    """使用 DeepSeek API 提取关键词并查询知识图谱（同步版本，供命令行等非异步场景使用）"""
     context_str = "\n".join(recent_context) if recent_context else "无上下文"
-    prompt = (
-        f"基于以下上下文和用户问题，提取与知识图谱相关的关键词（如人物、物体、关系、实体类型），"
-        f"仅以列表的形式返回核心关键词，避免无关词。返回 JSON 格式的关键词列表：\n"
-        f"上下文：\n{context_str}\n"
-        f"问题：{user_question}\n"
-        f"输出格式：```json\n[]\n```"
-    )
-
-    headers = {
-        "Authorization": f"Bearer {config.api.api_key}",
-        "Content-Type": "application/json"
-    }
-
-    # 检测是否使用ollama并启用结构化输出
-    is_ollama = "localhost" in config.api.base_url or "11434" in config.api.base_url
-    
-    body = {
-        "model": config.api.model,
-        "messages": [
-            {"role": "user", "content": prompt}
-        ],
-                    "max_tokens": config.api.max_tokens,
-        "temperature": 0.5  # 降低温度，提高精准度
-    }
-    
-    # 为ollama添加结构化输出
-    if is_ollama:
-        body["format"] = "json"
-        # 简化提示词，ollama会自动处理JSON格式
-        simplified_prompt = (
-            f"基于以下上下文和用户问题，提取与知识图谱相关的关键词（如人物、物体、关系、实体类型），"
-            f"仅返回核心关键词，避免无关词。直接返回关键词数组：\n"
-            f"上下文：\n{context_str}\n"
-            f"问题：{user_question}"
-        )
-        body["messages"] = [{"role": "user", "content": simplified_prompt}]
+    cache = keyword_extractor.cache
+    cache_key = cache.make_key(user_question)
 
     try:
-        response = requests.post(API_URL, headers=headers, json=body, timeout=20)
-        response.raise_for_status()
-        content = response.json()
-
-        if "choices" not in content or not content["choices"]:
-            logger.error("DeepSeek API 响应中未找到 'choices' 字段")
-            return "无法处理 API 响应，请稍后重试。"
-
-        raw_content = content["choices"][0]["message"]["content"]
-        try:
-            raw_content = raw_content.strip()
-            if raw_content.startswith("```json") and raw_content.endswith("```"):
-                raw_content = raw_content[7:-3].strip()
-            keywords = json.loads(raw_content)
-            print(keywords)
-            if not isinstance(keywords, list):
-                raise ValueError("关键词应为列表")
-        except (json.JSONDecodeError, ValueError) as e:
-            logger.error(f"解析 DeepSeek 响应失败: {raw_content}, 错误: {e}")
-            return "无法解析关键词，请检查问题格式。"
-
-        if not keywords:
-            logger.warning("未提取到关键词")
-            return "未找到相关关键词，请提供更具体的问题。"
-
-        logger.info(f"提取关键词: {keywords}")
-        from .quintuple_graph import query_graph_by_keywords
-        quintuples = query_graph_by_keywords(keywords)
-        if not quintuples:
-            logger.info(f"未找到相关五元组: {keywords}")
-            return "未在知识图谱中找到相关信息。"
-
-        answer = "我在知识图谱中找到以下相关信息：\n\n"
-        for h, h_type, r, t, t_type in quintuples:
-            answer += f"- {h}({h_type}) —[{r}]→ {t}({t_type})\n"
-        return answer
+        keywords = cache.get(cache_key)
+        if keywords is None:
+            headers = {
+                "Authorization": f"Bearer {config.api.api_key}",
+                "Content-Type": "application/json"
+            }
+            body = build_keyword_request(user_question, context_str)
+            response = requests.post(API_URL, headers=headers, json=body, timeout=20)
+            response.raise_for_status()
+            keywords = parse_keyword_response(response.json())
+            cache.put(cache_key, keywords)
+            cache.flush()
+        return _format_answer(keywords)
 
+    except KeywordExtractionError as e:
+        return str(e)
     except requests.exceptions.HTTPError as e:
         logger.error(f"DeepSeek API HTTP 错误: {e}")
         return "调用 DeepSeek API 失败，请检查 API 密钥或网络连接。"
@@ -112,3 +90,16 @@ def query_knowledge(user_question):
     except Exception as e:
         logger.error(f"查询过程中发生未知错误: {e}")
         return "查询过程中发生未知错误，请稍后重试。"
+
+
+async def query_knowledge_async(user_question):
+    """异步版本：关键词提取走缓存与并发合并，图谱查询放到线程池，不阻塞事件循环"""
+    context_str = "\n".join(recent_context) if recent_context else "无上下文"
+    try:
+        keywords = await keyword_extractor.extract(user_question, context_str)
+        return await asyncio.to_thread(_format_answer, keywords)
+    except KeywordExtractionError as e:
+        return str(e)
+    except Exception as e:
+        logger.error(f"查询过程中发生未知错误: {e}")
+        return "查询过程中发生未知错误，请稍后重试。"
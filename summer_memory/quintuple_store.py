@@ -0,0 +1,338 @@
+"""
+五元组追加式分段存储
+
+- 新五元组以 JSONL 追加到当前段文件，写入成本与图谱规模无关
+- 内存哈希集合负责去重，不再每次读取/重写整个 quintuples.json
+- 后台线程定期把已封存的段合并回 quintuples.json 快照（原子替换）
+- 启动时从快照 + 段文件恢复，自动截断崩溃遗留的半行记录
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Quintuple = Tuple[str, str, str, str, str]
+
+DEFAULT_SNAPSHOT_FILE = "logs/knowledge_graph/quintuples.json"
+SEGMENT_PREFIX = "seg-"
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class QuintupleStore:
+    """追加式分段五元组存储（线程安全）"""
+
+    def __init__(self, snapshot_file: str = DEFAULT_SNAPSHOT_FILE,
+                 segment_max_bytes: int = 4 * 1024 * 1024,
+                 compact_min_segments: int = 4,
+                 compact_interval: float = 300.0,
+                 fsync: bool = True):
+        self.snapshot_file = snapshot_file
+        self.segment_dir = os.path.splitext(snapshot_file)[0] + ".segments"
+        self.segment_max_bytes = segment_max_bytes
+        self.compact_min_segments = compact_min_segments
+        self.compact_interval = compact_interval
+        self.fsync = fsync
+
+        self._quintuples: Set[Quintuple] = set()
+        self._lock = threading.RLock()  # 保护内存集合与当前段
+        self._compact_lock = threading.Lock()  # 同一时刻只允许一个合并
+        self._loaded = False
+
+        self._active_index = 0
+        self._active_file = None
+        self._active_size = 0
+
+        self._listeners: list = []  # 增量索引等订阅者，需实现 add(quintuples) / clear()
+
+        self._compactor: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+        # 统计信息
+        self.appended_count = 0
+        self.compaction_count = 0
+        self.last_compaction_at: Optional[float] = None
+
+    # ---------- 加载与恢复 ----------
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(self.segment_dir, exist_ok=True)
+            self._quintuples = self._read_snapshot()
+            segments = self._list_segments()
+            for index in segments:
+                self._quintuples.update(self._read_segment(self._segment_path(index)))
+            # 新写入总是进入一个新段，已存在的段全部视为封存
+            self._active_index = (segments[-1] + 1) if segments else 1
+            self._loaded = True
+            logger.info(f"[GRAG] 五元组存储已加载: {len(self._quintuples)} 条, 段文件 {len(segments)} 个")
+
+    def _read_snapshot(self) -> Set[Quintuple]:
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                return set(tuple(t) for t in json.load(f) if len(t) == 5)
+        except FileNotFoundError:
+            return set()
+        except json.JSONDecodeError as e:
+            logger.error(f"[GRAG] 五元组快照损坏，忽略快照继续从段文件恢复: {e}")
+            return set()
+
+    def _read_segment(self, path: str) -> List[Quintuple]:
+        """读取一个段文件；末尾不完整的记录（写入中途崩溃）会被截断"""
+        records: List[Quintuple] = []
+        good_offset = 0
+        with open(path, 'rb') as f:
+            data = f.read()
+        offset = 0
+        while offset < len(data):
+            end = data.find(b'\n', offset)
+            if end == -1:
+                break  # 没有换行结尾，说明是写了一半的记录
+            line = data[offset:end].strip()
+            if line:
+                try:
+                    item = json.loads(line.decode('utf-8'))
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    logger.warning(f"[GRAG] 跳过损坏的五元组记录: {path}@{offset}")
+                else:
+                    if len(item) == 5:
+                        records.append(tuple(item))
+            offset = end + 1
+            good_offset = offset
+        if good_offset < len(data):
+            logger.warning(f"[GRAG] 段文件末尾存在不完整记录，截断 {len(data) - good_offset} 字节: {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+        return records
+
+    def _list_segments(self) -> List[int]:
+        indexes = []
+        try:
+            names = os.listdir(self.segment_dir)
+        except FileNotFoundError:
+            return indexes
+        for name in names:
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    indexes.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(indexes)
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.segment_dir, f"{SEGMENT_PREFIX}{index:06d}{SEGMENT_SUFFIX}")
+
+    # ---------- 写入 ----------
+
+    def _open_active(self):
+        if self._active_file is None:
+            path = self._segment_path(self._active_index)
+            self._active_file = open(path, 'ab')
+            self._active_size = self._active_file.tell()
+
+    def _seal_active(self):
+        """封存当前段，后续写入进入新段"""
+        if self._active_file is not None:
+            self._active_file.close()
+            self._active_file = None
+            self._active_index += 1
+            self._active_size = 0
+
+    def append(self, quintuples: Iterable) -> List[Quintuple]:
+        """追加五元组，返回实际新增（去重后）的五元组列表"""
+        self._ensure_loaded()
+        with self._lock:
+            added: List[Quintuple] = []
+            for q in quintuples:
+                q = tuple(q)
+                if len(q) != 5 or q in self._quintuples:
+                    continue
+                self._quintuples.add(q)
+                added.append(q)
+            if not added:
+                return added
+
+            payload = b''.join(
+                json.dumps(list(q), ensure_ascii=False).encode('utf-8') + b'\n' for q in added
+            )
+            self._open_active()
+            self._active_file.write(payload)
+            self._active_file.flush()
+            if self.fsync:
+                os.fsync(self._active_file.fileno())
+            self._active_size += len(payload)
+            self.appended_count += len(added)
+            self._notify_added(added)
+
+            if self._active_size >= self.segment_max_bytes:
+                self._seal_active()
+            return added
+
+    def contains(self, quintuple) -> bool:
+        self._ensure_loaded()
+        return tuple(quintuple) in self._quintuples
+
+    def snapshot(self) -> Set[Quintuple]:
+        """返回当前全部五元组的副本"""
+        self._ensure_loaded()
+        with self._lock:
+            return set(self._quintuples)
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._quintuples)
+
+    def replace_all(self, quintuples: Iterable):
+        """用给定集合整体替换存储内容（兼容旧的 save_quintuples 语义）"""
+        self._ensure_loaded()
+        with self._compact_lock, self._lock:
+            self._seal_active()
+            self._quintuples = set(tuple(q) for q in quintuples if len(q) == 5)
+            self._write_snapshot(self._quintuples)
+            for index in self._list_segments():
+                self._remove_segment(index)
+            for listener in self._listeners:
+                listener.clear()
+            self._notify_added(self._quintuples)
+
+    # ---------- 订阅 ----------
+
+    def add_listener(self, listener):
+        """注册订阅者：先用当前全部五元组初始化，之后每次追加都会收到新增部分"""
+        self._ensure_loaded()
+        with self._lock:
+            listener.add(self._quintuples)
+            self._listeners.append(listener)
+
+    def _notify_added(self, added):
+        for listener in self._listeners:
+            try:
+                listener.add(added)
+            except Exception as e:
+                logger.error(f"[GRAG] 五元组订阅者更新失败: {e}")
+
+    # ---------- 合并 ----------
+
+    def sealed_segment_count(self) -> int:
+        return sum(1 for index in self._list_segments() if index < self._active_index)
+
+    def compact(self, force: bool = False) -> bool:
+        """把已封存的段合并进快照文件；force=True 时会先封存当前段"""
+        self._ensure_loaded()
+        if not self._compact_lock.acquire(blocking=False):
+            return False
+        try:
+            with self._lock:
+                if force:
+                    self._seal_active()
+                sealed = [i for i in self._list_segments() if i < self._active_index]
+                if not sealed:
+                    return False
+                # 快照 ⊇ 所有封存段，故可以直接用内存集合的副本，未封存的新记录多写进去也无妨
+                data = set(self._quintuples)
+
+            # 写快照在锁外进行，不阻塞新的追加
+            self._write_snapshot(data)
+            for index in sealed:
+                self._remove_segment(index)
+
+            self.compaction_count += 1
+            self.last_compaction_at = time.time()
+            logger.info(f"[GRAG] 五元组段合并完成: 合并 {len(sealed)} 个段, 快照 {len(data)} 条")
+            return True
+        except Exception as e:
+            logger.error(f"[GRAG] 五元组段合并失败: {e}")
+            return False
+        finally:
+            self._compact_lock.release()
+
+    def _write_snapshot(self, data: Set[Quintuple]):
+        """原子写入快照：先写临时文件并 fsync，再 os.replace"""
+        directory = os.path.dirname(self.snapshot_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.snapshot_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump([list(q) for q in data], f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_file)
+
+    def _remove_segment(self, index: int):
+        try:
+            os.remove(self._segment_path(index))
+        except FileNotFoundError:
+            pass
+
+    def start_compactor(self):
+        """启动后台合并线程"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._stop_event.clear()
+        self._compactor = threading.Thread(target=self._compactor_loop, name="quintuple_compactor", daemon=True)
+        self._compactor.start()
+
+    def _compactor_loop(self):
+        while not self._stop_event.wait(self.compact_interval):
+            try:
+                if self.sealed_segment_count() >= self.compact_min_segments:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"[GRAG] 后台合并异常: {e}")
+
+    def close(self):
+        """停止后台线程，合并全部段并关闭文件"""
+        self._stop_event.set()
+        if self._compactor is not None:
+            self._compactor.join(timeout=5)
+            self._compactor = None
+        if self._loaded:
+            self.compact(force=True)
+            with self._lock:
+                self._seal_active()
+
+    def get_stats(self) -> dict:
+        self._ensure_loaded()
+        return {
+            "total_quintuples": len(self._quintuples),
+            "segment_count": len(self._list_segments()),
+            "appended_count": self.appended_count,
+            "compaction_count": self.compaction_count,
+            "last_compaction_at": self.last_compaction_at,
+        }
+
+
+# 全局存储实例（延迟创建）
+_store: Optional[QuintupleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_quintuple_store() -> QuintupleStore:
+    """获取全局五元组存储实例"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                kwargs = {}
+                try:
+                    from system.config import config
+                    kwargs = {
+                        "segment_max_bytes": config.grag.store_segment_max_kb * 1024,
+                        "compact_min_segments": config.grag.store_compact_min_segments,
+                        "compact_interval": config.grag.store_compact_interval,
+                    }
+                except Exception:
+                    pass
+                store = QuintupleStore(**kwargs)
+                store.start_compactor()
+                atexit.register(store.close)  # 退出时把剩余段合并进快照
+                _store = store
+    return _store
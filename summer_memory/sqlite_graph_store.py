@@ -0,0 +1,287 @@
+"""
+内嵌 SQLite 图存储
+
+无需部署 Neo4j 即可使用 GRAG 召回：
+- entities / relations 两张邻接表，实体名唯一索引，关系按 (head_id, weight)、(tail_id, weight) 建索引，
+  取某个实体权重最高的 k 条关系只需一次索引范围扫描
+- 实体名按单字/相邻双字切分后写入 FTS5 表，中文无需分词即可做“包含”检索；
+  FTS5 不可用时回退到 LIKE 扫描
+- 关系名、实体类型按“包含”匹配：两者取值种类很少，在内存中缓存取值集合后逐个比对，
+  再按 (rel, weight)、(head_type, weight)、(tail_type, weight) 索引取权重最高的关系
+- 关系重复写入时 weight 累加，与 Neo4j 后端的提及次数语义一致
+- expand() 按广度优先做 k 跳扩展，每一跳都走邻接索引
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .graph_store import GraphStore, Quintuple
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    entity_type TEXT
+);
+CREATE TABLE IF NOT EXISTS relations (
+    id INTEGER PRIMARY KEY,
+    head_id INTEGER NOT NULL REFERENCES entities(id),
+    rel TEXT NOT NULL,
+    tail_id INTEGER NOT NULL REFERENCES entities(id),
+    head_type TEXT,
+    tail_type TEXT,
+    weight INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (head_id, rel, tail_id)
+);
+CREATE INDEX IF NOT EXISTS idx_relations_head ON relations(head_id, weight);
+CREATE INDEX IF NOT EXISTS idx_relations_tail ON relations(tail_id, weight);
+CREATE INDEX IF NOT EXISTS idx_relations_rel ON relations(rel, weight);
+CREATE INDEX IF NOT EXISTS idx_relations_head_type ON relations(head_type, weight);
+CREATE INDEX IF NOT EXISTS idx_relations_tail_type ON relations(tail_type, weight);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS entity_fts USING fts5(
+    grams, chars, content='', tokenize='unicode61 remove_diacritics 0'
+)
+"""
+
+_RELATION_COLUMNS = """
+SELECT r.id, h.name, r.head_type, r.rel, t.name, r.tail_type, r.weight, r.head_id, r.tail_id
+FROM relations r JOIN entities h ON h.id = r.head_id JOIN entities t ON t.id = r.tail_id
+"""
+_TOP_BY_HEAD = _RELATION_COLUMNS + "WHERE r.head_id = ? ORDER BY r.weight DESC LIMIT ?"
+_TOP_BY_TAIL = _RELATION_COLUMNS + "WHERE r.tail_id = ? ORDER BY r.weight DESC LIMIT ?"
+_TOP_BY_REL = _RELATION_COLUMNS + "WHERE r.rel = ? ORDER BY r.weight DESC LIMIT ?"
+_TOP_BY_HEAD_TYPE = _RELATION_COLUMNS + "WHERE r.head_type = ? ORDER BY r.weight DESC LIMIT ?"
+_TOP_BY_TAIL_TYPE = _RELATION_COLUMNS + "WHERE r.tail_type = ? ORDER BY r.weight DESC LIMIT ?"
+
+# 关系名、实体类型命中的权重低于实体名命中（与本地倒排索引的 ROLE_WEIGHTS 保持一致）
+RELATION_MATCH_WEIGHT = 0.8
+TYPE_MATCH_WEIGHT = 0.5
+# 每个关键词先取多少个候选实体再做包含校验
+CANDIDATE_FACTOR = 20
+
+
+def _phrase(tokens: Sequence[str]) -> str:
+    """FTS5 短语查询，双引号按规则转义"""
+    return '"' + " ".join(tokens).replace('"', '""') + '"'
+
+
+def _bigrams(text: str) -> List[str]:
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class SQLiteGraphStore(GraphStore):
+    """基于 SQLite 邻接表 + FTS5 的图存储（线程安全，单连接串行访问）"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = ":memory:", bootstrap: bool = False):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.execute(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"[GRAG] 当前SQLite不支持FTS5，关键词检索回退到LIKE扫描: {e}")
+            self.fts_enabled = False
+        self._conn.commit()
+
+        # 关系名与实体类型的取值集合，用于包含匹配
+        self._rel_names = {row[0] for row in self._conn.execute("SELECT DISTINCT rel FROM relations")}
+        self._entity_types = {row[0] for row in self._conn.execute(
+            "SELECT DISTINCT head_type FROM relations UNION SELECT DISTINCT tail_type FROM relations") if row[0]}
+
+        if bootstrap and self.count() == 0:
+            self._bootstrap()
+
+    def _bootstrap(self):
+        """首次使用时从五元组存储导入已有数据"""
+        from .quintuple_store import get_quintuple_store
+        quintuples = get_quintuple_store().snapshot()
+        if quintuples:
+            added = self.add_quintuples(quintuples)
+            logger.info(f"[GRAG] SQLite图存储已从五元组存储导入 {added} 条关系")
+
+    # ---------- 写入 ----------
+
+    def _entity_id(self, cur: sqlite3.Cursor, name: str, entity_type: str) -> int:
+        cur.execute("INSERT OR IGNORE INTO entities(name, entity_type) VALUES (?, ?)", (name, entity_type))
+        if cur.rowcount:
+            eid = cur.lastrowid
+            if self.fts_enabled:
+                text = name.lower()
+                cur.execute("INSERT INTO entity_fts(rowid, grams, chars) VALUES (?, ?, ?)",
+                            (eid, " ".join(_bigrams(text)), " ".join(text)))
+            return eid
+        cur.execute("UPDATE entities SET entity_type = ? WHERE name = ?", (entity_type, name))
+        return cur.execute("SELECT id FROM entities WHERE name = ?", (name,)).fetchone()[0]
+
+    def add_quintuples(self, quintuples: Iterable) -> int:
+        rows = []
+        for quintuple in quintuples:
+            head, head_type, rel, tail, tail_type = (str(x) if x is not None else "" for x in quintuple)
+            if not head or not tail or not rel:
+                logger.warning(f"跳过无效五元组，head/rel/tail为空: {tuple(quintuple)}")
+                continue
+            rows.append((head, head_type, rel, tail, tail_type))
+        if not rows:
+            return 0
+
+        with self._lock:
+            cur = self._conn.cursor()
+            try:
+                for head, head_type, rel, tail, tail_type in rows:
+                    head_id = self._entity_id(cur, head, head_type)
+                    tail_id = self._entity_id(cur, tail, tail_type)
+                    cur.execute(
+                        "INSERT INTO relations(head_id, rel, tail_id, head_type, tail_type) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(head_id, rel, tail_id) DO UPDATE SET weight = weight + 1, "
+                        "head_type = excluded.head_type, tail_type = excluded.tail_type",
+                        (head_id, rel, tail_id, head_type, tail_type)
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            for head, head_type, rel, tail, tail_type in rows:
+                self._rel_names.add(rel)
+                self._entity_types.update(t for t in (head_type, tail_type) if t)
+        return len(rows)
+
+    # ---------- 查询 ----------
+
+    def _candidate_entities(self, keyword: str, limit: int) -> List[Tuple[float, int]]:
+        """返回名称包含关键词的实体 [(匹配度, 实体id)]，按匹配度降序"""
+        kw = keyword.lower()
+        cur = self._conn.cursor()
+        rows = None
+        # 全是标点的关键词会被 FTS5 分词器丢弃，只能走 LIKE
+        if self.fts_enabled and any(ch.isalnum() for ch in kw):
+            query = f"grams : {_phrase(_bigrams(kw))}" if len(kw) > 1 else f"chars : {_phrase([kw])}"
+            try:
+                # bm25 对短文档打分更高，正好优先返回更“贴合”关键词的实体名
+                rows = cur.execute(
+                    "SELECT e.id, e.name FROM entity_fts JOIN entities e ON e.id = entity_fts.rowid "
+                    "WHERE entity_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (query, limit * CANDIDATE_FACTOR)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                rows = None
+        if rows is None:
+            pattern = "%" + kw.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = cur.execute(
+                "SELECT id, name FROM entities WHERE lower(name) LIKE ? ESCAPE '\\' LIMIT ?",
+                (pattern, limit * CANDIDATE_FACTOR)
+            ).fetchall()
+
+        matches = [(len(kw) / len(name), eid) for eid, name in rows if kw in name.lower()]
+        matches.sort(reverse=True)
+        return matches[:limit]
+
+    @staticmethod
+    def _matching_values(values, keyword: str) -> List[Tuple[float, str]]:
+        """取值集合中包含关键词的值 [(匹配度, 值)]"""
+        kw = keyword.lower()
+        return [(len(kw) / len(value), value) for value in values if kw in value.lower()]
+
+    @staticmethod
+    def _to_quintuple(row) -> Quintuple:
+        return row[1], row[2], row[3], row[4], row[5]
+
+    def query_by_keywords(self, keywords: List[str], limit_per_keyword: int = 5) -> List[Quintuple]:
+        """
+        每个关键词匹配实体名（FTS5）、关系名与实体类型（包含匹配），取命中的实体/关系名/类型上权重最高的关系，
+        得分 = 匹配度 × (1 + ln(weight))，多个关键词命中同一关系时累加
+        """
+        scores: Dict[int, float] = {}
+        found: Dict[int, Quintuple] = {}
+        with self._lock:
+            cur = self._conn.cursor()
+            for keyword in keywords:
+                keyword = str(keyword).strip()
+                if not keyword:
+                    continue
+                per_keyword: Dict[int, float] = {}
+
+                def collect(rows, match_score):
+                    for row in rows:
+                        rank = match_score * (1.0 + math.log(max(row[6], 1)))
+                        if rank > per_keyword.get(row[0], 0.0):
+                            per_keyword[row[0]] = rank
+                            found[row[0]] = self._to_quintuple(row)
+
+                for match_score, eid in self._candidate_entities(keyword, limit_per_keyword * 4):
+                    collect(cur.execute(_TOP_BY_HEAD, (eid, limit_per_keyword)).fetchall(), match_score)
+                    collect(cur.execute(_TOP_BY_TAIL, (eid, limit_per_keyword)).fetchall(), match_score)
+                for match_score, rel in self._matching_values(self._rel_names, keyword):
+                    collect(cur.execute(_TOP_BY_REL, (rel, limit_per_keyword)).fetchall(),
+                            RELATION_MATCH_WEIGHT * match_score)
+                for match_score, entity_type in self._matching_values(self._entity_types, keyword):
+                    collect(cur.execute(_TOP_BY_HEAD_TYPE, (entity_type, limit_per_keyword)).fetchall(),
+                            TYPE_MATCH_WEIGHT * match_score)
+                    collect(cur.execute(_TOP_BY_TAIL_TYPE, (entity_type, limit_per_keyword)).fetchall(),
+                            TYPE_MATCH_WEIGHT * match_score)
+
+                top = sorted(per_keyword.items(), key=lambda item: item[1], reverse=True)[:limit_per_keyword]
+                for rid, rank in top:
+                    scores[rid] = scores.get(rid, 0.0) + rank
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [found[rid] for rid, _ in ranked]
+
+    def expand(self, entities: List[str], hops: int = 1, limit: int = 50) -> List[Quintuple]:
+        names = [str(name) for name in entities if name]
+        if not names or hops < 1 or limit < 1:
+            return []
+
+        results: Dict[int, Quintuple] = {}
+        with self._lock:
+            cur = self._conn.cursor()
+            placeholders = ",".join("?" * len(names))
+            frontier = [row[0] for row in cur.execute(
+                f"SELECT id FROM entities WHERE name IN ({placeholders})", names).fetchall()]
+            visited = set(frontier)
+
+            for _ in range(hops):
+                next_frontier = []
+                for eid in frontier:
+                    remaining = limit - len(results)
+                    if remaining <= 0:
+                        break
+                    rows = cur.execute(_TOP_BY_HEAD, (eid, remaining)).fetchall()
+                    rows += cur.execute(_TOP_BY_TAIL, (eid, remaining)).fetchall()
+                    rows.sort(key=lambda row: row[6], reverse=True)
+                    for row in rows[:remaining]:
+                        results.setdefault(row[0], self._to_quintuple(row))
+                        other = row[8] if row[7] == eid else row[7]
+                        if other not in visited:
+                            visited.add(other)
+                            next_frontier.append(other)
+                frontier = next_frontier
+                if not frontier or len(results) >= limit:
+                    break
+        return list(results.values())
+
+    def count(self) -> Optional[int]:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM relations").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
@@ -4,11 +4,15 @@ import time
 from typing import Dict, List, Optional, Callable, Any, Tuple
 from dataclasses import dataclass
 from enum import Enum
+import bisect
 import hashlib
+import itertools
 import traceback
 import os
 import sys
 
+from .quintuple_batch_extractor import batch_extractor
+
 # 添加项目根目录到路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 try:
@@ -20,6 +24,55 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+class TaskPriority(Enum):
+    """任务优先级通道：交互式记忆写入优先于批量回填"""
+    INTERACTIVE = 0
+    BULK = 1
+
+
+class LatencyHistogram:
+    """固定分桶的耗时直方图（毫秒）"""
+
+    BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, seconds: float):
+        ms = max(0.0, seconds * 1000)
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """按分桶上界估算分位数"""
+        if not self.total:
+            return None
+        rank = self.total * pct / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict:
+        buckets = {f"le_{b}ms": c for b, c in zip(self.BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 2) if self.total else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max_ms, 2),
+            "buckets": buckets,
+        }
+
+
 class TaskStatus(Enum):
     """任务状态枚举"""
     PENDING = "pending"
@@ -44,6 +97,9 @@ class ExtractionTask:
     retry_count: int = 0
     max_retries: int = 3
     future: Optional[asyncio.Future] = None
+    priority: TaskPriority = TaskPriority.INTERACTIVE
+    enqueued_at: Optional[float] = None
+    runner: Optional[asyncio.Task] = None  # 正在执行提取的协程，用于立即取消
 
 
 class QuintupleTaskManager:
@@ -63,10 +119,18 @@ class QuintupleTaskManager:
             self.task_timeout = 30
             self.auto_cleanup_hours = 24
             self.enabled = True
+        try:
+            self.enqueue_timeout = config.grag.task_enqueue_timeout
+        except Exception:
+            self.enqueue_timeout = 10.0
 
         # 任务存储
         self.tasks: Dict[str, ExtractionTask] = {}
-        self.task_queue = asyncio.Queue(maxsize=self.max_queue_size)
+        # 优先级队列按 (优先级, 序号) 出队；每个通道用信号量限制排队数量，满时 add_task 等待（背压）
+        self.task_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._lane_slots = {lane: asyncio.Semaphore(self.max_queue_size) for lane in TaskPriority}
+        self._lane_depth = {lane: 0 for lane in TaskPriority}
+        self._seq = itertools.count()
 
         # 工作协程管理
         self.worker_tasks: List[asyncio.Task] = []
@@ -76,6 +140,8 @@ class QuintupleTaskManager:
         # 统计信息
         self.completed_tasks = 0
         self.failed_tasks = 0
+        self.queue_wait_histogram = LatencyHistogram()
+        self.execution_histogram = LatencyHistogram()
 
         # 回调函数
         self.on_task_completed: Optional[Callable] = None
@@ -106,8 +172,8 @@ class QuintupleTaskManager:
                 )
                 self.worker_tasks.append(worker_task)
 
-            # 添加工作协程状态检查
-            await asyncio.sleep(0.5)  # 短暂等待协程启动
+            # 让出一次事件循环，使工作协程进入等待状态
+            await asyncio.sleep(0)
             active_workers = sum(1 for t in self.worker_tasks if not t.done())
             logger.info(f"活跃工作协程: {active_workers}/{self.max_workers}")
 
@@ -166,9 +232,10 @@ class QuintupleTaskManager:
         """检查任务管理器是否活跃运行"""
         return self.is_running and any(not t.done() for t in self.worker_tasks)
 
-    async def add_task(self, text: str) -> str:
+    async def add_task(self, text: str, priority: TaskPriority = TaskPriority.INTERACTIVE,
+                       timeout: Optional[float] = None) -> str:
+        """添加新的提取任务；对应通道已满时最多等待 timeout 秒（默认 enqueue_timeout）"""
         logger.info("add_task被调用")  # 改为INFO级别确保输出
-        """添加新的提取任务"""
         if not self.enabled:
             raise RuntimeError("任务管理器已禁用")
 
@@ -189,36 +256,51 @@ class QuintupleTaskManager:
                     logger.info(f"发现重复任务: {task.task_id}")
                     return task.task_id
 
+        # 背压：等待通道空位
+        slots = self._lane_slots[priority]
+        if slots.locked():
+            logger.warning(f"任务通道已满 ({priority.name}: {self._lane_depth[priority]}/{self.max_queue_size})，等待空位")
+        wait_timeout = self.enqueue_timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=wait_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"任务队列已满（{priority.name}），{wait_timeout}s 内未能入队")
+
         # 创建新任务
         task_id = self._generate_task_id(text)
+        now = time.time()
         task = ExtractionTask(
             task_id=task_id,
             text=text,
             text_hash=text_hash,
             status=TaskStatus.PENDING,
-            created_at=time.time(),
-            future=asyncio.Future()
+            created_at=now,
+            future=asyncio.get_running_loop().create_future(),
+            priority=priority,
+            enqueued_at=now
         )
 
         # 添加到任务字典
         async with self.lock:
             self.tasks[task_id] = task
 
-        logger.info(f"添加新任务: {task_id} (长度={len(text)})")
+        self._lane_depth[priority] += 1
+        self.task_queue.put_nowait((priority.value, next(self._seq), task))
+        logger.info(f"任务已加入队列: {task_id} (长度={len(text)}, 通道={priority.name})")
+        return task_id
 
-        # 将任务放入队列
+    def _dequeue_nowait(self) -> Optional[ExtractionTask]:
         try:
-            if self.task_queue.full():
-                logger.warning(f"任务队列已满 ({self.task_queue.qsize()}/{self.max_queue_size})")
+            _, _, task = self.task_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self._on_dequeued(task)
+        return task
 
-            await self.task_queue.put(task)
-            logger.info(f"任务已加入队列: {task_id}")
-            return task_id
-        except Exception as e:
-            logger.error(f"加入队列失败: {task_id}, 错误: {e}")
-            async with self.lock:
-                del self.tasks[task_id]
-            raise RuntimeError("加入队列失败")
+    def _on_dequeued(self, task: ExtractionTask):
+        """任务出队：释放通道空位"""
+        self._lane_depth[task.priority] -= 1
+        self._lane_slots[task.priority].release()
 
     async def get_task_result(self, task_id: str, timeout: float = None) -> Tuple[List, str]:
         """获取任务结果，支持超时等待"""
@@ -256,86 +338,20 @@ class QuintupleTaskManager:
                 # === 添加队列状态日志 ===
                 logger.debug(f"{worker_id} 正在等待新任务 (队列大小: {self.task_queue.qsize()})")
 
-                # 使用带超时的get，避免永久阻塞
-                try:
-                    task = await asyncio.wait_for(self.task_queue.get(), timeout=1.0)
-                except asyncio.TimeoutError:
-                    # 超时但继续循环检查
-                    continue
-
-                logger.info(f"{worker_id} 获取到任务: {task.task_id}")
-
-                if task.status != TaskStatus.PENDING:
-                    logger.warning(f"任务状态异常: {task.task_id} ({task.status.value})")
-                    self.task_queue.task_done()
-                    continue
-
-                # 更新任务状态
-                task.status = TaskStatus.RUNNING
-                task.started_at = time.time()
-                logger.info(f"{worker_id} 开始处理任务: {task.task_id}")
-
-                # 执行任务
-                result = None
-                error = None
-                try:
-                    # 导入提取函数（避免循环导入）
-                    from .quintuple_extractor import extract_quintuples_async
-                    logger.info(f"{worker_id} 调用五元组提取API: {task.task_id}")
-
-                    # 使用超时控制执行任务
-                    result = await asyncio.wait_for(
-                        extract_quintuples_async(task.text),
-                        timeout=self.task_timeout
-                    )
-                    logger.info(f"{worker_id} 提取到 {len(result)} 个五元组: {task.text}")
-
-                    # 更新任务状态
-                    async with self.lock:
-                        task.status = TaskStatus.COMPLETED
-                        task.result = result
-                        task.completed_at = time.time()
-                        self.completed_tasks += 1
-
-                except asyncio.TimeoutError:
-                    error = "任务执行超时"
-                    logger.warning(f"{worker_id} 任务超时: {task.task_id}")
-                    async with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = error
-                        task.completed_at = time.time()
-                        self.failed_tasks += 1
-
-                except Exception as e:
-                    error = str(e)
-                    logger.error(f"{worker_id} 任务失败: {task.task_id}, 错误: {error}")
-                    traceback.print_exc()
-                    async with self.lock:
-                        task.status = TaskStatus.FAILED
-                        task.error = error
-                        task.completed_at = time.time()
-                        self.failed_tasks += 1
-
-                # 设置future结果
-                if not task.future.done():
-                    if task.status == TaskStatus.COMPLETED:
-                        task.future.set_result(result)
-                    else:
-                        task.future.set_exception(Exception(error or "任务失败"))
-
-                # 触发回调
-                try:
-                    if task.status == TaskStatus.COMPLETED and self.on_task_completed:
-                        self.on_task_completed(task.task_id, result)
-                    elif task.status == TaskStatus.FAILED and self.on_task_failed:
-                        self.on_task_failed(task.task_id, error)
-                except Exception as e:
-                    logger.error(f"任务回调失败: {task.task_id}, 错误: {str(e)}")
-
-                # 标记任务完成
-                self.task_queue.task_done()
-                logger.info(f"{worker_id} 任务处理完成: {task.task_id}")
+                # 阻塞等待新任务，关闭时由 cancel() 唤醒
+                _, _, task = await self.task_queue.get()
+                self._on_dequeued(task)
+
+                # 顺带取出已在队列中等待的任务，交给批量提取器一起打包
+                tasks = [task]
+                while len(tasks) < batch_extractor.max_batch_texts:
+                    extra = self._dequeue_nowait()
+                    if extra is None:
+                        break
+                    tasks.append(extra)
 
+                logger.info(f"{worker_id} 获取到 {len(tasks)} 个任务: {[t.task_id for t in tasks]}")
+                await asyncio.gather(*(self._process_task(worker_id, t) for t in tasks))
 
             except asyncio.CancelledError:
                 logger.info(f"{worker_id} 工作协程被取消")
@@ -348,6 +364,98 @@ class QuintupleTaskManager:
                 await asyncio.sleep(1)
 
 
+    async def _process_task(self, worker_id: str, task: ExtractionTask):
+        """执行单个提取任务并更新状态、触发回调"""
+        if task.status != TaskStatus.PENDING:
+            logger.info(f"跳过非等待状态任务: {task.task_id} ({task.status.value})")
+            self.task_queue.task_done()
+            return
+
+        # 更新任务状态
+        task.status = TaskStatus.RUNNING
+        task.started_at = time.time()
+        self.queue_wait_histogram.observe(task.started_at - (task.enqueued_at or task.created_at))
+        logger.info(f"{worker_id} 开始处理任务: {task.task_id}")
+
+        # 执行任务
+        result = None
+        error = None
+        try:
+            logger.info(f"{worker_id} 调用五元组提取API: {task.task_id}")
+
+            # 使用超时控制执行任务（同批次的多段文本共用一次LLM请求）
+            # 放进独立协程执行，cancel_task 可以立即取消它
+            task.runner = asyncio.ensure_future(asyncio.wait_for(
+                batch_extractor.extract(task.text),
+                timeout=self.task_timeout
+            ))
+            try:
+                result = await task.runner
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling():
+                    # 工作协程本身被取消（关闭中），继续向上传播
+                    task.runner.cancel()
+                    raise
+                # 任务被 cancel_task 取消，状态已由 cancel_task 设置
+                logger.info(f"{worker_id} 任务已取消: {task.task_id}")
+                self.execution_histogram.observe(time.time() - task.started_at)
+                self.task_queue.task_done()
+                return
+            finally:
+                task.runner = None
+            logger.info(f"{worker_id} 提取到 {len(result)} 个五元组: {task.text}")
+
+            # 更新任务状态
+            async with self.lock:
+                task.status = TaskStatus.COMPLETED
+                task.result = result
+                task.completed_at = time.time()
+                self.completed_tasks += 1
+
+        except asyncio.TimeoutError:
+            error = "任务执行超时"
+            logger.warning(f"{worker_id} 任务超时: {task.task_id}")
+            async with self.lock:
+                task.status = TaskStatus.FAILED
+                task.error = error
+                task.completed_at = time.time()
+                self.failed_tasks += 1
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as e:
+            error = str(e)
+            logger.error(f"{worker_id} 任务失败: {task.task_id}, 错误: {error}")
+            traceback.print_exc()
+            async with self.lock:
+                task.status = TaskStatus.FAILED
+                task.error = error
+                task.completed_at = time.time()
+                self.failed_tasks += 1
+
+        self.execution_histogram.observe(task.completed_at - task.started_at)
+
+        # 设置future结果
+        if not task.future.done():
+            if task.status == TaskStatus.COMPLETED:
+                task.future.set_result(result)
+            else:
+                task.future.set_exception(Exception(error or "任务失败"))
+
+        # 触发回调
+        try:
+            if task.status == TaskStatus.COMPLETED and self.on_task_completed:
+                self.on_task_completed(task.task_id, result)
+            elif task.status == TaskStatus.FAILED and self.on_task_failed:
+                self.on_task_failed(task.task_id, error)
+        except Exception as e:
+            logger.error(f"任务回调失败: {task.task_id}, 错误: {str(e)}")
+
+        # 标记任务完成
+        self.task_queue.task_done()
+        logger.info(f"{worker_id} 任务处理完成: {task.task_id}")
+
     async def clear_completed_tasks(self, max_age_hours: int = None):
         """清理已完成的任务"""
         if max_age_hours is None:
@@ -417,9 +525,13 @@ class QuintupleTaskManager:
                 task.status = TaskStatus.CANCELLED
                 task.completed_at = time.time()
 
-                # 设置future异常
+                # 正在执行的提取立即取消；等待中的任务出队时会被跳过
+                if task.runner is not None and not task.runner.done():
+                    task.runner.cancel()
+
+                # 取消future，等待结果的调用方会收到“任务被取消”
                 if task.future and not task.future.done():
-                    task.future.set_exception(asyncio.CancelledError("任务被取消"))
+                    task.future.cancel()
 
                 logger.info(f"任务已取消: {task_id}")
                 return True
@@ -461,8 +573,11 @@ class QuintupleTaskManager:
             "max_workers": self.max_workers,
             "max_queue_size": self.max_queue_size,
             "queue_size": self.task_queue.qsize(),
-            "queue_usage": f"{self.task_queue.qsize()}/{self.max_queue_size}",
-            "task_timeout": self.task_timeout
+            "queue_usage": {lane.name.lower(): f"{self._lane_depth[lane]}/{self.max_queue_size}" for lane in TaskPriority},
+            "task_timeout": self.task_timeout,
+            "queue_wait_histogram": self.queue_wait_histogram.snapshot(),
+            "execution_histogram": self.execution_histogram.snapshot(),
+            "batch_extractor": batch_extractor.get_stats()
         }
 
 
@@ -126,6 +126,12 @@ class APIConfig(BaseModel):
     persistent_context: bool = Field(default=True, description="是否启用持久化上下文")
     context_load_days: int = Field(default=3, ge=1, le=30, description="加载历史上下文的天数")
     context_parse_logs: bool = Field(default=True, description="是否从日志文件解析上下文")
+    context_store_enabled: bool = Field(default=True, description="是否同步写入对话记录SQLite存储（加载上下文与统计不再解析文本日志）")
+    session_cache_max: int = Field(default=2000, ge=1, le=1000000, description="常驻内存的最大会话数，超出时按LRU淘汰到磁盘")
+    session_memory_budget_mb: float = Field(default=64, ge=1, le=65536, description="常驻会话的估算内存上限（MB）")
+    session_idle_ttl: int = Field(default=1800, ge=0, le=604800, description="会话空闲多少秒后移出内存（0为不按空闲淘汰）")
+    session_flush_interval: float = Field(default=5.0, ge=0.0, le=3600.0, description="脏会话批量写盘间隔（秒，0为只在退出时写盘）")
+    session_persist: bool = Field(default=True, description="是否将会话保存到磁盘，重启后可继续")
     applied_proxy: bool = Field(default=True, description="是否应用代理")
 
 class APIServerConfig(BaseModel):
@@ -135,6 +141,17 @@ class APIServerConfig(BaseModel):
     port: int = Field(default_factory=lambda: server_ports.api_server, description="API服务器端口")
     auto_start: bool = Field(default=True, description="启动时自动启动API服务器")
     docs_enabled: bool = Field(default=True, description="是否启用API文档")
+    mcp_per_service_limit: int = Field(default=4, ge=1, le=64, description="批量工具调用时同一MCP服务的最大并发数")
+    mcp_max_connections: int = Field(default=20, ge=1, le=200, description="到MCP服务器的HTTP连接池大小")
+    mcp_call_timeout: float = Field(default=30.0, ge=1.0, le=600.0, description="批量工具调用中单个调用的超时时间（秒）")
+    stream_flush_ms: int = Field(default=40, ge=0, le=1000, description="text流式格式下合并文本增量的刷新间隔（毫秒，0为不合并）")
+    stream_max_chunk_chars: int = Field(default=512, ge=1, le=65536, description="text流式格式下单个事件最多合并的字符数")
+    stream_sentence_tts: bool = Field(default=False, description="/chat/stream 是否在API服务器端逐句合成并播放语音（请求return_audio或QQ消息时不生效）")
+    tts_workers: int = Field(default=2, ge=1, le=8, description="异步TTS服务的合成线程数")
+    tts_max_pending: int = Field(default=32, ge=1, le=1024, description="异步TTS服务排队任务上限，超出时拒绝新任务")
+    tts_max_jobs: int = Field(default=256, ge=1, le=10000, description="保留的TTS任务记录上限")
+    tts_job_ttl: int = Field(default=300, ge=10, le=86400, description="已完成TTS任务及其音频文件的保留时间（秒）")
+    tts_audio_wait_s: float = Field(default=60.0, ge=0, le=600, description="inline音频模式下文本流结束后等待音频的最长时间（秒）")
 
 class GRAGConfig(BaseModel):
     """GRAG知识图谱记忆系统配置"""
@@ -149,6 +166,28 @@ class GRAGConfig(BaseModel):
     extraction_timeout: int = Field(default=12, ge=1, le=60, description="知识提取超时时间（秒）")
     extraction_retries: int = Field(default=2, ge=0, le=5, description="知识提取重试次数")
     base_timeout: int = Field(default=15, ge=5, le=120, description="基础操作超时时间（秒）")
+    neo4j_batch_size: int = Field(default=500, ge=1, le=10000, description="Neo4j批量写入每个UNWIND分块的行数")
+    neo4j_write_retries: int = Field(default=3, ge=0, le=10, description="Neo4j批量写入遇到瞬时错误的重试次数")
+    store_segment_max_kb: int = Field(default=4096, ge=64, le=262144, description="五元组追加段文件大小上限（KB）")
+    store_compact_min_segments: int = Field(default=4, ge=1, le=1000, description="触发后台合并的已封存段数量")
+    store_compact_interval: float = Field(default=300.0, ge=1.0, le=86400.0, description="后台合并检查间隔（秒）")
+    keyword_cache_size: int = Field(default=256, ge=1, le=100000, description="召回关键词内存LRU缓存条数")
+    keyword_cache_disk_size: int = Field(default=2048, ge=0, le=1000000, description="召回关键词磁盘缓存条数")
+    keyword_cache_ttl: float = Field(default=86400.0, ge=1.0, description="召回关键词缓存有效期（秒）")
+    batch_max_texts: int = Field(default=8, ge=1, le=64, description="五元组批量提取每次请求最多打包的文本数")
+    batch_max_tokens: int = Field(default=3000, ge=100, le=32000, description="五元组批量提取每次请求的文本token预算")
+    batch_max_wait: float = Field(default=0.2, ge=0.0, le=10.0, description="五元组批量提取最长等待凑批时间（秒）")
+    task_enqueue_timeout: float = Field(default=10.0, ge=0.0, le=600.0, description="提取任务队列已满时add_task的最长等待时间（秒）")
+    graph_backend: str = Field(default="auto", description="图存储后端: auto(优先Neo4j，不可用时用SQLite)/neo4j/sqlite/memory")
+    recall_hops: int = Field(default=0, ge=0, le=3, description="召回时从命中实体出发额外扩展的跳数（0为不扩展）")
+
+    @field_validator('graph_backend')
+    @classmethod
+    def validate_graph_backend(cls, v):
+        v = (v or "auto").lower()
+        if v not in ("auto", "neo4j", "sqlite", "memory"):
+            raise ValueError("graph_backend 必须是 auto/neo4j/sqlite/memory 之一")
+        return v
 
 class HandoffConfig(BaseModel):
     """工具调用循环配置"""
@@ -182,6 +221,15 @@ class TTSConfig(BaseModel):
     default_speed: float = Field(default=1.0, ge=0.1, le=3.0, description="默认语速")
     default_language: str = Field(default="zh-CN", description="默认语言")
     remove_filter: bool = Field(default=False, description="是否移除过滤")
+    synthesis_workers: int = Field(default=2, ge=1, le=8, description="并行合成句子的线程数（即TTS请求并发数）")
+    max_pending_sentences: int = Field(default=4, ge=1, le=64, description="已提交合成但尚未播放的句子上限（背压）")
+    cache_enabled: bool = Field(default=True, description="是否启用TTS音频缓存（相同引擎/音色/语速/文本只合成一次）")
+    cache_dir: str = Field(default="logs/tts_cache", description="TTS音频缓存目录")
+    cache_max_disk_mb: int = Field(default=256, ge=1, le=102400, description="TTS音频缓存磁盘上限（MB），超出按LRU淘汰")
+    cache_memory_mb: int = Field(default=16, ge=0, le=4096, description="TTS音频缓存内存热点层上限（MB）")
+    gapless_playback: bool = Field(default=True, description="是否在内存中解码并通过常开输出流无缝连续播放（需要sounddevice，不可用时回退pygame）")
+    playback_sample_rate: int = Field(default=44100, ge=8000, le=96000, description="连续播放输出流的采样率，不同采样率的音频会重采样")
+    lip_sync_timeline: bool = Field(default=True, description="是否在合成时一次性预计算整句口型时间轴（随音频缓存），播放时按时间戳插值而不实时分析音频")
     expand_api: bool = Field(default=True, description="是否扩展API")
     require_api_key: bool = Field(default=False, description="是否需要API密钥")
 
@@ -493,6 +541,20 @@ class ToolPriorityConfig(BaseModel):
         description="禁用的工具列表"
     )
 
+class MCPSchedulerConfig(BaseModel):
+    """MCP调度器配置"""
+    sync_timeout: float = Field(default=60.0, ge=1.0, le=3600.0, description="同步工具调用（skip_callback）的默认最长等待时间（秒）")
+    per_service_limit: int = Field(default=4, ge=1, le=64, description="同一MCP服务同时执行的工具调用数上限（任务内同服务调用默认按顺序执行，声明parallel的调用才会并发）")
+    completed_max: int = Field(default=10000, ge=100, le=10000000, description="内存中保留的已完成任务数上限")
+    completed_ttl: int = Field(default=3600, ge=0, le=604800, description="已完成任务在内存中的保留时间（秒，0为只按条数淘汰）")
+    completed_spill: bool = Field(default=False, description="是否把移出内存的已完成任务追加写入 logs/mcp_tasks/completed.jsonl 留档")
+    completed_spill_max_mb: float = Field(default=64, ge=1, le=4096, description="留档文件轮转大小（MB）")
+    min_workers: int = Field(default=2, ge=1, le=256, description="常驻的最少工作协程数")
+    max_workers: int = Field(default=32, ge=1, le=1024, description="排队积压时最多扩容到的工作协程数")
+    target_queue_wait_ms: float = Field(default=200, ge=0, le=60000, description="排队延迟超过该值时扩容，低于该值才允许缩容（毫秒）")
+    service_quota: int = Field(default=4, ge=1, le=256, description="同一MCP服务同时执行的任务数上限，超额任务排队不占用工作协程")
+    service_quotas: Dict[str, int] = Field(default={}, description="按服务单独设置的任务数上限，如 {\"在线搜索\": 2}")
+
 class SystemCheckConfig(BaseModel):
     """系统检测状态配置"""
     passed: bool = Field(default=False, description="系统检测是否通过")
@@ -698,6 +760,7 @@ class NagaConfig(BaseModel):
     system_check: SystemCheckConfig = Field(default_factory=SystemCheckConfig)
     computer_control: ComputerControlConfig = Field(default_factory=ComputerControlConfig)
     tool_priority: ToolPriorityConfig = Field(default_factory=ToolPriorityConfig)  # 工具优先级配置
+    mcp_scheduler: MCPSchedulerConfig = Field(default_factory=MCPSchedulerConfig)
     window: QWidget = Field(default=None)
 
     model_config = {
@@ -263,6 +263,8 @@ class ChatTool(QObject):
             "use_self_game": use_self_game,
             "session_id": self._get_current_session_id()
         }
+        if stream:
+            data["stream_format"] = "text"  # UTF-8 JSON事件，服务端合并细碎增量
         from system.config import config as _cfg
         if _cfg.system.voice_enabled and _cfg.voice_realtime.voice_mode in ["hybrid", "end2end"]:
             data["return_audio"] = True
@@ -679,8 +681,8 @@ class ChatTool(QObject):
                                 logger.info(f"[UI] 自主消息音频已生成，大小: {len(audio_data)} bytes")
 
                                 # 使用VoiceIntegration播放
-                                from voice.output.voice_integration import VoiceIntegration
-                                voice_integration = VoiceIntegration()
+                                from voice.output.voice_integration import get_voice_integration
+                                voice_integration = get_voice_integration()
                                 voice_integration._play_audio_data_sync(audio_data)
                                 logger.info(f"[UI] 自主消息TTS播放已提交")
                             else:
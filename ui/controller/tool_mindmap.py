@@ -13,9 +13,10 @@ class MindmapTool():
             # 检查是否存在知识图谱文件
             graph_file = "logs/knowledge_graph/graph.html"
             quintuples_file = "logs/knowledge_graph/quintuples.json"
+            segments_dir = "logs/knowledge_graph/quintuples.segments"
             
-            # 如果quintuples.json存在，删除现有的graph.html并重新生成
-            if os.path.exists(quintuples_file):
+            # 如果存在五元组数据（快照或追加段），删除现有的graph.html并重新生成
+            if os.path.exists(quintuples_file) or os.path.isdir(segments_dir):
                 # 如果graph.html存在，先删除它
                 if os.path.exists(graph_file):
                     try:
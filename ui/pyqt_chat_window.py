@@ -635,8 +635,8 @@ class ChatWindow(QWidget):
                 try:
                     # 生成音频
                     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-                    from voice.output.voice_integration import VoiceIntegration
-                    voice_integration = VoiceIntegration()
+                    from voice.output.voice_integration import get_voice_integration
+                    voice_integration = get_voice_integration()
                     audio_data = voice_integration._generate_audio_sync(message)
 
                     if audio_data:
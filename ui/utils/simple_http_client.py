@@ -77,6 +77,17 @@ class SimpleHttpClient(QThread):
                                 continue
                             elif data_str.startswith('audio_url: '):
                                 continue  # 忽略音频URL，由apiserver处理
+                            elif data_str.startswith('{'):
+                                # text格式：UTF-8 JSON事件（base64字符集不含'{'，不会与旧格式混淆）
+                                event = json.loads(data_str)
+                                if 'text' in event:
+                                    complete_text += event['text']
+                                    self.chunk_received.emit(event['text'])
+                                elif 'session_id' in event:
+                                    self.last_session_id = event['session_id']
+                                elif 'error' in event:
+                                    complete_text += event['error']
+                                    self.chunk_received.emit(event['error'])
                             else:
                                 # 解码base64内容
                                 try:
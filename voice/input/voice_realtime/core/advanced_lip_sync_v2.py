@@ -6,6 +6,7 @@
 完整实现：Kalman滤波 + 音素识别 + 情感联动 + 60FPS优化
 """
 
+import io
 import numpy as np
 import logging
 import time
@@ -17,7 +18,7 @@ from enum import Enum
 # 尝试导入scipy，如果失败则提供降级方案
 try:
     from scipy import signal
-    from scipy.fft import fft, fftfreq
+    from scipy.fft import fftfreq, rfft, irfft
     SCIPY_AVAILABLE = True
     logger = logging.getLogger(__name__)
     logger.info("scipy可用，启用高级口型同步功能（FFT/LPC/共振峰检测）")
@@ -26,9 +27,12 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logger.warning("scipy不可用，使用简化的口型同步（仅基于音量）")
     # 使用numpy的FFT作为降级方案
-    from numpy.fft import fft, fftfreq
+    from numpy.fft import fftfreq, rfft, irfft
     signal = None  # 标记为不可用
 
+# 分析常量缓存的最大帧长种类数（播放末尾的短块帧长各不相同，避免无限增长）
+_MAX_CACHED_FRAME_SIZES = 16
+
 
 class EmotionType(Enum):
     """情感类型枚举"""
@@ -53,6 +57,71 @@ class LipSyncState:
     timestamp: float = 0.0
 
 
+@dataclass
+class LipSyncTimeline:
+    """
+    整句音频的口型时间轴（离线预计算，播放时按时间戳插值）
+
+    第 k 帧对应 k / fps 秒；mouth_open/mouth_form 为平滑后的值，
+    mouth_smile 为音素目标值（情感调制在播放时叠加），visemes 为 viseme_names 的下标
+    """
+    fps: float
+    mouth_open: np.ndarray
+    mouth_form: np.ndarray
+    mouth_smile: np.ndarray
+    visemes: np.ndarray
+    viseme_names: Tuple[str, ...]
+
+    # 序列化格式版本：口型算法改变时递增，旧缓存自动失效
+    VERSION = 1
+
+    @property
+    def duration(self) -> float:
+        return len(self.mouth_open) / self.fps
+
+    def sample(self, t: float) -> Tuple[float, float, float, str]:
+        """t 秒处的 (张嘴, 嘴形, 微笑, 音素)，相邻两帧线性插值"""
+        count = len(self.mouth_open)
+        if count == 0:
+            return 0.0, 0.0, 0.0, 'silence'
+        pos = min(max(t * self.fps, 0.0), count - 1)
+        i = int(pos)
+        j = min(i + 1, count - 1)
+        frac = pos - i
+        return (
+            float(self.mouth_open[i] + (self.mouth_open[j] - self.mouth_open[i]) * frac),
+            float(self.mouth_form[i] + (self.mouth_form[j] - self.mouth_form[i]) * frac),
+            float(self.mouth_smile[i] + (self.mouth_smile[j] - self.mouth_smile[i]) * frac),
+            self.viseme_names[self.visemes[i if frac < 0.5 else j]],
+        )
+
+    def to_bytes(self) -> bytes:
+        buf = io.BytesIO()
+        np.savez(buf, version=self.VERSION, fps=self.fps, mouth_open=self.mouth_open,
+                 mouth_form=self.mouth_form, mouth_smile=self.mouth_smile,
+                 visemes=self.visemes, viseme_names=np.array(self.viseme_names))
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Optional['LipSyncTimeline']:
+        """反序列化；格式版本不符或数据损坏时返回None"""
+        try:
+            with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+                if int(npz['version']) != cls.VERSION:
+                    return None
+                return cls(
+                    fps=float(npz['fps']),
+                    mouth_open=npz['mouth_open'],
+                    mouth_form=npz['mouth_form'],
+                    mouth_smile=npz['mouth_smile'],
+                    visemes=npz['visemes'],
+                    viseme_names=tuple(str(name) for name in npz['viseme_names']),
+                )
+        except Exception as e:
+            logger.debug(f"口型时间轴解析失败: {e}")
+            return None
+
+
 # 注释：KalmanFilter 和 SpringDamperSystem 类已被移除
 # 原因：这些类在实际使用中被替换为简单的指数平滑算法
 # SpringDamperSystem 会导致数值爆炸问题
@@ -90,6 +159,12 @@ class AdvancedLipSyncEngineV2:
         # 特殊
         'silence': {'mouth_open': 0.0, 'mouth_form': 0.0, 'mouth_smile': 0.0, 'name': '静音'},
     }
+
+    # 音素下标顺序（离线时间轴中按下标存储音素）
+    VISEME_ORDER = ('silence', 'a', 'i', 'u', 'e', 'o', 'consonant', 'sibilant', 'm_n', 'plosive')
+
+    # 初始音量缩放系数（自适应调整前使用）
+    DEFAULT_VOLUME_SCALE = 2000.0
     
     # 情感参数预设
     EMOTION_PARAMS = {
@@ -159,7 +234,7 @@ class AdvancedLipSyncEngineV2:
 
         # 动态阈值（EdgeTTS优化）
         self.silence_threshold = 50  # 静音阈值，过滤背景噪音
-        self.adaptive_volume_scale = 2000.0  # 音量缩放系数，EdgeTTS使用
+        self.adaptive_volume_scale = self.DEFAULT_VOLUME_SCALE  # 音量缩放系数，EdgeTTS使用
 
         # 持续时间控制（防止过快闭嘴）
         self.last_sound_time = 0.0
@@ -175,6 +250,10 @@ class AdvancedLipSyncEngineV2:
         self.frame_count = 0
         self.avg_fps = 0.0
 
+        # 按帧长缓存的分析常量与工作缓冲区（窗函数、频率轴、MEL滤波器矩阵），见 _get_frame_plan
+        self._frame_plans: Dict[int, Dict[str, Any]] = {}
+        self._mel_filterbanks: Dict[Tuple[int, int, int], np.ndarray] = {}
+
         logger.info(f"AdvancedLipSyncEngineV2 初始化完成 (目标{target_fps}FPS)")
     
     def process_audio_chunk(self, audio_chunk: bytes) -> Dict[str, float]:
@@ -293,6 +372,175 @@ class AdvancedLipSyncEngineV2:
             logger.debug(f"音频处理错误: {e}")
             return {'mouth_open': 0.0, 'mouth_form': 0.0, 'mouth_smile': 0.0}
     
+    def compute_timeline(self, samples: np.ndarray, sample_rate: Optional[int] = None,
+                         fps: Optional[float] = None) -> LipSyncTimeline:
+        """
+        离线计算整段音频的口型时间轴（一次向量化处理，合成时调用，播放时只需插值）
+
+        每帧取以 k / fps 秒为中心、1/60 秒长的样本窗口（与实时播放路径读取的窗口相同），
+        所有帧的 RMS、过零率、频谱、MEL频段与共振峰批量计算，
+        自适应音量、音素判定与指数平滑按 process_audio_chunk 的规则逐帧对应。
+        基频不参与音素判定，这里不计算；情感调制在播放时由 params_from_timeline 叠加。
+        不修改引擎的实时状态，可在合成线程中与播放线程并发调用。
+
+        Args:
+            samples: int16 单声道样本
+            sample_rate: 样本采样率（默认为引擎采样率）
+            fps: 时间轴帧率（默认为目标帧率）
+        """
+        sample_rate = sample_rate or self.sample_rate
+        fps = fps or self.target_fps
+        audio = np.asarray(samples, dtype=np.float32)
+        size = int(sample_rate / 60)
+        n_frames = int(np.ceil(len(audio) * fps / sample_rate))
+        if n_frames == 0 or size < 2:
+            empty = np.zeros(0, dtype=np.float32)
+            return LipSyncTimeline(fps, empty, empty, empty, np.zeros(0, dtype=np.uint8), self.VISEME_ORDER)
+        if len(audio) < size:
+            audio = np.pad(audio, (0, size - len(audio)))
+
+        # 帧矩阵 (帧数, size)
+        centers = np.round(np.arange(n_frames) * (sample_rate / fps)).astype(np.int64)
+        starts = np.clip(centers - size // 2, 0, len(audio) - size)
+        frames = np.lib.stride_tricks.sliding_window_view(audio, size)[starts]
+
+        # 1. RMS能量与过零率
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        zcr = np.sum(np.abs(np.diff(np.sign(frames), axis=1)), axis=1) / (2.0 * size)
+        silent = rms < self.silence_threshold
+
+        # 2. 自适应音量缩放：最近100帧（含当前帧）RMS的95分位
+        scale = self._rolling_volume_scale(rms)
+
+        # 3. 频谱特征（不足512点时先补零再加窗，与 _analyze_spectrum_advanced 一致）
+        n = max(size, 512)
+        magnitude = np.abs(rfft(frames * np.hamming(n)[:size], n=n, axis=1)[:, :n // 2])
+        freqs = fftfreq(n, 1 / sample_rate)[:n // 2]
+        mel_bands = magnitude @ self._get_mel_filterbank(freqs, 80, sample_rate).T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mel_total = mel_bands.sum(axis=1)
+            mid_energy = mel_bands[:, 20:50].sum(axis=1) / mel_total
+            high_energy = mel_bands[:, 50:].sum(axis=1) / mel_total
+            magnitude_sum = magnitude.sum(axis=1)
+            centroid = np.where(magnitude_sum > 0, magnitude @ freqs / magnitude_sum, 0.0)
+        flatness = np.exp(np.mean(np.log(magnitude + 1e-10), axis=1)) / (magnitude_sum / magnitude.shape[1] + 1e-10)
+
+        # 4. 共振峰（需要scipy；峰值检测只能逐帧进行，仅处理非静音帧）
+        f1, f2 = self._detect_formants_batch(frames, sample_rate, ~silent)
+
+        # 5. 音素判定（与 _identify_viseme_advanced 的判定顺序一致，NaN 比较为False与逐帧实现相同）
+        names = self.VISEME_ORDER
+        code = {name: index for index, name in enumerate(names)}
+        has_formants = (f1 > 0) & (f2 > 0)
+        low_vowel, mid_vowel, high_vowel = has_formants & (f1 > 700), has_formants & (f1 > 400) & (f1 <= 700), has_formants & (f1 <= 400)
+        visemes = np.select(
+            [silent, zcr > 0.3, flatness > 0.5, high_energy > 0.4,
+             (mid_energy > 0.6) & (rms < scale * 0.3), mid_energy > 0.6,
+             low_vowel & (f2 < 1400), low_vowel & (f2 > 1400),
+             mid_vowel & (f2 > 2000), mid_vowel,
+             high_vowel & (f2 > 2200), high_vowel,
+             centroid > 3000, centroid > 1500, centroid > 800],
+            [code['silence'], code['sibilant'], code['sibilant'], code['sibilant'],
+             code['m_n'], code['plosive'],
+             code['o'], code['a'],
+             code['e'], code['o'],
+             code['i'], code['u'],
+             code['i'], code['e'], code['a']],
+            default=code['o'],
+        ).astype(np.uint8)
+
+        # 6. 目标参数：能量调制；静音帧张嘴与嘴形归零，微笑保持上一个目标值
+        table = {key: np.array([self.VISEME_PARAMS[name][key] for name in names])
+                 for key in ('mouth_open', 'mouth_form', 'mouth_smile')}
+        energy_factor = np.clip(rms / scale, 0.3, 1.0)
+        target_open = np.where(silent, 0.0, table['mouth_open'][visemes] * energy_factor)
+        target_form = np.where(silent, 0.0, table['mouth_form'][visemes])
+        last_voiced = np.maximum.accumulate(np.where(silent, -1, np.arange(n_frames)))
+        target_smile = np.where(last_voiced >= 0, table['mouth_smile'][visemes[np.maximum(last_voiced, 0)]], 0.0)
+
+        # 7. 指数平滑（与实时路径的 alpha 相同）
+        return LipSyncTimeline(
+            fps=float(fps),
+            mouth_open=np.clip(self._exp_smooth(target_open, 0.6), 0.0, 1.0).astype(np.float32),
+            mouth_form=np.clip(self._exp_smooth(target_form, 0.5), -1.0, 1.0).astype(np.float32),
+            mouth_smile=target_smile.astype(np.float32),
+            visemes=visemes,
+            viseme_names=names,
+        )
+
+    def _rolling_volume_scale(self, rms: np.ndarray) -> np.ndarray:
+        """逐帧的自适应音量缩放系数（_update_volume_history 的向量化版本，从空历史开始）"""
+        history = self.max_history_size
+        padded = np.concatenate([np.full(history - 1, np.nan), rms])
+        windows = np.sort(np.lib.stride_tricks.sliding_window_view(padded, history), axis=1)  # NaN排在末尾
+        counts = np.minimum(np.arange(1, len(rms) + 1), history)
+        # 与 np.percentile 默认的线性插值相同
+        rank = 0.95 * (counts - 1)
+        lower = np.floor(rank).astype(np.int64)
+        upper = np.minimum(lower + 1, counts - 1)
+        rows = np.arange(len(rms))
+        percentile_95 = windows[rows, lower] + (windows[rows, upper] - windows[rows, lower]) * (rank - lower)
+        return np.where(counts >= 20, np.maximum(1000.0, percentile_95 * 1.2), self.DEFAULT_VOLUME_SCALE)
+
+    def _detect_formants_batch(self, frames: np.ndarray, sample_rate: int,
+                               voiced: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """批量共振峰检测（_detect_formants_lpc 的多帧版本），scipy不可用时全为0"""
+        f1 = np.zeros(len(frames))
+        f2 = np.zeros(len(frames))
+        size = frames.shape[1]
+        if not SCIPY_AVAILABLE or signal is None or size < 256 or not np.any(voiced):
+            return f1, f2
+        rows = np.flatnonzero(voiced)
+        emphasized = frames[rows].astype(np.float64)
+        emphasized[:, 1:] -= 0.97 * frames[rows, :-1]
+        spectrum = np.abs(rfft(emphasized * np.hamming(size), axis=1)[:, :size // 2])
+        freqs = fftfreq(size, 1 / sample_rate)[:size // 2]
+        smoothed = signal.savgol_filter(spectrum, 11, 3, axis=1)
+        for row, frame_spectrum in zip(rows, smoothed):
+            peaks, properties = signal.find_peaks(frame_spectrum, height=np.max(frame_spectrum) * 0.15, distance=10)
+            if len(peaks) >= 2:
+                top_peaks = np.sort(peaks[np.argsort(properties['peak_heights'])[::-1][:2]])
+                f1[row] = np.clip(freqs[top_peaks[0]], 200, 1000)
+                f2[row] = np.clip(freqs[top_peaks[1]], 800, 3000)
+        return f1, f2
+
+    @staticmethod
+    def _exp_smooth(target: np.ndarray, alpha: float) -> np.ndarray:
+        """y[k] = y[k-1] + alpha * (x[k] - y[k-1])，初值为第一个目标值"""
+        if len(target) == 0:
+            return target
+        if SCIPY_AVAILABLE and signal is not None:
+            smoothed, _ = signal.lfilter([alpha], [1.0, alpha - 1.0], target, zi=[(1.0 - alpha) * target[0]])
+            return smoothed
+        smoothed = np.empty_like(target)
+        value = target[0]
+        for k, x in enumerate(target):
+            value += (x - value) * alpha
+            smoothed[k] = value
+        return smoothed
+
+    def params_from_timeline(self, timeline: LipSyncTimeline, t: float) -> Dict[str, float]:
+        """
+        按时间戳从预计算的时间轴取Live2D参数（播放时调用，只做插值与情感调制）
+
+        返回值与 process_audio_chunk 相同
+        """
+        mouth_open, mouth_form, mouth_smile, viseme = timeline.sample(t)
+        emotion_modulation = self._get_emotion_modulation()
+        final_params = {
+            'mouth_open': np.clip(mouth_open, 0.0, 1.0),
+            'mouth_form': np.clip(mouth_form, -1.0, 1.0),
+            'mouth_smile': np.clip(mouth_smile + emotion_modulation['mouth_smile'], -1.0, 1.0),
+            'eye_brow_up': emotion_modulation['eye_brow_up'],
+            'eye_wide': emotion_modulation['eye_wide'],
+        }
+        self.state.mouth_open = final_params['mouth_open']
+        self.state.mouth_form = final_params['mouth_form']
+        self.state.mouth_smile = final_params['mouth_smile']
+        self.state.current_viseme = viseme
+        self.state.timestamp = time.time()
+        return final_params
+
     def _calculate_rms(self, audio: np.ndarray) -> float:
         """计算RMS能量"""
         return float(np.sqrt(np.mean(audio ** 2)))
@@ -339,51 +587,73 @@ class AdvancedLipSyncEngineV2:
     # - _track_viseme_changes(): 音素历史追踪，用于诊断，但从未被调用
     # - _add_natural_variation(): 添加自然抖动，已禁用，直接使用np.clip替代
 
+    def _get_frame_plan(self, n: int) -> Dict[str, Any]:
+        """
+        按帧长缓存的分析常量与工作缓冲区
+
+        包含汉明窗、正频率轴、加窗帧缓冲区与自相关的补零缓冲区；
+        每个音频块只做乘加与FFT，不再重复生成窗函数和频率轴
+        """
+        plan = self._frame_plans.get(n)
+        if plan is None:
+            if len(self._frame_plans) >= _MAX_CACHED_FRAME_SIZES:
+                self._frame_plans.pop(next(iter(self._frame_plans)))
+            plan = {
+                'window': np.hamming(n),
+                'freqs': fftfreq(n, 1 / self.sample_rate)[:n // 2],
+                'frame': np.zeros(n),
+                # 线性自相关需要 >= 2n-1 点的FFT（取2的幂），补零部分保持为0
+                'acf_frame': np.zeros(1 << (2 * n - 2).bit_length() if n > 0 else 1),
+            }
+            self._frame_plans[n] = plan
+        return plan
+
     def _analyze_spectrum_advanced(self, audio: np.ndarray) -> Dict[str, float]:
         """
         高级频谱分析（MEL频谱）
 
-        性能说明：此方法执行标准FFT用于频谱分析。
+        性能说明：窗函数、频率轴与MEL滤波器矩阵按帧长预先计算，
+        加窗结果写入复用的缓冲区，实数FFT只计算正频率部分。
         注意：共振峰检测需要单独的预加重FFT，目前无法合并。
-        未来优化方向：可考虑缓存FFT结果或使用更快的FFT实现。
 
         Returns:
             频谱特征字典
         """
         try:
-            n = len(audio)
-            if n < 512:
-                audio = np.pad(audio, (0, 512 - n), 'constant')
-                n = 512
-            
-            # 应用汉明窗
-            windowed = audio * np.hamming(len(audio))
-            
+            n = max(len(audio), 512)
+            plan = self._get_frame_plan(n)
+            windowed = plan['frame']
+
+            # 应用汉明窗（不足512点时补零）
+            if len(audio) < n:
+                windowed[len(audio):] = 0.0
+            np.multiply(audio, plan['window'][:len(audio)], out=windowed[:len(audio)])
+
             # FFT变换
-            spectrum = fft(windowed)
-            freqs = fftfreq(len(spectrum), 1/self.sample_rate)
-            magnitude = np.abs(spectrum[:n//2])
-            freqs = freqs[:n//2]
-            
+            magnitude = np.abs(rfft(windowed)[:n // 2])
+            freqs = plan['freqs']
+
             # MEL频率转换
             mel_bands = self._convert_to_mel_scale(freqs, magnitude)
             
             # 分频段能量
+            mel_total = np.sum(mel_bands)
             features = {
-                'low_energy': np.sum(mel_bands[:20]) / np.sum(mel_bands),  # 低频
-                'mid_energy': np.sum(mel_bands[20:50]) / np.sum(mel_bands),  # 中频
-                'high_energy': np.sum(mel_bands[50:]) / np.sum(mel_bands),  # 高频
+                'low_energy': np.sum(mel_bands[:20]) / mel_total,  # 低频
+                'mid_energy': np.sum(mel_bands[20:50]) / mel_total,  # 中频
+                'high_energy': np.sum(mel_bands[50:]) / mel_total,  # 高频
             }
             
             # 频谱质心
-            if np.sum(magnitude) > 0:
-                features['spectral_centroid'] = np.sum(freqs * magnitude) / np.sum(magnitude)
+            magnitude_sum = np.sum(magnitude)
+            if magnitude_sum > 0:
+                features['spectral_centroid'] = np.dot(freqs, magnitude) / magnitude_sum
             else:
                 features['spectral_centroid'] = 0
             
             # 频谱平坦度（识别清音）
             geometric_mean = np.exp(np.mean(np.log(magnitude + 1e-10)))
-            arithmetic_mean = np.mean(magnitude)
+            arithmetic_mean = magnitude_sum / len(magnitude)
             features['spectral_flatness'] = geometric_mean / (arithmetic_mean + 1e-10)
             
             return features
@@ -392,29 +662,34 @@ class AdvancedLipSyncEngineV2:
             logger.debug(f"频谱分析错误: {e}")
             return {'low_energy': 0, 'mid_energy': 0, 'high_energy': 0, 'spectral_centroid': 0, 'spectral_flatness': 0}
     
+    def _get_mel_filterbank(self, freqs: np.ndarray, n_mels: int, sample_rate: Optional[int] = None) -> np.ndarray:
+        """
+        MEL滤波器矩阵 (n_mels, len(freqs))，按 (采样率, 频点数, 频段数) 缓存
+
+        第 i 行在 [hz_points[i], hz_points[i+2]] 范围内为1，与逐频段求和的结果一致
+        """
+        key = (sample_rate or self.sample_rate, len(freqs), n_mels)
+        filterbank = self._mel_filterbanks.get(key)
+        if filterbank is None:
+            def hz_to_mel(hz):
+                return 2595 * np.log10(1 + hz / 700)
+
+            def mel_to_hz(mel):
+                return 700 * (10 ** (mel / 2595) - 1)
+
+            mel_points = np.linspace(hz_to_mel(80), hz_to_mel(8000), n_mels + 2)
+            hz_points = mel_to_hz(mel_points)
+            lower = hz_points[:n_mels, np.newaxis]
+            upper = hz_points[2:, np.newaxis]
+            filterbank = ((freqs >= lower) & (freqs <= upper)).astype(np.float64)
+            if len(self._mel_filterbanks) >= _MAX_CACHED_FRAME_SIZES:
+                self._mel_filterbanks.pop(next(iter(self._mel_filterbanks)))
+            self._mel_filterbanks[key] = filterbank
+        return filterbank
+
     def _convert_to_mel_scale(self, freqs: np.ndarray, magnitude: np.ndarray, n_mels: int = 80) -> np.ndarray:
-        """转换到MEL频率尺度"""
-        def hz_to_mel(hz):
-            return 2595 * np.log10(1 + hz / 700)
-        
-        def mel_to_hz(mel):
-            return 700 * (10 ** (mel / 2595) - 1)
-        
-        # 创建MEL滤波器组
-        mel_min = hz_to_mel(80)
-        mel_max = hz_to_mel(8000)
-        mel_points = np.linspace(mel_min, mel_max, n_mels + 2)
-        hz_points = mel_to_hz(mel_points)
-        
-        # 计算每个MEL频段的能量
-        mel_bands = np.zeros(n_mels)
-        for i in range(n_mels):
-            # 找到对应的频率范围
-            mask = (freqs >= hz_points[i]) & (freqs <= hz_points[i + 2])
-            if np.any(mask):
-                mel_bands[i] = np.sum(magnitude[mask])
-        
-        return mel_bands
+        """转换到MEL频率尺度（预计算的滤波器矩阵乘幅度谱）"""
+        return self._get_mel_filterbank(freqs, n_mels) @ magnitude
     
     def _detect_formants_lpc(self, audio: np.ndarray) -> Tuple[float, float]:
         """
@@ -431,17 +706,20 @@ class AdvancedLipSyncEngineV2:
             if len(audio) < 256:
                 return 0.0, 0.0
 
-            # 预加重
-            pre_emphasis = 0.97
-            emphasized = np.append(audio[0], audio[1:] - pre_emphasis * audio[:-1])
+            n = len(audio)
+            plan = self._get_frame_plan(n)
+            emphasized = plan['frame']
 
-            # FFT峰值检测法（简化但有效）
-            spectrum = np.abs(fft(emphasized * np.hamming(len(emphasized))))
-            freqs = fftfreq(len(spectrum), 1/self.sample_rate)
+            # 预加重（写入复用的缓冲区）
+            pre_emphasis = 0.97
+            emphasized[0] = audio[0]
+            np.multiply(audio[:-1], -pre_emphasis, out=emphasized[1:])
+            emphasized[1:] += audio[1:]
+            emphasized *= plan['window']
 
-            # 只看正频率
-            pos_freqs = freqs[:len(freqs)//2]
-            pos_spectrum = spectrum[:len(spectrum)//2]
+            # FFT峰值检测法（简化但有效），只看正频率
+            pos_spectrum = np.abs(rfft(emphasized)[:n // 2])
+            pos_freqs = plan['freqs']
 
             # 平滑频谱
             smoothed = signal.savgol_filter(pos_spectrum, 11, 3)
@@ -480,9 +758,14 @@ class AdvancedLipSyncEngineV2:
             基频F0
         """
         try:
-            # 自相关
-            correlation = np.correlate(audio, audio, mode='full')
-            correlation = correlation[len(correlation)//2:]
+            # 自相关（FFT法，O(n log n)）：|FFT|² 的逆变换即为各延迟的自相关
+            # 复用补零到2的幂长度的float64缓冲区（补零部分始终为0）
+            n = len(audio)
+            padded = self._get_frame_plan(n)['acf_frame']
+            padded[:n] = audio
+            spectrum = rfft(padded)
+            spectrum *= spectrum.conj()
+            correlation = irfft(spectrum, len(padded))[:n]
 
             # 归一化
             correlation = correlation / correlation[0] if correlation[0] > 0 else correlation
@@ -492,6 +775,8 @@ class AdvancedLipSyncEngineV2:
             max_period = int(self.sample_rate / 80)
 
             search_range = correlation[min_period:max_period]
+            # FFT的舍入误差（~1e-15）会让本应全为0的区间出现任意的最大值位置，按0处理
+            search_range = np.where(np.abs(search_range) < 1e-9, 0.0, search_range)
 
             if len(search_range) > 0:
                 # 如果scipy可用，使用find_peaks
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存PCM连续播放
+- decode_audio(): 直接从内存字节解码（WAV走标准库 wave，其它格式走 soundfile / pydub），不落临时文件
+- PCMStreamPlayer: 一个长期打开的 sounddevice 输出流，句子解码后的PCM按顺序排队，
+  输出回调在同一个数据块内从上一句末尾接到下一句开头，句间无缝
+- 播放与口型同步共用同一份样本：current_window() 返回正在播放位置附近样本的切片视图，不复制；
+  附带预计算口型时间轴的句子用 position() 取得 (tag, 已播放秒数)，按时间戳插值
+"""
+
+import io
+import logging
+import threading
+import time
+import wave
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("PCMStream")
+
+
+def decode_audio(data: bytes) -> Optional[Tuple[np.ndarray, int]]:
+    """从内存解码音频，返回 (int16 单声道样本, 采样率)；无法解码时返回None"""
+    if not data:
+        return None
+    try:
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+            with wave.open(io.BytesIO(data), "rb") as wf:
+                if wf.getsampwidth() == 2:
+                    channels = wf.getnchannels()
+                    samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+                    return _to_mono(samples.reshape(-1, channels) if channels > 1 else samples), wf.getframerate()
+    except (wave.Error, EOFError) as e:
+        logger.debug(f"wave解码失败，尝试其它解码器: {e}")
+
+    try:
+        import soundfile as sf
+
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="int16")
+        return _to_mono(samples), sample_rate
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.debug(f"soundfile解码失败: {e}")
+
+    try:
+        from pydub import AudioSegment
+
+        segment = AudioSegment.from_file(io.BytesIO(data)).set_sample_width(2)
+        samples = np.array(segment.get_array_of_samples(), dtype=np.int16)
+        if segment.channels > 1:
+            samples = samples.reshape(-1, segment.channels)
+        return _to_mono(samples), segment.frame_rate
+    except Exception as e:
+        logger.debug(f"pydub解码失败: {e}")
+    return None
+
+
+def _to_mono(samples: np.ndarray) -> np.ndarray:
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1).astype(np.int16)
+    return np.ascontiguousarray(samples)
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """线性插值重采样（TTS语音足够），采样率相同时原样返回"""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    n = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(n, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+
+class _Clip:
+    __slots__ = ("samples", "offset", "queued_frame", "start_frame", "on_start", "on_end", "tag")
+
+    def __init__(self, samples: np.ndarray, on_start: Optional[Callable], on_end: Optional[Callable], tag: Any = None):
+        self.samples = samples
+        self.offset = 0
+        self.queued_frame = 0
+        self.start_frame: Optional[int] = None
+        self.on_start = on_start
+        self.on_end = on_end
+        self.tag = tag
+
+
+class PCMStreamPlayer:
+    """单输出流、按顺序无缝播放的PCM播放器（线程安全）"""
+
+    def __init__(self, sample_rate: int = 44100, blocksize: int = 1024, max_queued: int = 2):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.max_queued = max_queued
+
+        self._clips: Deque[_Clip] = deque()
+        self._cond = threading.Condition()
+        self._frames = 0  # 输出流已消费的总帧数（播放时钟）
+        self._render_time = 0.0  # 最近一次输出回调的时刻，用于在数据块内插值播放位置
+        self._last_end_frame: Optional[int] = None
+        self._gaps: Deque[float] = deque(maxlen=256)
+        self._stream = None
+        self.epoch = 0  # 每次 clear() 加一，enqueue 据此丢弃打断前解码的句子
+        self.active = threading.Event()  # 有句子在播放或排队时置位
+        self.stats = {"clips": 0, "seconds": 0.0, "late_clips": 0, "cleared": 0}
+
+    # ---------- 输出流 ----------
+
+    def open(self) -> bool:
+        """打开 sounddevice 输出流；不可用时返回False，调用方回退到旧的播放方式"""
+        if self._stream is not None:
+            return True
+        try:
+            import sounddevice as sd
+
+            self._stream = sd.OutputStream(samplerate=self.sample_rate, channels=1, dtype="int16",
+                                           blocksize=self.blocksize, callback=self._callback)
+            self._stream.start()
+            logger.info(f"PCM输出流已打开: {self.sample_rate}Hz, 块大小 {self.blocksize}")
+            return True
+        except Exception as e:
+            logger.warning(f"无法打开PCM输出流: {e}")
+            self._stream = None
+            return False
+
+    def _callback(self, outdata, frames, time_info, status):
+        self.render_into(outdata[:, 0])
+
+    def render_into(self, out: np.ndarray):
+        """输出回调：按顺序把排队句子的样本写入 out，一句结束立即接下一句，没有样本时补静音"""
+        n = len(out)
+        pos = 0
+        started, finished = [], []
+        with self._cond:
+            while pos < n and self._clips:
+                clip = self._clips[0]
+                if clip.start_frame is None:
+                    clip.start_frame = self._frames + pos
+                    if self._last_end_frame is not None:
+                        # 播放器造成的句间空隙：从“上一句结束且本句已就绪”到本句开始
+                        ready = max(self._last_end_frame, clip.queued_frame)
+                        self._gaps.append((clip.start_frame - ready) / self.sample_rate)
+                        if clip.queued_frame > self._last_end_frame:
+                            self.stats["late_clips"] += 1  # 上一句播完时下一句还没就绪（含新一轮对话的首句）
+                    started.append(clip)
+                take = min(n - pos, len(clip.samples) - clip.offset)
+                out[pos:pos + take] = clip.samples[clip.offset:clip.offset + take]
+                clip.offset += take
+                pos += take
+                if clip.offset >= len(clip.samples):
+                    self._clips.popleft()
+                    self._last_end_frame = self._frames + pos
+                    self.stats["clips"] += 1
+                    self.stats["seconds"] += len(clip.samples) / self.sample_rate
+                    finished.append(clip)
+            if pos < n:
+                out[pos:] = 0
+            self._frames += n
+            self._render_time = time.perf_counter()
+            if finished:
+                if not self._clips:
+                    self.active.clear()
+                self._cond.notify_all()
+        for clip in started:
+            if clip.on_start:
+                clip.on_start()
+        for clip in finished:
+            if clip.on_end:
+                clip.on_end()
+
+    # ---------- 排队与控制 ----------
+
+    def enqueue(self, samples: np.ndarray, sample_rate: int, on_start: Optional[Callable] = None,
+                on_end: Optional[Callable] = None, timeout: Optional[float] = None,
+                epoch: Optional[int] = None, tag: Any = None) -> bool:
+        """
+        排入一句PCM（int16 单声道）；已排队句子达到 max_queued 时等待，超时返回False
+        传入 epoch 时，若等待期间（或之前）发生了 clear()，这句话被丢弃并返回False
+        tag 随句子保存，播放时由 position() 返回（如预计算的口型时间轴）
+        """
+        samples = resample(samples, sample_rate, self.sample_rate)
+        clip = _Clip(samples, on_start, on_end, tag)
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._clips) < self.max_queued, timeout):
+                return False
+            if epoch is not None and epoch != self.epoch:
+                return False
+            clip.queued_frame = self._frames
+            self._clips.append(clip)
+            self.active.set()
+        return True
+
+    def current_window(self, size: int) -> Optional[np.ndarray]:
+        """正在播放位置附近 size 个样本（切片视图，不复制），空闲时返回None"""
+        with self._cond:
+            if not self._clips or self._clips[0].start_frame is None:
+                return None
+            clip = self._clips[0]
+            start = max(0, clip.offset - size // 2)
+            return clip.samples[start:start + size]
+
+    def position(self) -> Optional[Tuple[Any, float]]:
+        """正在播放的句子的 (tag, 已播放秒数)，空闲时返回None；数据块内按距上次回调的时间插值"""
+        with self._cond:
+            if not self._clips or self._clips[0].start_frame is None:
+                return None
+            clip = self._clips[0]
+            # offset 已包含刚写入输出块的样本，这一块从上次回调开始播放
+            played = clip.offset - self.blocksize + (time.perf_counter() - self._render_time) * self.sample_rate
+            return clip.tag, max(0.0, min(played, clip.offset)) / self.sample_rate
+
+    def clear(self) -> int:
+        """丢弃所有排队和正在播放的句子（新一轮对话打断），返回丢弃数量"""
+        with self._cond:
+            dropped = len(self._clips)
+            self.epoch += 1
+            self._clips.clear()
+            self._last_end_frame = None
+            self.stats["cleared"] += dropped
+            self.active.clear()
+            self._cond.notify_all()
+        return dropped
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._clips, timeout)
+
+    @property
+    def busy(self) -> bool:
+        return self.active.is_set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            gaps = sorted(self._gaps)
+            return {
+                "sample_rate": self.sample_rate,
+                "queued": len(self._clips),
+                "stream_open": self._stream is not None,
+                "gap_p50_ms": round(gaps[len(gaps) // 2] * 1000, 1) if gaps else None,
+                "gap_max_ms": round(gaps[-1] * 1000, 1) if gaps else None,
+                **self.stats,
+            }
+
+    def close(self):
+        self.clear()
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+                self._stream.close()
+            except Exception as e:
+                logger.debug(f"关闭PCM输出流失败: {e}")
+            self._stream = None
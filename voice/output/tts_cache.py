@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TTS音频缓存（内容寻址）
+- 键为 (引擎, 音色参数, 语速, 归一化文本) 的 SHA-256，同一句话在同一配置下只合成一次
+- 两级缓存：内存热点层（LRU，按字节上限）+ 磁盘层（每条一个文件，按总字节上限LRU淘汰，重启后仍可命中）
+- 磁盘层以文件修改时间记录最近使用，启动时按修改时间重建LRU顺序
+- 可为已缓存的音频附带口型时间轴（<key>.lips），计入磁盘上限并随音频一起淘汰
+- 统计命中率与节省的合成字节数
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("TTSCache")
+
+_WHITESPACE = re.compile(r"\s+")
+_SUFFIX = ".audio"
+_TIMELINE_SUFFIX = ".lips"
+
+
+def normalize_text(text: str) -> str:
+    """归一化文本：去掉首尾空白、合并连续空白"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_cache_key(engine: str, voice: str, speed: float, text: str) -> str:
+    """(引擎, 音色, 语速, 归一化文本) -> 十六进制键"""
+    raw = "\x1f".join((engine, voice, f"{float(speed):g}", normalize_text(text)))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSAudioCache:
+    """内存热点层 + 磁盘LRU层的音频缓存（线程安全）"""
+
+    def __init__(self, cache_dir: str, max_disk_mb: float = 256, memory_mb: float = 16):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.memory_budget = int(memory_mb * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> 文件字节数（含口型时间轴），按最近使用排序
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        # key -> 口型时间轴文件字节数
+        self._timelines: Dict[str, int] = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0,
+                      "evictions": 0, "bytes_saved": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str, suffix: str = _SUFFIX) -> str:
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def _load_index(self):
+        entries = []
+        timelines = {}
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith((_SUFFIX, _TIMELINE_SUFFIX)):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            if name.endswith(_TIMELINE_SUFFIX):
+                timelines[name[: -len(_TIMELINE_SUFFIX)]] = st.st_size
+            else:
+                entries.append((st.st_mtime, name[: -len(_SUFFIX)], st.st_size))
+        for _, key, size in sorted(entries):
+            timeline_size = timelines.pop(key, None)
+            if timeline_size is not None:
+                self._timelines[key] = timeline_size
+                size += timeline_size
+            self._disk[key] = size
+            self._disk_bytes += size
+        for key in timelines:  # 对应音频已不存在的时间轴
+            self._remove_file(self._path(key, _TIMELINE_SUFFIX))
+        self._evict_disk()
+
+    # ---------- 读写 ----------
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                self.stats["bytes_saved"] += len(audio)
+                return audio
+            if key not in self._disk:
+                self.stats["misses"] += 1
+                return None
+            self._disk.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)  # 记录最近使用，重启后保持LRU顺序
+        except OSError:
+            with self._lock:
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+                if self._timelines.pop(key, None) is not None:
+                    self._remove_file(self._path(key, _TIMELINE_SUFFIX))
+                self.stats["misses"] += 1
+            return None
+
+        with self._lock:
+            self.stats["disk_hits"] += 1
+            self.stats["bytes_saved"] += len(audio)
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        if not audio or not self._write_atomic(self._path(key), audio):
+            return
+        with self._lock:
+            old = self._disk.pop(key, None)
+            if old is not None:
+                self._disk_bytes -= old
+            size = len(audio) + self._timelines.get(key, 0)
+            self._disk[key] = size
+            self._disk_bytes += size
+            self.stats["stores"] += 1
+            self._remember(key, audio)
+            self._evict_disk()
+
+    def get_timeline(self, key: str) -> Optional[bytes]:
+        """读取与音频一起缓存的口型时间轴，不存在时返回None（不计入命中率）"""
+        with self._lock:
+            if key not in self._timelines:
+                return None
+        try:
+            with open(self._path(key, _TIMELINE_SUFFIX), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_timeline(self, key: str, data: bytes):
+        """为已缓存的音频附带口型时间轴；音频不在缓存中（未写入或已淘汰）时忽略"""
+        with self._lock:
+            if key not in self._disk:
+                return
+        path = self._path(key, _TIMELINE_SUFFIX)
+        if not data or not self._write_atomic(path, data):
+            return
+        with self._lock:
+            if key not in self._disk:  # 写入期间音频被淘汰
+                self._remove_file(path)
+                return
+            delta = len(data) - self._timelines.get(key, 0)
+            self._timelines[key] = len(data)
+            self._disk[key] += delta
+            self._disk_bytes += delta
+            self._evict_disk()
+
+    def _write_atomic(self, path: str, data: bytes) -> bool:
+        """先写临时文件再替换，读者不会看到写了一半的文件"""
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            return True
+        except OSError as e:
+            logger.warning(f"写入TTS缓存失败: {e}")
+            self._remove_file(tmp)
+            return False
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remember(self, key: str, audio: bytes):
+        """放入内存热点层（调用方持有锁）；超过预算一半的大音频只留在磁盘"""
+        if len(audio) > self.memory_budget // 2:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        """按LRU删除磁盘文件直到总字节数不超过上限（调用方持有锁或在初始化中）"""
+        while self._disk_bytes > self.max_disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["evictions"] += 1
+            evicted = self._memory.pop(key, None)
+            if evicted is not None:
+                self._memory_bytes -= len(evicted)
+            self._remove_file(self._path(key))
+            if self._timelines.pop(key, None) is not None:
+                self._remove_file(self._path(key, _TIMELINE_SUFFIX))
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._disk):
+                self._remove_file(self._path(key))
+            for key in self._timelines:
+                self._remove_file(self._path(key, _TIMELINE_SUFFIX))
+            self._disk.clear()
+            self._timelines.clear()
+            self._memory.clear()
+            self._disk_bytes = self._memory_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                "entries": len(self._disk),
+                "disk_mb": round(self._disk_bytes / 1024 / 1024, 2),
+                "max_disk_mb": round(self.max_disk_bytes / 1024 / 1024, 2),
+                "timelines": len(self._timelines),
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / 1024 / 1024, 2),
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                **self.stats,
+            }
+
+
+_tts_cache: Optional[TTSAudioCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSAudioCache]:
+    """获取全局TTS音频缓存；配置关闭或目录不可用时返回None"""
+    global _tts_cache
+    from system.config import config
+
+    if not getattr(config.tts, "cache_enabled", True):
+        return None
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                try:
+                    _tts_cache = TTSAudioCache(
+                        getattr(config.tts, "cache_dir", "logs/tts_cache"),
+                        max_disk_mb=getattr(config.tts, "cache_max_disk_mb", 256),
+                        memory_mb=getattr(config.tts, "cache_memory_mb", 16),
+                    )
+                except OSError as e:
+                    logger.warning(f"TTS缓存初始化失败，禁用缓存: {e}")
+                    return None
+    return _tts_cache
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+有序TTS合成流水线
+- 固定大小的线程池并行合成句子，替代“每句一个线程”
+- 提交顺序即播放顺序：排序线程按提交顺序等待合成结果，再放入播放队列
+- 背压：已提交但尚未进入播放队列的句子最多 max_pending 个，播放队列本身也有上限，
+  合成不会跑到播放前面太远；超出时 submit() 阻塞
+- cancel()：新一轮对话打断时作废所有未播放的句子，尚未开始的合成直接取消
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from queue import Full, Queue
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger("TTSPipeline")
+
+
+def latency_percentile_ms(ordered: List[float], q: float) -> Optional[float]:
+    """已排序延迟（秒）的 q 分位数，换算为毫秒；无样本时返回 None"""
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000, 1)
+
+
+class _Pending:
+    __slots__ = ("generation", "text", "future", "submitted_at")
+
+    def __init__(self, generation: int, text: str, future: Future, submitted_at: float):
+        self.generation = generation
+        self.text = text
+        self.future = future
+        self.submitted_at = submitted_at
+
+
+class OrderedTTSPipeline:
+    """并行合成、按提交顺序输出的TTS流水线"""
+
+    def __init__(self, synthesize: Callable[[str], Optional[bytes]], output: Queue,
+                 workers: int = 2, max_pending: int = 4):
+        self.synthesize = synthesize
+        self.output = output
+        self.workers = workers
+        self.max_pending = max_pending
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-synth")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._order: Deque[_Pending] = deque()
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._latencies: Deque[float] = deque(maxlen=256)
+        self.stats = {"submitted": 0, "delivered": 0, "failed": 0, "cancelled": 0}
+
+        self._sequencer = threading.Thread(target=self._sequence_loop, name="tts-sequencer", daemon=True)
+        self._sequencer.start()
+
+    def submit(self, text: str, timeout: Optional[float] = None) -> bool:
+        """提交一句待合成文本；排队已满时阻塞，超时或等待期间被 cancel() 打断时返回False"""
+        generation = self._generation
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        with self._cond:
+            if generation != self._generation:
+                self._slots.release()
+                self.stats["cancelled"] += 1
+                return False
+            future = self._executor.submit(self._run, generation, text)
+            self._order.append(_Pending(generation, text, future, time.perf_counter()))
+            self.stats["submitted"] += 1
+            self._cond.notify()
+        return True
+
+    def cancel(self) -> int:
+        """作废所有尚未进入播放队列的句子，返回作废数量"""
+        with self._cond:
+            self._generation += 1
+            cancelled = 0
+            for item in self._order:
+                item.future.cancel()
+                cancelled += 1
+            self._cond.notify()
+        return cancelled
+
+    def _run(self, generation: int, text: str) -> Optional[bytes]:
+        if generation != self._generation:
+            return None  # 排队期间已被打断
+        return self.synthesize(text)
+
+    def _sequence_loop(self):
+        while True:
+            with self._cond:
+                while not self._order:
+                    self._cond.wait()
+                item = self._order[0]
+            try:
+                audio = self._await(item)
+                if audio is None:
+                    continue
+                self._deliver(item, audio)
+            except Exception as e:
+                logger.error(f"TTS流水线输出异常: {e}")
+            finally:
+                with self._cond:
+                    self._order.popleft()
+                self._slots.release()
+
+    def _deliver(self, item: _Pending, audio: bytes):
+        """放入播放队列；队列满时等待。检查轮次与入队在同一把锁内完成，
+        cancel() 返回后不会再有旧音频进入播放队列"""
+        with self._cond:
+            while item.generation == self._generation:
+                try:
+                    self.output.put_nowait(audio)
+                except Full:
+                    self._cond.wait(0.05)
+                    continue
+                self.stats["delivered"] += 1
+                self._latencies.append(time.perf_counter() - item.submitted_at)
+                return
+            self.stats["cancelled"] += 1
+
+    def _await(self, item: _Pending) -> Optional[bytes]:
+        """等待队首句子的合成结果；被打断时立即放弃，不等待仍在进行的合成"""
+        while not item.future.done():
+            if item.generation != self._generation:
+                self.stats["cancelled"] += 1
+                return None
+            wait([item.future], timeout=0.1)
+        if item.future.cancelled() or item.generation != self._generation:
+            self.stats["cancelled"] += 1
+            return None
+        try:
+            audio = item.future.result()
+        except Exception as e:
+            logger.error(f"TTS合成异常: {e}")
+            audio = None
+        if not audio:
+            self.stats["failed"] += 1
+            return None
+        return audio
+
+    def get_stats(self) -> Dict[str, Any]:
+        ordered: List[float] = sorted(self._latencies)
+        with self._cond:
+            pending = len(self._order)
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": pending,
+            "latency_p50_ms": latency_percentile_ms(ordered, 0.5),
+            "latency_p95_ms": latency_percentile_ms(ordered, 0.95),
+            **self.stats,
+        }
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
@@ -8,14 +8,13 @@
 import asyncio
 import logging
 import tempfile
-import os
 import threading
 import time
 import hashlib
 import re
 import io
 import base64
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from nagaagent_core.core import aiohttp
 import sys
 from pathlib import Path
@@ -24,6 +23,8 @@ from queue import Queue, Empty
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from system.config import config, AI_NAME
+from voice.output.tts_cache import get_tts_cache, make_cache_key
+from voice.output.pcm_stream import PCMStreamPlayer, decode_audio
 
 logger = logging.getLogger("VoiceIntegration")
 
@@ -31,6 +32,18 @@ logger = logging.getLogger("VoiceIntegration")
 SENTENCE_ENDINGS = ["。", "！", "？", "；", ".", "!", "?", ";"]
 
 
+class _SynthesizedAudio:
+    """合成结果：音频字节，以及在合成线程中解码好的样本与预计算的口型时间轴（播放时不再解码和分析）"""
+
+    __slots__ = ("audio_data", "samples", "sample_rate", "timeline")
+
+    def __init__(self, audio_data: bytes, samples, sample_rate: int, timeline=None):
+        self.audio_data = audio_data
+        self.samples = samples
+        self.sample_rate = sample_rate
+        self.timeline = timeline
+
+
 class VoiceIntegration:
     """语音集成模块 - 重构版本：依赖apiserver的流式TTS实现"""
 
@@ -53,8 +66,10 @@ class VoiceIntegration:
         self.min_sentence_length = 5  # 最小句子长度（硬编码默认值）
         self.max_concurrent_tasks = 3  # 最大并发任务数（硬编码默认值）
 
-        # 并发控制
-        self.tts_semaphore = threading.Semaphore(2)  # 限制TTS请求并发数为2
+        # 并发控制：合成线程池大小与TTS请求并发数一致
+        self.synthesis_workers = getattr(config.tts, "synthesis_workers", 2)
+        self.max_pending_sentences = getattr(config.tts, "max_pending_sentences", 4)
+        self.tts_semaphore = threading.Semaphore(self.synthesis_workers)
 
         # 音频文件存储目录
         self.audio_temp_dir = Path("logs/audio_temp")
@@ -64,7 +79,17 @@ class VoiceIntegration:
         self.text_buffer = ""  # 文本缓冲区
         self.is_processing = False  # 是否正在处理
         self.sentence_queue = Queue()  # 句子队列
-        self.audio_queue = Queue()  # 音频队列
+        self.audio_queue = Queue(maxsize=self.max_pending_sentences)  # 音频队列（有界，合成不会领先播放太多）
+
+        # 有序合成流水线（并行合成，按句子顺序送入音频队列）与连续播放输出流在首次播放时创建，
+        # 只构造实例不会占用音频设备或启动额外线程
+        self.tts_pipeline = None
+        self.pcm_player = None
+        self._playback_init_lock = threading.Lock()
+        self._pcm_player_checked = False
+
+        # 口型同步引擎在首次合成/播放时创建，合成线程与播放线程可能同时请求
+        self._lip_sync_engine_lock = threading.Lock()
 
         # 播放状态控制
         self.is_playing = False
@@ -126,6 +151,44 @@ class VoiceIntegration:
             logger.error(f"音频系统初始化失败: {e}")
             self.audio_available = False
 
+    def _ensure_pcm_player(self):
+        """
+        首次播放时打开内存PCM连续播放输出流：解码后的样本排入常开的输出流，句间无缝；
+        不可用时回退到pygame逐句播放（只尝试一次）
+        """
+        if self._pcm_player_checked:
+            return self.pcm_player
+        with self._playback_init_lock:
+            if self._pcm_player_checked:
+                return self.pcm_player
+            if getattr(config.tts, "gapless_playback", True):
+                player = PCMStreamPlayer(sample_rate=getattr(config.tts, "playback_sample_rate", 44100))
+                if player.open():
+                    self.pcm_player = player
+                    self.audio_available = True
+                    # 连续播放模式下，口型同步独立跟随输出流的播放位置
+                    self.lip_sync_thread = threading.Thread(target=self._pcm_lip_sync_worker, daemon=True)
+                    self.lip_sync_thread.start()
+                    # pygame不可用时播放线程在初始化时已退出，输出流可用后重新启动
+                    if not self.audio_thread.is_alive():
+                        self.audio_thread = threading.Thread(target=self._audio_player_worker, daemon=True)
+                        self.audio_thread.start()
+            self._pcm_player_checked = True
+        return self.pcm_player
+
+    def _ensure_tts_pipeline(self):
+        """首次合成时创建有序合成流水线（合成阶段按输出流采样率预计算口型，先打开输出流）"""
+        self._ensure_pcm_player()
+        if self.tts_pipeline is None:
+            with self._playback_init_lock:
+                if self.tts_pipeline is None:
+                    from voice.output.tts_pipeline import OrderedTTSPipeline
+                    self.tts_pipeline = OrderedTTSPipeline(
+                        self._synthesize_for_playback, self.audio_queue,
+                        workers=self.synthesis_workers, max_pending=self.max_pending_sentences,
+                    )
+        return self.tts_pipeline
+
     def receive_final_text(self, final_text: str):
         """接收最终完整文本 - 流式处理（保持原始逻辑）"""
         if not config.system.voice_enabled:
@@ -214,7 +277,7 @@ class VoiceIntegration:
         # 线程会自动从队列中获取句子进行处理
 
     def reset_processing_state(self):
-        """重置处理状态，为新的对话做准备（保持原始逻辑）"""
+        """重置处理状态，为新的对话做准备：丢弃上一轮尚未播放的句子与音频"""
         # 清空队列
         while not self.sentence_queue.empty():
             try:
@@ -222,19 +285,27 @@ class VoiceIntegration:
             except Empty:
                 break
 
+        # 作废流水线中正在排队/合成的句子（必须在清空音频队列之前，避免旧音频再被放入）
+        if self.tts_pipeline is not None:
+            self.tts_pipeline.cancel()
+
         while not self.audio_queue.empty():
             try:
                 self.audio_queue.get_nowait()
             except Empty:
                 break
 
+        # 停止正在播放的句子，丢弃输出流中排队的PCM
+        if self.pcm_player is not None:
+            self.pcm_player.clear()
+
         # 重置状态（不重置is_processing，因为线程是持续运行的）
         self.text_buffer = ""
 
         logger.debug("语音处理状态已重置")
 
     def _audio_processing_worker(self):
-        """音频处理工作线程 - 持续运行（保持原始逻辑）"""
+        """音频处理工作线程 - 持续运行：按顺序把句子提交给合成流水线（流水线满时在此等待）"""
         logger.info("音频处理工作线程启动")
 
         try:
@@ -246,13 +317,9 @@ class VoiceIntegration:
                     # 设置处理状态
                     self.is_processing = True
 
-                    # 生成音频
-                    audio_data = self._generate_audio_sync(sentence)
-                    if audio_data:
-                        self.audio_queue.put(audio_data)
-                        logger.debug(f"音频生成完成: {sentence[:30]}...")
-                    else:
-                        logger.warning(f"音频生成失败: {sentence[:30]}...")
+                    # 提交并行合成，结果由流水线按顺序放入音频队列
+                    self._ensure_tts_pipeline().submit(sentence)
+                    logger.debug(f"句子已提交合成: {sentence[:30]}...")
 
                 except Empty:
                     # 队列为空，检查是否还有待处理的文本
@@ -273,12 +340,11 @@ class VoiceIntegration:
             logger.info("音频处理工作线程结束")
 
     def _generate_audio_sync(self, text: str) -> Optional[bytes]:
-        """同步生成音频数据 - 支持多引擎TTS"""
-        # 使用信号量控制并发
-        if not self.tts_semaphore.acquire(timeout=10):  # 10秒超时
-            logger.warning("TTS请求超时，跳过音频生成")
-            return None
+        """同步生成音频数据 - 支持多引擎TTS；命中音频缓存时不占用合成并发"""
+        return self._synthesize(text)[0]
 
+    def _synthesize(self, text: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """合成一句，返回 (音频数据, 音频缓存键)；缓存关闭时缓存键为None"""
         try:
             # 文本预处理
             if not getattr(config.tts, "remove_filter", False):
@@ -287,30 +353,110 @@ class VoiceIntegration:
                 text = prepare_tts_input_with_context(text)
 
             if not text.strip():
-                return None
+                return None, None
 
             # 根据配置选择TTS引擎
             engine = getattr(config.tts, "default_engine", "edge_tts")
 
+            cache = get_tts_cache()
+            cache_key = None
+            if cache is not None:
+                voice, speed = self._tts_voice_identity(engine)
+                cache_key = make_cache_key(engine, voice, speed, text)
+                audio_data = cache.get(cache_key)
+                if audio_data is not None:
+                    logger.debug(f"TTS缓存命中: {len(audio_data)} bytes")
+                    return audio_data, cache_key
+        except Exception as e:
+            logger.error(f"TTS文本预处理异常: {e}")
+            return None, None
+
+        # 使用信号量控制并发
+        if not self.tts_semaphore.acquire(timeout=10):  # 10秒超时
+            logger.warning("TTS请求超时，跳过音频生成")
+            return None, None
+
+        try:
             if engine == "gpt_sovits":
-                return self._generate_gpt_sovits(text)
+                audio_data = self._generate_gpt_sovits(text)
             elif engine == "genie_tts":
-                return self._generate_genie_tts(text)
+                audio_data = self._generate_genie_tts(text)
             elif engine == "vits":
-                return self._generate_vits(text)
+                audio_data = self._generate_vits(text)
             else:  # edge_tts 或其他默认
-                return self._generate_edge_tts(text)
+                audio_data = self._generate_edge_tts(text)
+
+            if audio_data and cache_key is not None:
+                cache.put(cache_key, audio_data)
+            return audio_data, cache_key
 
         except Exception as e:
             logger.error(f"生成音频数据异常: {e}")
             import traceback
 
             traceback.print_exc()
-            return None
+            return None, None
         finally:
             # 释放信号量
             self.tts_semaphore.release()
 
+    def _synthesize_for_playback(self, text: str):
+        """
+        合成流水线使用的合成函数：合成后在合成线程中解码，并一次性计算整句的口型时间轴，
+        播放时口型同步只按时间戳插值；时间轴随音频一起缓存，缓存命中时直接读取
+        """
+        audio_data, cache_key = self._synthesize(text)
+        if not audio_data or not getattr(config.tts, "lip_sync_timeline", True):
+            return audio_data
+        try:
+            return self._prepare_playback(audio_data, cache_key)
+        except Exception as e:
+            logger.debug(f"预计算口型时间轴失败，播放时实时分析: {e}")
+            return audio_data
+
+    def _prepare_playback(self, audio_data: bytes, cache_key: Optional[str]):
+        decoded = decode_audio(audio_data)
+        if decoded is None:
+            return audio_data
+        samples, sample_rate = decoded
+        engine = self._ensure_lip_sync_engine(self.pcm_player.sample_rate if self.pcm_player is not None else sample_rate)
+        if engine is None:
+            return _SynthesizedAudio(audio_data, samples, sample_rate)
+
+        from voice.input.voice_realtime.core.advanced_lip_sync_v2 import LipSyncTimeline
+
+        cache = get_tts_cache() if cache_key is not None else None
+        cached = cache.get_timeline(cache_key) if cache is not None else None
+        timeline = LipSyncTimeline.from_bytes(cached) if cached else None
+        if timeline is None:
+            timeline = engine.compute_timeline(samples, sample_rate)
+            if cache is not None:
+                cache.put_timeline(cache_key, timeline.to_bytes())
+        return _SynthesizedAudio(audio_data, samples, sample_rate, timeline)
+
+    def _tts_voice_identity(self, engine: str):
+        """当前引擎下决定合成结果的音色参数与语速，作为音频缓存键的一部分"""
+        tts = config.tts
+        if engine == "gpt_sovits":
+            voice = "|".join(str(getattr(tts, name, "")) for name in (
+                "gpt_sovits_ref_audio_path", "gpt_sovits_ref_text", "gpt_sovits_ref_free",
+                "gpt_sovits_top_k", "gpt_sovits_top_p", "gpt_sovits_temperature",
+                "gpt_sovits_filter_brackets", "gpt_sovits_filter_special_chars",
+            ))
+            return voice, getattr(tts, "gpt_sovits_speed", 1.0)
+        if engine == "genie_tts":
+            voice = "|".join(str(getattr(tts, name, "")) for name in (
+                "genie_tts_ref_audio_path", "genie_tts_ref_text", "genie_tts_top_k",
+                "genie_tts_top_p", "genie_tts_temperature",
+            ))
+            return voice, getattr(tts, "genie_tts_speed", 1.0)
+        if engine == "vits":
+            voice = "|".join(str(getattr(tts, name, "")) for name in (
+                "vits_voice_id", "vits_noise_scale", "vits_noise_scale_w",
+            ))
+            return voice, getattr(tts, "vits_length_scale", 1.0)
+        return f"{tts.default_voice}|{tts.default_format}", tts.default_speed
+
     def _convert_time_to_chinese(self, text: str) -> str:
         """将时间格式转换为中文语音格式
 
@@ -637,7 +783,7 @@ class VoiceIntegration:
 
                     if audio_data:
                         # 播放音频数据
-                        self._play_audio_data_sync(audio_data)
+                        self._play_audio_data(audio_data)
 
                 except Empty:
                     # 队列为空，继续等待
@@ -652,8 +798,78 @@ class VoiceIntegration:
         finally:
             logger.info("音频播放工作线程结束")
 
-    def _play_audio_data_sync(self, audio_data: bytes):
-        """同步播放音频数据 - 使用pygame.mixer（无需ffmpeg）"""
+    def _play_audio_data(self, audio_data):
+        """
+        播放一段音频：优先内存解码后排入连续输出流，无法解码或输出流不可用时逐句播放
+        合成流水线送来的 _SynthesizedAudio 已解码并带有口型时间轴，直接使用
+        """
+        decoded, timeline = None, None
+        if isinstance(audio_data, _SynthesizedAudio):
+            decoded, timeline = (audio_data.samples, audio_data.sample_rate), audio_data.timeline
+            audio_data = audio_data.audio_data
+        if self._ensure_pcm_player() is not None:
+            epoch = self.pcm_player.epoch
+            if decoded is None:
+                decoded = decode_audio(audio_data)
+            if decoded is not None:
+                samples, sample_rate = decoded
+                self._ensure_lip_sync_engine(self.pcm_player.sample_rate)
+                # 输出流中已排队的句子达到上限时在此等待（背压）；期间被打断则丢弃
+                self.pcm_player.enqueue(samples, sample_rate, epoch=epoch, tag=timeline)
+                return
+            logger.debug("内存解码失败，回退到pygame播放")
+        if getattr(self, "_pygame", None) is not None:
+            self._play_audio_data_sync(audio_data, decoded, timeline)
+
+    def _ensure_lip_sync_engine(self, sample_rate: int):
+        """首次使用时创建口型同步引擎并返回（可选功能，失败后不再重试，返回None）"""
+        with self._lip_sync_engine_lock:
+            if hasattr(self, "_advanced_lip_sync_v2"):
+                return self._advanced_lip_sync_v2
+            try:
+                from voice.input.voice_realtime.core.advanced_lip_sync_v2 import AdvancedLipSyncEngineV2
+
+                self._advanced_lip_sync_v2 = AdvancedLipSyncEngineV2(sample_rate=sample_rate, target_fps=60)
+                logger.info("✅ TTS播放已启用商业级口型同步引擎V2.0")
+            except ImportError as e:
+                logger.error(f"商业级引擎导入失败: {e} - 口型同步功能将不可用")
+                self._advanced_lip_sync_v2 = None
+            except Exception as e:
+                logger.error(f"商业级引擎初始化失败: {e}")
+                self._advanced_lip_sync_v2 = None
+            return self._advanced_lip_sync_v2
+
+    def _pcm_lip_sync_worker(self):
+        """
+        连续播放模式的口型同步（60FPS）：句子带有预计算的口型时间轴时按播放位置插值，
+        否则读取输出流当前播放位置附近的样本实时分析（与播放共用同一数组，不复制）
+        """
+        player = self.pcm_player
+        chunk_size = int(player.sample_rate / 60)
+        while True:
+            try:
+                player.active.wait()
+                self.is_playing = True
+                self._start_live2d_lip_sync()
+                while player.busy:
+                    engine = getattr(self, "_advanced_lip_sync_v2", None)
+                    position = player.position() if engine else None
+                    if position is not None and position[0] is not None:
+                        timeline, seconds = position
+                        self._apply_live2d_params(engine.params_from_timeline(timeline, seconds))
+                    elif position is not None:
+                        window = player.current_window(chunk_size)
+                        if window is not None and len(window):
+                            self._update_live2d_with_advanced_engine(window)
+                    time.sleep(1.0 / 60)
+                self.is_playing = False
+                self._stop_live2d_lip_sync()
+            except Exception as e:
+                logger.error(f"口型同步线程错误: {e}")
+                time.sleep(0.1)
+
+    def _play_audio_data_sync(self, audio_data: bytes, decoded: Optional[Tuple[Any, int]] = None, timeline=None):
+        """同步播放音频数据 - 使用pygame.mixer（无需ffmpeg）；decoded/timeline 为合成阶段已解码的样本与口型时间轴"""
         if not self.audio_available:
             logger.warning("音频系统不可用，无法播放音频")
             return
@@ -668,10 +884,7 @@ class VoiceIntegration:
                 self._pygame.mixer.music.stop()
                 time.sleep(0.1)
 
-            # 创建临时文件用于播放（pygame.mixer需要文件路径）
-            import tempfile
-
-            # 根据当前TTS引擎确定音频格式
+            # 根据当前TTS引擎确定音频格式（作为pygame的格式提示）
             engine = getattr(config.tts, "default_engine", "edge_tts")
             if engine == "gpt_sovits":
                 audio_format = "wav"  # GPT-SoVITS返回WAV格式
@@ -679,65 +892,20 @@ class VoiceIntegration:
                 audio_format = "wav"  # VITS通常返回WAV格式
             else:
                 audio_format = config.tts.default_format or "mp3"  # Edge-TTS使用配置的格式
-            temp_file = tempfile.mktemp(suffix=f".{audio_format}")
-
-            # 写入音频数据
-            with open(temp_file, "wb") as f:
-                f.write(audio_data)
 
             # ====== 商业级Live2D口型同步引擎 V2.0 ======
             # 🔧 关键修改：先启动口型同步，让引擎立即开始初始化
             self._start_live2d_lip_sync()
 
-            # 如果需要口型同步，先加载音频数据进行分析（让引擎准备就绪）
+            # 从内存解码音频用于口型同步（可选功能），不再写临时文件
             audio_array = None
             sample_rate = 44100
-
-            # 尝试加载音频用于口型同步（可选功能）
-            if hasattr(self, "_advanced_lip_sync_v2") or True:  # 尝试初始化
-                try:
-                    # 使用soundfile或wave读取音频数据用于分析
-                    try:
-                        import soundfile as sf
-
-                        audio_array, sample_rate = sf.read(temp_file)
-                        # 转换为单声道
-                        if len(audio_array.shape) > 1:
-                            audio_array = audio_array.mean(axis=1)
-                        # 转换为int16格式
-                        import numpy as np
-
-                        audio_array = (audio_array * 32767).astype(np.int16)
-                        logger.debug(f"使用soundfile加载音频: {len(audio_array)} 样本, {sample_rate}Hz")
-                    except ImportError:
-                        # soundfile不可用，尝试使用wave（仅支持WAV格式）
-                        if audio_format == "wav":
-                            import wave
-                            import numpy as np
-
-                            with wave.open(temp_file, "rb") as wf:
-                                sample_rate = wf.getframerate()
-                                frames = wf.readframes(wf.getnframes())
-                                audio_array = np.frombuffer(frames, dtype=np.int16)
-                            logger.debug(f"使用wave加载音频: {len(audio_array)} 样本, {sample_rate}Hz")
-
-                    # 初始化口型同步引擎
-                    if not hasattr(self, "_advanced_lip_sync_v2") and audio_array is not None:
-                        try:
-                            from voice.input.voice_realtime.core.advanced_lip_sync_v2 import AdvancedLipSyncEngineV2
-
-                            self._advanced_lip_sync_v2 = AdvancedLipSyncEngineV2(sample_rate=sample_rate, target_fps=60)
-                            logger.info("✅ TTS播放已启用商业级口型同步引擎V2.0")
-                        except ImportError as e:
-                            logger.error(f"商业级引擎导入失败: {e} - 口型同步功能将不可用")
-                            self._advanced_lip_sync_v2 = None
-                        except Exception as e:
-                            logger.error(f"商业级引擎初始化失败: {e}")
-                            self._advanced_lip_sync_v2 = None
-
-                except Exception as e:
-                    logger.debug(f"加载音频数据用于口型同步失败: {e}")
-                    audio_array = None
+            if decoded is None and timeline is None:
+                decoded = decode_audio(audio_data)
+            if decoded is not None:
+                audio_array, sample_rate = decoded
+                logger.debug(f"内存解码音频: {len(audio_array)} 样本, {sample_rate}Hz")
+                self._ensure_lip_sync_engine(sample_rate)
 
             # 🔧 首次播放延迟：在口型引擎准备好后，延迟音频播放
             if self.first_playback and self.first_playback_delay_ms > 0:
@@ -754,15 +922,15 @@ class VoiceIntegration:
             # 加载并播放音频
             load_start_time = time.time()
 
-            # 尝试使用pygame的sound.music.load()加载MP3
+            # pygame可直接从内存文件对象加载（需提供格式提示）
             try:
-                self._pygame.mixer.music.load(temp_file)
+                self._pygame.mixer.music.load(io.BytesIO(audio_data), audio_format)
                 self._pygame.mixer.music.play()
             except Exception as load_error:
                 logger.error(f"pygame.mixer.music.load()失败: {load_error}")
                 logger.info("尝试使用pygame.mixer.Sound()替代...")
                 try:
-                    sound = self._pygame.mixer.Sound(temp_file)
+                    sound = self._pygame.mixer.Sound(file=io.BytesIO(audio_data))
                     sound.play()
                 except Exception as sound_error:
                     logger.error(f"pygame.mixer.Sound()也失败: {sound_error}")
@@ -780,7 +948,19 @@ class VoiceIntegration:
             start_time = time.time()
             lip_sync_count = 0  # 口型同步更新次数
 
-            if audio_array is not None and self._advanced_lip_sync_v2:
+            if timeline is not None and getattr(self, "_advanced_lip_sync_v2", None):
+                # 有预计算的口型时间轴，按播放时间插值
+                while self._pygame.mixer.music.get_busy():
+                    elapsed_time = time.time() - start_time
+                    self._apply_live2d_params(self._advanced_lip_sync_v2.params_from_timeline(timeline, elapsed_time))
+                    time.sleep(1.0 / 60)
+
+                    # 防止无限等待（5分钟超时）
+                    if elapsed_time > 300:
+                        logger.warning("音频播放超时，强制停止")
+                        self._pygame.mixer.music.stop()
+                        break
+            elif audio_array is not None and getattr(self, "_advanced_lip_sync_v2", None):
                 # 有音频数据，执行口型同步
                 chunk_size = int(sample_rate / 60)  # 60FPS
                 audio_pos = 0
@@ -796,10 +976,10 @@ class VoiceIntegration:
                     if target_pos < len(audio_array):
                         chunk_start = max(0, target_pos - chunk_size // 2)
                         chunk_end = min(len(audio_array), target_pos + chunk_size // 2)
-                        audio_chunk = audio_array[chunk_start:chunk_end].tobytes()
+                        audio_chunk = audio_array[chunk_start:chunk_end]  # 切片视图，不复制
 
                         # 使用商业级引擎处理音频
-                        if audio_chunk:
+                        if len(audio_chunk):
                             try:
                                 # 🔧 首次播放计时：记录前5次口型同步耗时
                                 if is_first_play and self.enable_timing_debug and lip_sync_count < 5:
@@ -839,30 +1019,13 @@ class VoiceIntegration:
             self._stop_live2d_lip_sync()
             logger.debug("音频播放完成")
 
-            # 🔧 关键：先卸载音频以释放文件句柄
+            # 卸载音频，释放内存文件对象
             try:
                 self._pygame.mixer.music.unload()
                 logger.debug("已卸载pygame音频")
             except Exception as e:
                 logger.debug(f"卸载pygame音频失败: {e}")
 
-            # 清理临时文件（带重试机制）
-            try:
-                # 等待pygame完全释放文件
-                for attempt in range(20):  # 最多尝试20次（增加到20次）
-                    try:
-                        if os.path.exists(temp_file):
-                            os.unlink(temp_file)
-                            logger.debug(f"成功删除临时文件: {temp_file}")
-                            break
-                    except PermissionError as e:
-                        if attempt < 19:
-                            time.sleep(1.0)  # 等待1秒后重试（增加到1秒）
-                        else:
-                            logger.debug(f"清理临时文件失败: {e}")
-            except Exception as e:
-                logger.debug(f"清理临时文件失败: {e}")
-
         except Exception as e:
             logger.error(f"播放音频数据失败: {e}")
             import traceback
@@ -933,11 +1096,15 @@ class VoiceIntegration:
             "is_processing": self.is_processing,
             "is_playing": self.is_playing,
             "audio_available": self.audio_available,  # 替换原pygame_available
+            "tts_pipeline": self.tts_pipeline.get_stats() if self.tts_pipeline is not None else None,
+            "tts_cache": get_tts_cache().get_stats() if get_tts_cache() is not None else None,
+            "pcm_player": self.pcm_player.get_stats() if self.pcm_player is not None else None,
             "temp_files": len(list(self.audio_temp_dir.glob(f"*.{config.tts.default_format}"))),
         }
 
     def _play_audio_from_url(self, audio_url: str):
         """从URL播放音频 - 使用pygame.mixer（异步执行，不阻塞）"""
+        self._ensure_pcm_player()
         if not self.audio_available:
             logger.warning("音频系统不可用，无法播放音频URL")
             return
@@ -947,51 +1114,26 @@ class VoiceIntegration:
         threading.Thread(target=self._play_audio_from_url_async, args=(audio_url,), daemon=True).start()
 
     def _play_audio_from_url_async(self, audio_url: str):
-        """异步执行音频播放逻辑"""
+        """异步执行音频播放逻辑：下载或读取到内存后播放，不写临时文件"""
         try:
             import requests
-            import tempfile
             import os
 
             # 判断是URL还是本地文件
             if audio_url.startswith("http://") or audio_url.startswith("https://"):
-                # 下载音频文件
+                # 下载音频到内存
                 logger.info(f"下载音频文件: {audio_url}")
                 resp = requests.get(audio_url)
-                temp_file = tempfile.mktemp(suffix=f".{config.tts.default_format or 'mp3'}")
-                with open(temp_file, "wb") as f:
-                    f.write(resp.content)
-                audio_file = temp_file
+                audio_data = resp.content
             else:
                 # 本地文件路径
-                audio_file = audio_url
-
-            # 检查文件是否存在
-            if not os.path.exists(audio_file):
-                logger.error(f"音频文件不存在: {audio_file}")
-                return
-
-            # 读取音频文件并播放
-            with open(audio_file, "rb") as f:
-                audio_data = f.read()
-            self._play_audio_data_sync(audio_data)
+                if not os.path.exists(audio_url):
+                    logger.error(f"音频文件不存在: {audio_url}")
+                    return
+                with open(audio_url, "rb") as f:
+                    audio_data = f.read()
 
-            # 清理临时文件（带重试机制）
-            if audio_file != audio_url:
-                try:
-                    for attempt in range(20):  # 最多尝试20次（增加到20次）
-                        try:
-                            if os.path.exists(audio_file):
-                                os.unlink(audio_file)
-                                logger.debug(f"成功删除临时文件: {audio_file}")
-                                break
-                        except PermissionError as e:
-                            if attempt < 19:
-                                time.sleep(1.0)  # 等待1秒后重试（增加到1秒）
-                            else:
-                                logger.debug(f"清理临时文件失败: {e}")
-                except Exception as e:
-                    logger.debug(f"清理临时文件失败: {e}")
+            self._play_audio_data(audio_data)
 
         except Exception as e:
             logger.error(f"播放音频URL失败: {e}")
@@ -1036,7 +1178,17 @@ class VoiceIntegration:
                 return
 
             # 使用商业级引擎处理音频
-            lip_sync_params = self._advanced_lip_sync_v2.process_audio_chunk(audio_chunk)
+            self._apply_live2d_params(self._advanced_lip_sync_v2.process_audio_chunk(audio_chunk), live2d_widget)
+
+        except Exception as e:
+            logger.debug(f"商业级引擎更新Live2D失败: {e}")
+
+    def _apply_live2d_params(self, lip_sync_params: Dict[str, float], live2d_widget=None):
+        """把口型参数应用到Live2D（完整5参数控制）"""
+        try:
+            live2d_widget = live2d_widget or self._get_live2d_widget()
+            if not live2d_widget:
+                return
 
             # 应用全部5个参数
             if "mouth_open" in lip_sync_params: